@@ -2,12 +2,21 @@
 
 from __future__ import annotations
 
+import argparse
 import csv
 import sys
 import traceback
 from datetime import datetime
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from nhl_output import path_date, write_rows_csv
+from nhl_parallel import add_dates_argument, for_dates
+from nhl_profile import run_main
+from nhl_schema import GAMES
+from nhl_validate import Rules, Violation, report, validate_rows
+
 
 SPORTBOOK_DIR = Path("docs/win/hockey/nhl/00_intake/sportsbook")
 GAMES_DIR = Path("docs/win/hockey/nhl/00_intake/games")
@@ -16,25 +25,14 @@ LOG_PATH = Path("docs/win/hockey/nhl/errors/00_intake/build_games.txt")
 INPUT_SUFFIX = ".csv"
 OUTPUT_SUFFIX = "_nhl_games.csv"
 
-REQUIRED_COLUMNS = [
-    "game_id",
-    "sport",
-    "league",
-    "game_date",
-    "game_time",
-    "home_team",
-    "away_team",
-]
-
-OUTPUT_COLUMNS = [
-    "game_id",
-    "sport",
-    "league",
-    "game_date",
-    "game_time",
-    "home_team",
-    "away_team",
-]
+REQUIRED_COLUMNS = list(GAMES)
+OUTPUT_COLUMNS = list(GAMES)
+
+# Checked over the rows of every sportsbook file at once, per file.
+SPORTSBOOK_RULES = Rules(
+    not_null=tuple(OUTPUT_COLUMNS),
+    single_value=("game_date",),
+)
 
 
 def now_stamp() -> str:
@@ -86,83 +84,87 @@ def extract_date_from_input_name(path: Path) -> str:
     return date_value
 
 
-def read_sportsbook_file(path: Path, log_lines: list[str]) -> tuple[str, list[dict[str, str]]]:
-    file_date = extract_date_from_input_name(path)
-
+def read_sportsbook_file(path: Path) -> tuple[list[str] | None, list[dict[str, str]]]:
     with path.open("r", newline="", encoding="utf-8-sig") as infile:
         reader = csv.DictReader(infile)
+        return reader.fieldnames, list(reader)
 
-        if reader.fieldnames is None:
-            fail(log_lines, f"{path} has no header row.")
 
-        missing_columns = [col for col in REQUIRED_COLUMNS if col not in reader.fieldnames]
-        if missing_columns:
-            fail(
-                log_lines,
-                f"{path} missing required columns: {', '.join(missing_columns)}",
-            )
+def check_sportsbook_files(paths: list[Path]) -> tuple[list[tuple[Path, str, list[dict[str, str]]]], list[Violation]]:
+    """(path, game_date, game rows) per sportsbook file, and every violation.
 
-        rows: list[dict[str, str]] = []
-        game_dates_seen: set[str] = set()
+    Header, required-column and row-count problems are found per file; the game
+    rows of every file are then checked against SPORTSBOOK_RULES in one pass.
+    """
+    slates = []
+    violations = []
+    tagged = []
 
-        for row_number, row in enumerate(reader, start=2):
-            output_row = {col: (row.get(col) or "").strip() for col in OUTPUT_COLUMNS}
+    for path in paths:
+        fieldnames, file_rows = read_sportsbook_file(path)
 
-            missing_values = [col for col in OUTPUT_COLUMNS if output_row[col] == ""]
-            if missing_values:
-                fail(
-                    log_lines,
-                    f"{path} row {row_number} missing values for: {', '.join(missing_values)}",
-                )
+        if fieldnames is None:
+            violations.append(Violation(str(path), "header", (), "no header row"))
+            continue
 
-            game_dates_seen.add(output_row["game_date"])
-            rows.append(output_row)
+        missing = [col for col in REQUIRED_COLUMNS if col not in fieldnames]
+        if missing:
+            violations.append(Violation(str(path), "required", tuple(missing), "missing columns"))
+            continue
 
-    if not rows:
-        fail(log_lines, f"{path} contains no game rows.")
+        if not file_rows:
+            violations.append(Violation(str(path), "rows", (), "contains no game rows"))
+            continue
 
-    if len(game_dates_seen) != 1:
-        fail(
-            log_lines,
-            f"{path} contains multiple game_date values: {', '.join(sorted(game_dates_seen))}",
-        )
+        games = [{col: (row.get(col) or "").strip() for col in OUTPUT_COLUMNS} for row in file_rows]
+        dates = {game["game_date"] for game in games}
+        file_date = extract_date_from_input_name(path)
 
-    game_date = next(iter(game_dates_seen))
+        if len(dates) == 1 and file_date not in dates:
+            detail = f"filename date {file_date} does not match game_date column {next(iter(dates))}"
+            violations.append(Violation(str(path), "file_date", ("game_date",), detail))
 
-    if game_date != file_date:
-        fail(
-            log_lines,
-            f"{path} filename date {file_date} does not match game_date column {game_date}.",
+        slates.append((path, file_date, games))
+        tagged.extend(
+            game | {"_source_file": str(path), "_row": row_number}
+            for row_number, game in enumerate(games, start=2)
         )
 
-    return game_date, rows
+    violations.extend(validate_rows(tagged, SPORTSBOOK_RULES, SPORTBOOK_DIR, by="_source_file", row="_row"))
 
+    return slates, violations
 
-def write_games_file(game_date: str, rows: list[dict[str, str]]) -> Path:
-    GAMES_DIR.mkdir(parents=True, exist_ok=True)
 
+def write_games_file(game_date: str, rows: list[dict[str, str]]) -> tuple[Path, bool]:
     output_path = GAMES_DIR / f"{game_date}{OUTPUT_SUFFIX}"
+    changed = write_rows_csv(output_path, OUTPUT_COLUMNS, rows)
 
-    with output_path.open("w", newline="", encoding="utf-8") as outfile:
-        writer = csv.DictWriter(outfile, fieldnames=OUTPUT_COLUMNS)
-        writer.writeheader()
-        writer.writerows(rows)
+    return output_path, changed
 
-    return output_path
 
-
-def remove_stale_games_files(valid_dates: set[str], log_lines: list[str]) -> None:
+def remove_stale_games_files(valid_dates: set[str], log_lines: list[str], dates=None) -> None:
     GAMES_DIR.mkdir(parents=True, exist_ok=True)
 
     for path in sorted(GAMES_DIR.glob(f"*{OUTPUT_SUFFIX}")):
         output_date = path.name[: -len(OUTPUT_SUFFIX)]
 
+        if dates is not None and path_date(path) not in dates:
+            continue
+
         if output_date not in valid_dates:
             path.unlink()
             log_lines.append(f"Removed stale games file: {path}")
 
 
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Build NHL games files from sportsbook files.")
+    add_dates_argument(parser)
+    return parser.parse_args()
+
+
 def main() -> None:
+    args = parse_args()
+
     log_lines = [
         "NHL build_games.py summary",
         f"Started: {now_stamp()}",
@@ -183,27 +185,34 @@ def main() -> None:
     if not sportsbook_files:
         fail(log_lines, f"No sportsbook files found in {SPORTBOOK_DIR}")
 
+    if args.dates:
+        sportsbook_files = for_dates(sportsbook_files, args.dates)
+        log_lines.append(f"Dates: {', '.join(sorted(args.dates))}")
+
     valid_dates: set[str] = set()
     written_files: list[Path] = []
     total_rows = 0
 
-    for sportsbook_path in sportsbook_files:
-        log_lines.append(f"Processing sportsbook file: {sportsbook_path}")
+    slates, violations = check_sportsbook_files(sportsbook_files)
+
+    if violations:
+        fail(log_lines, report(violations))
 
-        game_date, rows = read_sportsbook_file(sportsbook_path, log_lines)
+    for sportsbook_path, game_date, rows in slates:
+        log_lines.append(f"Processing sportsbook file: {sportsbook_path}")
 
         valid_dates.add(game_date)
         total_rows += len(rows)
 
-        output_path = write_games_file(game_date, rows)
+        output_path, changed = write_games_file(game_date, rows)
         written_files.append(output_path)
 
         log_lines.append(f"Date: {game_date}")
         log_lines.append(f"Rows written: {len(rows)}")
-        log_lines.append(f"Output file: {output_path}")
+        log_lines.append(f"Output file: {output_path}{'' if changed else ' (unchanged)'}")
         log_lines.append("")
 
-    remove_stale_games_files(valid_dates, log_lines)
+    remove_stale_games_files(valid_dates, log_lines, args.dates)
 
     log_lines.extend(
         [
@@ -221,7 +230,7 @@ def main() -> None:
 
 if __name__ == "__main__":
     try:
-        main()
+        run_main(main, LOG_PATH)
     except SystemExit:
         raise
     except Exception as exc:
@@ -1,13 +1,17 @@
 # docs/win/hockey/nhl/scripts/00_intake/hockey_drat_scraper.py
 
-import json
+import argparse
+import sys
 import traceback
 from pathlib import Path
 from datetime import datetime
 
-import pandas as pd
 import pytz
-from playwright.sync_api import sync_playwright
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from nhl_json import json_files, read_json, write_json
+from nhl_profile import run_main
 
 
 URLS = {
@@ -17,12 +21,18 @@ URLS = {
 UTC = pytz.utc
 ET = pytz.timezone("America/New_York")
 
+RAW_DIR = Path("docs/win/hockey/nhl/00_intake/drat_raw")
+RAW_ROWS_DIR = RAW_DIR / "rows"
+
 ERROR_DIR = Path("docs/win/hockey/nhl/errors/00_intake")
-ERROR_DIR.mkdir(parents=True, exist_ok=True)
 LOG_FILE = ERROR_DIR / "hockey_drat_scraper.txt"
 
-with open(LOG_FILE, "w", encoding="utf-8") as f:
-    f.write(f"=== hockey_drat_scraper RUN {datetime.now(ET).isoformat()} ===\n")
+
+def reset_log() -> None:
+    ERROR_DIR.mkdir(parents=True, exist_ok=True)
+
+    with open(LOG_FILE, "w", encoding="utf-8") as f:
+        f.write(f"=== hockey_drat_scraper RUN {datetime.now(ET).isoformat()} ===\n")
 
 
 def log(msg: str) -> None:
@@ -126,6 +136,35 @@ def parse_nhl(row):
     return None
 
 
+def parse_rows(raw):
+    """(games, parse_errors) for the scraped table rows."""
+    games = []
+    parse_errors = 0
+
+    for r in raw:
+        result = parse_nhl(r)
+        if result:
+            games.append(result)
+        elif is_game_row(r):
+            parse_errors += 1
+
+    return games, parse_errors
+
+
+def reparse_saved_rows():
+    """Rebuild every drat_raw/*_nhl_raw.json from its saved rows dump, plain or compressed."""
+    rows_files = json_files(RAW_ROWS_DIR, "*_nhl_raw_rows.json")
+    log(f"--reparse: {len(rows_files)} rows file(s) in {RAW_ROWS_DIR}")
+
+    for rows_path in rows_files:
+        games, parse_errors = parse_rows(read_json(rows_path))
+        date = rows_path.name.split("_nhl_raw_rows.json")[0]
+        raw_path = write_json(RAW_DIR / f"{date}_nhl_raw.json", games)
+        log(f"  {rows_path} -> {raw_path} | games={len(games)} parse_errors={parse_errors}")
+
+    log("STATUS: SUCCESS")
+
+
 def scrape_page(page, url):
     page.goto(url)
     page.wait_for_selector("table")
@@ -133,18 +172,35 @@ def scrape_page(page, url):
     return [[c.inner_text().strip() for c in r.query_selector_all("td")] for r in rows]
 
 
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Scrape dratings NHL predictions.")
+    parser.add_argument(
+        "--reparse",
+        action="store_true",
+        help="Re-parse the saved drat_raw/rows dumps into drat_raw/*_nhl_raw.json instead of scraping.",
+    )
+    return parser.parse_args()
+
+
 def main():
+    args = parse_args()
+    reset_log()
+
+    if args.reparse:
+        reparse_saved_rows()
+        return
+
+    # Heavy imports stay out of module scope so importing the parsers is cheap.
+    import pandas as pd
+    from playwright.sync_api import sync_playwright
+
     files_written = []
     parse_errors = 0
 
     try:
         date = datetime.now(ET).strftime("%Y_%m_%d")
 
-        raw_rows_dir = Path("docs/win/hockey/nhl/00_intake/drat_raw/rows")
-        raw_rows_dir.mkdir(parents=True, exist_ok=True)
-
-        raw_dir = Path("docs/win/hockey/nhl/00_intake/drat_raw")
-        raw_dir.mkdir(parents=True, exist_ok=True)
+        RAW_ROWS_DIR.mkdir(parents=True, exist_ok=True)
 
         scraper_dir = Path("docs/win/hockey/nhl/00_intake/predictions/scraper")
         scraper_dir.mkdir(parents=True, exist_ok=True)
@@ -165,9 +221,7 @@ def main():
 
             raw = scrape_page(page, URLS["nhl"])
 
-            raw_rows_path = raw_rows_dir / f"{date}_nhl_raw_rows.json"
-            with open(raw_rows_path, "w", encoding="utf-8") as f:
-                json.dump(raw, f, indent=2)
+            raw_rows_path = write_json(RAW_ROWS_DIR / f"{date}_nhl_raw_rows.json", raw)
             files_written.append((str(raw_rows_path), len(raw)))
 
             col_counts = {}
@@ -176,17 +230,9 @@ def main():
                 col_counts[n] = col_counts.get(n, 0) + 1
             log(f"Column count distribution: {col_counts}")
 
-            games = []
-            for r in raw:
-                result = parse_nhl(r)
-                if result:
-                    games.append(result)
-                elif is_game_row(r):
-                    parse_errors += 1
-
-            raw_path = raw_dir / f"{date}_nhl_raw.json"
-            with open(raw_path, "w", encoding="utf-8") as f:
-                json.dump(games, f, indent=2)
+            games, parse_errors = parse_rows(raw)
+
+            raw_path = write_json(RAW_DIR / f"{date}_nhl_raw.json", games)
             files_written.append((str(raw_path), len(games)))
 
             upcoming = [g for g in games if g["game_status"] == "upcoming"]
@@ -226,4 +272,4 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
+    run_main(main, LOG_FILE)
@@ -1,14 +1,19 @@
 #!/usr/bin/env python3
 # docs/win/hockey/scripts/00_parsing/nhl_odds_pull.py
 
-import json
 import os
+import sys
 from datetime import datetime, timedelta
 from pathlib import Path
 from zoneinfo import ZoneInfo
 
 import requests
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from nhl_json import write_json
+from nhl_profile import run_main
+
 API_KEY_ENV = "API_ODDS"
 BASE_URL = "https://api.odds-api.io/v3"
 
@@ -19,7 +24,9 @@ BOOKMAKER = "FanDuel"
 ET = ZoneInfo("America/New_York")
 
 JSON_OUT_DIR = Path("docs/win/hockey/nhl/odds")
-JSON_OUT_DIR.mkdir(parents=True, exist_ok=True)
+
+# No log of its own; --profile output lands with the other intake logs.
+PROFILE_LOG = Path("docs/win/hockey/nhl/errors/00_intake/nhl_odds_pull.txt")
 
 
 def get_api_key() -> str:
@@ -133,6 +140,8 @@ def fetch_odds_multi(api_key: str, event_ids: list[str]) -> list[dict]:
 
 
 def main() -> None:
+    JSON_OUT_DIR.mkdir(parents=True, exist_ok=True)
+
     api_key = get_api_key()
 
     run_date = datetime.now(ET).strftime("%Y_%m_%d")
@@ -161,11 +170,10 @@ def main() -> None:
         "odds": odds,
     }
 
-    with open(json_out_path, "w", encoding="utf-8") as f:
-        json.dump(output, f, indent=2)
+    json_out_path = write_json(json_out_path, output)
 
     print(f"WROTE {json_out_path}")
 
 
 if __name__ == "__main__":
-    main()
+    run_main(main, PROFILE_LOG)
@@ -2,23 +2,30 @@
 # docs/win/hockey/nhl/scripts/00_intake/pred_name_normalization.py
 
 import csv
+import sys
 import traceback
 from pathlib import Path
 from datetime import datetime
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from nhl_profile import run_main
+
 
 PREDICTIONS_DIR = Path("docs/win/hockey/nhl/00_intake/predictions")
 MAP_FILE = Path("docs/win/hockey/nhl/config/mapping/team_map_nhl.csv")
 NO_MAP_FILE = Path("docs/win/hockey/nhl/config/mapping/no_map_nhl_pred.csv")
 
 ERROR_DIR = Path("docs/win/hockey/nhl/errors/00_intake")
-ERROR_DIR.mkdir(parents=True, exist_ok=True)
 LOG_FILE = ERROR_DIR / "pred_name_normalization.txt"
 
-NO_MAP_FILE.parent.mkdir(parents=True, exist_ok=True)
 
-with open(LOG_FILE, "w", encoding="utf-8") as f:
-    f.write(f"=== pred_name_normalization RUN {datetime.utcnow().isoformat()} ===\n")
+def reset_log() -> None:
+    ERROR_DIR.mkdir(parents=True, exist_ok=True)
+    NO_MAP_FILE.parent.mkdir(parents=True, exist_ok=True)
+
+    with open(LOG_FILE, "w", encoding="utf-8") as f:
+        f.write(f"=== pred_name_normalization RUN {datetime.utcnow().isoformat()} ===\n")
 
 
 def log(msg: str) -> None:
@@ -26,94 +33,117 @@ def log(msg: str) -> None:
         f.write(f"{datetime.utcnow().isoformat()} | {msg}\n")
 
 
-team_map = {}
+def load_team_map() -> dict:
+    team_map = {}
+
+    if MAP_FILE.exists():
+        with open(MAP_FILE, newline="", encoding="utf-8-sig") as f:
+            reader = csv.DictReader(f)
+
+            for row in reader:
+                league = row.get("league", "").strip().lower()
+                alias = row.get("alias", "").strip()
+                canonical = row.get("canonical_team", "").strip()
+
+                if league == "nhl" and alias and canonical:
+                    team_map[alias.lower()] = canonical
+
+        log(f"Team map loaded: {len(team_map)} entries")
+    else:
+        log(f"WARNING: team_map_nhl.csv not found: {MAP_FILE}")
 
-if MAP_FILE.exists():
-    with open(MAP_FILE, newline="", encoding="utf-8-sig") as f:
+    return team_map
+
+
+def normalize_file(csv_file: Path, team_map: dict, unmapped: set) -> tuple[int, int]:
+    rows_processed = 0
+    names_normalized = 0
+    updated_rows = []
+    modified = False
+
+    with open(csv_file, newline="", encoding="utf-8-sig") as f:
         reader = csv.DictReader(f)
+        fieldnames = reader.fieldnames or []
 
         for row in reader:
-            league = row.get("league", "").strip().lower()
-            alias = row.get("alias", "").strip()
-            canonical = row.get("canonical_team", "").strip()
+            rows_processed += 1
 
-            if league == "nhl" and alias and canonical:
-                team_map[alias.lower()] = canonical
+            for col in ["home_team", "away_team"]:
+                team = row.get(col, "").strip()
 
-    log(f"Team map loaded: {len(team_map)} entries")
-else:
-    log(f"WARNING: team_map_nhl.csv not found: {MAP_FILE}")
+                if not team:
+                    continue
 
+                canonical = team_map.get(team.lower())
 
-target_files = sorted(PREDICTIONS_DIR.glob("hockey_*.csv"))
-log(f"Files to process: {len(target_files)}")
+                if canonical:
+                    if row.get(col) != canonical:
+                        row[col] = canonical
+                        modified = True
+                        names_normalized += 1
+                else:
+                    unmapped.add(team)
 
-unmapped = set()
-files_processed = 0
-rows_processed = 0
-names_normalized = 0
+            updated_rows.append(row)
 
-try:
-    for csv_file in target_files:
-        try:
-            files_processed += 1
-            updated_rows = []
-            modified = False
+    if modified and fieldnames:
+        with open(csv_file, "w", newline="", encoding="utf-8-sig") as f:
+            writer = csv.DictWriter(f, fieldnames=fieldnames)
+            writer.writeheader()
+            writer.writerows(updated_rows)
 
-            with open(csv_file, newline="", encoding="utf-8-sig") as f:
-                reader = csv.DictReader(f)
-                fieldnames = reader.fieldnames or []
+        log(f"UPDATED: {csv_file}")
 
-                for row in reader:
-                    rows_processed += 1
+    return rows_processed, names_normalized
 
-                    for col in ["home_team", "away_team"]:
-                        team = row.get(col, "").strip()
 
-                        if not team:
-                            continue
+def main() -> None:
+    reset_log()
 
-                        canonical = team_map.get(team.lower())
+    team_map = load_team_map()
 
-                        if canonical:
-                            if row.get(col) != canonical:
-                                row[col] = canonical
-                                modified = True
-                                names_normalized += 1
-                        else:
-                            unmapped.add(team)
+    target_files = sorted(PREDICTIONS_DIR.glob("hockey_*.csv"))
+    log(f"Files to process: {len(target_files)}")
+
+    unmapped = set()
+    files_processed = 0
+    rows_processed = 0
+    names_normalized = 0
+
+    try:
+        for csv_file in target_files:
+            files_processed += 1
 
-                    updated_rows.append(row)
+            try:
+                rows, normalized = normalize_file(csv_file, team_map, unmapped)
+                rows_processed += rows
+                names_normalized += normalized
 
-            if modified and fieldnames:
-                with open(csv_file, "w", newline="", encoding="utf-8-sig") as f:
-                    writer = csv.DictWriter(f, fieldnames=fieldnames)
-                    writer.writeheader()
-                    writer.writerows(updated_rows)
+            except Exception as e:
+                log(f"ERROR processing {csv_file}: {e}\n{traceback.format_exc()}")
 
-                log(f"UPDATED: {csv_file}")
+        with open(NO_MAP_FILE, "w", newline="", encoding="utf-8-sig") as f:
+            writer = csv.writer(f)
+            writer.writerow(["league", "team"])
 
-        except Exception as e:
-            log(f"ERROR processing {csv_file}: {e}\n{traceback.format_exc()}")
+            for team in sorted(unmapped):
+                writer.writerow(["nhl", team])
 
-    with open(NO_MAP_FILE, "w", newline="", encoding="utf-8-sig") as f:
-        writer = csv.writer(f)
-        writer.writerow(["league", "team"])
+        log("--- SUMMARY ---")
+        log(f"Files processed: {files_processed}")
+        log(f"Rows processed: {rows_processed}")
+        log(f"Names normalized: {names_normalized}")
+        log(f"Unmapped teams: {len(unmapped)}")
+        log(f"No-map output: {NO_MAP_FILE}")
+        log("STATUS: SUCCESS")
 
-        for team in sorted(unmapped):
-            writer.writerow(["nhl", team])
+    except Exception as e:
+        log(f"FATAL ERROR: {e}\n{traceback.format_exc()}")
+        log("STATUS: FAILED")
+        raise
 
-    log("--- SUMMARY ---")
-    log(f"Files processed: {files_processed}")
-    log(f"Rows processed: {rows_processed}")
-    log(f"Names normalized: {names_normalized}")
-    log(f"Unmapped teams: {len(unmapped)}")
-    log(f"No-map output: {NO_MAP_FILE}")
-    log("STATUS: SUCCESS")
+    print("NHL prediction name normalization complete.")
 
-except Exception as e:
-    log(f"FATAL ERROR: {e}\n{traceback.format_exc()}")
-    log("STATUS: FAILED")
-    raise
 
-print("NHL prediction name normalization complete.")
+if __name__ == "__main__":
+    run_main(main, LOG_FILE)
@@ -29,8 +29,16 @@ from typing import Any
 from zoneinfo import ZoneInfo
 
 import pandas as pd
-import polars as pl
-import sportsdataverse.nhl as nhl
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from nhl_json import plain_path, variants, write_json
+from nhl_profile import run_main
+
+# polars and sportsdataverse are bound by load_sdv_modules() from main(); they
+# take seconds to import and are not needed to import this module or for --help.
+pl = None
+nhl = None
 
 
 ROOT = Path("docs/win/hockey/nhl/sdv")
@@ -45,6 +53,9 @@ CATEGORIES = (
 )
 NY = ZoneInfo("America/New_York")
 
+# No log of its own; --profile output lands with the intake logs.
+PROFILE_LOG = Path("docs/win/hockey/nhl/errors/00_intake/pull_sdv.txt")
+
 
 def parse_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser()
@@ -99,6 +110,16 @@ def run_stamp() -> str:
     return datetime.now(NY).strftime("%Y_%m_%dT%H%M%S_ET")
 
 
+def load_sdv_modules() -> None:
+    global pl, nhl
+
+    import polars
+    import sportsdataverse.nhl
+
+    pl = polars
+    nhl = sportsdataverse.nhl
+
+
 def ensure_dirs() -> None:
     ROOT.mkdir(parents=True, exist_ok=True)
     for name in CATEGORIES:
@@ -135,11 +156,9 @@ def csv_safe_frame(obj: Any) -> pd.DataFrame:
     return df
 
 
-def _write_json(path: Path, obj: Any) -> None:
-    path.write_text(
-        json.dumps(obj, indent=2, default=str, ensure_ascii=False),
-        encoding="utf-8",
-    )
+def _write_json(path: Path, obj: Any, raw: bool = False) -> Path:
+    """Raw dumps follow $NHL_JSON_COMPRESS; parsed objects stay plain JSON."""
+    return write_json(path, obj, codec="env" if raw else None, default=str, ensure_ascii=False)
 
 
 def _write_csv(path: Path, obj: Any) -> None:
@@ -192,13 +211,16 @@ def save_object(
             written.append(latest)
         return written
 
-    snap = out_dir / f"{prefix}_{label}.json"
-    _write_json(snap, obj)
+    snap = _write_json(out_dir / f"{prefix}_{label}.json", obj, raw=label.endswith("_raw"))
     written.append(snap)
 
     if current:
-        latest = out_dir / f"latest_{label}.json"
+        codec_suffix = snap.name[len(plain_path(snap).name):]  # "", ".gz" or ".zst"
+        latest = out_dir / f"latest_{label}.json{codec_suffix}"
         shutil.copyfile(snap, latest)
+        for other in variants(latest):
+            if other != latest:
+                other.unlink(missing_ok=True)
         written.append(latest)
 
     return written
@@ -1519,8 +1541,9 @@ def run_one(
 
 
 def main() -> None:
-    ensure_dirs()
     args = parse_args()
+    load_sdv_modules()
+    ensure_dirs()
     categories = requested_categories(args)
     seasons = requested_seasons(args)
 
@@ -1568,7 +1591,7 @@ def main() -> None:
 
 if __name__ == "__main__":
     try:
-        main()
+        run_main(main, PROFILE_LOG)
     except Exception:
         traceback.print_exc()
         sys.exit(1)
\ No newline at end of file
@@ -1,10 +1,17 @@
 import re
+import sys
 import traceback
 from pathlib import Path
 from datetime import datetime
 
 import pandas as pd
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from nhl_output import write_csv
+from nhl_profile import run_main
+from nhl_schema import PREDICTIONS
+
 
 BASE_DIR = Path("docs/win/hockey/nhl")
 
@@ -16,27 +23,16 @@ MAP_PATH = BASE_DIR / "config" / "mapping" / "team_map_nhl.csv"
 NO_MAP_PATH = BASE_DIR / "config" / "mapping" / "no_map_nhl_pred.csv"
 
 ERROR_DIR = BASE_DIR / "errors" / "00_intake"
-ERROR_DIR.mkdir(parents=True, exist_ok=True)
 LOG_FILE = ERROR_DIR / "transform_hockey.txt"
 
-OUTPUT_COLUMNS = [
-    "sport",
-    "league",
-    "game_id",
-    "game_date",
-    "game_time",
-    "home_team",
-    "away_team",
-    "home_prob_moneyline",
-    "away_prob_moneyline",
-    "away_projected_goals",
-    "home_projected_goals",
-    "total_projected_goals",
-]
+OUTPUT_COLUMNS = list(PREDICTIONS)
+
 
+def reset_log() -> None:
+    ERROR_DIR.mkdir(parents=True, exist_ok=True)
 
-with open(LOG_FILE, "w", encoding="utf-8") as f:
-    f.write(f"=== transform_hockey RUN {datetime.now().isoformat()} ===\n")
+    with open(LOG_FILE, "w", encoding="utf-8") as f:
+        f.write(f"=== transform_hockey RUN {datetime.now().isoformat()} ===\n")
 
 
 def log(msg: str) -> None:
@@ -261,19 +257,22 @@ def write_no_map_file(no_map_records: list) -> None:
     NO_MAP_PATH.parent.mkdir(parents=True, exist_ok=True)
 
     if not no_map_records:
-        pd.DataFrame(
-            columns=[
-                "source_file",
-                "raw_team",
-                "stripped_team",
-                "normalized_attempt",
-            ]
-        ).to_csv(NO_MAP_PATH, index=False)
+        write_csv(
+            pd.DataFrame(
+                columns=[
+                    "source_file",
+                    "raw_team",
+                    "stripped_team",
+                    "normalized_attempt",
+                ]
+            ),
+            NO_MAP_PATH,
+        )
         log(f"WROTE no-map file with 0 rows: {NO_MAP_PATH}")
         return
 
     no_map_df = pd.DataFrame(no_map_records).drop_duplicates()
-    no_map_df.to_csv(NO_MAP_PATH, index=False)
+    write_csv(no_map_df, NO_MAP_PATH)
     log(f"WROTE no-map file: {NO_MAP_PATH} ({len(no_map_df)} rows)")
 
 
@@ -371,13 +370,15 @@ def transform_prediction_file(
 
         OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
         output_path = OUTPUT_DIR / f"hockey_{date_val}.csv"
-        output.to_csv(output_path, index=False)
+        changed = write_csv(output, output_path)
 
         files_written.append((str(output_path), len(output)))
-        log(f"WROTE prediction output: {output_path} ({len(output)} rows)")
+        log(f"{'WROTE' if changed else 'UNCHANGED'} prediction output: {output_path} ({len(output)} rows)")
 
 
 def main():
+    reset_log()
+
     files_written = []
 
     try:
@@ -422,4 +423,4 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
+    run_main(main, LOG_FILE)
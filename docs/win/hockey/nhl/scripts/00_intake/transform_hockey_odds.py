@@ -3,12 +3,19 @@
 
 import csv
 import json
+import sys
 import traceback
 from collections import defaultdict
 from datetime import datetime
 from pathlib import Path
 from zoneinfo import ZoneInfo
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from nhl_json import json_files, read_json
+from nhl_output import write_rows_csv, write_text
+from nhl_profile import run_main
+
 BOOKMAKER = "FanDuel"
 ET = ZoneInfo("America/New_York")
 
@@ -20,8 +27,9 @@ SPORTSBOOK_DIR = Path("docs/win/hockey/nhl/00_intake/sportsbook")
 ERROR_DIR = Path("docs/win/hockey/nhl/errors/00_intake")
 LOG_FILE = ERROR_DIR / "transform_hockey_odds.txt"
 
-SPORTSBOOK_DIR.mkdir(parents=True, exist_ok=True)
-ERROR_DIR.mkdir(parents=True, exist_ok=True)
+# game_ids whose sportsbook row was added or changed by the latest run, per
+# game_date; read by pipeline/nhl_intraday.py to re-price only those games.
+CHANGES_FILE = Path("docs/win/hockey/nhl/00_intake/changed_games.json")
 
 FIELDS = [
     "game_id",
@@ -50,6 +58,9 @@ FIELDS = [
 
 
 def reset_log() -> None:
+    SPORTSBOOK_DIR.mkdir(parents=True, exist_ok=True)
+    ERROR_DIR.mkdir(parents=True, exist_ok=True)
+
     with open(LOG_FILE, "w", encoding="utf-8") as f:
         f.write(f"=== transform_hockey_odds RUN {datetime.now(ET).isoformat()} ===\n")
 
@@ -356,15 +367,18 @@ def row_changed(existing: dict, new: dict) -> bool:
     return False
 
 
-def write_csv(path: Path, rows_by_game_id: dict[str, dict]) -> None:
-    rows = list(rows_by_game_id.values())
+def write_csv(path: Path, rows_by_game_id: dict[str, dict]) -> bool:
+    rows = [{field: row.get(field, "") for field in FIELDS} for row in rows_by_game_id.values()]
+    return write_rows_csv(path, FIELDS, rows, encoding="utf-8-sig")
 
-    with open(path, "w", newline="", encoding="utf-8-sig") as f:
-        writer = csv.DictWriter(f, fieldnames=FIELDS)
-        writer.writeheader()
 
-        for row in rows:
-            writer.writerow({field: row.get(field, "") for field in FIELDS})
+def write_changes(changes: dict[str, dict[str, list[str]]]) -> bool:
+    dates = {
+        game_date: {kind: sorted(ids) for kind, ids in sorted(kinds.items()) if ids}
+        for game_date, kinds in sorted(changes.items())
+    }
+    dates = {game_date: kinds for game_date, kinds in dates.items() if kinds}
+    return write_text(CHANGES_FILE, json.dumps({"dates": dates}, indent=2) + "\n")
 
 
 def main() -> None:
@@ -388,19 +402,19 @@ def main() -> None:
     }
 
     try:
-        json_files = sorted(ODDS_DIR.glob("*.json"))
+        odds_files = json_files(ODDS_DIR, "*.json")
         log(f"Odds input directory: {ODDS_DIR}")
-        log(f"JSON files found: {len(json_files)}")
+        log(f"JSON files found: {len(odds_files)}")
 
         new_rows_by_date = defaultdict(dict)
         status_by_date_game = {}
+        changes = defaultdict(lambda: {"added": [], "updated": []})
 
-        for json_file in json_files:
+        for json_file in odds_files:
             file_rows_built = 0
             file_warnings_before = counters["warnings"]
 
-            with open(json_file, "r", encoding="utf-8") as f:
-                payload = json.load(f)
+            payload = read_json(json_file)
 
             counters["json_files_processed"] += 1
 
@@ -505,18 +519,24 @@ def main() -> None:
                 if not existing_row:
                     merged_rows[game_id] = new_row
                     counters["rows_added"] += 1
+                    changes[game_date]["added"].append(game_id)
                     continue
 
                 if row_changed(existing_row, new_row):
                     merged_rows[game_id] = new_row
                     counters["rows_updated"] += 1
+                    changes[game_date]["updated"].append(game_id)
                 else:
                     merged_rows[game_id] = existing_row
                     counters["rows_unchanged"] += 1
 
-            write_csv(csv_path, merged_rows)
+            changed = write_csv(csv_path, merged_rows)
             counters["csv_files_written"] += 1
-            log(f"WROTE {csv_path} rows={len(merged_rows)}")
+            log(f"{'WROTE' if changed else 'UNCHANGED'} {csv_path} rows={len(merged_rows)}")
+
+        changed = write_changes(changes)
+        changed_games = sum(len(ids) for kinds in changes.values() for ids in kinds.values())
+        log(f"{'WROTE' if changed else 'UNCHANGED'} {CHANGES_FILE} changed_games={changed_games}")
 
         log(f"Spread rows selected by abs(hdp)==1.5: {counters['spread_1_5_selected']}")
         log(
@@ -557,4 +577,4 @@ def main() -> None:
 
 
 if __name__ == "__main__":
-    main()
+    run_main(main, LOG_FILE)
@@ -1,6 +1,7 @@
 #!/usr/bin/env python3
 # docs/win/hockey/nhl/scripts/01_merge/build_juice_files.py
 
+import argparse
 import math
 import sys
 import traceback
@@ -8,133 +9,56 @@ from pathlib import Path
 from datetime import datetime, UTC
 
 import pandas as pd
-from scipy.stats import poisson, skellam
+
+# scipy.stats is imported inside the probability helpers: it takes longer to
+# import than pandas and is only needed once there are rows to price.
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from nhl_output import remove_stale, write_csv
+from nhl_parallel import add_dates_argument, add_workers_argument, for_dates, log_line, map_slates
+from nhl_profile import run_main
+from nhl_schema import MERGED, MONEYLINE, PUCK_LINE, TOTAL, read_typed_csv
 
 
 BASE_DIR = Path("docs/win/hockey/nhl")
 
 INPUT_DIR = BASE_DIR / "01_merge"
 OUTPUT_DIR = INPUT_DIR / "01_merguiced"
-OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
 
 ERROR_DIR = BASE_DIR / "errors" / "01_merge"
-ERROR_DIR.mkdir(parents=True, exist_ok=True)
 LOG_FILE = ERROR_DIR / "build_juice_files.txt"
 
 
-MERGED_REQUIRED_COLUMNS = [
-    "sport",
-    "league",
-    "game_date",
-    "game_time",
-    "game_id",
-    "away_team",
-    "home_team",
-    "away_prob_moneyline",
-    "home_prob_moneyline",
-    "away_projected_goals",
-    "home_projected_goals",
-    "total_projected_goals",
-    "away_puck_line",
-    "home_puck_line",
-    "total",
-    "away_dk_moneyline_american",
-    "home_dk_moneyline_american",
-    "away_dk_moneyline_decimal",
-    "home_dk_moneyline_decimal",
-    "away_dk_puck_line_american",
-    "home_dk_puck_line_american",
-    "away_dk_puck_line_decimal",
-    "home_dk_puck_line_decimal",
-    "dk_total_over_american",
-    "dk_total_under_american",
-    "dk_total_over_decimal",
-    "dk_total_under_decimal",
-]
-
-
-MONEYLINE_COLUMNS = [
-    "sport",
-    "league",
-    "game_date",
-    "game_time",
-    "game_id",
-    "away_team",
-    "home_team",
-    "away_prob_moneyline",
-    "home_prob_moneyline",
-    "away_fair_decimal_moneyline",
-    "home_fair_decimal_moneyline",
-    "away_dk_moneyline_american",
-    "home_dk_moneyline_american",
-    "away_dk_moneyline_decimal",
-    "home_dk_moneyline_decimal",
-]
-
-
-PUCK_LINE_COLUMNS = [
-    "sport",
-    "league",
-    "game_date",
-    "game_time",
-    "game_id",
-    "away_team",
-    "home_team",
-    "away_puck_line",
-    "home_puck_line",
-    "away_prob_puck_line",
-    "home_prob_puck_line",
-    "away_fair_decimal_puck_line",
-    "home_fair_decimal_puck_line",
-    "away_dk_puck_line_american",
-    "home_dk_puck_line_american",
-    "away_dk_puck_line_decimal",
-    "home_dk_puck_line_decimal",
-]
-
-
-TOTAL_COLUMNS = [
-    "sport",
-    "league",
-    "game_date",
-    "game_time",
-    "game_id",
-    "away_team",
-    "home_team",
-    "total",
-    "total_projected_goals",
-    "over_prob_total",
-    "under_prob_total",
-    "over_fair_decimal_total",
-    "under_fair_decimal_total",
-    "dk_total_over_american",
-    "dk_total_under_american",
-    "dk_total_over_decimal",
-    "dk_total_under_decimal",
-]
-
-
-with open(LOG_FILE, "w", encoding="utf-8") as f:
-    f.write(f"=== build_juice_files RUN {datetime.now(UTC).isoformat()} ===\n")
+MERGED_REQUIRED_COLUMNS = list(MERGED)
 
+MONEYLINE_COLUMNS = list(MONEYLINE)
 
-def log(msg: str) -> None:
-    with open(LOG_FILE, "a", encoding="utf-8") as f:
-        f.write(f"{datetime.now(UTC).isoformat()} | {msg}\n")
+PUCK_LINE_COLUMNS = list(PUCK_LINE)
 
+TOTAL_COLUMNS = list(TOTAL)
 
-def wipe_output_dir() -> None:
-    removed = 0
 
-    for path in OUTPUT_DIR.glob("*.csv"):
-        path.unlink()
-        removed += 1
+def reset_log() -> None:
+    OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+    ERROR_DIR.mkdir(parents=True, exist_ok=True)
+
+    with open(LOG_FILE, "w", encoding="utf-8") as f:
+        f.write(f"=== build_juice_files RUN {datetime.now(UTC).isoformat()} ===\n")
+
+
+def log(msg: str) -> None:
+    log_line(LOG_FILE, f"{datetime.now(UTC).isoformat()} | {msg}\n")
 
-    log(f"Wiped pre-juice CSV outputs: {removed}")
 
+def remove_stale_outputs(files_written: list[tuple[str, int]], dates=None) -> None:
+    removed = remove_stale(OUTPUT_DIR, "*.csv", keep=[path for path, _ in files_written], dates=dates)
+    log(f"Removed stale pre-juice CSV outputs: {len(removed)}")
 
-def to_numeric(series: pd.Series) -> pd.Series:
-    return pd.to_numeric(series, errors="coerce")
+
+def write_output(df: pd.DataFrame, output_path: Path) -> None:
+    changed = write_csv(df, output_path)
+    log(f"{'WROTE' if changed else 'UNCHANGED'} {output_path} ({len(df)} rows)")
 
 
 def fair_decimal(prob):
@@ -154,6 +78,8 @@ def calculate_home_puck_probability(home_line, home_projected_goals, away_projec
     ):
         return None
 
+    from scipy.stats import skellam
+
     threshold = math.floor(-home_line)
     probability = 1 - skellam.cdf(threshold, home_projected_goals, away_projected_goals)
 
@@ -173,6 +99,8 @@ def calculate_away_puck_probability(away_line, away_projected_goals, home_projec
     ):
         return None
 
+    from scipy.stats import skellam
+
     threshold = math.floor(-away_line)
     probability = 1 - skellam.cdf(threshold, away_projected_goals, home_projected_goals)
 
@@ -190,6 +118,8 @@ def calculate_total_probabilities(total_line, total_projected_goals):
     ):
         return None, None
 
+    from scipy.stats import poisson
+
     total_line = float(total_line)
 
     if total_line.is_integer():
@@ -224,20 +154,22 @@ def validate_schema(path: Path, df: pd.DataFrame) -> list[str]:
     return [col for col in MERGED_REQUIRED_COLUMNS if col not in df.columns]
 
 
-def build_moneyline(df: pd.DataFrame, output_path: Path) -> int:
+def moneyline_frame(df: pd.DataFrame) -> pd.DataFrame:
     moneyline = df.copy()
 
     moneyline["away_fair_decimal_moneyline"] = moneyline["away_prob_moneyline"].apply(fair_decimal)
     moneyline["home_fair_decimal_moneyline"] = moneyline["home_prob_moneyline"].apply(fair_decimal)
 
-    moneyline = moneyline[MONEYLINE_COLUMNS]
-    moneyline.to_csv(output_path, index=False)
+    return moneyline[MONEYLINE_COLUMNS]
+
 
-    log(f"WROTE {output_path} ({len(moneyline)} rows)")
+def build_moneyline(df: pd.DataFrame, output_path: Path) -> int:
+    moneyline = moneyline_frame(df)
+    write_output(moneyline, output_path)
     return len(moneyline)
 
 
-def build_puck_line(df: pd.DataFrame, output_path: Path) -> int:
+def puck_line_frame(df: pd.DataFrame) -> pd.DataFrame:
     puck_line = df.copy()
 
     away_probs = []
@@ -275,14 +207,16 @@ def build_puck_line(df: pd.DataFrame, output_path: Path) -> int:
     puck_line["away_fair_decimal_puck_line"] = away_fair_decimals
     puck_line["home_fair_decimal_puck_line"] = home_fair_decimals
 
-    puck_line = puck_line[PUCK_LINE_COLUMNS]
-    puck_line.to_csv(output_path, index=False)
+    return puck_line[PUCK_LINE_COLUMNS]
+
 
-    log(f"WROTE {output_path} ({len(puck_line)} rows)")
+def build_puck_line(df: pd.DataFrame, output_path: Path) -> int:
+    puck_line = puck_line_frame(df)
+    write_output(puck_line, output_path)
     return len(puck_line)
 
 
-def build_total(df: pd.DataFrame, output_path: Path) -> int:
+def total_frame(df: pd.DataFrame) -> pd.DataFrame:
     total = df.copy()
 
     over_probs = []
@@ -314,17 +248,21 @@ def build_total(df: pd.DataFrame, output_path: Path) -> int:
     total["over_fair_decimal_total"] = over_fair_decimals
     total["under_fair_decimal_total"] = under_fair_decimals
 
-    total = total[TOTAL_COLUMNS]
-    total.to_csv(output_path, index=False)
+    return total[TOTAL_COLUMNS]
 
-    log(f"WROTE {output_path} ({len(total)} rows)")
+
+def build_total(df: pd.DataFrame, output_path: Path) -> int:
+    total = total_frame(df)
+    write_output(total, output_path)
     return len(total)
 
 
 def process_file(path: Path) -> list[tuple[str, int]]:
+    log(f"Processing merged input: {path}")
+
     files_written = []
 
-    df = pd.read_csv(path)
+    df = read_typed_csv(path, MERGED, usecols=True)
 
     if df.empty:
         log(f"EMPTY: {path} — skipping")
@@ -336,32 +274,6 @@ def process_file(path: Path) -> list[tuple[str, int]]:
         log(f"SCHEMA ERROR: {path} missing columns: {missing_columns}")
         raise ValueError(f"{path} missing required columns: {missing_columns}")
 
-    numeric_columns = [
-        "away_prob_moneyline",
-        "home_prob_moneyline",
-        "away_projected_goals",
-        "home_projected_goals",
-        "total_projected_goals",
-        "away_puck_line",
-        "home_puck_line",
-        "total",
-        "away_dk_moneyline_american",
-        "home_dk_moneyline_american",
-        "away_dk_moneyline_decimal",
-        "home_dk_moneyline_decimal",
-        "away_dk_puck_line_american",
-        "home_dk_puck_line_american",
-        "away_dk_puck_line_decimal",
-        "home_dk_puck_line_decimal",
-        "dk_total_over_american",
-        "dk_total_under_american",
-        "dk_total_over_decimal",
-        "dk_total_under_decimal",
-    ]
-
-    for col in numeric_columns:
-        df[col] = to_numeric(df[col])
-
     slate_date = path.name.replace("_NHL_merged.csv", "")
 
     moneyline_path = OUTPUT_DIR / f"{slate_date}_NHL_moneyline.csv"
@@ -380,13 +292,21 @@ def process_file(path: Path) -> list[tuple[str, int]]:
     return files_written
 
 
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Build per-market NHL pre-juice files.")
+    add_workers_argument(parser)
+    add_dates_argument(parser)
+    return parser.parse_args()
+
+
 def main() -> None:
+    args = parse_args()
+    reset_log()
+
     files_written = []
     files_processed = 0
 
     try:
-        wipe_output_dir()
-
         input_files = sorted(INPUT_DIR.glob("*_NHL_merged.csv"))
 
         log(f"Input files found: {len(input_files)}")
@@ -394,12 +314,16 @@ def main() -> None:
         if not input_files:
             raise FileNotFoundError(f"No merged input files found in {INPUT_DIR}")
 
-        for path in input_files:
-            log(f"Processing merged input: {path}")
-            written = process_file(path)
+        if args.dates:
+            input_files = for_dates(input_files, args.dates)
+            log(f"Dates: {', '.join(sorted(args.dates))} | input files: {len(input_files)}")
+
+        for written in map_slates(process_file, input_files, args.workers, LOG_FILE):
             files_written.extend(written)
             files_processed += 1
 
+        remove_stale_outputs(files_written, args.dates)
+
         log("--- SUMMARY ---")
         log(f"Input files processed: {files_processed}")
         log(f"Files written: {len(files_written)}")
@@ -414,4 +338,4 @@ def main() -> None:
 
 
 if __name__ == "__main__":
-    main()
+    run_main(main, LOG_FILE)
@@ -1,11 +1,22 @@
 #!/usr/bin/env python3
 # docs/win/hockey/nhl/scripts/01_merge/merge_intake.py
 
+import argparse
 import csv
+import sys
 import traceback
+from collections import Counter
 from pathlib import Path
 from datetime import datetime, UTC
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from nhl_output import remove_stale, write_rows_csv
+from nhl_parallel import add_dates_argument
+from nhl_profile import run_main
+from nhl_schema import GAMES, MERGED, PREDICTIONS, SPORTSBOOK_REQUIRED
+from nhl_validate import ODDS_DECIMAL, PROBABILITY, Rules, Violation, report, validate_rows
+
 
 BASE_DIR = Path("docs/win/hockey/nhl")
 
@@ -17,42 +28,10 @@ MERGE_DIR = BASE_DIR / "01_merge"
 AUDIT_DIR = MERGE_DIR / "audit"
 
 ERROR_DIR = BASE_DIR / "errors" / "01_merge"
-ERROR_DIR.mkdir(parents=True, exist_ok=True)
 LOG_FILE = ERROR_DIR / "merge_intake.txt"
 
-MERGE_DIR.mkdir(parents=True, exist_ok=True)
-AUDIT_DIR.mkdir(parents=True, exist_ok=True)
-
 
-MERGED_COLUMNS = [
-    "sport",
-    "league",
-    "game_date",
-    "game_time",
-    "game_id",
-    "away_team",
-    "home_team",
-    "away_prob_moneyline",
-    "home_prob_moneyline",
-    "away_projected_goals",
-    "home_projected_goals",
-    "total_projected_goals",
-    "away_puck_line",
-    "home_puck_line",
-    "total",
-    "away_dk_moneyline_american",
-    "home_dk_moneyline_american",
-    "away_dk_moneyline_decimal",
-    "home_dk_moneyline_decimal",
-    "away_dk_puck_line_american",
-    "home_dk_puck_line_american",
-    "away_dk_puck_line_decimal",
-    "home_dk_puck_line_decimal",
-    "dk_total_over_american",
-    "dk_total_under_american",
-    "dk_total_over_decimal",
-    "dk_total_under_decimal",
-]
+MERGED_COLUMNS = list(MERGED)
 
 AUDIT_COLUMNS = [
     "game_date",
@@ -76,59 +55,49 @@ REJECTION_COLUMNS = [
     "home_team",
 ]
 
-REQUIRED_GAMES_COLUMNS = [
-    "game_id",
-    "sport",
-    "league",
-    "game_date",
-    "game_time",
-    "home_team",
-    "away_team",
-]
+REQUIRED_GAMES_COLUMNS = list(GAMES)
 
-REQUIRED_SPORTSBOOK_COLUMNS = [
-    "game_id",
-    "sport",
-    "league",
-    "game_date",
-    "game_time",
-    "home_team",
-    "away_team",
-    "home_dk_moneyline_american",
-    "away_dk_moneyline_american",
-    "home_puck_line",
-    "away_puck_line",
-    "total",
-    "home_dk_puck_line_american",
-    "away_dk_puck_line_american",
-    "dk_total_over_american",
-    "dk_total_under_american",
-    "home_dk_moneyline_decimal",
-    "away_dk_moneyline_decimal",
-    "home_dk_puck_line_decimal",
-    "away_dk_puck_line_decimal",
-    "dk_total_over_decimal",
-    "dk_total_under_decimal",
-]
+REQUIRED_SPORTSBOOK_COLUMNS = list(SPORTSBOOK_REQUIRED)
 
-REQUIRED_PREDICTION_COLUMNS = [
-    "sport",
-    "league",
-    "game_id",
-    "game_date",
-    "game_time",
-    "home_team",
-    "away_team",
-    "home_prob_moneyline",
-    "away_prob_moneyline",
-    "away_projected_goals",
-    "home_projected_goals",
-    "total_projected_goals",
-]
+REQUIRED_PREDICTION_COLUMNS = list(PREDICTIONS)
+
+SOURCE_COLUMNS = {
+    "games": REQUIRED_GAMES_COLUMNS,
+    "sportsbook": REQUIRED_SPORTSBOOK_COLUMNS,
+    "predictions": REQUIRED_PREDICTION_COLUMNS,
+}
 
+# Checked per source file, after future rows without a game_id are dropped.
+SOURCE_RULES = {
+    "games": Rules(
+        not_null=("game_id", "game_date"),
+        unique=(("game_id",),),
+    ),
+    "sportsbook": Rules(
+        not_null=("game_id", "game_date"),
+        unique=(("game_id",),),
+        ranges=dict.fromkeys([col for col in SPORTSBOOK_REQUIRED if col.endswith("_decimal")], ODDS_DECIMAL),
+    ),
+    "predictions": Rules(
+        not_null=("game_id", "game_date"),
+        unique=(("game_id",),),
+        ranges=dict.fromkeys(["home_prob_moneyline", "away_prob_moneyline"], PROBABILITY),
+    ),
+}
 
-with open(LOG_FILE, "w", encoding="utf-8") as f:
-    f.write(f"=== merge_intake RUN {datetime.now(UTC).isoformat()} ===\n")
+# Checked over the rows of every file of a source.
+GROUP_RULES = Rules(
+    unique=(("game_date", "game_id"),),
+)
+
+
+def reset_log() -> None:
+    ERROR_DIR.mkdir(parents=True, exist_ok=True)
+    MERGE_DIR.mkdir(parents=True, exist_ok=True)
+    AUDIT_DIR.mkdir(parents=True, exist_ok=True)
+
+    with open(LOG_FILE, "w", encoding="utf-8") as f:
+        f.write(f"=== merge_intake RUN {datetime.now(UTC).isoformat()} ===\n")
 
 
 def log(msg: str) -> None:
@@ -142,14 +111,9 @@ def fail(message: str) -> None:
     raise SystemExit(message)
 
 
-def wipe_merge_outputs() -> None:
-    removed = 0
-
-    for path in MERGE_DIR.glob("*.csv"):
-        path.unlink()
-        removed += 1
-
-    log(f"Wiped merge CSV outputs: {removed}")
+def remove_stale_merge_outputs(written: list[Path], dates=None) -> None:
+    removed = remove_stale(MERGE_DIR, "*.csv", keep=written, dates=dates)
+    log(f"Removed stale merge CSV outputs: {len(removed)}")
 
 
 def load_csv(path: Path) -> tuple[list[str], list[dict[str, str]]]:
@@ -162,173 +126,104 @@ def load_csv(path: Path) -> tuple[list[str], list[dict[str, str]]]:
 
 
 def write_csv(path: Path, fieldnames: list[str], rows: list[dict[str, str]]) -> None:
-    path.parent.mkdir(parents=True, exist_ok=True)
-
-    with open(path, "w", newline="", encoding="utf-8") as f:
-        writer = csv.DictWriter(f, fieldnames=fieldnames, extrasaction="ignore")
-        writer.writeheader()
-        writer.writerows(rows)
-
-    log(f"WROTE {path} ({len(rows)} rows)")
-
-
-def validate_required_columns(path: Path, fieldnames: list[str], required_columns: list[str]) -> None:
-    missing = [col for col in required_columns if col not in fieldnames]
-
-    if missing:
-        fail(f"{path} missing required columns: {missing}")
-
-
-def row_date(row: dict[str, str]) -> str:
-    return str(row.get("game_date", "")).strip()
+    changed = write_rows_csv(path, fieldnames, rows, extrasaction="ignore")
+    log(f"{'WROTE' if changed else 'UNCHANGED'} {path} ({len(rows)} rows)")
 
 
-def row_game_id(row: dict[str, str]) -> str:
-    return str(row.get("game_id", "")).strip()
-
-
-def parse_game_date(value: str):
-    s = str(value).strip().replace("-", "_")
-
+def is_future_date(game_date: str, today: str) -> bool:
     try:
-        return datetime.strptime(s, "%Y_%m_%d").date()
-    except Exception:
-        return None
-
-
-def is_future_game_date(value: str) -> bool:
-    parsed = parse_game_date(value)
-
-    if parsed is None:
+        parsed = datetime.strptime(game_date.replace("-", "_"), "%Y_%m_%d").strftime("%Y_%m_%d")
+    except ValueError:
         return False
 
-    return parsed > datetime.now(UTC).date()
+    return parsed > today
 
 
-def validate_and_filter_game_ids(
-    path: Path,
-    rows: list[dict[str, str]],
+def check_sources(
     source_name: str,
-) -> list[dict[str, str]]:
-    seen = {}
-    missing_rows = []
-    duplicate_ids = set()
-    filtered_rows = []
-    skipped_future_missing_game_id = 0
-
-    for idx, row in enumerate(rows, start=2):
-        game_id = row_game_id(row)
+    files: list[tuple[Path, list[str], list[dict[str, str]]]],
+) -> tuple[list[dict[str, str]], list[Violation]]:
+    """Usable rows of a source's (path, fieldnames, rows) files, and every violation.
+
+    A file missing SOURCE_COLUMNS is reported and left out; future rows without a
+    game_id yet are logged and dropped. The rest of every file are checked in one
+    pass, against SOURCE_RULES per file and GROUP_RULES across files. Each usable
+    row is tagged with its _source_file and _row.
+    """
+    required = SOURCE_COLUMNS[source_name]
+    today = datetime.now(UTC).strftime("%Y_%m_%d")
+    violations = []
+    usable = []
+    skipped = 0
+
+    for path, fieldnames, file_rows in files:
+        missing = [col for col in required if col not in fieldnames]
+        if missing:
+            violations.append(Violation(str(path), "required", tuple(missing), "missing columns"))
+            continue
 
-        if not game_id:
-            game_date = row_date(row)
+        for row_number, row in enumerate(file_rows, start=2):
+            row["game_id"] = str(row.get("game_id") or "").strip()
+            row["game_date"] = str(row.get("game_date") or "").strip()
 
-            if is_future_game_date(game_date):
-                skipped_future_missing_game_id += 1
+            if not row["game_id"] and is_future_date(row["game_date"], today):
+                skipped += 1
                 log(
                     f"SKIPPED FUTURE ROW WITH MISSING game_id | "
-                    f"source={source_name} | file={path} | row={idx} | game_date={game_date} | "
+                    f"source={source_name} | file={path} | row={row_number} | game_date={row['game_date']} | "
                     f"away_team={row.get('away_team', '')} | home_team={row.get('home_team', '')}"
                 )
                 continue
 
-            missing_rows.append(idx)
-            continue
-
-        if game_id in seen:
-            duplicate_ids.add(game_id)
-        else:
-            seen[game_id] = idx
-
-        filtered_rows.append(row)
-
-    if missing_rows:
-        fail(f"{source_name} file has missing game_id values: {path} rows={missing_rows}")
-
-    if duplicate_ids:
-        fail(f"{source_name} file has duplicate game_id values: {path} duplicate_game_ids={sorted(duplicate_ids)}")
+            row["_source_file"] = str(path)
+            row["_row"] = row_number
+            usable.append(row)
 
-    if skipped_future_missing_game_id:
-        log(
-            f"{source_name} file skipped future rows with missing game_id: "
-            f"{path} count={skipped_future_missing_game_id}"
-        )
+    if skipped:
+        log(f"{source_name} rows skipped as future with missing game_id: {skipped}")
 
-    return filtered_rows
+    violations.extend(validate_rows(usable, SOURCE_RULES[source_name], source_name, by="_source_file", row="_row"))
+    violations.extend(validate_rows(usable, GROUP_RULES, source_name, first_row=1))
 
+    return usable, violations
 
-def load_source_rows(
-    source_name: str,
-    directory: Path,
-    pattern: str,
-    required_columns: list[str],
-) -> list[dict[str, str]]:
-    all_rows = []
 
+def load_source_rows(source_name: str, directory: Path, pattern: str) -> list[dict[str, str]]:
     if source_name == "sportsbook":
-        files = sorted(
+        paths = sorted(
             p
             for p in directory.glob("*.csv")
             if p.name.lower().startswith("nhl_")
         )
     else:
-        files = sorted(directory.glob(pattern))
+        paths = sorted(directory.glob(pattern))
 
-    log(f"{source_name} files found: {len(files)}")
+    log(f"{source_name} files found: {len(paths)}")
 
-    if not files:
+    if not paths:
         fail(f"No {source_name} files found in {directory} matching {pattern}")
 
-    for path in files:
-        fieldnames, rows = load_csv(path)
-        validate_required_columns(path, fieldnames, required_columns)
-
-        rows = validate_and_filter_game_ids(path, rows, source_name)
+    rows, violations = check_sources(source_name, [(path, *load_csv(path)) for path in paths])
 
-        for row in rows:
-            row["_source_file"] = str(path)
-            all_rows.append(row)
+    if violations:
+        fail(report(violations))
 
-        log(f"Loaded {source_name} file: {path} ({len(rows)} usable rows)")
+    usable = Counter(row["_source_file"] for row in rows)
+    for path in paths:
+        log(f"Loaded {source_name} file: {path} ({usable[str(path)]} usable rows)")
 
-    return all_rows
+    return rows
 
 
-def rows_by_date_game_id(rows: list[dict[str, str]], source_name: str) -> dict[str, dict[str, dict[str, str]]]:
+def rows_by_date_game_id(rows: list[dict[str, str]]) -> dict[str, dict[str, dict[str, str]]]:
+    """Checked source rows keyed game_date -> game_id."""
     grouped = {}
 
-    seen = {}
-    duplicate_keys = set()
-    missing_date_rows = []
-
-    for idx, row in enumerate(rows, start=1):
-        game_date = row_date(row)
-        game_id = row_game_id(row)
-
-        if not game_date:
-            missing_date_rows.append((row.get("_source_file", ""), idx, game_id))
-            continue
-
-        if not game_id:
-            fail(
-                f"{source_name} row reached grouping with blank game_id: "
-                f"source_file={row.get('_source_file', '')} row={idx} game_date={game_date}"
-            )
-
-        key = (game_date, game_id)
-
-        if key in seen:
-            duplicate_keys.add(key)
-        else:
-            seen[key] = row.get("_source_file", "")
-
+    for row in rows:
+        game_date = str(row.get("game_date", "")).strip()
+        game_id = str(row.get("game_id", "")).strip()
         grouped.setdefault(game_date, {})[game_id] = row
 
-    if missing_date_rows:
-        fail(f"{source_name} rows have missing game_date values: {missing_date_rows}")
-
-    if duplicate_keys:
-        fail(f"{source_name} has duplicate game_date/game_id keys: {sorted(duplicate_keys)}")
-
     return grouped
 
 
@@ -345,11 +240,50 @@ def rejection_from_row(reason: str, row: dict[str, str]) -> dict[str, str]:
     }
 
 
+def merged_row(
+    date_val: str,
+    game_id: str,
+    game: dict[str, str],
+    sportsbook: dict[str, str],
+    prediction: dict[str, str],
+) -> dict[str, str]:
+    return {
+        "sport": game.get("sport", "hockey"),
+        "league": game.get("league", "nhl"),
+        "game_date": game.get("game_date", date_val),
+        "game_time": game.get("game_time", ""),
+        "game_id": game_id,
+        "away_team": game.get("away_team", ""),
+        "home_team": game.get("home_team", ""),
+        "away_prob_moneyline": prediction.get("away_prob_moneyline", ""),
+        "home_prob_moneyline": prediction.get("home_prob_moneyline", ""),
+        "away_projected_goals": prediction.get("away_projected_goals", ""),
+        "home_projected_goals": prediction.get("home_projected_goals", ""),
+        "total_projected_goals": prediction.get("total_projected_goals", ""),
+        "away_puck_line": sportsbook.get("away_puck_line", ""),
+        "home_puck_line": sportsbook.get("home_puck_line", ""),
+        "total": sportsbook.get("total", ""),
+        "away_dk_moneyline_american": sportsbook.get("away_dk_moneyline_american", ""),
+        "home_dk_moneyline_american": sportsbook.get("home_dk_moneyline_american", ""),
+        "away_dk_moneyline_decimal": sportsbook.get("away_dk_moneyline_decimal", ""),
+        "home_dk_moneyline_decimal": sportsbook.get("home_dk_moneyline_decimal", ""),
+        "away_dk_puck_line_american": sportsbook.get("away_dk_puck_line_american", ""),
+        "home_dk_puck_line_american": sportsbook.get("home_dk_puck_line_american", ""),
+        "away_dk_puck_line_decimal": sportsbook.get("away_dk_puck_line_decimal", ""),
+        "home_dk_puck_line_decimal": sportsbook.get("home_dk_puck_line_decimal", ""),
+        "dk_total_over_american": sportsbook.get("dk_total_over_american", ""),
+        "dk_total_under_american": sportsbook.get("dk_total_under_american", ""),
+        "dk_total_over_decimal": sportsbook.get("dk_total_over_decimal", ""),
+        "dk_total_under_decimal": sportsbook.get("dk_total_under_decimal", ""),
+    }
+
+
 def process_date(
     date_val: str,
     games_map: dict[str, dict[str, str]],
     sportsbook_map: dict[str, dict[str, str]],
     predictions_map: dict[str, dict[str, str]],
+    written: list[Path],
 ) -> tuple[int, int, int, bool]:
     merged_path = MERGE_DIR / f"{date_val}_NHL_merged.csv"
     audit_path = AUDIT_DIR / f"{date_val}_NHL_merge_audit.csv"
@@ -413,37 +347,7 @@ def process_date(
         sportsbook = sportsbook_map[game_id]
         prediction = predictions_map[game_id]
 
-        merged_rows.append(
-            {
-                "sport": game.get("sport", "hockey"),
-                "league": game.get("league", "nhl"),
-                "game_date": game.get("game_date", date_val),
-                "game_time": game.get("game_time", ""),
-                "game_id": game_id,
-                "away_team": game.get("away_team", ""),
-                "home_team": game.get("home_team", ""),
-                "away_prob_moneyline": prediction.get("away_prob_moneyline", ""),
-                "home_prob_moneyline": prediction.get("home_prob_moneyline", ""),
-                "away_projected_goals": prediction.get("away_projected_goals", ""),
-                "home_projected_goals": prediction.get("home_projected_goals", ""),
-                "total_projected_goals": prediction.get("total_projected_goals", ""),
-                "away_puck_line": sportsbook.get("away_puck_line", ""),
-                "home_puck_line": sportsbook.get("home_puck_line", ""),
-                "total": sportsbook.get("total", ""),
-                "away_dk_moneyline_american": sportsbook.get("away_dk_moneyline_american", ""),
-                "home_dk_moneyline_american": sportsbook.get("home_dk_moneyline_american", ""),
-                "away_dk_moneyline_decimal": sportsbook.get("away_dk_moneyline_decimal", ""),
-                "home_dk_moneyline_decimal": sportsbook.get("home_dk_moneyline_decimal", ""),
-                "away_dk_puck_line_american": sportsbook.get("away_dk_puck_line_american", ""),
-                "home_dk_puck_line_american": sportsbook.get("home_dk_puck_line_american", ""),
-                "away_dk_puck_line_decimal": sportsbook.get("away_dk_puck_line_decimal", ""),
-                "home_dk_puck_line_decimal": sportsbook.get("home_dk_puck_line_decimal", ""),
-                "dk_total_over_american": sportsbook.get("dk_total_over_american", ""),
-                "dk_total_under_american": sportsbook.get("dk_total_under_american", ""),
-                "dk_total_over_decimal": sportsbook.get("dk_total_over_decimal", ""),
-                "dk_total_under_decimal": sportsbook.get("dk_total_under_decimal", ""),
-            }
-        )
+        merged_rows.append(merged_row(date_val, game_id, game, sportsbook, prediction))
 
     write_csv(audit_path, AUDIT_COLUMNS, audit_rows)
     write_csv(rejected_sportsbook_path, REJECTION_COLUMNS, rejected_sportsbook)
@@ -451,6 +355,7 @@ def process_date(
 
     if merged_rows:
         write_csv(merged_path, MERGED_COLUMNS, merged_rows)
+        written.append(merged_path)
     else:
         log(f"No merged rows written for {date_val}")
 
@@ -465,22 +370,30 @@ def process_date(
     return len(merged_rows), len(rejected_sportsbook), len(rejected_predictions), date_has_failure
 
 
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Merge NHL games, sportsbook and prediction intake by game.")
+    add_dates_argument(parser)
+    return parser.parse_args()
+
+
 def main() -> None:
+    args = parse_args()
+    reset_log()
+
     total_merged = 0
     total_rejected_sportsbook = 0
     total_rejected_predictions = 0
     dates_failed = 0
+    written = []
 
     try:
-        wipe_merge_outputs()
+        games_rows = load_source_rows("games", GAMES_DIR, "*_nhl_games.csv")
+        sportsbook_rows = load_source_rows("sportsbook", SPORTSBOOK_DIR, "NHL_*.csv")
+        prediction_rows = load_source_rows("predictions", PREDICTIONS_DIR, "hockey_*.csv")
 
-        games_rows = load_source_rows("games", GAMES_DIR, "*_nhl_games.csv", REQUIRED_GAMES_COLUMNS)
-        sportsbook_rows = load_source_rows("sportsbook", SPORTSBOOK_DIR, "NHL_*.csv", REQUIRED_SPORTSBOOK_COLUMNS)
-        prediction_rows = load_source_rows("predictions", PREDICTIONS_DIR, "hockey_*.csv", REQUIRED_PREDICTION_COLUMNS)
-
-        games_by_date = rows_by_date_game_id(games_rows, "games")
-        sportsbook_by_date = rows_by_date_game_id(sportsbook_rows, "sportsbook")
-        predictions_by_date = rows_by_date_game_id(prediction_rows, "predictions")
+        games_by_date = rows_by_date_game_id(games_rows)
+        sportsbook_by_date = rows_by_date_game_id(sportsbook_rows)
+        predictions_by_date = rows_by_date_game_id(prediction_rows)
 
         dates = sorted(predictions_by_date.keys())
 
@@ -489,12 +402,17 @@ def main() -> None:
         if not dates:
             fail("No Stage 01 prediction rows found.")
 
+        if args.dates:
+            dates = [date_val for date_val in dates if date_val in args.dates]
+            log(f"Dates selected: {', '.join(sorted(args.dates))} | processing {len(dates)}")
+
         for date_val in dates:
             merged_count, rejected_sportsbook_count, rejected_predictions_count, date_has_failure = process_date(
                 date_val,
                 games_by_date.get(date_val, {}),
                 sportsbook_by_date.get(date_val, {}),
                 predictions_by_date.get(date_val, {}),
+                written,
             )
 
             total_merged += merged_count
@@ -504,6 +422,8 @@ def main() -> None:
             if date_has_failure:
                 dates_failed += 1
 
+        remove_stale_merge_outputs(written, args.dates)
+
         log("--- SUMMARY ---")
         log(f"Dates processed: {len(dates)}")
         log(f"Dates with failures: {dates_failed}")
@@ -525,4 +445,4 @@ def main() -> None:
 
 
 if __name__ == "__main__":
-    main()
+    run_main(main, LOG_FILE)
@@ -1,14 +1,23 @@
 #!/usr/bin/env python3
 # docs/win/hockey/nhl/scripts/02_juice/apply_puck_line_juice.py
 
+import argparse
 import math
 import sys
 import traceback
 from datetime import datetime, UTC
+from functools import partial
 from pathlib import Path
 
 import pandas as pd
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from nhl_output import remove_stale, write_csv
+from nhl_parallel import add_dates_argument, add_workers_argument, for_dates, log_line, map_slates
+from nhl_profile import run_main
+from nhl_schema import JUICE_CONFIG, JUICED, PUCK_LINE, read_typed_csv
+
 
 BASE_DIR = Path("docs/win/hockey/nhl")
 
@@ -21,29 +30,9 @@ LOG_FILE = ERROR_DIR / "apply_puck_line_juice.txt"
 
 MIN_DECIMAL = 1.01
 
-OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
-ERROR_DIR.mkdir(parents=True, exist_ok=True)
-
-
-REQUIRED_INPUT_COLUMNS = [
-    "sport",
-    "league",
-    "game_date",
-    "game_time",
-    "game_id",
-    "away_team",
-    "home_team",
-    "away_puck_line",
-    "home_puck_line",
-    "away_prob_puck_line",
-    "home_prob_puck_line",
-    "away_fair_decimal_puck_line",
-    "home_fair_decimal_puck_line",
-    "away_dk_puck_line_american",
-    "home_dk_puck_line_american",
-    "away_dk_puck_line_decimal",
-    "home_dk_puck_line_decimal",
-]
+
+
+REQUIRED_INPUT_COLUMNS = list(PUCK_LINE)
 
 REQUIRED_CONFIG_COLUMNS = [
     "band",
@@ -54,14 +43,7 @@ REQUIRED_CONFIG_COLUMNS = [
     "extra_juice",
 ]
 
-OUTPUT_COLUMNS = REQUIRED_INPUT_COLUMNS + [
-    "away_juiced_decimal_puck_line",
-    "home_juiced_decimal_puck_line",
-    "away_juiced_prob_puck_line",
-    "home_juiced_prob_puck_line",
-    "away_normalized_prob_puck_line",
-    "home_normalized_prob_puck_line",
-]
+OUTPUT_COLUMNS = list(JUICED["puck_line"])
 
 
 def now() -> str:
@@ -69,24 +51,21 @@ def now() -> str:
 
 
 def reset_log() -> None:
+    OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+    ERROR_DIR.mkdir(parents=True, exist_ok=True)
+
     with open(LOG_FILE, "w", encoding="utf-8") as f:
         f.write(f"=== apply_puck_line_juice RUN {now()} ===\n")
 
 
 def log(msg: str) -> None:
-    with open(LOG_FILE, "a", encoding="utf-8") as f:
-        f.write(f"{now()} | {msg}\n")
+    log_line(LOG_FILE, f"{now()} | {msg}\n")
 
 
-def wipe_outputs() -> int:
-    removed = 0
-
-    for path in OUTPUT_DIR.glob("*puck_line*.csv"):
-        path.unlink()
-        removed += 1
-
-    log(f"Wiped puck_line output CSVs: {removed}")
-    return removed
+def remove_stale_outputs(input_files: list[Path], dates=None) -> int:
+    removed = remove_stale(OUTPUT_DIR, "*puck_line*.csv", keep=[OUTPUT_DIR / p.name for p in input_files], dates=dates)
+    log(f"Removed stale puck_line output CSVs: {len(removed)}")
+    return len(removed)
 
 
 def validate_columns(path: Path, df: pd.DataFrame, required_columns: list[str]) -> None:
@@ -96,21 +75,18 @@ def validate_columns(path: Path, df: pd.DataFrame, required_columns: list[str])
         raise ValueError(f"{path} missing required columns: {missing}")
 
 
-def load_config() -> pd.DataFrame:
-    if not JUICE_FILE.exists():
-        raise FileNotFoundError(f"Missing config file: {JUICE_FILE}")
+def load_config(path: Path = JUICE_FILE) -> pd.DataFrame:
+    if not path.exists():
+        raise FileNotFoundError(f"Missing config file: {path}")
 
-    juice_df = pd.read_csv(JUICE_FILE)
-    validate_columns(JUICE_FILE, juice_df, REQUIRED_CONFIG_COLUMNS)
+    juice_df = read_typed_csv(path, JUICE_CONFIG)
+    validate_columns(path, juice_df, REQUIRED_CONFIG_COLUMNS)
 
-    juice_df["band_min"] = pd.to_numeric(juice_df["band_min"], errors="coerce")
-    juice_df["band_max"] = pd.to_numeric(juice_df["band_max"], errors="coerce")
-    juice_df["extra_juice"] = pd.to_numeric(juice_df["extra_juice"], errors="coerce")
     juice_df["venue"] = juice_df["venue"].astype(str).str.strip()
     juice_df["fav_ud"] = juice_df["fav_ud"].astype(str).str.strip()
 
     if juice_df[["band_min", "band_max", "extra_juice"]].isna().any().any():
-        raise ValueError(f"{JUICE_FILE} has non-numeric band_min, band_max, or extra_juice values")
+        raise ValueError(f"{path} has non-numeric band_min, band_max, or extra_juice values")
 
     return juice_df
 
@@ -129,24 +105,7 @@ def find_extra_juice(juice_df: pd.DataFrame, puck_line: float, venue: str, fav_u
     return float(band.iloc[0]["extra_juice"])
 
 
-def process_file(path: Path, juice_df: pd.DataFrame) -> tuple[int, int, int]:
-    df = pd.read_csv(path)
-    validate_columns(path, df, REQUIRED_INPUT_COLUMNS)
-
-    for col in [
-        "away_puck_line",
-        "home_puck_line",
-        "away_prob_puck_line",
-        "home_prob_puck_line",
-        "away_fair_decimal_puck_line",
-        "home_fair_decimal_puck_line",
-        "away_dk_puck_line_american",
-        "home_dk_puck_line_american",
-        "away_dk_puck_line_decimal",
-        "home_dk_puck_line_decimal",
-    ]:
-        df[col] = pd.to_numeric(df[col], errors="coerce")
-
+def apply_juice(df: pd.DataFrame, juice_df: pd.DataFrame, name: str) -> tuple[pd.DataFrame, int, int, int]:
     for col in [
         "away_juiced_decimal_puck_line",
         "home_juiced_decimal_puck_line",
@@ -169,7 +128,7 @@ def process_file(path: Path, juice_df: pd.DataFrame) -> tuple[int, int, int]:
             home_fair = float(row["home_fair_decimal_puck_line"])
         except Exception:
             skipped_bad += 1
-            log(f"ROW SKIP: {path.name} idx={idx} reason=bad_numeric_parse")
+            log(f"ROW SKIP: {name} idx={idx} reason=bad_numeric_parse")
             continue
 
         if (
@@ -181,7 +140,7 @@ def process_file(path: Path, juice_df: pd.DataFrame) -> tuple[int, int, int]:
             or home_fair <= 1
         ):
             skipped_bad += 1
-            log(f"ROW SKIP: {path.name} idx={idx} reason=bad_puck_line_values")
+            log(f"ROW SKIP: {name} idx={idx} reason=bad_puck_line_values")
             continue
 
         away_fav_ud = "favorite" if away_line < 0 else "underdog"
@@ -193,7 +152,7 @@ def process_file(path: Path, juice_df: pd.DataFrame) -> tuple[int, int, int]:
         if away_extra is None or home_extra is None:
             skipped_noband += 1
             log(
-                f"ROW SKIP: {path.name} idx={idx} reason=no_config_band "
+                f"ROW SKIP: {name} idx={idx} reason=no_config_band "
                 f"away_line={away_line} home_line={home_line}"
             )
             continue
@@ -203,19 +162,19 @@ def process_file(path: Path, juice_df: pd.DataFrame) -> tuple[int, int, int]:
 
         if not math.isfinite(away_juiced_decimal) or not math.isfinite(home_juiced_decimal):
             skipped_bad += 1
-            log(f"ROW SKIP: {path.name} idx={idx} reason=bad_juiced_decimal")
+            log(f"ROW SKIP: {name} idx={idx} reason=bad_juiced_decimal")
             continue
 
         if away_juiced_decimal <= 1:
             log(
-                f"ROW CAP: {path.name} idx={idx} side=away "
+                f"ROW CAP: {name} idx={idx} side=away "
                 f"original_juiced_decimal={away_juiced_decimal} capped_to={MIN_DECIMAL}"
             )
             away_juiced_decimal = MIN_DECIMAL
 
         if home_juiced_decimal <= 1:
             log(
-                f"ROW CAP: {path.name} idx={idx} side=home "
+                f"ROW CAP: {name} idx={idx} side=home "
                 f"original_juiced_decimal={home_juiced_decimal} capped_to={MIN_DECIMAL}"
             )
             home_juiced_decimal = MIN_DECIMAL
@@ -226,7 +185,7 @@ def process_file(path: Path, juice_df: pd.DataFrame) -> tuple[int, int, int]:
 
         if not math.isfinite(prob_total) or prob_total <= 0:
             skipped_bad += 1
-            log(f"ROW SKIP: {path.name} idx={idx} reason=bad_probability_total")
+            log(f"ROW SKIP: {name} idx={idx} reason=bad_probability_total")
             continue
 
         df.at[idx, "away_juiced_decimal_puck_line"] = away_juiced_decimal
@@ -238,24 +197,40 @@ def process_file(path: Path, juice_df: pd.DataFrame) -> tuple[int, int, int]:
 
         applied += 1
 
+    return df[OUTPUT_COLUMNS], applied, skipped_bad, skipped_noband
+
+
+def process_file(path: Path, juice_df: pd.DataFrame) -> tuple[int, int, int]:
+    log(f"Processing input: {path}")
+
+    df = read_typed_csv(path, PUCK_LINE, usecols=True)
+    validate_columns(path, df, REQUIRED_INPUT_COLUMNS)
+
+    df, applied, skipped_bad, skipped_noband = apply_juice(df, juice_df, path.name)
+
     out_path = OUTPUT_DIR / path.name
-    df = df[OUTPUT_COLUMNS]
-    df.to_csv(out_path, index=False)
+    changed = write_csv(df, out_path)
 
     log(
-        f"WROTE {out_path} rows={len(df)} applied={applied} "
+        f"{'WROTE' if changed else 'UNCHANGED'} {out_path} rows={len(df)} applied={applied} "
         f"skipped_bad={skipped_bad} skipped_noband={skipped_noband}"
     )
 
     return applied, skipped_bad, skipped_noband
 
 
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Apply puck line juice to NHL pre-juice files.")
+    add_workers_argument(parser)
+    add_dates_argument(parser)
+    return parser.parse_args()
+
+
 def main() -> None:
+    args = parse_args()
     reset_log()
 
     try:
-        wipe_outputs()
-
         log(f"INPUT_DIR: {INPUT_DIR}")
         log(f"OUTPUT_DIR: {OUTPUT_DIR}")
         log(f"JUICE_FILE: {JUICE_FILE}")
@@ -268,20 +243,25 @@ def main() -> None:
         if not input_files:
             raise FileNotFoundError(f"No puck-line input files found in {INPUT_DIR}")
 
+        if args.dates:
+            input_files = for_dates(input_files, args.dates)
+            log(f"Dates: {', '.join(sorted(args.dates))} | input files: {len(input_files)}")
+
         files_written = 0
         total_applied = 0
         total_skipped_bad = 0
         total_skipped_noband = 0
 
-        for path in input_files:
-            log(f"Processing input: {path}")
-            applied, skipped_bad, skipped_noband = process_file(path, juice_df)
+        counts = map_slates(partial(process_file, juice_df=juice_df), input_files, args.workers, LOG_FILE)
 
+        for applied, skipped_bad, skipped_noband in counts:
             files_written += 1
             total_applied += applied
             total_skipped_bad += skipped_bad
             total_skipped_noband += skipped_noband
 
+        remove_stale_outputs(input_files, args.dates)
+
         log("--- SUMMARY ---")
         log(f"Files processed: {len(input_files)}")
         log(f"Files written: {files_written}")
@@ -299,4 +279,4 @@ def main() -> None:
 
 
 if __name__ == "__main__":
-    main()
+    run_main(main, LOG_FILE)
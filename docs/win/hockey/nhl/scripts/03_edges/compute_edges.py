@@ -1,21 +1,29 @@
 #!/usr/bin/env python3
 # docs/win/hockey/nhl/scripts/03_edges/compute_edges.py
 
+import argparse
+import sys
 import traceback
 from datetime import datetime, UTC
+from functools import partial
 from pathlib import Path
 
 import numpy as np
 import pandas as pd
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from nhl_output import remove_stale, write_csv
+from nhl_parallel import add_dates_argument, add_workers_argument, for_dates, log_line, map_slates
+from nhl_profile import run_main
+from nhl_schema import JUICED, read_typed_csv
+
+
 INPUT_DIR = Path("docs/win/hockey/nhl/02_juice")
 OUTPUT_DIR = Path("docs/win/hockey/nhl/03_edges")
 ERROR_DIR = Path("docs/win/hockey/nhl/errors/03_edges")
 LOG_FILE = ERROR_DIR / "compute_edges.txt"
 
-OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
-ERROR_DIR.mkdir(parents=True, exist_ok=True)
-
 
 # =========================
 # LOGGING
@@ -26,8 +34,7 @@ def _now():
 
 
 def _log(msg: str, level: str = "INFO"):
-    with open(LOG_FILE, "a", encoding="utf-8") as f:
-        f.write(f"{_now()} | {level:<5} | {msg.rstrip()}\n")
+    log_line(LOG_FILE, f"{_now()} | {level:<5} | {msg.rstrip()}\n")
 
 
 def _write_summary(summary: dict, per_file: list) -> None:
@@ -77,19 +84,6 @@ def validate_columns(df, required_cols, file_path):
         raise ValueError(f"{file_path.name} missing required columns: {missing}")
 
 
-def atomic_write_csv(df, output_path):
-    tmp = output_path.with_suffix(".tmp")
-    df.to_csv(tmp, index=False)
-    tmp.replace(output_path)
-
-
-def to_numeric(df, cols):
-    for col in cols:
-        if col in df.columns:
-            df[col] = pd.to_numeric(df[col], errors="coerce")
-    return df
-
-
 def safe_edge_decimal(book_decimal, model_prob):
     d = pd.to_numeric(book_decimal, errors="coerce")
     p = pd.to_numeric(model_prob, errors="coerce")
@@ -130,8 +124,6 @@ def compute_moneyline_edges(df, file_path):
     ]
     validate_columns(df, required_cols, file_path)
 
-    df = to_numeric(df, required_cols[1:])
-
     df["away_model_prob_moneyline"] = df["away_normalized_prob_moneyline"]
     df["home_model_prob_moneyline"] = df["home_normalized_prob_moneyline"]
 
@@ -180,8 +172,6 @@ def compute_puck_line_edges(df, file_path):
     ]
     validate_columns(df, required_cols, file_path)
 
-    df = to_numeric(df, required_cols[1:])
-
     df["away_model_prob_puck_line"] = df["away_normalized_prob_puck_line"]
     df["home_model_prob_puck_line"] = df["home_normalized_prob_puck_line"]
 
@@ -230,8 +220,6 @@ def compute_total_edges(df, file_path):
     ]
     validate_columns(df, required_cols, file_path)
 
-    df = to_numeric(df, required_cols[1:])
-
     df["over_model_prob_total"] = df["over_normalized_prob_total"]
     df["under_model_prob_total"] = df["under_normalized_prob_total"]
 
@@ -270,62 +258,79 @@ def compute_total_edges(df, file_path):
 # DRIVER
 # =========================
 
-def process_pattern(pattern, compute_fn, market_label, summary, per_file):
-    input_files = sorted(INPUT_DIR.glob(pattern))
+def process_file(input_path, compute_fn, market_label):
+    pf = {
+        "name": input_path.name,
+        "market": market_label,
+        "rows": 0,
+        "null_edges": 0,
+        "status": "ok",
+        "output": None,
+    }
 
-    if not input_files:
-        _log(f"No input files found for pattern: {pattern}", "WARN")
-        return
+    _log(f"--- FILE: {input_path.name}  market={market_label}")
 
-    for input_path in input_files:
-        pf = {
-            "name": input_path.name,
-            "market": market_label,
-            "rows": 0,
-            "null_edges": 0,
-            "status": "ok",
-        }
+    try:
+        df = read_typed_csv(input_path, JUICED[market_label])
 
-        _log(f"--- FILE: {input_path.name}  market={market_label}")
+        if df.empty:
+            _log(f"{input_path.name} empty — skipping")
+            pf["status"] = "empty"
+            return pf
 
-        try:
-            df = pd.read_csv(input_path)
+        pf["rows"] = len(df)
 
-            if df.empty:
-                _log(f"{input_path.name} empty — skipping")
-                pf["status"] = "empty"
-                summary["skipped"] += 1
-                per_file.append(pf)
-                continue
+        out_df, null_edges = compute_fn(df, input_path)
 
-            pf["rows"] = len(df)
-            summary["rows_processed"] += len(df)
+        pf["null_edges"] = null_edges
 
-            out_df, null_edges = compute_fn(df, input_path)
+        if null_edges > 0:
+            _log(f"{input_path.name} | {null_edges} null edge values", "WARN")
 
-            pf["null_edges"] = null_edges
-            summary["null_edges"] += null_edges
+        output_path = OUTPUT_DIR / input_path.name
+        changed = write_csv(out_df, output_path)
+        pf["output"] = str(output_path)
 
-            if null_edges > 0:
-                _log(f"{input_path.name} | {null_edges} null edge values", "WARN")
+        verb = "WROTE" if changed else "UNCHANGED"
+        _log(f"{verb}: {output_path} ({len(out_df)} rows, {null_edges} null edge values)")
 
-            output_path = OUTPUT_DIR / input_path.name
-            atomic_write_csv(out_df, output_path)
+    except ValueError as e:
+        _log(f"{input_path.name} schema error: {e}", "ERROR")
+        pf["status"] = "schema_error"
+
+    except Exception as e:
+        _log(f"{input_path.name} FAILED: {e}\n{traceback.format_exc()}", "ERROR")
+        pf["status"] = "error"
+
+    return pf
+
+
+STATUS_COUNTERS = {
+    "ok": "files_processed",
+    "empty": "skipped",
+    "schema_error": "schema_errors",
+    "error": "errors",
+}
 
-            summary["files_processed"] += 1
-            summary[f"{market_label}_files"] += 1
 
-            _log(f"WROTE: {output_path} ({len(out_df)} rows, {null_edges} null edge values)")
+def process_pattern(pattern, compute_fn, market_label, summary, per_file, workers=1, dates=None):
+    input_files = sorted(INPUT_DIR.glob(pattern))
+
+    if not input_files:
+        _log(f"No input files found for pattern: {pattern}", "WARN")
+        return
 
-        except ValueError as e:
-            _log(f"{input_path.name} schema error: {e}", "ERROR")
-            pf["status"] = "schema_error"
-            summary["schema_errors"] += 1
+    input_files = for_dates(input_files, dates)
 
-        except Exception as e:
-            _log(f"{input_path.name} FAILED: {e}\n{traceback.format_exc()}", "ERROR")
-            pf["status"] = "error"
-            summary["errors"] += 1
+    run_file = partial(process_file, compute_fn=compute_fn, market_label=market_label)
+
+    for pf in map_slates(run_file, input_files, workers, LOG_FILE):
+        summary["rows_processed"] += pf["rows"]
+        summary["null_edges"] += pf["null_edges"]
+        summary[STATUS_COUNTERS[pf["status"]]] += 1
+
+        if pf["status"] == "ok":
+            summary[f"{market_label}_files"] += 1
 
         per_file.append(pf)
 
@@ -334,7 +339,19 @@ def process_pattern(pattern, compute_fn, market_label, summary, per_file):
 # MAIN
 # =========================
 
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Compute NHL edges from juiced files.")
+    add_workers_argument(parser)
+    add_dates_argument(parser)
+    return parser.parse_args()
+
+
 def main():
+    args = parse_args()
+
+    OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+    ERROR_DIR.mkdir(parents=True, exist_ok=True)
+
     with open(LOG_FILE, "w", encoding="utf-8") as f:
         f.write(f"=== compute_edges RUN {_now()} ===\n")
 
@@ -354,9 +371,8 @@ def main():
 
     _log(f"INPUT_DIR : {INPUT_DIR}")
     _log(f"OUTPUT_DIR: {OUTPUT_DIR}")
-
-    for output_file in OUTPUT_DIR.glob("*.csv"):
-        output_file.unlink()
+    if args.dates:
+        _log(f"DATES     : {', '.join(sorted(args.dates))}")
 
     try:
         process_pattern(
@@ -365,6 +381,8 @@ def main():
             "moneyline",
             summary,
             per_file,
+            args.workers,
+            args.dates,
         )
         process_pattern(
             "*_NHL_puck_line.csv",
@@ -372,6 +390,8 @@ def main():
             "puck_line",
             summary,
             per_file,
+            args.workers,
+            args.dates,
         )
         process_pattern(
             "*_NHL_total.csv",
@@ -379,8 +399,14 @@ def main():
             "total",
             summary,
             per_file,
+            args.workers,
+            args.dates,
         )
 
+        kept = [pf["output"] for pf in per_file if pf["output"]]
+        removed = remove_stale(OUTPUT_DIR, "*.csv", keep=kept, dates=args.dates)
+        _log(f"Removed stale outputs: {len(removed)}")
+
     except Exception as e:
         _log(f"FATAL: {e}\n{traceback.format_exc()}", "ERROR")
         _write_summary(summary, per_file)
@@ -391,4 +417,4 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
+    run_main(main, LOG_FILE)
@@ -1,21 +1,29 @@
 #!/usr/bin/env python3
 # docs/win/hockey/nhl/scripts/03_edges/compute_ev_kelly.py
 
+import argparse
+import sys
 import traceback
 from datetime import datetime, UTC
+from functools import partial
 from pathlib import Path
 
 import numpy as np
 import pandas as pd
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from nhl_output import remove_stale, write_csv
+from nhl_parallel import add_dates_argument, add_workers_argument, for_dates, log_line, map_slates
+from nhl_profile import run_main
+from nhl_schema import EDGES, read_typed_csv
+
+
 INPUT_DIR = Path("docs/win/hockey/nhl/03_edges")
 OUTPUT_DIR = Path("docs/win/hockey/nhl/03_edges/ev_kelly")
 ERROR_DIR = Path("docs/win/hockey/nhl/errors/03_edges")
 LOG_FILE = ERROR_DIR / "compute_ev_kelly.txt"
 
-OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
-ERROR_DIR.mkdir(parents=True, exist_ok=True)
-
 
 # =========================
 # LOGGING
@@ -26,8 +34,7 @@ def _now():
 
 
 def _log(msg: str, level: str = "INFO"):
-    with open(LOG_FILE, "a", encoding="utf-8") as log_f:
-        log_f.write(f"{_now()} | {level:<5} | {msg.rstrip()}\n")
+    log_line(LOG_FILE, f"{_now()} | {level:<5} | {msg.rstrip()}\n")
 
 
 def _write_summary(summary: dict, per_file: list) -> None:
@@ -77,19 +84,6 @@ def validate_columns(df, required_cols, file_path):
         raise ValueError(f"{file_path.name} missing required columns: {missing}")
 
 
-def atomic_write_csv(df, output_path):
-    tmp = output_path.with_suffix(".tmp")
-    df.to_csv(tmp, index=False)
-    tmp.replace(output_path)
-
-
-def to_numeric(df, cols):
-    for col in cols:
-        if col in df.columns:
-            df[col] = pd.to_numeric(df[col], errors="coerce")
-    return df
-
-
 def compute_ev(model_prob, book_decimal):
     p = pd.to_numeric(model_prob, errors="coerce")
     d = pd.to_numeric(book_decimal, errors="coerce")
@@ -161,8 +155,6 @@ def process_moneyline(df, file_path):
     ]
     validate_columns(df, required_cols, file_path)
 
-    df = to_numeric(df, required_cols[1:])
-
     df["away_ev_moneyline"] = compute_ev(
         df["away_model_prob_moneyline"],
         df["away_dk_moneyline_decimal"],
@@ -207,8 +199,6 @@ def process_puck_line(df, file_path):
     ]
     validate_columns(df, required_cols, file_path)
 
-    df = to_numeric(df, required_cols[1:])
-
     df["away_ev_puck_line"] = compute_ev(
         df["away_model_prob_puck_line"],
         df["away_dk_puck_line_decimal"],
@@ -253,8 +243,6 @@ def process_total(df, file_path):
     ]
     validate_columns(df, required_cols, file_path)
 
-    df = to_numeric(df, required_cols[1:])
-
     df["over_ev_total"] = compute_ev(
         df["over_model_prob_total"],
         df["dk_total_over_decimal"],
@@ -285,59 +273,76 @@ def process_total(df, file_path):
 # DRIVER
 # =========================
 
-def process_pattern(pattern, process_fn, market_label, summary, per_file):
-    input_files = sorted(INPUT_DIR.glob(pattern))
+def process_file(input_path, process_fn, market_label):
+    pf = {
+        "name": input_path.name,
+        "market": market_label,
+        "rows": 0,
+        "neg_kelly": 0,
+        "status": "ok",
+        "output": None,
+    }
 
-    if not input_files:
-        _log(f"No input files found for pattern: {pattern}", "WARN")
-        return
+    _log(f"--- FILE: {input_path.name}  market={market_label}")
 
-    for input_path in input_files:
-        pf = {
-            "name": input_path.name,
-            "market": market_label,
-            "rows": 0,
-            "neg_kelly": 0,
-            "status": "ok",
-        }
+    try:
+        df = read_typed_csv(input_path, EDGES[market_label])
 
-        _log(f"--- FILE: {input_path.name}  market={market_label}")
+        if df.empty:
+            _log(f"{input_path.name} empty — skipping")
+            pf["status"] = "empty"
+            return pf
 
-        try:
-            df = pd.read_csv(input_path)
+        pf["rows"] = len(df)
 
-            if df.empty:
-                _log(f"{input_path.name} empty — skipping")
-                pf["status"] = "empty"
-                summary["skipped"] += 1
-                per_file.append(pf)
-                continue
+        out_df, neg_kelly = process_fn(df, input_path)
 
-            pf["rows"] = len(df)
-            summary["rows_processed"] += len(df)
+        pf["neg_kelly"] = neg_kelly
 
-            out_df, neg_kelly = process_fn(df, input_path)
+        output_path = OUTPUT_DIR / input_path.name
+        changed = write_csv(out_df, output_path)
+        pf["output"] = str(output_path)
 
-            pf["neg_kelly"] = neg_kelly
-            summary["neg_kelly_clipped"] += neg_kelly
+        verb = "WROTE" if changed else "UNCHANGED"
+        _log(f"{verb}: {output_path} ({len(out_df)} rows, {neg_kelly} kelly values clipped)")
 
-            output_path = OUTPUT_DIR / input_path.name
-            atomic_write_csv(out_df, output_path)
+    except ValueError as e:
+        _log(f"{input_path.name} schema error: {e}", "ERROR")
+        pf["status"] = "schema_error"
+
+    except Exception as e:
+        _log(f"{input_path.name} FAILED: {e}\n{traceback.format_exc()}", "ERROR")
+        pf["status"] = "error"
+
+    return pf
+
+
+STATUS_COUNTERS = {
+    "ok": "files_processed",
+    "empty": "skipped",
+    "schema_error": "schema_errors",
+    "error": "errors",
+}
 
-            summary["files_processed"] += 1
-            summary[f"{market_label}_files"] += 1
 
-            _log(f"WROTE: {output_path} ({len(out_df)} rows, {neg_kelly} kelly values clipped)")
+def process_pattern(pattern, process_fn, market_label, summary, per_file, workers=1, dates=None):
+    input_files = sorted(INPUT_DIR.glob(pattern))
+
+    if not input_files:
+        _log(f"No input files found for pattern: {pattern}", "WARN")
+        return
 
-        except ValueError as e:
-            _log(f"{input_path.name} schema error: {e}", "ERROR")
-            pf["status"] = "schema_error"
-            summary["schema_errors"] += 1
+    input_files = for_dates(input_files, dates)
 
-        except Exception as e:
-            _log(f"{input_path.name} FAILED: {e}\n{traceback.format_exc()}", "ERROR")
-            pf["status"] = "error"
-            summary["errors"] += 1
+    run_file = partial(process_file, process_fn=process_fn, market_label=market_label)
+
+    for pf in map_slates(run_file, input_files, workers, LOG_FILE):
+        summary["rows_processed"] += pf["rows"]
+        summary["neg_kelly_clipped"] += pf["neg_kelly"]
+        summary[STATUS_COUNTERS[pf["status"]]] += 1
+
+        if pf["status"] == "ok":
+            summary[f"{market_label}_files"] += 1
 
         per_file.append(pf)
 
@@ -346,7 +351,19 @@ def process_pattern(pattern, process_fn, market_label, summary, per_file):
 # MAIN
 # =========================
 
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Compute NHL EV and Kelly from edge files.")
+    add_workers_argument(parser)
+    add_dates_argument(parser)
+    return parser.parse_args()
+
+
 def main():
+    args = parse_args()
+
+    OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+    ERROR_DIR.mkdir(parents=True, exist_ok=True)
+
     with open(LOG_FILE, "w", encoding="utf-8") as log_f:
         log_f.write(f"=== compute_ev_kelly RUN {_now()} ===\n")
 
@@ -366,9 +383,8 @@ def main():
 
     _log(f"INPUT_DIR : {INPUT_DIR}")
     _log(f"OUTPUT_DIR: {OUTPUT_DIR}")
-
-    for output_file in OUTPUT_DIR.glob("*.csv"):
-        output_file.unlink()
+    if args.dates:
+        _log(f"DATES     : {', '.join(sorted(args.dates))}")
 
     try:
         process_pattern(
@@ -377,6 +393,8 @@ def main():
             "moneyline",
             summary,
             per_file,
+            args.workers,
+            args.dates,
         )
         process_pattern(
             "*_NHL_puck_line.csv",
@@ -384,6 +402,8 @@ def main():
             "puck_line",
             summary,
             per_file,
+            args.workers,
+            args.dates,
         )
         process_pattern(
             "*_NHL_total.csv",
@@ -391,8 +411,14 @@ def main():
             "total",
             summary,
             per_file,
+            args.workers,
+            args.dates,
         )
 
+        kept = [pf["output"] for pf in per_file if pf["output"]]
+        removed = remove_stale(OUTPUT_DIR, "*.csv", keep=kept, dates=args.dates)
+        _log(f"Removed stale outputs: {len(removed)}")
+
     except Exception as e:
         _log(f"FATAL: {e}\n{traceback.format_exc()}", "ERROR")
         _write_summary(summary, per_file)
@@ -403,4 +429,4 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
+    run_main(main, LOG_FILE)
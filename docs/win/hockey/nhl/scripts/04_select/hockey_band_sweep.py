@@ -0,0 +1,518 @@
+#!/usr/bin/env python3
+# docs/win/hockey/nhl/scripts/04_select/hockey_band_sweep.py
+
+"""
+Offline band sweep for config/markets.yaml.
+
+Joins every ev_kelly row with its final score once, grades each market side the
+same way 01_nhl_results_grade.py does, then evaluates the grids in
+config/band_sweep.yaml as boolean masks over that table. Configs are ranked per
+market side by units, then ROI, then bet count.
+
+    python docs/win/hockey/nhl/scripts/04_select/hockey_band_sweep.py
+    python docs/win/hockey/nhl/scripts/04_select/hockey_band_sweep.py --start 2025_10_07 --end 2026_01_31
+    python docs/win/hockey/nhl/scripts/04_select/hockey_band_sweep.py --min-bets 50 --top 100
+
+Each side is swept independently, i.e. as if pick_preference were "all".
+"""
+
+import argparse
+import sys
+import time
+import traceback
+from datetime import datetime, UTC
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import yaml
+
+from hockey_select_bets import MARKET_FIELDS, MARKET_ORDER
+from market_rules import BAND_KEYS, MARKET_SIDES, load_rules
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from nhl_archive import dataset_files
+from nhl_profile import run_main
+from nhl_schema import EV_KELLY, FINAL_SCORES, read_typed_csv
+
+
+EV_KELLY_DIR = Path("docs/win/hockey/nhl/03_edges/ev_kelly")
+SCORE_DIR = Path("docs/win/hockey/nhl/05_final_scores/final_scores")
+CONFIG_PATH = Path("docs/win/hockey/nhl/config/markets.yaml")
+GRID_PATH = Path("docs/win/hockey/nhl/config/band_sweep.yaml")
+RULES_CACHE_DIR = Path("docs/win/hockey/nhl/04_select/.rules_cache")
+OUTPUT_DIR = Path("docs/win/hockey/nhl/04_select/sweep")
+
+ERROR_DIR = Path("docs/win/hockey/nhl/errors/04_select")
+LOG_FILE = ERROR_DIR / "hockey_band_sweep.txt"
+
+# Configs evaluated per matrix product; bounds peak memory to
+# CONFIG_CHUNK x rows float64.
+CONFIG_CHUNK = 2048
+
+BAND_VALUE_FIELD = {
+    "odds_bands": "odds",
+    "line_bands": "line",
+    "prob_bands": "prob",
+    "edge_bands": "edge",
+    "ev_bands": "ev",
+    "kelly_bands": "kelly",
+}
+
+SCORE_COLUMNS = [
+    "away_score",
+    "home_score",
+    "total_score",
+    "away_puck_line_result",
+    "home_puck_line_result",
+]
+
+TEAM_KEY = ["game_date", "away_team", "home_team"]
+
+STAT_COLUMNS = ["Win", "Loss", "Push", "units"]
+
+REPORT_STATS = ["bets", "Win", "Loss", "Push", "Win_Pct", "units", "roi"]
+
+
+# =========================
+# LOGGING
+# =========================
+
+def _now():
+    return datetime.now(UTC).isoformat()
+
+
+def _log(msg: str, level: str = "INFO"):
+    with open(LOG_FILE, "a", encoding="utf-8") as f:
+        f.write(f"{_now()} | {level:<5} | {msg.rstrip()}\n")
+
+
+def _write_summary(summary: list, elapsed: float) -> None:
+    lines = [
+        "",
+        "=" * 60,
+        f"SUMMARY  {_now()}",
+        "=" * 60,
+        f"  configs_evaluated : {sum(s['configs'] for s in summary)}",
+        f"  elapsed_sec       : {elapsed:.2f}",
+        "",
+        f"  {'market':<10} {'side':<6} {'rows':>6} {'configs':>8} {'kept':>6} "
+        f"{'best_units':>11} {'cur_units':>10} {'ms':>8}",
+    ]
+
+    for s in summary:
+        lines.append(
+            f"  {s['market_type']:<10} {s['bet_side']:<6} {s['rows']:>6} {s['configs']:>8} "
+            f"{s['kept']:>6} {s['best_units']:>11.2f} {s['current_units']:>10.2f} {s['elapsed_ms']:>8.1f}"
+        )
+
+    lines += ["", "STATUS: SUCCESS", "=" * 60]
+
+    with open(LOG_FILE, "a", encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n")
+
+
+# =========================
+# ARGS / GRID
+# =========================
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--grid", type=Path, default=GRID_PATH, help="Sweep grid YAML.")
+    parser.add_argument("--start", help="First game_date to include, YYYY_MM_DD.")
+    parser.add_argument("--end", help="Last game_date to include, YYYY_MM_DD.")
+    parser.add_argument("--min-bets", type=int, default=25, help="Drop configs with fewer graded bets.")
+    parser.add_argument("--top", type=int, default=50, help="Configs kept per market side.")
+    return parser.parse_args()
+
+
+def grid_values(spec, where: str) -> np.ndarray:
+    if isinstance(spec, dict):
+        try:
+            start, stop, step = float(spec["start"]), float(spec["stop"]), float(spec["step"])
+        except (KeyError, TypeError, ValueError):
+            raise ValueError(f"{where} must have numeric start, stop and step: {spec!r}") from None
+
+        if step <= 0 or stop < start:
+            raise ValueError(f"{where} needs step > 0 and stop >= start: {spec!r}")
+
+        return np.round(np.arange(start, stop + step / 2, step), 10)
+
+    if isinstance(spec, list) and spec:
+        try:
+            return np.array([float(v) for v in spec], dtype="float64")
+        except (TypeError, ValueError):
+            raise ValueError(f"{where} has non-numeric values: {spec!r}") from None
+
+    raise ValueError(f"{where} must be a non-empty list or {{start, stop, step}}: {spec!r}")
+
+
+def band_options(spec, where: str) -> tuple[np.ndarray, np.ndarray]:
+    if not isinstance(spec, dict) or "lo" not in spec or "hi" not in spec:
+        raise ValueError(f"{where} must define lo and hi")
+
+    lo = grid_values(spec["lo"], f"{where}.lo")
+    hi = grid_values(spec["hi"], f"{where}.hi")
+
+    lo_grid, hi_grid = np.meshgrid(lo, hi, indexing="ij")
+    keep = lo_grid <= hi_grid
+
+    if not keep.any():
+        raise ValueError(f"{where} has no band with lo <= hi")
+
+    return lo_grid[keep], hi_grid[keep]
+
+
+def load_grid(path: Path) -> dict:
+    try:
+        raw = yaml.safe_load(path.read_text(encoding="utf-8"))
+        grid = raw["sweep"]["nhl"]
+    except yaml.YAMLError as e:
+        raise ValueError(f"Malformed YAML in {path}: {e}") from None
+    except Exception as e:
+        raise ValueError(f"Missing expected config path sweep -> nhl in {path}: {e}") from None
+
+    out = {}
+
+    for market_type, sides in MARKET_SIDES.items():
+        for side in sides:
+            spec = (grid.get(market_type) or {}).get(side) or {}
+            where = f"{market_type}.{side}"
+
+            unknown = sorted(set(spec) - set(BAND_KEYS))
+            if unknown:
+                raise ValueError(f"{where} has unknown band keys: {unknown}")
+
+            if market_type == "moneyline" and "line_bands" in spec:
+                raise ValueError(f"{where} cannot sweep line_bands")
+
+            out[(market_type, side)] = {
+                key: band_options(spec[key], f"{where}.{key}") for key in spec
+            }
+
+    return out
+
+
+# =========================
+# JOINED TABLE
+# =========================
+
+def load_scores() -> pd.DataFrame:
+    parts = []
+
+    for entry in dataset_files(SCORE_DIR, "*_NHL_final_scores.csv"):
+        df = read_typed_csv(entry.source(), FINAL_SCORES)
+        if not df.empty:
+            parts.append(df)
+
+    if not parts:
+        raise RuntimeError(f"No final score files under {SCORE_DIR}")
+
+    scores = pd.concat(parts, ignore_index=True)
+    scores["game_id"] = scores["game_id"].astype(str).str.strip()
+    scores["game_date"] = scores["game_date"].astype(str).str.strip().str.replace("-", "_", regex=False)
+    scores["away_team"] = scores["away_team"].astype(str).str.strip()
+    scores["home_team"] = scores["home_team"].astype(str).str.strip()
+
+    return scores
+
+
+def load_side_rows(market_type: str) -> pd.DataFrame:
+    entries = dataset_files(EV_KELLY_DIR, f"*_NHL_{market_type}.csv")
+    if not entries:
+        return pd.DataFrame()
+
+    df = pd.concat(
+        [read_typed_csv(e.source(), EV_KELLY[market_type], usecols=True) for e in entries],
+        ignore_index=True,
+    )
+
+    base = pd.DataFrame({
+        "game_id": df["game_id"].astype(str).str.strip(),
+        "game_date": df["game_date"].astype(str).str.strip().str.replace("-", "_", regex=False),
+        "away_team": df["away_team"].astype(str).str.strip(),
+        "home_team": df["home_team"].astype(str).str.strip(),
+    })
+
+    parts = []
+
+    for side in MARKET_SIDES[market_type]:
+        part = base.copy()
+        part["market_type"] = market_type
+        part["bet_side"] = side
+
+        for name, col in MARKET_FIELDS[market_type].items():
+            if col is None:
+                part[name] = np.nan
+            else:
+                part[name] = df[col.format(side=side)].astype("float64")
+
+        parts.append(part)
+
+    return pd.concat(parts, ignore_index=True)
+
+
+def attach_scores(rows: pd.DataFrame, scores: pd.DataFrame) -> pd.DataFrame:
+    """game_id first, then game_date/away/home; first score row wins on duplicates."""
+    by_id = scores[scores["game_id"] != ""].drop_duplicates("game_id").set_index("game_id")[SCORE_COLUMNS]
+    by_key = scores.drop_duplicates(TEAM_KEY).set_index(TEAM_KEY)[SCORE_COLUMNS]
+
+    id_hit = rows["game_id"].isin(by_id.index).to_numpy()
+
+    out = rows.copy()
+    out[SCORE_COLUMNS] = by_id.reindex(rows["game_id"]).to_numpy()
+
+    key_index = pd.MultiIndex.from_frame(rows[TEAM_KEY])
+    key_hit = ~id_hit & key_index.isin(by_key.index)
+    fallback = by_key.reindex(key_index[key_hit]).to_numpy()
+    out.loc[key_hit, SCORE_COLUMNS] = fallback
+
+    return out[id_hit | key_hit].reset_index(drop=True)
+
+
+def grade(rows: pd.DataFrame) -> pd.DataFrame:
+    """Vectorized 01_nhl_results_grade.determine_outcome plus report units."""
+    away = rows["away_score"].to_numpy(dtype="float64")
+    home = rows["home_score"].to_numpy(dtype="float64")
+    line = rows["line"].to_numpy(dtype="float64")
+    market = rows["market_type"].to_numpy()
+    side = rows["bet_side"].to_numpy()
+
+    side_result = np.where(
+        side == "home",
+        rows["home_puck_line_result"].fillna(rows["home_score"] - rows["away_score"]),
+        rows["away_puck_line_result"].fillna(rows["away_score"] - rows["home_score"]),
+    )
+    total_score = rows["total_score"].fillna(rows["away_score"] + rows["home_score"]).to_numpy()
+
+    side_margin = np.where(side == "home", home - away, away - home)
+    pl_diff = side_result + line
+    total_diff = np.where(side == "over", total_score - line, line - total_score)
+
+    is_ml = market == "moneyline"
+    is_pl = market == "puck_line"
+    is_total = market == "total"
+
+    unknown = np.isnan(away) | np.isnan(home) | ((is_pl | is_total) & np.isnan(line))
+
+    push = ~unknown & (
+        (is_ml & (away == home))
+        | (is_pl & (np.abs(pl_diff) < 1e-9))
+        | (is_total & (np.abs(total_diff) < 1e-9))
+    )
+    win = ~unknown & ~push & (
+        (is_ml & (side_margin > 0))
+        | (is_pl & (pl_diff > 0))
+        | (is_total & (total_diff > 0))
+    )
+    loss = ~unknown & ~push & ~win
+
+    odds = rows["odds"].to_numpy(dtype="float64")
+    with np.errstate(divide="ignore", invalid="ignore"):
+        profit = np.select([odds > 0, odds < 0], [odds / 100.0, 100.0 / np.abs(odds)], np.nan)
+
+    units = np.select([win, loss, push], [profit, -1.0, 0.0], np.nan)
+
+    out = rows.assign(Win=win.astype("float64"), Loss=loss.astype("float64"), Push=push.astype("float64"))
+    out["units"] = np.nan_to_num(units, nan=0.0)
+
+    return out[~unknown].reset_index(drop=True)
+
+
+# =========================
+# SWEEP
+# =========================
+
+def format_bound(value: float) -> str:
+    return np.format_float_positional(value, trim="-")
+
+
+def format_bands(lo: np.ndarray, hi: np.ndarray) -> str:
+    return "[" + ", ".join(f"[{format_bound(a)}, {format_bound(b)}]" for a, b in zip(lo, hi)) + "]"
+
+
+def current_band_mask(current, key: str, values: np.ndarray) -> tuple[np.ndarray, str]:
+    if current is None:
+        return ~np.isnan(values), "null"
+
+    band = current.bands[key]
+    label = "null" if band.unbounded else format_bands(band.lo, band.hi)
+
+    return band.mask(values), label
+
+
+def sweep_side(table: pd.DataFrame, market_type: str, side: str, options: dict, current, args) -> tuple[pd.DataFrame, dict]:
+    t0 = time.perf_counter()
+
+    keys = [k for k in BAND_KEYS if not (market_type == "moneyline" and k == "line_bands")]
+    outcomes = table[STAT_COLUMNS].to_numpy(dtype="float64")
+
+    masks = []
+    labels = []
+    current_labels = {}
+    current_mask = np.ones(len(table), dtype=bool)
+
+    for key in keys:
+        values = table[BAND_VALUE_FIELD[key]].to_numpy(dtype="float64")
+        fixed_mask, fixed_label = current_band_mask(current, key, values)
+        current_mask &= fixed_mask
+        current_labels[key] = fixed_label
+
+        if key in options:
+            lo, hi = options[key]
+            present = ~np.isnan(values)
+            masks.append(present & (lo[:, None] <= values) & (values <= hi[:, None]))
+            labels.append([format_bands([a], [b]) for a, b in zip(lo, hi)])
+        else:
+            masks.append(fixed_mask[None, :])
+            labels.append([fixed_label])
+
+    # Selection takes nothing from a disabled side or market, whatever its bands;
+    # the swept configs still show what its bands would take if it were enabled.
+    if current is None or not current.enabled:
+        current_mask[:] = False
+
+    shape = tuple(m.shape[0] for m in masks)
+    n_configs = int(np.prod(shape))
+    index = np.indices(shape).reshape(len(shape), -1).T
+
+    stats = np.empty((n_configs, len(STAT_COLUMNS)), dtype="float64")
+
+    for start in range(0, n_configs, CONFIG_CHUNK):
+        chunk = index[start:start + CONFIG_CHUNK]
+        mask = masks[0][chunk[:, 0]]
+
+        for d in range(1, len(masks)):
+            mask &= masks[d][chunk[:, d]]
+
+        stats[start:start + len(chunk)] = mask.astype("float64") @ outcomes
+
+    result = pd.DataFrame(stats, columns=STAT_COLUMNS)
+    for d, key in enumerate(keys):
+        result[key] = np.asarray(labels[d], dtype=object)[index[:, d]]
+
+    current_row = pd.DataFrame([current_mask.astype("float64") @ outcomes], columns=STAT_COLUMNS)
+    for key in keys:
+        current_row[key] = current_labels[key]
+
+    result = add_metrics(result)
+    current_row = add_metrics(current_row)
+
+    ranked = result[result["bets"] >= args.min_bets].sort_values(
+        ["units", "roi", "bets"],
+        ascending=False,
+        kind="mergesort",
+    ).head(args.top)
+
+    ranked.insert(0, "rank", np.arange(1, len(ranked) + 1))
+    current_row.insert(0, "rank", "current")
+
+    out = pd.concat([current_row, ranked], ignore_index=True)
+    out.insert(0, "bet_side", side)
+    out.insert(0, "market_type", market_type)
+
+    stat = {
+        "market_type": market_type,
+        "bet_side": side,
+        "rows": len(table),
+        "configs": n_configs,
+        "kept": len(ranked),
+        "best_units": float(ranked["units"].iloc[0]) if not ranked.empty else float("nan"),
+        "current_units": float(current_row["units"].iloc[0]),
+        "elapsed_ms": (time.perf_counter() - t0) * 1000.0,
+    }
+
+    return out[["market_type", "bet_side", "rank"] + keys + REPORT_STATS], stat
+
+
+def add_metrics(df: pd.DataFrame) -> pd.DataFrame:
+    for col in ["Win", "Loss", "Push"]:
+        df[col] = df[col].round().astype(int)
+
+    df["units"] = df["units"].round(6)
+    df["bets"] = df["Win"] + df["Loss"] + df["Push"]
+
+    decided = df["Win"] + df["Loss"]
+    df["Win_Pct"] = np.where(decided > 0, df["Win"] / decided.where(decided > 0, 1), np.nan)
+    df["roi"] = np.where(df["bets"] > 0, df["units"] / df["bets"].where(df["bets"] > 0, 1), np.nan)
+
+    return df
+
+
+# =========================
+# MAIN
+# =========================
+
+def main():
+    args = parse_args()
+
+    OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+    ERROR_DIR.mkdir(parents=True, exist_ok=True)
+
+    with open(LOG_FILE, "w", encoding="utf-8") as f:
+        f.write(f"=== hockey_band_sweep RUN {_now()} ===\n")
+
+    t0 = time.perf_counter()
+
+    _log(f"EV_KELLY_DIR : {EV_KELLY_DIR}")
+    _log(f"SCORE_DIR    : {SCORE_DIR}")
+    _log(f"GRID_PATH    : {args.grid}")
+    _log(f"OUTPUT_DIR   : {OUTPUT_DIR}")
+    _log(f"start={args.start} end={args.end} min_bets={args.min_bets} top={args.top}")
+
+    try:
+        rules, _ = load_rules(CONFIG_PATH, RULES_CACHE_DIR)
+        grid = load_grid(args.grid)
+        scores = load_scores()
+
+        summary = []
+
+        for market_type in MARKET_ORDER:
+            rows = load_side_rows(market_type)
+            if rows.empty:
+                _log(f"{market_type}: no ev_kelly files", "WARN")
+                continue
+
+            if args.start:
+                rows = rows[rows["game_date"] >= args.start]
+            if args.end:
+                rows = rows[rows["game_date"] <= args.end]
+
+            joined = attach_scores(rows, scores)
+            table = grade(joined)
+
+            _log(
+                f"{market_type}: side_rows={len(rows)} | matched={len(joined)} | graded={len(table)}"
+            )
+
+            market_rules = rules.markets[market_type]
+            reports = []
+
+            for side in MARKET_SIDES[market_type]:
+                current = market_rules.sides.get(side)
+                if current is None:
+                    _log(f"{market_type}.{side}: market disabled in {CONFIG_PATH}, unswept bands are unbounded", "WARN")
+                elif not current.enabled:
+                    _log(f"{market_type}.{side}: side disabled in {CONFIG_PATH}, current takes no bets", "WARN")
+
+                side_table = table[table["bet_side"] == side].reset_index(drop=True)
+                report, stat = sweep_side(side_table, market_type, side, grid[(market_type, side)], current, args)
+
+                reports.append(report)
+                summary.append(stat)
+
+            out_path = OUTPUT_DIR / f"nhl_band_sweep_{market_type}.csv"
+            pd.concat(reports, ignore_index=True).to_csv(out_path, index=False)
+            _log(f"WROTE: {out_path}")
+
+    except Exception as e:
+        _log(f"FATAL: {e}\n{traceback.format_exc()}", "ERROR")
+        raise SystemExit(1)
+
+    _write_summary(summary, time.perf_counter() - t0)
+    print("hockey_band_sweep complete.")
+
+
+if __name__ == "__main__":
+    run_main(main, LOG_FILE)
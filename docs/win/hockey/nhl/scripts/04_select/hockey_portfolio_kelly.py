@@ -0,0 +1,494 @@
+#!/usr/bin/env python3
+# docs/win/hockey/nhl/scripts/04_select/hockey_portfolio_kelly.py
+
+import argparse
+import sys
+import time
+import traceback
+import zlib
+from datetime import datetime, UTC
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from nhl_output import remove_stale, write_csv
+from nhl_parallel import add_dates_argument, for_dates
+from nhl_profile import run_main
+from nhl_schema import MERGED, SELECTED, read_typed_csv
+
+
+SELECT_DIR = Path("docs/win/hockey/nhl/04_select")
+MERGE_DIR = Path("docs/win/hockey/nhl/01_merge")
+OUTPUT_DIR = SELECT_DIR / "portfolio"
+
+ERROR_DIR = Path("docs/win/hockey/nhl/errors/04_select")
+LOG_FILE = ERROR_DIR / "hockey_portfolio_kelly.txt"
+
+# Score grid per game: regulation goals 0..MAX_GOALS per team, regulation ties
+# are split evenly into a one-goal OT/shootout win for either side.
+MAX_GOALS = 12
+
+# Monte Carlo scenarios per slate. Games are independent of each other; bets on
+# the same game share the sampled final score.
+N_SCENARIOS = 20000
+
+# Hard wall-clock budget for one slate's allocation (raking, sampling and the
+# optimizer all check it). A slate that runs out keeps the optimizer's last
+# feasible stakes, or greedy_stakes when those are worse or sampling never
+# finished.
+SLATE_TIME_BUDGET_SEC = 0.5
+
+# Total stake across one slate may never exceed this fraction of bankroll.
+MAX_SLATE_FRACTION = 1.0
+
+MAX_NEWTON_ITERS = 100
+RAKE_ITERS = 200
+RAKE_TOL = 1e-9
+
+OUTPUT_COLUMNS = list(SELECTED) + ["portfolio_kelly"]
+
+
+# =========================
+# LOGGING
+# =========================
+
+def _now():
+    return datetime.now(UTC).isoformat()
+
+
+def _log(msg: str, level: str = "INFO"):
+    with open(LOG_FILE, "a", encoding="utf-8") as f:
+        f.write(f"{_now()} | {level:<5} | {msg.rstrip()}\n")
+
+
+def _write_summary(summary: dict, per_slate: list) -> None:
+    lines = [
+        "",
+        "=" * 60,
+        f"SUMMARY  {_now()}",
+        "=" * 60,
+        f"  slates_processed : {summary['slates_processed']}",
+        f"  bets_sized       : {summary['bets_sized']}",
+        f"  converged        : {summary['converged']}",
+        f"  budget_hit       : {summary['budget_hit']}",
+        f"  no_projection    : {summary['no_projection']}",
+        f"  errors           : {summary['errors']}",
+        "",
+        f"  {'slate':<12} {'bets':>5} {'kelly_sum':>10} {'port_sum':>10} "
+        f"{'growth':>9} {'iters':>6} {'ms':>7} {'status':>13}",
+    ]
+
+    for ps in per_slate:
+        lines.append(
+            f"  {ps['slate']:<12} {ps['bets']:>5} {ps['kelly_sum']:>10.4f} "
+            f"{ps['portfolio_sum']:>10.4f} {ps['growth']:>9.5f} {ps['iters']:>6} "
+            f"{ps['elapsed_ms']:>7.1f} {ps['status']:>13}"
+        )
+
+    status = "SUCCESS" if summary["errors"] == 0 else "COMPLETED WITH ERRORS"
+    lines += ["", f"STATUS: {status}", "=" * 60]
+
+    with open(LOG_FILE, "a", encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n")
+
+
+# =========================
+# SCORE SCENARIOS
+# =========================
+
+def poisson_pmf(lam: float, max_goals: int) -> np.ndarray:
+    k = np.arange(max_goals + 1)
+    log_fact = np.concatenate([[0.0], np.cumsum(np.log(np.arange(1, max_goals + 1)))])
+    return np.exp(k * np.log(lam) - lam - log_fact)
+
+
+def final_score_distribution(away_goals: float, home_goals: float) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    pa = poisson_pmf(away_goals, MAX_GOALS)
+    ph = poisson_pmf(home_goals, MAX_GOALS)
+
+    grid = np.outer(pa, ph)
+    grid /= grid.sum()
+
+    away, home = np.indices(grid.shape)
+    away = away.ravel()
+    home = home.ravel()
+    prob = grid.ravel()
+
+    tie = away == home
+
+    # A regulation tie ends as a one-goal OT/shootout win for either side.
+    away_final = np.concatenate([away[~tie], away[tie] + 1, away[tie]])
+    home_final = np.concatenate([home[~tie], home[tie], home[tie] + 1])
+    prob_final = np.concatenate([prob[~tie], prob[tie] / 2, prob[tie] / 2])
+
+    return away_final, home_final, prob_final
+
+
+def bet_outcomes(bets: pd.DataFrame, away_score: np.ndarray, home_score: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Win / push masks of shape (n_scores, n_bets), graded like 01_nhl_results_grade."""
+    a = away_score[:, None].astype(float)
+    h = home_score[:, None].astype(float)
+
+    market = bets["market_type"].to_numpy()[None, :]
+    side = bets["bet_side"].to_numpy()[None, :]
+    line = pd.to_numeric(bets["line"], errors="coerce").fillna(0.0).to_numpy()[None, :]
+
+    ml_diff = np.where(side == "home", h - a, a - h)
+    pl_diff = ml_diff + line
+    total_diff = (a + h) - line
+    total_diff = np.where(side == "under", -total_diff, total_diff)
+
+    diff = np.select(
+        [market == "moneyline", market == "puck_line", market == "total"],
+        [ml_diff, pl_diff, total_diff],
+        default=np.nan,
+    )
+
+    push = np.abs(diff) < 1e-9
+    win = (diff > 0) & ~push
+
+    return win, push
+
+
+def rake_to_marginals(prob: np.ndarray, win: np.ndarray, targets: np.ndarray, deadline: float) -> np.ndarray | None:
+    """Minimum-KL reweighting of score probabilities so each bet's P(win) matches its model_prob.
+
+    None if the deadline passes first.
+    """
+    w = prob.copy()
+
+    for _ in range(RAKE_ITERS):
+        if time.perf_counter() >= deadline:
+            return None
+
+        worst = 0.0
+
+        for j in range(win.shape[1]):
+            p_win = w[win[:, j]].sum()
+            p_other = 1.0 - p_win
+            t = targets[j]
+
+            if p_win <= 0 or p_other <= 0:
+                continue
+
+            worst = max(worst, abs(p_win - t))
+            w = np.where(win[:, j], w * (t / p_win), w * ((1.0 - t) / p_other))
+
+        if worst < RAKE_TOL:
+            break
+
+    return w / w.sum()
+
+
+def build_returns(
+    bets: pd.DataFrame,
+    projections: dict,
+    rng: np.random.Generator,
+    deadline: float,
+) -> tuple[np.ndarray | None, int]:
+    """Per-scenario net return of one unit staked on each bet, shape (N_SCENARIOS, n_bets).
+
+    None instead of the matrix if the deadline passes before every game is sampled.
+    """
+    returns = np.zeros((N_SCENARIOS, len(bets)), dtype="float64")
+    payout = bets["dk_odds_decimal"].to_numpy(dtype="float64") - 1.0
+    targets = bets["model_prob"].to_numpy(dtype="float64")
+    no_projection = 0
+
+    for game_id, idx in bets.groupby("game_id", sort=True).indices.items():
+        if time.perf_counter() >= deadline:
+            return None, no_projection
+
+        game_bets = bets.iloc[idx]
+        proj = projections.get(str(game_id))
+
+        if proj is None:
+            no_projection += 1
+            _log(f"game_id={game_id} has no projected goals — sizing its bets as independent", "WARN")
+            u = rng.random((N_SCENARIOS, len(idx)))
+            win = u < targets[idx]
+            push = np.zeros_like(win)
+        else:
+            away_final, home_final, prob = final_score_distribution(*proj)
+            cell_win, _ = bet_outcomes(game_bets, away_final, home_final)
+            prob = rake_to_marginals(prob, cell_win, targets[idx], deadline)
+
+            if prob is None:
+                return None, no_projection
+
+            draws = rng.choice(len(prob), size=N_SCENARIOS, p=prob)
+            win, push = bet_outcomes(game_bets, away_final[draws], home_final[draws])
+
+        returns[:, idx] = np.where(win, payout[idx], np.where(push, 0.0, -1.0))
+
+    return returns, no_projection
+
+
+# =========================
+# OPTIMIZER
+# =========================
+
+def project_capped(f: np.ndarray, cap: float) -> np.ndarray:
+    """Euclidean projection onto {f >= 0, sum(f) <= cap}."""
+    f = np.maximum(f, 0.0)
+
+    if f.sum() <= cap:
+        return f
+
+    u = np.sort(f)[::-1]
+    css = np.cumsum(u) - cap
+    rho = np.nonzero(u - css / np.arange(1, len(u) + 1) > 0)[0][-1]
+    theta = css[rho] / (rho + 1)
+
+    return np.maximum(f - theta, 0.0)
+
+
+def growth(returns: np.ndarray, f: np.ndarray) -> float:
+    wealth = 1.0 + returns @ f
+    if np.any(wealth <= 0):
+        return -np.inf
+    return float(np.mean(np.log(wealth)))
+
+
+def line_search(returns: np.ndarray, f: np.ndarray, g_val: float, grad: np.ndarray, step: np.ndarray):
+    t = 1.0
+
+    while t > 1e-8:
+        cand = project_capped(f + t * step, MAX_SLATE_FRACTION)
+        cand_val = growth(returns, cand)
+
+        if cand_val > g_val and cand_val >= g_val + 1e-4 * float(grad @ (cand - f)):
+            return cand, cand_val
+
+        t *= 0.5
+
+    return None, g_val
+
+
+def greedy_stakes(bets: pd.DataFrame) -> np.ndarray:
+    """Each bet's own Kelly fraction, scaled down pro rata to the slate cap."""
+    dec = bets["dk_odds_decimal"].to_numpy(dtype="float64")
+    prob = bets["model_prob"].to_numpy(dtype="float64")
+
+    f = np.maximum((prob * dec - 1.0) / (dec - 1.0), 0.0)
+    total = f.sum()
+
+    return f * (MAX_SLATE_FRACTION / total) if total > MAX_SLATE_FRACTION else f
+
+
+def solve_growth_optimal(returns: np.ndarray, deadline: float) -> tuple[np.ndarray, float, int, str]:
+    """Projected Newton ascent on mean log wealth, stopping at the slate deadline.
+
+    Falls back to a projected gradient step whenever the Newton direction does not
+    improve growth, which happens once the slate fraction cap becomes binding.
+    """
+    n = returns.shape[1]
+    f = np.zeros(n)
+    g_val = 0.0
+
+    for it in range(1, MAX_NEWTON_ITERS + 1):
+        if time.perf_counter() >= deadline:
+            return f, g_val, it - 1, "budget"
+
+        inv_w = 1.0 / (1.0 + returns @ f)
+        grad = returns.T @ inv_w / len(returns)
+        scaled = returns * inv_w[:, None]
+        neg_hess = scaled.T @ scaled / len(returns)
+
+        free = (f > 0) | (grad > 0)
+        if not free.any():
+            return f, g_val, it, "converged"
+
+        newton = np.zeros(n)
+        newton[free] = np.linalg.lstsq(neg_hess[np.ix_(free, free)], grad[free], rcond=None)[0]
+        gradient = grad / max(float(np.max(np.diag(neg_hess))), 1e-12)
+
+        for step in (newton, gradient):
+            cand, cand_val = line_search(returns, f, g_val, grad, step)
+            if cand is not None:
+                break
+
+        if cand is None or cand_val - g_val < 1e-14:
+            return f, g_val, it, "converged"
+
+        f, g_val = cand, cand_val
+
+    return f, g_val, MAX_NEWTON_ITERS, "max_iter"
+
+
+# =========================
+# INPUTS
+# =========================
+
+def load_projections(slate_key: str) -> dict:
+    path = MERGE_DIR / f"{slate_key}_NHL_merged.csv"
+
+    if not path.exists():
+        _log(f"{slate_key} merged file missing — no projected goals: {path}", "WARN")
+        return {}
+
+    df = read_typed_csv(path, MERGED, usecols=True)
+
+    ok = (df["away_projected_goals"] > 0) & (df["home_projected_goals"] > 0)
+    df = df[ok]
+
+    return {
+        str(gid).strip(): (float(a), float(h))
+        for gid, a, h in zip(df["game_id"], df["away_projected_goals"], df["home_projected_goals"])
+    }
+
+
+def slate_seed(slate_key: str) -> int:
+    return zlib.crc32(slate_key.encode("utf-8"))
+
+
+# =========================
+# DRIVER
+# =========================
+
+def process_slate(path: Path, summary: dict) -> dict:
+    slate_key = path.name.replace("_NHL.csv", "")
+    start = time.perf_counter()
+    deadline = start + SLATE_TIME_BUDGET_SEC
+
+    ps = {
+        "slate": slate_key,
+        "bets": 0,
+        "kelly_sum": 0.0,
+        "portfolio_sum": 0.0,
+        "growth": 0.0,
+        "iters": 0,
+        "elapsed_ms": 0.0,
+        "status": "empty",
+    }
+
+    df = read_typed_csv(path, SELECTED)
+    df["portfolio_kelly"] = 0.0
+
+    sizable = (
+        df["dk_odds_decimal"].gt(1)
+        & df["model_prob"].gt(0)
+        & df["model_prob"].lt(1)
+    )
+
+    bets = df[sizable].reset_index()
+    ps["bets"] = len(bets)
+    ps["kelly_sum"] = float(df["kelly"].fillna(0).sum())
+
+    if not bets.empty:
+        rng = np.random.default_rng(slate_seed(slate_key))
+        returns, no_projection = build_returns(bets, load_projections(slate_key), rng, deadline)
+        summary["no_projection"] += no_projection
+
+        if returns is None:
+            f, g_val, iters, status = greedy_stakes(bets), float("nan"), 0, "budget_greedy"
+        else:
+            f, g_val, iters, status = solve_growth_optimal(returns, deadline)
+
+            if status == "budget":
+                greedy = greedy_stakes(bets)
+                greedy_val = growth(returns, greedy)
+
+                if greedy_val > g_val:
+                    f, g_val, status = greedy, greedy_val, "budget_greedy"
+
+        df.loc[bets["index"].to_numpy(), "portfolio_kelly"] = f
+
+        ps["portfolio_sum"] = float(f.sum())
+        ps["growth"] = g_val
+        ps["iters"] = iters
+        ps["status"] = status
+
+        if status.startswith("budget"):
+            summary["budget_hit"] += 1
+            _log(
+                f"{slate_key} hit {SLATE_TIME_BUDGET_SEC}s budget after {iters} iterations "
+                f"| using {'greedy' if status == 'budget_greedy' else 'last feasible'} stakes",
+                "WARN",
+            )
+        else:
+            summary["converged"] += 1
+
+    ps["elapsed_ms"] = (time.perf_counter() - start) * 1000
+
+    out_path = OUTPUT_DIR / f"{slate_key}_NHL_portfolio.csv"
+    changed = write_csv(df[OUTPUT_COLUMNS], out_path)
+
+    summary["bets_sized"] += ps["bets"]
+
+    verb = "WROTE" if changed else "UNCHANGED"
+    _log(
+        f"{verb}: {out_path} | bets={ps['bets']} | kelly_sum={ps['kelly_sum']:.4f} "
+        f"| portfolio_sum={ps['portfolio_sum']:.4f} | status={ps['status']}"
+    )
+
+    return ps
+
+
+# =========================
+# MAIN
+# =========================
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Size NHL slate portfolios from selected bets.")
+    add_dates_argument(parser)
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+
+    OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+    ERROR_DIR.mkdir(parents=True, exist_ok=True)
+
+    with open(LOG_FILE, "w", encoding="utf-8") as f:
+        f.write(f"=== hockey_portfolio_kelly RUN {_now()} ===\n")
+
+    summary = {
+        "slates_processed": 0,
+        "bets_sized": 0,
+        "converged": 0,
+        "budget_hit": 0,
+        "no_projection": 0,
+        "errors": 0,
+    }
+
+    per_slate = []
+
+    _log(f"SELECT_DIR : {SELECT_DIR}")
+    _log(f"MERGE_DIR  : {MERGE_DIR}")
+    _log(f"OUTPUT_DIR : {OUTPUT_DIR}")
+    _log(f"N_SCENARIOS={N_SCENARIOS} SLATE_TIME_BUDGET_SEC={SLATE_TIME_BUDGET_SEC} MAX_SLATE_FRACTION={MAX_SLATE_FRACTION}")
+
+    try:
+        if args.dates:
+            _log(f"DATES      : {', '.join(sorted(args.dates))}")
+
+        for path in for_dates(sorted(SELECT_DIR.glob("*_NHL.csv")), args.dates):
+            _log(f"--- SLATE: {path.name}")
+
+            try:
+                per_slate.append(process_slate(path, summary))
+                summary["slates_processed"] += 1
+            except Exception as e:
+                _log(f"{path.name} FAILED: {e}\n{traceback.format_exc()}", "ERROR")
+                summary["errors"] += 1
+
+        kept = [OUTPUT_DIR / f"{ps['slate']}_NHL_portfolio.csv" for ps in per_slate]
+        removed = remove_stale(OUTPUT_DIR, "*.csv", keep=kept, dates=args.dates)
+        _log(f"Removed stale outputs: {len(removed)}")
+
+    except Exception as e:
+        _log(f"FATAL: {e}\n{traceback.format_exc()}", "ERROR")
+        _write_summary(summary, per_slate)
+        raise
+
+    _write_summary(summary, per_slate)
+    print("hockey_portfolio_kelly complete.")
+
+
+if __name__ == "__main__":
+    run_main(main, LOG_FILE)
@@ -1,18 +1,31 @@
 #!/usr/bin/env python3
 # docs/win/hockey/nhl/scripts/04_select/hockey_select_bets.py
 
+import argparse
 import sys
 import traceback
 from datetime import datetime, UTC
+from functools import partial
 from pathlib import Path
 
+import numpy as np
 import pandas as pd
-import yaml
+
+from market_rules import MARKET_SIDES, load_rules, prune_rules_cache
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from nhl_output import remove_stale, write_csv
+from nhl_parallel import add_dates_argument, add_workers_argument, log_line, map_slates
+from nhl_profile import run_main
+from nhl_schema import EV_KELLY, MARKET_FIELDS, SELECTED, read_typed_csv
+from nhl_validate import ODDS_DECIMAL, PROBABILITY, Rules, report, validate
 
 
 INPUT_DIR = Path("docs/win/hockey/nhl/03_edges/ev_kelly")
 OUTPUT_DIR = Path("docs/win/hockey/nhl/04_select")
 CONFIG_PATH = Path("docs/win/hockey/nhl/config/markets.yaml")
+RULES_CACHE_DIR = OUTPUT_DIR / ".rules_cache"
 
 ERROR_DIR = Path("docs/win/hockey/nhl/errors/04_select")
 LOG_FILE = ERROR_DIR / "hockey_select_bets.txt"
@@ -26,25 +39,23 @@ BLOCKED_PATH_PARTS = {
     "reports",
 }
 
-OUTPUT_COLUMNS = [
-    "sport",
-    "league",
-    "game_date",
-    "game_time",
-    "game_id",
-    "away_team",
-    "home_team",
-    "market_type",
-    "bet_side",
-    "line",
-    "take_bet",
-    "dk_odds_american",
-    "dk_odds_decimal",
-    "model_prob",
-    "edge",
-    "ev",
-    "kelly",
-]
+OUTPUT_COLUMNS = list(SELECTED)
+
+# One row per game and one slate date per ev_kelly file; every price column
+# (dk, fair, juiced) above 1 and every probability strictly inside (0, 1).
+MARKET_RULES = {
+    market_type: Rules(
+        required=("game_id",),
+        not_null=("game_id",),
+        unique=(("game_id",),),
+        single_value=("game_date",),
+        ranges={
+            **{col: ODDS_DECIMAL for col in schema if "decimal" in col and "edge" not in col},
+            **{col: PROBABILITY for col in schema if col.endswith(f"_prob_{market_type}")},
+        },
+    )
+    for market_type, schema in EV_KELLY.items()
+}
 
 
 def _now():
@@ -52,8 +63,7 @@ def _now():
 
 
 def _log(msg: str, level: str = "INFO"):
-    with open(LOG_FILE, "a", encoding="utf-8") as f:
-        f.write(f"{_now()} | {level:<5} | {msg.rstrip()}\n")
+    log_line(LOG_FILE, f"{_now()} | {level:<5} | {msg.rstrip()}\n")
 
 
 def fail(msg: str):
@@ -77,7 +87,11 @@ def assert_read_path(path: Path):
     ]
 
     p = path.as_posix()
-    if not (p.startswith(INPUT_DIR.as_posix() + "/") or p == CONFIG_PATH.as_posix()):
+    if not (
+        p.startswith(INPUT_DIR.as_posix() + "/")
+        or p == CONFIG_PATH.as_posix()
+        or p.startswith(RULES_CACHE_DIR.as_posix() + "/")
+    ):
         fail(f"Blocked read path outside allowed Stage 04 inputs/config: {path}")
 
 
@@ -109,29 +123,23 @@ def reset_log():
 
 def load_config():
     assert_read_path(CONFIG_PATH)
+    assert_read_path(RULES_CACHE_DIR / "dummy.npz")
+    assert_write_path(RULES_CACHE_DIR / "dummy.npz")
 
     if not CONFIG_PATH.exists():
         fail(f"Config file not found: {CONFIG_PATH}")
 
     try:
-        with open(CONFIG_PATH, "r", encoding="utf-8") as f:
-            raw = yaml.safe_load(f)
-    except yaml.YAMLError as e:
-        fail(f"Malformed YAML in {CONFIG_PATH}: {e}")
-
-    try:
-        return raw["markets"]["nhl"]
-    except Exception as e:
-        fail(f"Missing expected config path markets -> nhl in {CONFIG_PATH}: {e}")
+        rules, cache_hit = load_rules(CONFIG_PATH, RULES_CACHE_DIR)
+    except ValueError as e:
+        fail(f"Invalid config {CONFIG_PATH}: {e}")
 
+    _log(
+        f"Compiled rules: sha256={rules.config_hash[:16]} | "
+        f"cache={'hit' if cache_hit else 'miss'}"
+    )
 
-def fv(x):
-    try:
-        if pd.isna(x):
-            return None
-        return float(x)
-    except Exception:
-        return None
+    return rules
 
 
 def sv(x):
@@ -140,49 +148,6 @@ def sv(x):
     return str(x)
 
 
-def in_range(val, ranges):
-    if val is None:
-        return False
-    if ranges is None:
-        return True
-    return any(float(lo) <= val <= float(hi) for lo, hi in ranges)
-
-
-def check_side_rules(
-    *,
-    rules: dict,
-    odds,
-    line,
-    prob,
-    edge,
-    ev,
-    kelly,
-    check_line: bool,
-):
-    if not rules.get("enabled", False):
-        return False
-
-    if not in_range(odds, rules.get("odds_bands", [])):
-        return False
-
-    if check_line and not in_range(line, rules.get("line_bands", [])):
-        return False
-
-    if not in_range(prob, rules.get("prob_bands", [])):
-        return False
-
-    if not in_range(edge, rules.get("edge_bands", None)):
-        return False
-
-    if not in_range(ev, rules.get("ev_bands", [])):
-        return False
-
-    if not in_range(kelly, rules.get("kelly_bands", [])):
-        return False
-
-    return True
-
-
 def require_columns(df: pd.DataFrame, cols: list[str], market_type: str, path: Path):
     missing = [c for c in cols if c not in df.columns]
     if missing:
@@ -196,244 +161,131 @@ def read_market_file(path: Path, market_type: str):
     assert_read_path(path)
 
     try:
-        df = pd.read_csv(path)
+        df = read_typed_csv(path, EV_KELLY[market_type])
     except Exception as e:
         fail(f"Failed reading {market_type} file: {path} | {e}")
 
-    if "game_id" not in df.columns:
-        fail(f"{market_type} file missing game_id: {path}")
+    violations = validate(df, MARKET_RULES[market_type], path)
+    if violations:
+        fail(f"{market_type} file failed validation\n{report(violations)}")
 
-    if df["game_id"].isna().any():
-        fail(f"{market_type} file has blank game_id: {path}")
+    return df
 
-    dupes = df[df.duplicated(subset=["game_id"], keep=False)]
-    if not dupes.empty:
-        ids = sorted(dupes["game_id"].astype(str).unique().tolist())
-        fail(f"multiple {market_type} rows for one game_id | file={path} | game_id={ids}")
 
-    return df
+MARKET_ORDER = ["moneyline", "puck_line", "total"]
 
+META_COLUMNS = [
+    "sport",
+    "league",
+    "game_date",
+    "game_time",
+    "away_team",
+    "home_team",
+]
 
-def get_base_meta(row):
-    return {
-        "sport": sv(row.get("sport")),
-        "league": sv(row.get("league")),
-        "game_date": sv(row.get("game_date")),
-        "game_time": sv(row.get("game_time")),
-        "game_id": row.get("game_id"),
-        "away_team": sv(row.get("away_team")),
-        "home_team": sv(row.get("home_team")),
-    }
+
+def numeric(df: pd.DataFrame, col: str) -> np.ndarray:
+    return df[col].to_numpy(dtype="float64", na_value=np.nan)
 
 
-def apply_pick_preference(candidates: list[dict], pick_preference: str, slate_key: str, game_id, market_type: str):
-    if not candidates:
-        return []
+def side_mask(side_rules, values: dict) -> np.ndarray:
+    bands = side_rules.bands
 
-    if pick_preference == "all":
+    mask = bands["odds_bands"].mask(values["odds"])
+
+    if values["line"] is not None:
+        mask &= bands["line_bands"].mask(values["line"])
+
+    mask &= bands["prob_bands"].mask(values["prob"])
+    mask &= bands["edge_bands"].mask(values["edge"])
+    mask &= bands["ev_bands"].mask(values["ev"])
+    mask &= bands["kelly_bands"].mask(values["kelly"])
+
+    return mask
+
+
+def apply_pick_preference(candidates: pd.DataFrame, pick_preference: str, slate_key: str, market_type: str):
+    if candidates.empty or pick_preference == "all":
         return candidates
 
-    if pick_preference == "best_ev":
-        max_ev = max(c["ev"] for c in candidates)
-        winners = [c for c in candidates if c["ev"] == max_ev]
-    elif pick_preference == "best_prob":
-        max_prob = max(c["model_prob"] for c in candidates)
-        winners = [c for c in candidates if c["model_prob"] == max_prob]
-    else:
-        fail(
-            f"Invalid pick_preference for {market_type}: {pick_preference} | "
-            f"slate={slate_key} | game_id={game_id}"
-        )
+    key = "ev" if pick_preference == "best_ev" else "model_prob"
+
+    best = candidates.groupby("_gid", sort=False)[key].transform("max")
+    winners = candidates[candidates[key] == best]
 
-    if len(winners) > 1:
+    tie_counts = winners["_gid"].value_counts()
+    ties = sorted(tie_counts[tie_counts > 1].index.tolist())
+
+    if ties:
         fail(
             f"pick_preference tie for {market_type} | preference={pick_preference} | "
-            f"slate={slate_key} | game_id={game_id}"
+            f"slate={slate_key} | game_id={ties[0]}"
         )
 
     return winners
 
 
-def process_moneyline(row, config, slate_key):
-    market_config = config.get("moneyline", {})
-    if not market_config.get("enabled", False):
-        return []
-
-    require_keys = ["home", "away"]
-    for key in require_keys:
-        if key not in market_config:
-            fail(f"moneyline config missing side: {key}")
-
-    candidates = []
-    meta = get_base_meta(row)
-
-    for side in ["home", "away"]:
-        side_rules = market_config[side]
-
-        odds = fv(row.get(f"{side}_dk_moneyline_american"))
-        dec = fv(row.get(f"{side}_dk_moneyline_decimal"))
-        prob = fv(row.get(f"{side}_model_prob_moneyline"))
-        edge = fv(row.get(f"{side}_edge_decimal_moneyline"))
-        ev = fv(row.get(f"{side}_ev_moneyline"))
-        kelly = fv(row.get(f"{side}_kelly_moneyline"))
-
-        if not check_side_rules(
-            rules=side_rules,
-            odds=odds,
-            line=None,
-            prob=prob,
-            edge=edge,
-            ev=ev,
-            kelly=kelly,
-            check_line=False,
-        ):
-            continue
+def select_market(df, market_type: str, rules, slate_key: str) -> pd.DataFrame:
+    market_rules = rules.markets[market_type]
 
-        candidates.append({
-            **meta,
-            "market_type": "moneyline",
-            "bet_side": side,
-            "line": "",
-            "take_bet": f"{side}_moneyline",
-            "dk_odds_american": odds,
-            "dk_odds_decimal": dec,
-            "model_prob": prob,
-            "edge": edge,
-            "ev": ev,
-            "kelly": kelly,
-        })
-
-    return apply_pick_preference(
-        candidates,
-        market_config.get("pick_preference", "all"),
-        slate_key,
-        row.get("game_id"),
-        "moneyline",
-    )
+    if df is None or not market_rules.enabled:
+        return pd.DataFrame(columns=OUTPUT_COLUMNS + ["_gid", "_market", "_side"])
+
+    fields = MARKET_FIELDS[market_type]
+    parts = []
 
+    for side_idx, side in enumerate(MARKET_SIDES[market_type]):
+        side_rules = market_rules.sides[side]
 
-def process_puck_line(row, config, slate_key):
-    market_config = config.get("puck_line", {})
-    if not market_config.get("enabled", False):
-        return []
-
-    require_keys = ["home", "away"]
-    for key in require_keys:
-        if key not in market_config:
-            fail(f"puck_line config missing side: {key}")
-
-    candidates = []
-    meta = get_base_meta(row)
-
-    for side in ["home", "away"]:
-        side_rules = market_config[side]
-
-        odds = fv(row.get(f"{side}_dk_puck_line_american"))
-        dec = fv(row.get(f"{side}_dk_puck_line_decimal"))
-        line = fv(row.get(f"{side}_puck_line"))
-        prob = fv(row.get(f"{side}_model_prob_puck_line"))
-        edge = fv(row.get(f"{side}_edge_decimal_puck_line"))
-        ev = fv(row.get(f"{side}_ev_puck_line"))
-        kelly = fv(row.get(f"{side}_kelly_puck_line"))
-
-        if not check_side_rules(
-            rules=side_rules,
-            odds=odds,
-            line=line,
-            prob=prob,
-            edge=edge,
-            ev=ev,
-            kelly=kelly,
-            check_line=True,
-        ):
+        if not side_rules.enabled:
             continue
 
-        candidates.append({
-            **meta,
-            "market_type": "puck_line",
-            "bet_side": side,
-            "line": line,
-            "take_bet": f"{side}_puck_line",
-            "dk_odds_american": odds,
-            "dk_odds_decimal": dec,
-            "model_prob": prob,
-            "edge": edge,
-            "ev": ev,
-            "kelly": kelly,
-        })
-
-    return apply_pick_preference(
-        candidates,
-        market_config.get("pick_preference", "all"),
-        slate_key,
-        row.get("game_id"),
-        "puck_line",
-    )
+        values = {
+            name: numeric(df, col.format(side=side)) if col else None
+            for name, col in fields.items()
+        }
 
+        mask = side_mask(side_rules, values)
 
-def process_total(row, config, slate_key):
-    market_config = config.get("total", {})
-    if not market_config.get("enabled", False):
-        return []
-
-    require_keys = ["over", "under"]
-    for key in require_keys:
-        if key not in market_config:
-            fail(f"total config missing side: {key}")
-
-    candidates = []
-    meta = get_base_meta(row)
-
-    for side in ["over", "under"]:
-        side_rules = market_config[side]
-
-        odds = fv(row.get(f"dk_total_{side}_american"))
-        dec = fv(row.get(f"dk_total_{side}_decimal"))
-        line = fv(row.get("total"))
-        prob = fv(row.get(f"{side}_model_prob_total"))
-        edge = fv(row.get(f"{side}_edge_decimal_total"))
-        ev = fv(row.get(f"{side}_ev_total"))
-        kelly = fv(row.get(f"{side}_kelly_total"))
-
-        if not check_side_rules(
-            rules=side_rules,
-            odds=odds,
-            line=line,
-            prob=prob,
-            edge=edge,
-            ev=ev,
-            kelly=kelly,
-            check_line=True,
-        ):
+        if not mask.any():
             continue
 
-        candidates.append({
-            **meta,
-            "market_type": "total",
-            "bet_side": side,
-            "line": line,
-            "take_bet": f"{side}_total",
-            "dk_odds_american": odds,
-            "dk_odds_decimal": dec,
-            "model_prob": prob,
-            "edge": edge,
-            "ev": ev,
-            "kelly": kelly,
-        })
-
-    return apply_pick_preference(
-        candidates,
-        market_config.get("pick_preference", "all"),
-        slate_key,
-        row.get("game_id"),
-        "total",
-    )
+        picked = df.loc[mask]
+
+        part = pd.DataFrame({col: picked[col].map(sv).to_numpy() for col in META_COLUMNS})
+        part["game_id"] = picked["game_id"].to_numpy()
+        part["market_type"] = market_type
+        part["bet_side"] = side
+        part["line"] = values["line"][mask] if values["line"] is not None else ""
+        part["take_bet"] = f"{side}_{market_type}"
+        part["dk_odds_american"] = values["odds"][mask]
+        part["dk_odds_decimal"] = values["dec"][mask]
+        part["model_prob"] = values["prob"][mask]
+        part["edge"] = values["edge"][mask]
+        part["ev"] = values["ev"][mask]
+        part["kelly"] = values["kelly"][mask]
+        part["_gid"] = picked["game_id"].astype(str).to_numpy()
+        part["_market"] = MARKET_ORDER.index(market_type)
+        part["_side"] = side_idx
+
+        parts.append(part)
+
+    if not parts:
+        return pd.DataFrame(columns=OUTPUT_COLUMNS + ["_gid", "_market", "_side"])
+
+    candidates = pd.concat(parts, ignore_index=True)
+    candidates["line"] = candidates["line"].astype(object)
+
+    return apply_pick_preference(candidates, market_rules.pick_preference, slate_key, market_type)
+
 
+def remove_stale_outputs(summary_rows, dates=None):
+    assert_write_path(OUTPUT_DIR / "dummy.csv")
+
+    kept = [OUTPUT_DIR / f"{r['slate']}_NHL.csv" for r in summary_rows]
+    removed = remove_stale(OUTPUT_DIR, "*.csv", keep=kept, dates=dates)
 
-def wipe_outputs():
-    for old in OUTPUT_DIR.glob("*.csv"):
-        assert_write_path(old)
-        old.unlink()
+    _log(f"Removed stale outputs: {len(removed)}")
 
 
 def find_slates():
@@ -525,22 +377,28 @@ def validate_market_columns(df, market_type, path):
     require_columns(df, cols, market_type, path)
 
 
-def row_for_game(df, game_id, market_type):
-    if df is None:
-        return None
-
-    match = df[df["game_id"].astype(str) == str(game_id)]
+def slate_picks(ml_df, pl_df, td_df, config, slate_key: str) -> pd.DataFrame:
+    picks = [
+        select_market(ml_df, "moneyline", config, slate_key),
+        select_market(pl_df, "puck_line", config, slate_key),
+        select_market(td_df, "total", config, slate_key),
+    ]
+    picks = [p for p in picks if not p.empty]
 
-    if len(match) > 1:
-        fail(f"multiple {market_type} rows for one game_id | game_id={game_id}")
+    if picks:
+        final_rows = (
+            pd.concat(picks, ignore_index=True)
+            .sort_values(["_gid", "_market", "_side"], kind="mergesort")
+        )
+    else:
+        final_rows = pd.DataFrame(columns=OUTPUT_COLUMNS)
 
-    if len(match) == 0:
-        return None
+    return final_rows[OUTPUT_COLUMNS].reset_index(drop=True)
 
-    return match.iloc[0]
 
+def process_slate(slate, config):
+    slate_key, paths = slate
 
-def process_slate(slate_key, paths, config):
     _log(f"--- SLATE: {slate_key}")
 
     ml_path = paths.get("moneyline")
@@ -566,42 +424,20 @@ def process_slate(slate_key, paths, config):
     else:
         _log(f"{slate_key} missing total file — skipping total only", "WARN")
 
-    game_ids = set()
-
-    for df in [ml_df, pl_df, td_df]:
-        if df is not None:
-            game_ids.update(df["game_id"].astype(str).tolist())
-
-    game_ids = sorted(game_ids)
-
-    final_rows = []
-
-    for game_id in game_ids:
-        ml_row = row_for_game(ml_df, game_id, "moneyline")
-        pl_row = row_for_game(pl_df, game_id, "puck_line")
-        td_row = row_for_game(td_df, game_id, "total")
-
-        if ml_row is not None:
-            final_rows.extend(process_moneyline(ml_row, config, slate_key))
-
-        if pl_row is not None:
-            final_rows.extend(process_puck_line(pl_row, config, slate_key))
-
-        if td_row is not None:
-            final_rows.extend(process_total(td_row, config, slate_key))
+    df_out = slate_picks(ml_df, pl_df, td_df, config, slate_key)
 
     out_path = OUTPUT_DIR / f"{slate_key}_NHL.csv"
     assert_write_path(out_path)
 
-    df_out = pd.DataFrame(final_rows, columns=OUTPUT_COLUMNS)
-    df_out.to_csv(out_path, index=False)
+    changed = write_csv(df_out, out_path)
 
     ml_count = int((df_out["market_type"] == "moneyline").sum()) if not df_out.empty else 0
     pl_count = int((df_out["market_type"] == "puck_line").sum()) if not df_out.empty else 0
     td_count = int((df_out["market_type"] == "total").sum()) if not df_out.empty else 0
 
+    verb = "WROTE" if changed else "UNCHANGED"
     _log(
-        f"WROTE: {out_path} | bets={len(df_out)} | "
+        f"{verb}: {out_path} | bets={len(df_out)} | "
         f"moneyline={ml_count} | puck_line={pl_count} | total={td_count}"
     )
 
@@ -651,7 +487,16 @@ def write_summary(summary_rows):
         f.write("\n".join(lines) + "\n")
 
 
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Select NHL bets from EV/Kelly files.")
+    add_workers_argument(parser)
+    add_dates_argument(parser)
+    return parser.parse_args()
+
+
 def main():
+    args = parse_args()
+
     ensure_dirs()
     reset_log()
 
@@ -663,18 +508,27 @@ def main():
         _log(f"CONFIG_PATH: {CONFIG_PATH}")
         _log(f"LOG_FILE: {LOG_FILE}")
 
-        wipe_outputs()
-
         slates = find_slates()
         _log(f"Slates found: {len(slates)}")
 
-        summary_rows = []
+        if args.dates:
+            slates = {key: paths for key, paths in slates.items() if key in args.dates}
+            _log(f"Dates: {', '.join(sorted(args.dates))} | slates: {len(slates)}")
 
-        for slate_key in sorted(slates):
-            summary_rows.append(process_slate(slate_key, slates[slate_key], config))
+        summary_rows = map_slates(
+            partial(process_slate, config=config),
+            sorted(slates.items()),
+            args.workers,
+            LOG_FILE,
+        )
 
+        remove_stale_outputs(summary_rows, args.dates)
         write_summary(summary_rows)
 
+        # Workers are done with the cache; drop keys for older configs.
+        for path in prune_rules_cache(RULES_CACHE_DIR, config):
+            _log(f"PRUNED: {path}")
+
         print("hockey_select_bets complete.")
 
     except SystemExit:
@@ -688,4 +542,4 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
+    run_main(main, LOG_FILE)
@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+# docs/win/hockey/nhl/scripts/04_select/market_rules.py
+
+"""
+Compiled form of config/markets.yaml.
+
+Every band list is turned into a pair of float64 arrays once, so selection can
+apply rules as vectorized masks over a whole market file. The compiled rules are
+cached on disk as .npz keyed by COMPILER_VERSION and the sha256 of the YAML
+bytes; config errors are raised as ValueError while compiling, before any slate
+is read.
+
+Cache files are written atomically and load_rules never removes another key, so
+process-pool workers and replays can share a cache directory. Old keys are
+removed by prune_rules_cache once a run is done with the directory.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import tempfile
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+import yaml
+
+
+MARKET_SIDES = {
+    "moneyline": ("home", "away"),
+    "puck_line": ("home", "away"),
+    "total": ("over", "under"),
+}
+
+PICK_PREFERENCES = {"all", "best_ev", "best_prob"}
+
+# Bump when the compiled form or the npz layout changes, so caches written by an
+# older compiler are never read back.
+COMPILER_VERSION = 1
+
+# Band keys, and whether a missing key means "no constraint" (True) or
+# "nothing passes" (False). An explicit null always means "no constraint".
+BAND_KEYS = {
+    "odds_bands": False,
+    "line_bands": False,
+    "prob_bands": False,
+    "edge_bands": True,
+    "ev_bands": False,
+    "kelly_bands": False,
+}
+
+
+@dataclass(frozen=True)
+class BandSet:
+    lo: np.ndarray
+    hi: np.ndarray
+    unbounded: bool = False
+
+    def mask(self, values: np.ndarray) -> np.ndarray:
+        values = np.asarray(values, dtype="float64")
+        present = ~np.isnan(values)
+
+        if self.unbounded:
+            return present
+
+        v = values[:, None]
+        inside = (self.lo[None, :] <= v) & (v <= self.hi[None, :])
+        return present & inside.any(axis=1)
+
+
+@dataclass(frozen=True)
+class SideRules:
+    enabled: bool
+    bands: dict[str, BandSet]
+
+
+@dataclass(frozen=True)
+class MarketRules:
+    enabled: bool
+    pick_preference: str
+    sides: dict[str, SideRules]
+
+
+@dataclass(frozen=True)
+class CompiledRules:
+    config_hash: str
+    markets: dict[str, MarketRules]
+
+
+def config_hash(raw_bytes: bytes) -> str:
+    return hashlib.sha256(raw_bytes).hexdigest()
+
+
+def _compile_bands(rules: dict, key: str, where: str) -> BandSet:
+    raw = rules.get(key, None if BAND_KEYS[key] else [])
+
+    if raw is None:
+        return BandSet(np.empty(0), np.empty(0), unbounded=True)
+
+    if not isinstance(raw, list):
+        raise ValueError(f"{where}.{key} must be a list of [lo, hi] pairs, got {type(raw).__name__}")
+
+    lo = []
+    hi = []
+
+    for i, band in enumerate(raw):
+        if not isinstance(band, (list, tuple)) or len(band) != 2:
+            raise ValueError(f"{where}.{key}[{i}] must be a [lo, hi] pair, got {band!r}")
+
+        try:
+            band_lo, band_hi = float(band[0]), float(band[1])
+        except (TypeError, ValueError):
+            raise ValueError(f"{where}.{key}[{i}] has non-numeric bounds: {band!r}") from None
+
+        if band_lo > band_hi:
+            raise ValueError(f"{where}.{key}[{i}] has lo > hi: {band!r}")
+
+        lo.append(band_lo)
+        hi.append(band_hi)
+
+    return BandSet(np.array(lo, dtype="float64"), np.array(hi, dtype="float64"))
+
+
+def compile_config(config: dict) -> dict[str, MarketRules]:
+    if not isinstance(config, dict):
+        raise ValueError("markets -> nhl must be a mapping")
+
+    markets = {}
+
+    for market_type, sides in MARKET_SIDES.items():
+        market_config = config.get(market_type) or {}
+        enabled = bool(market_config.get("enabled", False))
+        pick_preference = market_config.get("pick_preference", "all")
+
+        if not enabled:
+            markets[market_type] = MarketRules(False, str(pick_preference), {})
+            continue
+
+        for side in sides:
+            if side not in market_config:
+                raise ValueError(f"{market_type} config missing side: {side}")
+
+        if pick_preference not in PICK_PREFERENCES:
+            raise ValueError(
+                f"Invalid pick_preference for {market_type}: {pick_preference} | "
+                f"expected one of {sorted(PICK_PREFERENCES)}"
+            )
+
+        side_rules = {}
+
+        for side in sides:
+            rules = market_config[side] or {}
+            where = f"{market_type}.{side}"
+
+            side_rules[side] = SideRules(
+                enabled=bool(rules.get("enabled", False)),
+                bands={key: _compile_bands(rules, key, where) for key in BAND_KEYS},
+            )
+
+        markets[market_type] = MarketRules(True, pick_preference, side_rules)
+
+    return markets
+
+
+def _to_npz_payload(markets: dict[str, MarketRules]) -> dict:
+    meta = {}
+    arrays = {}
+
+    for market_type, market in markets.items():
+        meta[market_type] = {
+            "enabled": market.enabled,
+            "pick_preference": market.pick_preference,
+            "sides": {},
+        }
+
+        for side, rules in market.sides.items():
+            meta[market_type]["sides"][side] = {
+                "enabled": rules.enabled,
+                "unbounded": [key for key, band in rules.bands.items() if band.unbounded],
+            }
+
+            for key, band in rules.bands.items():
+                arrays[f"{market_type}.{side}.{key}.lo"] = band.lo
+                arrays[f"{market_type}.{side}.{key}.hi"] = band.hi
+
+    arrays["meta"] = np.array(json.dumps(meta, sort_keys=True))
+    return arrays
+
+
+def _from_npz_payload(data) -> dict[str, MarketRules]:
+    meta = json.loads(str(data["meta"]))
+    markets = {}
+
+    for market_type, m in meta.items():
+        sides = {}
+
+        for side, s in m["sides"].items():
+            bands = {
+                key: BandSet(
+                    data[f"{market_type}.{side}.{key}.lo"],
+                    data[f"{market_type}.{side}.{key}.hi"],
+                    unbounded=key in s["unbounded"],
+                )
+                for key in BAND_KEYS
+            }
+            sides[side] = SideRules(s["enabled"], bands)
+
+        markets[market_type] = MarketRules(m["enabled"], m["pick_preference"], sides)
+
+    return markets
+
+
+def cache_path_for(cache_dir: Path, digest: str) -> Path:
+    return Path(cache_dir) / f"markets_v{COMPILER_VERSION}_{digest[:16]}.npz"
+
+
+def _write_cache(cache_path: Path, markets: dict[str, MarketRules]):
+    """Write to a private temporary file, then rename over cache_path."""
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(prefix=".markets_", suffix=".tmp", dir=cache_path.parent)
+
+    try:
+        with os.fdopen(fd, "wb") as f:
+            np.savez(f, **_to_npz_payload(markets))
+        os.replace(tmp, cache_path)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+
+
+def load_rules(config_path: Path, cache_dir: Path) -> tuple[CompiledRules, bool]:
+    """Return (compiled rules, cache_hit) for config_path."""
+    raw_bytes = Path(config_path).read_bytes()
+    digest = config_hash(raw_bytes)
+    cache_path = cache_path_for(cache_dir, digest)
+
+    if cache_path.exists():
+        try:
+            with np.load(cache_path, allow_pickle=False) as data:
+                return CompiledRules(digest, _from_npz_payload(data)), True
+        except Exception:
+            # Unreadable; recompiled below and replaced atomically.
+            pass
+
+    try:
+        raw = yaml.safe_load(raw_bytes)
+    except yaml.YAMLError as e:
+        raise ValueError(f"Malformed YAML in {config_path}: {e}") from None
+
+    try:
+        config = raw["markets"]["nhl"]
+    except Exception as e:
+        raise ValueError(f"Missing expected config path markets -> nhl in {config_path}: {e}") from None
+
+    markets = compile_config(config)
+    _write_cache(cache_path, markets)
+
+    return CompiledRules(digest, markets), False
+
+
+def prune_rules_cache(cache_dir: Path, keep: CompiledRules) -> list[Path]:
+    """Remove cached rules other than keep's. Call only when no other process is
+    loading from cache_dir; returns the removed paths."""
+    keep_path = cache_path_for(cache_dir, keep.config_hash)
+    removed = []
+
+    for path in sorted(Path(cache_dir).glob("markets_*.npz")):
+        if path != keep_path:
+            path.unlink(missing_ok=True)
+            removed.append(path)
+
+    return removed
@@ -1,11 +1,22 @@
 #!/usr/bin/env python3
 # docs/win/hockey/nhl/scripts/05_final_scores/01_nhl_results_grade.py
 
+import hashlib
+import json
+import sys
 from datetime import datetime, UTC
 from pathlib import Path
 
+import numpy as np
 import pandas as pd
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from nhl_archive import DatasetFile, dataset_files, write_live
+from nhl_output import remove_stale, write_csv, write_text
+from nhl_profile import run_main
+from nhl_schema import FINAL_SCORES, SELECTED
+
 
 ###############################################################
 ######################## PATH CONFIG ##########################
@@ -21,10 +32,6 @@ GRADED_DIR = FINAL_ROOT / "graded"
 INTERMEDIATE_DIR = FINAL_ROOT / "intermediate"
 ERROR_DIR = FINAL_ROOT / "errors"
 
-GRADED_DIR.mkdir(parents=True, exist_ok=True)
-INTERMEDIATE_DIR.mkdir(parents=True, exist_ok=True)
-ERROR_DIR.mkdir(parents=True, exist_ok=True)
-
 GRADE_ERROR_LOG = ERROR_DIR / "01_nhl_results_grade_errors.txt"
 GRADE_SUMMARY_LOG = ERROR_DIR / "01_nhl_results_grade_summary.txt"
 
@@ -33,12 +40,20 @@ SCORE_PATTERN = "*_NHL_final_scores.csv"
 
 MASTER_FILE = GRADED_DIR / "NHL_final.csv"
 
+# Rows and sha256 of each date's graded bytes, so 02_nhl_results_analyze only
+# redoes the dates whose grades changed.
+GRADE_MANIFEST_FILE = INTERMEDIATE_DIR / "grade" / "manifest.json"
+
 
 ###############################################################
 ######################## LOGGING ##############################
 ###############################################################
 
 def reset_logs() -> None:
+    GRADED_DIR.mkdir(parents=True, exist_ok=True)
+    INTERMEDIATE_DIR.mkdir(parents=True, exist_ok=True)
+    ERROR_DIR.mkdir(parents=True, exist_ok=True)
+
     GRADE_ERROR_LOG.write_text("", encoding="utf-8")
     GRADE_SUMMARY_LOG.write_text("", encoding="utf-8")
 
@@ -57,15 +72,16 @@ def log_summary(msg: str) -> None:
 ######################## HELPERS ##############################
 ###############################################################
 
-def safe_read(path: Path) -> pd.DataFrame:
+def safe_read(path: Path | DatasetFile) -> pd.DataFrame:
     try:
-        path = Path(path)
+        if not isinstance(path, DatasetFile):
+            path = DatasetFile(Path(path))
 
-        if not path.exists():
+        if path.archive is None and not path.path.exists():
             log_error(f"MISSING FILE | {path}")
             return pd.DataFrame()
 
-        df = pd.read_csv(path, dtype=str)
+        df = pd.read_csv(path.source(), dtype=str)
 
         if df is None or df.empty:
             log_error(f"EMPTY FILE | {path}")
@@ -125,13 +141,15 @@ def require_columns(df: pd.DataFrame, required: list[str], label: str) -> bool:
     return True
 
 
-def clean_old_outputs() -> None:
-    for path in GRADED_DIR.glob("*_results_NHL.csv"):
-        path.unlink(missing_ok=True)
+def clean_old_outputs(written: list[Path]) -> None:
+    removed = remove_stale(GRADED_DIR, "*_results_NHL.csv", keep=written)
 
-    MASTER_FILE.unlink(missing_ok=True)
+    for path in (MASTER_FILE, GRADE_MANIFEST_FILE):
+        if path not in written and path.exists():
+            path.unlink()
+            removed.append(path)
 
-    log_summary("CLEARED OLD NHL GRADED OUTPUTS")
+    log_summary(f"REMOVED STALE NHL GRADED OUTPUTS | files={len(removed)}")
 
 
 ###############################################################
@@ -139,31 +157,13 @@ def clean_old_outputs() -> None:
 ###############################################################
 
 def load_select_rows() -> pd.DataFrame:
-    select_files = sorted(SELECT_DIR.glob(SELECT_PATTERN))
+    select_files = dataset_files(SELECT_DIR, SELECT_PATTERN)
 
     if not select_files:
         log_error(f"NO SELECT FILES FOUND | {SELECT_DIR} | pattern={SELECT_PATTERN}")
         return pd.DataFrame()
 
-    required = [
-        "sport",
-        "league",
-        "game_date",
-        "game_time",
-        "game_id",
-        "away_team",
-        "home_team",
-        "market_type",
-        "bet_side",
-        "line",
-        "take_bet",
-        "dk_odds_american",
-        "dk_odds_decimal",
-        "model_prob",
-        "edge",
-        "ev",
-        "kelly",
-    ]
+    required = list(SELECTED)
 
     parts = []
 
@@ -196,25 +196,13 @@ def load_select_rows() -> pd.DataFrame:
 
 
 def load_score_rows() -> pd.DataFrame:
-    score_files = sorted(SCORE_DIR.glob(SCORE_PATTERN))
+    score_files = dataset_files(SCORE_DIR, SCORE_PATTERN)
 
     if not score_files:
         log_error(f"NO FINAL SCORE FILES FOUND | {SCORE_DIR} | pattern={SCORE_PATTERN}")
         return pd.DataFrame()
 
-    required = [
-        "sport",
-        "league",
-        "game_date",
-        "game_id",
-        "away_team",
-        "home_team",
-        "away_score",
-        "home_score",
-        "total_score",
-        "away_puck_line_result",
-        "home_puck_line_result",
-    ]
+    required = list(FINAL_SCORES)
 
     parts = []
 
@@ -248,129 +236,124 @@ def load_score_rows() -> pd.DataFrame:
 ###################### SCORE LOOKUPS ##########################
 ###############################################################
 
-def team_key(row) -> str:
+def to_float_array(values: pd.Series) -> tuple[np.ndarray, np.ndarray]:
+    """to_float over a column: (floats, missing), parsed once per distinct value."""
+    codes, uniques = pd.factorize(values, use_na_sentinel=False)
+    parsed = [to_float(v) for v in uniques]
+
+    floats = np.array([np.nan if v is None else v for v in parsed], dtype="float64")
+    missing = np.array([v is None for v in parsed], dtype=bool)
+
+    return floats[codes], missing[codes]
+
+
+def team_keys(df: pd.DataFrame) -> pd.Series:
     return (
-        f"{normalize_date(row.get('game_date', ''))}|"
-        f"{normalize_team(row.get('away_team', ''))}|"
-        f"{normalize_team(row.get('home_team', ''))}"
+        df["game_date"].astype(str).map(normalize_date)
+        + "|"
+        + df["away_team"].astype(str).map(normalize_team)
+        + "|"
+        + df["home_team"].astype(str).map(normalize_team)
     )
 
 
-def build_score_indexes(scores: pd.DataFrame) -> tuple[dict[str, dict], dict[str, dict]]:
-    by_game_id: dict[str, dict] = {}
-    by_team_key: dict[str, dict] = {}
+def build_score_indexes(scores: pd.DataFrame) -> tuple[pd.Series, pd.Series]:
+    """Map game_id and team/date key to the row position of the first matching score."""
+    game_ids = scores["game_id"].astype(str).str.strip()
+    keys = team_keys(scores)
 
-    for _, row in scores.iterrows():
-        rec = row.to_dict()
+    has_id = game_ids != ""
+    dup_id = has_id & game_ids.duplicated(keep="first")
+    dup_key = keys.duplicated(keep="first")
 
-        game_id = str(rec.get("game_id", "")).strip()
-        if game_id:
-            if game_id in by_game_id:
-                log_error(f"DUPLICATE FINAL SCORE game_id | {game_id}")
-            else:
-                by_game_id[game_id] = rec
+    for pos in np.flatnonzero((dup_id | dup_key).to_numpy()):
+        if dup_id.iat[pos]:
+            log_error(f"DUPLICATE FINAL SCORE game_id | {game_ids.iat[pos]}")
+        if dup_key.iat[pos]:
+            log_error(f"DUPLICATE FINAL SCORE team/date key | {keys.iat[pos]}")
 
-        key = team_key(rec)
-        if key in by_team_key:
-            log_error(f"DUPLICATE FINAL SCORE team/date key | {key}")
-        else:
-            by_team_key[key] = rec
+    positions = np.arange(len(scores))
+
+    first_id = has_id & ~dup_id
+    by_game_id = pd.Series(positions[first_id.to_numpy()], index=game_ids[first_id].to_numpy())
+    by_team_key = pd.Series(positions[~dup_key.to_numpy()], index=keys[~dup_key].to_numpy())
 
     return by_game_id, by_team_key
 
 
-def attach_score_to_bet(bet: dict, by_game_id: dict[str, dict], by_team_key: dict[str, dict]) -> dict | None:
-    game_id = str(bet.get("game_id", "")).strip()
+def match_scores(bets: pd.DataFrame, by_game_id: pd.Series, by_team_key: pd.Series) -> np.ndarray:
+    """Score row position per bet: game_id first, then team/date key; -1 if unmatched."""
+    game_ids = bets["game_id"].astype(str).str.strip()
 
-    if game_id and game_id in by_game_id:
-        return by_game_id[game_id]
+    id_pos = by_game_id.index.get_indexer(game_ids)
+    id_pos = np.where((id_pos >= 0) & (game_ids != "").to_numpy(), by_game_id.to_numpy()[id_pos], -1)
 
-    key = team_key(bet)
-    if key in by_team_key:
-        return by_team_key[key]
+    key_pos = by_team_key.index.get_indexer(team_keys(bets))
+    key_pos = np.where(key_pos >= 0, by_team_key.to_numpy()[key_pos], -1)
 
-    return None
+    return np.where(id_pos >= 0, id_pos, key_pos)
 
 
 ###############################################################
 ######################## OUTCOME LOGIC ########################
 ###############################################################
 
-def determine_outcome(row: dict) -> str:
-    try:
-        market = normalize_market(row.get("market_type", ""))
-        side = normalize_side(row.get("bet_side", ""))
-
-        away_score = to_float(row.get("away_score"))
-        home_score = to_float(row.get("home_score"))
-        line = to_float(row.get("line"))
-
-        if away_score is None or home_score is None:
-            return "Unknown"
-
-        if market == "moneyline":
-            if away_score == home_score:
-                return "Push"
-
-            if side == "home":
-                return "Win" if home_score > away_score else "Loss"
-
-            if side == "away":
-                return "Win" if away_score > home_score else "Loss"
-
-            return "Unknown"
-
-        if market == "puck_line":
-            if line is None:
-                return "Unknown"
-
-            if side == "home":
-                home_result = to_float(row.get("home_puck_line_result"))
-                if home_result is None:
-                    home_result = home_score - away_score
-
-                diff = home_result + line
-
-            elif side == "away":
-                away_result = to_float(row.get("away_puck_line_result"))
-                if away_result is None:
-                    away_result = away_score - home_score
-
-                diff = away_result + line
-
-            else:
-                return "Unknown"
-
-            if abs(diff) < 1e-9:
-                return "Push"
-
-            return "Win" if diff > 0 else "Loss"
-
-        if market == "total":
-            if line is None:
-                return "Unknown"
-
-            total_score = to_float(row.get("total_score"))
-            if total_score is None:
-                total_score = away_score + home_score
-
-            diff = total_score - line
-
-            if abs(diff) < 1e-9:
-                return "Push"
-
-            if side == "over":
-                return "Win" if diff > 0 else "Loss"
-
-            if side == "under":
-                return "Win" if diff < 0 else "Loss"
-
-            return "Unknown"
+def determine_outcomes(df: pd.DataFrame) -> np.ndarray:
+    market = df["market_type"].astype(str).map(normalize_market).to_numpy()
+    side = df["bet_side"].astype(str).map(normalize_side).to_numpy()
+
+    away, away_missing = to_float_array(df["away_score"])
+    home, home_missing = to_float_array(df["home_score"])
+    line, line_missing = to_float_array(df["line"])
+    total, total_missing = to_float_array(df["total_score"])
+    home_pl, home_pl_missing = to_float_array(df["home_puck_line_result"])
+    away_pl, away_pl_missing = to_float_array(df["away_puck_line_result"])
+
+    is_ml = market == "moneyline"
+    is_pl = market == "puck_line"
+    is_total = market == "total"
+
+    is_home = side == "home"
+    is_away = side == "away"
+
+    with np.errstate(invalid="ignore"):
+        home_result = np.where(home_pl_missing, home - away, home_pl)
+        away_result = np.where(away_pl_missing, away - home, away_pl)
+        pl_diff = np.where(is_home, home_result, away_result) + line
+
+        total_diff = np.where(total_missing, away + home, total) - line
+
+    conditions = [
+        away_missing | home_missing,
+        is_ml & (away == home),
+        is_ml & is_home,
+        is_ml & is_away,
+        is_ml,
+        is_pl & (line_missing | ~(is_home | is_away)),
+        is_pl & (np.abs(pl_diff) < 1e-9),
+        is_pl,
+        is_total & line_missing,
+        is_total & (np.abs(total_diff) < 1e-9),
+        is_total & (side == "over"),
+        is_total & (side == "under"),
+    ]
 
-    except Exception as e:
-        log_error(f"DETERMINE OUTCOME ERROR | {e} | row={row}")
+    choices = [
+        "Unknown",
+        "Push",
+        np.where(home > away, "Win", "Loss"),
+        np.where(away > home, "Win", "Loss"),
+        "Unknown",
+        "Unknown",
+        "Push",
+        np.where(pl_diff > 0, "Win", "Loss"),
+        "Unknown",
+        "Push",
+        np.where(total_diff > 0, "Win", "Loss"),
+        np.where(total_diff < 0, "Win", "Loss"),
+    ]
 
-    return "Unknown"
+    return np.select(conditions, choices, default="Unknown").astype(object)
 
 
 ###############################################################
@@ -380,57 +363,47 @@ def determine_outcome(row: dict) -> str:
 def grade_rows(bets: pd.DataFrame, scores: pd.DataFrame) -> pd.DataFrame:
     by_game_id, by_team_key = build_score_indexes(scores)
 
-    graded_rows = []
-    unmatched_rows = 0
+    score_cols = [col for col in FINAL_SCORES if col not in SELECTED] + ["source_score_file"]
 
-    score_cols = [
-        "away_score",
-        "home_score",
-        "total_score",
-        "away_puck_line_result",
-        "home_puck_line_result",
-        "source_score_file",
-    ]
+    bets = bets.reset_index(drop=True)
+    score_pos = match_scores(bets, by_game_id, by_team_key)
+    matched = score_pos >= 0
 
-    for _, bet_row in bets.iterrows():
-        bet = bet_row.to_dict()
-        score = attach_score_to_bet(bet, by_game_id, by_team_key)
-
-        if score is None:
-            unmatched_rows += 1
-            log_error(
-                "NO FINAL SCORE MATCH | "
-                f"game_date={bet.get('game_date', '')} | "
-                f"game_id={bet.get('game_id', '')} | "
-                f"{bet.get('away_team', '')} at {bet.get('home_team', '')} | "
-                f"market={bet.get('market_type', '')} | side={bet.get('bet_side', '')}"
-            )
-            continue
+    for pos in np.flatnonzero(~matched):
+        bet = bets.iloc[pos]
+        log_error(
+            "NO FINAL SCORE MATCH | "
+            f"game_date={bet.get('game_date', '')} | "
+            f"game_id={bet.get('game_id', '')} | "
+            f"{bet.get('away_team', '')} at {bet.get('home_team', '')} | "
+            f"market={bet.get('market_type', '')} | side={bet.get('bet_side', '')}"
+        )
 
-        combined = dict(bet)
+    graded = bets[matched].reset_index(drop=True)
+    score_pos = score_pos[matched]
 
-        score_game_id = str(score.get("game_id", "")).strip()
-        bet_game_id = str(combined.get("game_id", "")).strip()
-        if not bet_game_id and score_game_id:
-            combined["game_id"] = score_game_id
+    score_game_ids = scores["game_id"].astype(str).str.strip().to_numpy()[score_pos]
+    bet_game_ids = graded["game_id"].astype(str).str.strip().to_numpy()
+    fill_id = (bet_game_ids == "") & (score_game_ids != "")
+    if fill_id.any():
+        graded.loc[fill_id, "game_id"] = score_game_ids[fill_id]
 
-        for col in score_cols:
-            combined[col] = score.get(col, "")
+    for col in score_cols:
+        graded[col] = scores[col].to_numpy(dtype=object)[score_pos] if col in scores.columns else ""
 
-        combined["bet_result"] = determine_outcome(combined)
-        graded_rows.append(combined)
+    graded["bet_result"] = determine_outcomes(graded)
 
     log_summary(
-        f"GRADED ROWS BUILT | input_bets={len(bets)} | graded={len(graded_rows)} | unmatched={unmatched_rows}"
+        f"GRADED ROWS BUILT | input_bets={len(bets)} | graded={len(graded)} | unmatched={int((~matched).sum())}"
     )
 
-    return pd.DataFrame(graded_rows)
+    return graded
 
 
-def write_outputs(df: pd.DataFrame) -> None:
+def write_outputs(df: pd.DataFrame) -> list[Path]:
     if df.empty:
         log_error("NO GRADED ROWS TO WRITE")
-        return
+        return []
 
     df = df.copy()
     df["game_date"] = df["game_date"].map(normalize_date)
@@ -472,15 +445,36 @@ def write_outputs(df: pd.DataFrame) -> None:
         after = len(df)
         log_summary(f"DEDUPED GRADED ROWS | before={before} | after={after}")
 
+    written = []
+    digests = {}
+
     for game_date, date_df in df.groupby("game_date", dropna=False):
         out_path = GRADED_DIR / f"{game_date}_results_NHL.csv"
-        date_df.to_csv(out_path, index=False)
+        data = date_df.to_csv(index=False).encode("utf-8")
+        digests[str(game_date)] = {"rows": len(date_df), "sha256": hashlib.sha256(data).hexdigest()}
+
+        # A compacted month stays in its archive unless its grades changed.
+        if write_live(out_path, data):
+            verb = "WROTE"
+        elif out_path.exists():
+            verb = "UNCHANGED"
+        else:
+            verb = "ARCHIVED"
+
+        if verb != "ARCHIVED":
+            written.append(out_path)
 
         counts = date_df["bet_result"].astype(str).value_counts().to_dict()
-        log_summary(f"WROTE DAILY GRADED | {out_path} | rows={len(date_df)} | results={counts}")
+        log_summary(f"{verb} DAILY GRADED | {out_path} | rows={len(date_df)} | results={counts}")
+
+    verb = "WROTE" if write_csv(df, MASTER_FILE) else "UNCHANGED"
+    written.append(MASTER_FILE)
+    log_summary(f"{verb} MASTER GRADED | {MASTER_FILE} | rows={len(df)}")
 
-    df.to_csv(MASTER_FILE, index=False)
-    log_summary(f"WROTE MASTER GRADED | {MASTER_FILE} | rows={len(df)}")
+    write_text(GRADE_MANIFEST_FILE, json.dumps({"dates": digests}, indent=2) + "\n")
+    written.append(GRADE_MANIFEST_FILE)
+
+    return written
 
 
 ###############################################################
@@ -495,26 +489,26 @@ def main() -> None:
     log_summary(f"SCORE_DIR={SCORE_DIR}")
     log_summary(f"GRADED_DIR={GRADED_DIR}")
 
-    clean_old_outputs()
-
     bets = load_select_rows()
     if bets.empty:
+        clean_old_outputs([])
         log_error("STOPPING: no select rows")
         print("NHL grading failed: no select rows.")
         return
 
     scores = load_score_rows()
     if scores.empty:
+        clean_old_outputs([])
         log_error("STOPPING: no final score rows")
         print("NHL grading failed: no final score rows.")
         return
 
     graded = grade_rows(bets, scores)
-    write_outputs(graded)
+    clean_old_outputs(write_outputs(graded))
 
     log_summary("END 01_nhl_results_grade.py")
     print("NHL grading complete.")
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    run_main(main, GRADE_ERROR_LOG)
\ No newline at end of file
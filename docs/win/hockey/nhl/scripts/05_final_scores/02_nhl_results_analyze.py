@@ -1,11 +1,22 @@
 #!/usr/bin/env python3
 # docs/win/hockey/nhl/scripts/05_final_scores/02_nhl_results_analyze.py
 
+import hashlib
+import io
+import json
+import sys
 from datetime import datetime, UTC
 from pathlib import Path
 
 import pandas as pd
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from nhl_archive import find_file
+from nhl_output import write_bytes, write_text
+from nhl_profile import run_main
+from nhl_schema import GRADED, WORK, numeric_columns
+
 
 ###############################################################
 ######################## PATH CONFIG ##########################
@@ -20,20 +31,28 @@ INPUT_FILE = GRADED_DIR / "NHL_final.csv"
 INTERMEDIATE_DIR = FINAL_ROOT / "intermediate"
 ERROR_DIR = FINAL_ROOT / "errors"
 
-INTERMEDIATE_DIR.mkdir(parents=True, exist_ok=True)
-ERROR_DIR.mkdir(parents=True, exist_ok=True)
-
 ERROR_LOG = ERROR_DIR / "02_nhl_results_analyze_errors.txt"
 SUMMARY_LOG = ERROR_DIR / "02_nhl_results_analyze_summary.txt"
 
 WORK_FILE = INTERMEDIATE_DIR / "work_nhl.csv"
 
+GRADE_MANIFEST_FILE = INTERMEDIATE_DIR / "grade" / "manifest.json"
+WORK_MANIFEST_FILE = INTERMEDIATE_DIR / "work_nhl_manifest.json"
+
+WORK_VERSION = 1
+WORK_COLUMNS = list(WORK)
+
+REQUIRED_COLUMNS = [col for col in GRADED if not col.startswith("source_")]
+
 
 ###############################################################
 ######################## LOGGING ##############################
 ###############################################################
 
 def reset_logs() -> None:
+    INTERMEDIATE_DIR.mkdir(parents=True, exist_ok=True)
+    ERROR_DIR.mkdir(parents=True, exist_ok=True)
+
     ERROR_LOG.write_text("", encoding="utf-8")
     SUMMARY_LOG.write_text("", encoding="utf-8")
 
@@ -92,25 +111,6 @@ def normalize_side(value: str) -> str:
     return str(value).strip().lower()
 
 
-def side_group(row) -> str:
-    market = normalize_market(row.get("market_type", ""))
-    side = normalize_side(row.get("bet_side", ""))
-
-    if market in {"moneyline", "puck_line"}:
-        if side == "home":
-            return "HOME"
-        if side == "away":
-            return "AWAY"
-
-    if market == "total":
-        if side == "over":
-            return "OVER"
-        if side == "under":
-            return "UNDER"
-
-    return side.upper()
-
-
 def require_columns(df: pd.DataFrame, required: list[str]) -> bool:
     missing = [c for c in required if c not in df.columns]
     if missing:
@@ -123,40 +123,36 @@ def require_columns(df: pd.DataFrame, required: list[str]) -> bool:
 ######################## WORK FILE ############################
 ###############################################################
 
-def build_work() -> None:
-    df = safe_read(INPUT_FILE)
+# work_nhl.csv is the header plus one block of rows per game_date, in date
+# order. A block depends only on that date's graded rows, so a run rebuilds the
+# blocks of the dates whose graded bytes changed (per 01_nhl_results_grade's
+# manifest) and keeps every other block's bytes. New dates after the last one
+# are appended. work_nhl_manifest.json records each block's offset, length,
+# source sha256 and digest; 03_nhl_results_reports reads the digests and seeks
+# to the blocks it needs.
 
-    if df.empty:
-        log_error("MASTER GRADED FILE EMPTY OR MISSING")
-        return
+def sha256(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
 
-    required = [
-        "sport",
-        "league",
-        "game_date",
-        "game_id",
-        "away_team",
-        "home_team",
-        "market_type",
-        "bet_side",
-        "line",
-        "take_bet",
-        "dk_odds_american",
-        "dk_odds_decimal",
-        "model_prob",
-        "edge",
-        "ev",
-        "kelly",
-        "away_score",
-        "home_score",
-        "total_score",
-        "away_puck_line_result",
-        "home_puck_line_result",
-        "bet_result",
-    ]
-
-    if not require_columns(df, required):
-        return
+
+def read_manifest(path: Path) -> dict | None:
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        log_error(f"MANIFEST UNREADABLE | {path} | {e}")
+        return None
+
+
+def work_header() -> bytes:
+    return pd.DataFrame(columns=WORK_COLUMNS).to_csv(index=False).encode("utf-8")
+
+
+def work_frame(df: pd.DataFrame) -> pd.DataFrame | None:
+    """Graded rows read as str reshaped into work rows; None if columns are missing."""
+    if not require_columns(df, REQUIRED_COLUMNS):
+        return None
 
     df = df.copy()
 
@@ -165,37 +161,184 @@ def build_work() -> None:
     df["sport"] = "hockey"
     df["market_type"] = df["market_type"].map(normalize_market)
     df["bet_side"] = df["bet_side"].map(normalize_side)
-    df["side_group"] = df.apply(side_group, axis=1)
+    df["side_group"] = df["bet_side"].str.upper()
 
     df["selected_edge"] = df["edge"]
     df["take_odds"] = df["dk_odds_american"]
     df["win_prob"] = df["model_prob"]
 
-    numeric_cols = [
-        "line",
-        "dk_odds_american",
-        "dk_odds_decimal",
-        "model_prob",
-        "win_prob",
-        "edge",
-        "selected_edge",
-        "ev",
-        "kelly",
-        "take_odds",
-        "away_score",
-        "home_score",
-        "total_score",
-        "away_puck_line_result",
-        "home_puck_line_result",
-    ]
-
-    for col in numeric_cols:
+    # Numbers keep their graded text and anything that does not parse is
+    # blanked, so a block's bytes do not depend on the other dates' dtypes.
+    for col in numeric_columns(WORK):
         if col in df.columns:
-            df[col] = pd.to_numeric(df[col], errors="coerce")
+            df[col] = df[col].where(pd.to_numeric(df[col], errors="coerce").notna())
+
+    return df.reindex(columns=WORK_COLUMNS)
+
+
+def work_block(df: pd.DataFrame) -> bytes | None:
+    work = work_frame(df)
+    return None if work is None else work.to_csv(index=False, header=False).encode("utf-8")
+
+
+def load_work_manifest() -> dict | None:
+    """The stored manifest when it still describes WORK_FILE, else None."""
+    manifest = read_manifest(WORK_MANIFEST_FILE)
+
+    if not manifest or manifest.get("version") != WORK_VERSION or manifest.get("columns") != WORK_COLUMNS:
+        return None
+
+    if not WORK_FILE.exists() or WORK_FILE.stat().st_size != manifest.get("size"):
+        log_error(f"WORK FILE OUT OF SYNC WITH MANIFEST | {WORK_FILE} | rebuilding")
+        return None
+
+    return manifest
+
+
+def write_work(blocks: dict[str, dict], stored: dict[str, dict], removed: list[str]) -> tuple[bool, dict]:
+    """Splice new blocks into WORK_FILE; returns (changed, manifest dates)."""
+    dates = sorted((set(stored) - set(removed)) | set(blocks))
+    header = work_header()
 
-    df.to_csv(WORK_FILE, index=False)
+    append = bool(stored) and bool(blocks) and not removed and min(blocks) > max(stored)
+
+    if append:
+        offset = WORK_FILE.stat().st_size
+        with WORK_FILE.open("ab") as f:
+            for game_date in sorted(blocks):
+                f.write(blocks[game_date].pop("data"))
+        changed = True
+    else:
+        old = WORK_FILE.read_bytes() if stored else b""
+        parts = [header]
+
+        for game_date in dates:
+            if game_date in blocks:
+                parts.append(blocks[game_date].pop("data"))
+            else:
+                meta = stored[game_date]
+                parts.append(old[meta["offset"]:meta["offset"] + meta["length"]])
+
+        changed = write_bytes(WORK_FILE, b"".join(parts))
+        offset = len(header)
+
+    manifest_dates = {}
+
+    for game_date in dates:
+        meta = blocks.get(game_date) or stored[game_date]
+
+        if append and game_date not in blocks:
+            manifest_dates[game_date] = meta
+            continue
+
+        manifest_dates[game_date] = {**meta, "offset": offset}
+        offset += meta["length"]
+
+    return changed, manifest_dates
+
+
+def block_meta(data: bytes, rows: int, source: str | None) -> dict:
+    return {"rows": rows, "length": len(data), "source": source, "digest": sha256(data), "data": data}
+
+
+def full_blocks(sources: dict[str, dict]) -> dict[str, dict] | None:
+    """Every date's block from the master graded file."""
+    df = safe_read(INPUT_FILE)
+
+    if df.empty:
+        log_error("MASTER GRADED FILE EMPTY OR MISSING")
+        return None
+
+    if not require_columns(df, REQUIRED_COLUMNS):
+        return None
+
+    dates = df["game_date"].astype(str).str.strip().str.replace("-", "_", regex=False)
+    blocks = {}
+
+    for game_date, date_df in df.groupby(dates, sort=True):
+        source = sources.get(game_date, {}).get("sha256")
+        blocks[game_date] = block_meta(work_block(date_df), len(date_df), source)
+
+    return blocks
+
+
+def changed_blocks(sources: dict[str, dict], touched: list[str]) -> dict[str, dict] | None:
+    """Blocks of the touched dates from their daily graded files; None if one is out of sync."""
+    blocks = {}
+
+    for game_date in touched:
+        source = find_file(GRADED_DIR / f"{game_date}_results_NHL.csv")
+        data = source.read_bytes() if source is not None else None
+
+        if data is None or sha256(data) != sources[game_date]["sha256"]:
+            log_error(f"GRADED FILE OUT OF SYNC WITH GRADE MANIFEST | {game_date} | rebuilding")
+            return None
+
+        date_df = pd.read_csv(io.BytesIO(data), dtype=str)
+        block = work_block(date_df)
+
+        if block is None:
+            return None
+
+        blocks[game_date] = block_meta(block, len(date_df), sources[game_date]["sha256"])
+
+    return blocks
+
+
+def build_work() -> None:
+    sources = (read_manifest(GRADE_MANIFEST_FILE) or {}).get("dates")
+    manifest = load_work_manifest() if sources is not None else None
+
+    if manifest is None:
+        stored, removed = {}, []
+        blocks = full_blocks(sources or {})
+        mode = "REBUILT"
+    else:
+        stored = manifest["dates"]
+        touched = sorted(d for d, meta in sources.items() if stored.get(d, {}).get("source") != meta["sha256"])
+        removed = sorted(set(stored) - set(sources))
+
+        if not touched and not removed:
+            rows = sum(meta["rows"] for meta in stored.values())
+            log_summary(f"NHL WORK FILE UNCHANGED | dates={len(stored)} | rows={rows} | out={WORK_FILE}")
+            return
+
+        blocks = changed_blocks(sources, touched) if touched else {}
+        mode = "UPDATED"
+
+        if blocks is None:
+            stored, removed = {}, []
+            blocks = full_blocks(sources)
+            mode = "REBUILT"
+
+    if blocks is None:
+        return
+
+    if not blocks and not removed:
+        log_error("NO GRADED DATES FOR WORK FILE")
+        return
 
-    log_summary(f"NHL WORK FILE CREATED | rows={len(df)} | out={WORK_FILE}")
+    changed, dates = write_work(blocks, stored, removed)
+
+    write_text(
+        WORK_MANIFEST_FILE,
+        json.dumps(
+            {
+                "version": WORK_VERSION,
+                "columns": WORK_COLUMNS,
+                "size": WORK_FILE.stat().st_size,
+                "dates": dates,
+            },
+            indent=2,
+        )
+        + "\n",
+    )
+
+    rows = sum(meta["rows"] for meta in dates.values())
+    log_summary(
+        f"NHL WORK FILE {mode if changed else 'UNCHANGED'} | dates={len(dates)} | rebuilt_dates={len(blocks)} | "
+        f"removed_dates={len(removed)} | rows={rows} | out={WORK_FILE}"
+    )
 
 
 ###############################################################
@@ -216,4 +359,4 @@ def main() -> None:
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    run_main(main, ERROR_LOG)
\ No newline at end of file
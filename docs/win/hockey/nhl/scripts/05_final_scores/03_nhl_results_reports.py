@@ -1,12 +1,23 @@
 #!/usr/bin/env python3
 # docs/win/hockey/nhl/scripts/05_final_scores/03_nhl_results_reports.py
 
-from datetime import datetime, UTC
+import argparse
+import hashlib
+import io
+import json
+import sys
+from datetime import date, datetime, timedelta, UTC
 from pathlib import Path
 
 import numpy as np
 import pandas as pd
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from nhl_output import remove_stale, write_bytes, write_csv, write_text
+from nhl_profile import run_main
+from nhl_schema import GRADED, coerce_numeric
+
 
 ###############################################################
 ######################## PATH CONFIG ##########################
@@ -16,21 +27,23 @@ NHL_ROOT = Path("docs/win/hockey/nhl")
 FINAL_ROOT = NHL_ROOT / "05_final_scores"
 
 INPUT_FILE = FINAL_ROOT / "intermediate" / "work_nhl.csv"
+WORK_MANIFEST_FILE = FINAL_ROOT / "intermediate" / "work_nhl_manifest.json"
 
 REPORT_ROOT = FINAL_ROOT / "reports"
 MONEYLINE_DIR = REPORT_ROOT / "moneyline"
 PUCKLINE_DIR = REPORT_ROOT / "puckline"
 TOTAL_DIR = REPORT_ROOT / "total"
+WINDOW_DIR = REPORT_ROOT / "windows"
 
 TALLY_FILE = FINAL_ROOT / "nhl_market_tally.csv"
 
-ERROR_DIR = FINAL_ROOT / "errors"
-ERROR_DIR.mkdir(parents=True, exist_ok=True)
+STORE_DIR = FINAL_ROOT / "intermediate" / "report_store"
+STORE_DAILY_FILE = STORE_DIR / "nhl_report_store_daily.csv"
+STORE_TOTALS_FILE = STORE_DIR / "nhl_report_store_totals.csv"
+STORE_CUMULATIVE_FILE = STORE_DIR / "nhl_report_store_cumulative.csv"
+STORE_MANIFEST_FILE = STORE_DIR / "manifest.json"
 
-REPORT_ROOT.mkdir(parents=True, exist_ok=True)
-MONEYLINE_DIR.mkdir(parents=True, exist_ok=True)
-PUCKLINE_DIR.mkdir(parents=True, exist_ok=True)
-TOTAL_DIR.mkdir(parents=True, exist_ok=True)
+ERROR_DIR = FINAL_ROOT / "errors"
 
 ERROR_LOG = ERROR_DIR / "03_nhl_results_reports_errors.txt"
 SUMMARY_LOG = ERROR_DIR / "03_nhl_results_reports_summary.txt"
@@ -144,6 +157,17 @@ TOTAL_RANGE_BANDS = [
 ###############################################################
 
 def reset_logs() -> None:
+    for directory in [
+        ERROR_DIR,
+        REPORT_ROOT,
+        MONEYLINE_DIR,
+        PUCKLINE_DIR,
+        TOTAL_DIR,
+        WINDOW_DIR,
+        STORE_DIR,
+    ]:
+        directory.mkdir(parents=True, exist_ok=True)
+
     ERROR_LOG.write_text("", encoding="utf-8")
     SUMMARY_LOG.write_text("", encoding="utf-8")
 
@@ -202,23 +226,10 @@ def normalize_side(value) -> str:
     return str(value).strip().lower()
 
 
-def side_group(row) -> str:
-    market = normalize_market(row.get("market_type", ""))
-    side = normalize_side(row.get("bet_side", ""))
-
-    if market in {"moneyline", "puck_line"}:
-        if side == "home":
-            return "HOME"
-        if side == "away":
-            return "AWAY"
-
-    if market == "total":
-        if side == "over":
-            return "OVER"
-        if side == "under":
-            return "UNDER"
-
-    return side.upper()
+def side_groups(df: pd.DataFrame) -> pd.Series:
+    # home/away and over/under are already the only sides per market, so the
+    # group is the normalized side upper-cased in every case.
+    return df["bet_side"].map(normalize_side).str.upper()
 
 
 def band_label(low: float, high: float) -> str:
@@ -232,61 +243,57 @@ def band_label(low: float, high: float) -> str:
     return f"{fmt(low)}_to_{fmt(high)}"
 
 
-def bucket_value(value, bands: list[tuple[float, float]]) -> str:
-    if pd.isna(value):
-        return "missing"
+def bucket_values(values: pd.Series, bands: list[tuple[float, float]]) -> np.ndarray:
+    """Label each value with the first inclusive band containing it.
 
-    try:
-        v = float(value)
-    except Exception:
-        return "missing"
-
-    for low, high in bands:
-        if low <= v <= high:
-            return band_label(low, high)
+    Bands are ascending and may share edges, so the first containing band is the
+    first one whose high is >= the value, provided its low is <= the value.
+    """
+    v = pd.to_numeric(values, errors="coerce").to_numpy(dtype="float64")
+    labels = np.array([band_label(low, high) for low, high in bands] + ["out_of_range"], dtype=object)
 
-    return "out_of_range"
+    if not bands:
+        idx = np.zeros(len(v), dtype=int)
+    else:
+        lows = np.array([low for low, _ in bands], dtype="float64")
+        highs = np.array([high for _, high in bands], dtype="float64")
 
+        idx = np.digitize(v, highs, right=True)
+        inside = idx < len(bands)
+        inside[inside] = lows[idx[inside]] <= v[inside]
+        idx = np.where(inside, idx, len(bands))
 
-def win_prob_bucket(row) -> str:
-    market = normalize_market(row.get("market_type", ""))
-    bands = WIN_PROB_BANDS.get(market, [])
-    return bucket_value(row.get("model_prob"), bands)
+    return np.where(np.isnan(v), "missing", labels[idx])
 
 
-def american_to_profit_per_unit(odds) -> float:
-    if pd.isna(odds):
-        return np.nan
+def win_prob_buckets(df: pd.DataFrame) -> np.ndarray:
+    markets = df["market_type"].map(normalize_market).to_numpy()
+    out = bucket_values(df["model_prob"], [])
 
-    try:
-        odds = float(odds)
-    except Exception:
-        return np.nan
+    for market, bands in WIN_PROB_BANDS.items():
+        mask = markets == market
+        if mask.any():
+            out[mask] = bucket_values(df["model_prob"][mask], bands)
 
-    if odds > 0:
-        return odds / 100.0
+    return out
 
-    if odds < 0:
-        return 100.0 / abs(odds)
 
-    return np.nan
+def american_to_profit_per_unit(odds: pd.Series) -> np.ndarray:
+    odds = pd.to_numeric(odds, errors="coerce").to_numpy(dtype="float64")
 
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.select([odds > 0, odds < 0], [odds / 100.0, 100.0 / np.abs(odds)], np.nan)
 
-def grade_to_units(row) -> float:
-    result = str(row.get("bet_result", "")).strip().lower()
-    odds = row.get("dk_odds_american", np.nan)
-    profit_per_unit = american_to_profit_per_unit(odds)
 
-    if result == "win":
-        return profit_per_unit if not pd.isna(profit_per_unit) else np.nan
+def grade_to_units(df: pd.DataFrame) -> np.ndarray:
+    result = df["bet_result"].astype(str).str.strip().str.lower().to_numpy()
+    profit_per_unit = american_to_profit_per_unit(df["dk_odds_american"])
 
-    if result == "loss":
-        return -1.0
-
-    if result == "push":
-        return 0.0
-
-    return np.nan
+    return np.select(
+        [result == "win", result == "loss", result == "push"],
+        [profit_per_unit, -1.0, 0.0],
+        np.nan,
+    )
 
 
 def empty_report_df() -> pd.DataFrame:
@@ -299,40 +306,24 @@ def prepare_df(df: pd.DataFrame) -> pd.DataFrame:
     df["league"] = "nhl"
     df["market_type"] = df["market_type"].map(normalize_market)
     df["bet_side"] = df["bet_side"].map(normalize_side)
-    df["side_group"] = df.apply(side_group, axis=1)
-
-    numeric_cols = [
-        "line",
-        "dk_odds_american",
-        "dk_odds_decimal",
-        "model_prob",
-        "edge",
-        "ev",
-        "kelly",
-        "away_score",
-        "home_score",
-        "total_score",
-        "away_puck_line_result",
-        "home_puck_line_result",
-    ]
+    df["side_group"] = side_groups(df)
 
-    for col in numeric_cols:
-        if col in df.columns:
-            df[col] = pd.to_numeric(df[col], errors="coerce")
+    df = coerce_numeric(df, GRADED)
 
     result_clean = df["bet_result"].astype(str).str.strip().str.lower()
 
     df["is_win"] = (result_clean == "win").astype(int)
     df["is_loss"] = (result_clean == "loss").astype(int)
     df["is_push"] = (result_clean == "push").astype(int)
-    df["units"] = df.apply(grade_to_units, axis=1)
+    df["units"] = grade_to_units(df)
 
-    df["ev_bucket"] = df["ev"].apply(lambda v: bucket_value(v, EV_BANDS))
-    df["kelly_bucket"] = df["kelly"].apply(lambda v: bucket_value(v, KELLY_BANDS))
-    df["odds_bucket"] = df["dk_odds_american"].apply(lambda v: bucket_value(v, ODDS_BANDS))
-    df["win_prob_bucket"] = df.apply(win_prob_bucket, axis=1)
+    df["ev_bucket"] = bucket_values(df["ev"], EV_BANDS)
+    df["kelly_bucket"] = bucket_values(df["kelly"], KELLY_BANDS)
+    df["odds_bucket"] = bucket_values(df["dk_odds_american"], ODDS_BANDS)
+    df["win_prob_bucket"] = win_prob_buckets(df)
     df["side_bucket"] = df["side_group"]
-    df["total_range_bucket"] = df["line"].apply(lambda v: bucket_value(v, TOTAL_RANGE_BANDS))
+    df["total_range_bucket"] = bucket_values(df["line"], TOTAL_RANGE_BANDS)
+    df["all_bucket"] = "ALL"
 
     return df
 
@@ -341,29 +332,52 @@ def prepare_df(df: pd.DataFrame) -> pd.DataFrame:
 ######################## SUMMARIES ############################
 ###############################################################
 
-def summarize(df: pd.DataFrame, market_type: str, variable_col: str, include_side: bool) -> pd.DataFrame:
-    if df.empty:
-        return empty_report_df()
+CUBE_DIMS = [
+    "game_date",
+    "league",
+    "market_type",
+    "side_group",
+    "ev_bucket",
+    "kelly_bucket",
+    "odds_bucket",
+    "win_prob_bucket",
+    "side_bucket",
+    "total_range_bucket",
+    "all_bucket",
+]
 
-    group_cols = ["league", "market_type", variable_col]
+MEAN_SOURCES = {
+    "avg_odds": "dk_odds_american",
+    "avg_ev": "ev",
+    "avg_kelly": "kelly",
+    "avg_win_prob": "model_prob",
+}
 
-    if include_side:
-        group_cols.insert(2, "side_group")
+CUBE_MEASURES = ["rows", "Win", "Loss", "Push", "units"] + [
+    f"{avg}_{part}" for avg in MEAN_SOURCES for part in ("sum", "n")
+]
 
-    grouped = (
-        df.groupby(group_cols, dropna=False)
-        .agg(
-            Win=("is_win", "sum"),
-            Loss=("is_loss", "sum"),
-            Push=("is_push", "sum"),
-            units=("units", "sum"),
-            avg_odds=("dk_odds_american", "mean"),
-            avg_ev=("ev", "mean"),
-            avg_kelly=("kelly", "mean"),
-            avg_win_prob=("model_prob", "mean"),
-        )
-        .reset_index()
-    )
+
+def build_cube(df: pd.DataFrame) -> pd.DataFrame:
+    """One scan of the work file: additive measures per cell of every bucket dimension."""
+    work = df[CUBE_DIMS].copy()
+    work["rows"] = 1
+    work["Win"] = df["is_win"]
+    work["Loss"] = df["is_loss"]
+    work["Push"] = df["is_push"]
+    work["units"] = df["units"]
+
+    for avg, col in MEAN_SOURCES.items():
+        work[f"{avg}_sum"] = df[col]
+        work[f"{avg}_n"] = df[col].notna().astype(int)
+
+    return work.groupby(CUBE_DIMS, dropna=False, sort=False)[CUBE_MEASURES].sum().reset_index()
+
+
+def add_report_metrics(grouped: pd.DataFrame) -> pd.DataFrame:
+    for avg in MEAN_SOURCES:
+        n = grouped[f"{avg}_n"]
+        grouped[avg] = np.where(n > 0, grouped[f"{avg}_sum"] / n.where(n > 0, 1), np.nan)
 
     grouped["Total"] = grouped["Win"] + grouped["Loss"] + grouped["Push"]
     grouped["bets_excluding_pushes"] = grouped["Win"] + grouped["Loss"]
@@ -381,6 +395,21 @@ def summarize(df: pd.DataFrame, market_type: str, variable_col: str, include_sid
         np.nan,
     )
 
+    return grouped
+
+
+def summarize(cube: pd.DataFrame, market_type: str, variable_col: str, include_side: bool) -> pd.DataFrame:
+    if cube.empty:
+        return empty_report_df()
+
+    group_cols = ["league", "market_type", variable_col]
+
+    if include_side:
+        group_cols.insert(2, "side_group")
+
+    grouped = cube.groupby(group_cols, dropna=False)[CUBE_MEASURES].sum().reset_index()
+    grouped = add_report_metrics(grouped)
+
     grouped = grouped.rename(columns={variable_col: "variable"})
 
     if not include_side:
@@ -398,34 +427,603 @@ def summarize(df: pd.DataFrame, market_type: str, variable_col: str, include_sid
     return grouped
 
 
+###############################################################
+###################### AGGREGATE STORE ########################
+###############################################################
+
+# Reports are rendered from a persisted store of additive measures per
+# (market, side_group, dimension, bucket). The store keeps one partition per
+# game_date plus running totals; each run folds in only the dates whose work
+# block changed, retracting the old partition first. Which blocks changed, and
+# where they sit in the work file, comes from 02_nhl_results_analyze's
+# manifest, so only those rows are read. Partitions are blocks of
+# nhl_report_store_daily.csv in date order, laid out like work_nhl.csv: new
+# dates after the last one are appended, anything else re-splices the file.
+# Counts stay integers; the float sums are re-added from the partitions every
+# REFRESH_EVERY incremental runs so retract/fold rounding cannot build up.
+#
+# nhl_report_store_cumulative.csv holds, per stored date, one block of running
+# sums over that date and every earlier one. Blocks before the earliest changed
+# or removed date keep their bytes; the rest are re-added from the block before
+# it, so appending a date adds one partition to one block.
+
+STORE_VERSION = 1
+
+REFRESH_EVERY = 30
+
+DIMENSIONS = {
+    "ev": "ev_bucket",
+    "kelly": "kelly_bucket",
+    "odds": "odds_bucket",
+    "win_prob": "win_prob_bucket",
+    "side": "side_bucket",
+    "total_range": "total_range_bucket",
+    "all": "all_bucket",
+}
+
+STORE_KEYS = ["league", "market_type", "side_group", "dimension", "bucket"]
+
+STORE_COLUMNS = ["game_date"] + STORE_KEYS + CUBE_MEASURES
+
+COUNT_MEASURES = [m for m in CUBE_MEASURES if m in {"rows", "Win", "Loss", "Push"} or m.endswith("_n")]
+
+
+def store_layout() -> str:
+    """Changes whenever bucketing would, so a stale store is rebuilt instead of mixed."""
+    spec = repr((
+        STORE_VERSION,
+        EV_BANDS,
+        KELLY_BANDS,
+        ODDS_BANDS,
+        WIN_PROB_BANDS,
+        TOTAL_RANGE_BANDS,
+        DIMENSIONS,
+        CUBE_MEASURES,
+    ))
+    return hashlib.sha256(spec.encode("utf-8")).hexdigest()
+
+
+def file_sha256(path: Path) -> str:
+    return hashlib.sha256(path.read_bytes()).hexdigest()
+
+
+def write_store_csv(df: pd.DataFrame, path: Path) -> None:
+    write_csv(df, path)
+
+
+def read_store_csv(path: Path | io.BytesIO) -> pd.DataFrame:
+    # round_trip parsing gives back exactly the sums that were written, so an
+    # unchanged store reproduces byte-identical reports.
+    return pd.read_csv(
+        path,
+        dtype={key: str for key in STORE_KEYS + ["game_date"]},
+        keep_default_na=False,
+        float_precision="round_trip",
+    )
+
+
+def empty_store() -> pd.DataFrame:
+    return pd.DataFrame(columns=STORE_KEYS + CUBE_MEASURES)
+
+
+def work_index() -> dict | None:
+    """work_nhl_manifest.json when it still describes the work file on disk."""
+    try:
+        index = json.loads(WORK_MANIFEST_FILE.read_text(encoding="utf-8"))
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        log_error(f"WORK MANIFEST UNREADABLE | {WORK_MANIFEST_FILE} | {e}")
+        return None
+
+    if not INPUT_FILE.exists() or INPUT_FILE.stat().st_size != index.get("size"):
+        log_error(f"WORK FILE OUT OF SYNC WITH MANIFEST | {INPUT_FILE} | reading it whole")
+        return None
+
+    return index
+
+
+def read_work_dates(index: dict, dates: list[str]) -> pd.DataFrame:
+    """Work rows of dates only, read from their blocks of the work file."""
+    with INPUT_FILE.open("rb") as f:
+        parts = [f.readline()]
+
+        for game_date in dates:
+            meta = index["dates"][game_date]
+            f.seek(meta["offset"])
+            parts.append(f.read(meta["length"]))
+
+    df = pd.read_csv(io.BytesIO(b"".join(parts)))
+    df["game_date"] = df["game_date"].astype(str)
+    return df
+
+
+def store_header() -> bytes:
+    return pd.DataFrame(columns=STORE_COLUMNS).to_csv(index=False).encode("utf-8")
+
+
+def store_block(rows: pd.DataFrame) -> bytes:
+    return rows[STORE_COLUMNS].to_csv(index=False, header=False).encode("utf-8")
+
+
+def read_blocks(path: Path, spans: list[tuple[int, int]]) -> list[bytes]:
+    """The header line of path followed by its (offset, length) blocks."""
+    with path.open("rb") as f:
+        parts = [f.readline()]
+
+        for offset, length in spans:
+            f.seek(offset)
+            parts.append(f.read(length))
+
+    return parts
+
+
+def partition_spans(dates: dict[str, dict], wanted: list[str]) -> list[tuple[int, int]]:
+    return [(dates[d]["partition_offset"], dates[d]["partition_length"]) for d in wanted]
+
+
+def read_partitions(dates: dict[str, dict], wanted: list[str]) -> pd.DataFrame:
+    """Partitions of the wanted dates, read from their blocks of the daily file."""
+    if not wanted:
+        return pd.DataFrame(columns=STORE_COLUMNS)
+
+    return read_store_csv(io.BytesIO(b"".join(read_blocks(STORE_DAILY_FILE, partition_spans(dates, wanted)))))
+
+
+def write_partitions(dates: dict[str, dict], blocks: dict[str, bytes], removed: list[str]) -> int:
+    """Splice new partition blocks into the daily file; return its size.
+
+    dates is the new manifest: kept dates still carry their old offsets, and
+    every date gets its block's offset, length and sha256.
+    """
+    kept = [d for d in dates if d not in blocks]
+    append = bool(kept) and bool(blocks) and not removed and min(blocks) > max(kept)
+
+    if append:
+        offset = STORE_DAILY_FILE.stat().st_size
+        with STORE_DAILY_FILE.open("ab") as f:
+            for game_date in sorted(blocks):
+                f.write(blocks[game_date])
+    else:
+        old = STORE_DAILY_FILE.read_bytes() if kept else b""
+        parts = [store_header()]
+
+        for game_date in sorted(dates):
+            if game_date in blocks:
+                parts.append(blocks[game_date])
+            else:
+                offset, length = partition_spans(dates, [game_date])[0]
+                parts.append(old[offset:offset + length])
+
+        write_bytes(STORE_DAILY_FILE, b"".join(parts))
+        offset = len(parts[0])
+
+    for game_date in sorted(dates):
+        if append and game_date not in blocks:
+            continue
+
+        data = blocks.get(game_date)
+        length = len(data) if data is not None else dates[game_date]["partition_length"]
+        meta = {"partition_offset": offset, "partition_length": length}
+
+        if data is not None:
+            meta["partition_sha256"] = hashlib.sha256(data).hexdigest()
+
+        dates[game_date] = {**dates[game_date], **meta}
+        offset += length
+
+    return STORE_DAILY_FILE.stat().st_size
+
+
+def store_rows(prepared: pd.DataFrame) -> pd.DataFrame:
+    """Roll prepared work rows up to one store row per game_date and store key."""
+    cube = build_cube(prepared)
+    parts = []
+
+    for dimension, col in DIMENSIONS.items():
+        part = (
+            cube.groupby(["game_date", "league", "market_type", "side_group", col], dropna=False, sort=False)[CUBE_MEASURES]
+            .sum()
+            .reset_index()
+            .rename(columns={col: "bucket"})
+        )
+        part.insert(4, "dimension", dimension)
+        parts.append(part)
+
+    return pd.concat(parts, ignore_index=True)
+
+
+def fold(totals: pd.DataFrame, delta: pd.DataFrame, sign: int) -> pd.DataFrame:
+    if delta.empty:
+        return totals
+
+    delta = delta.groupby(STORE_KEYS, dropna=False, sort=False)[CUBE_MEASURES].sum() * sign
+
+    if totals.empty:
+        return delta[delta["rows"] != 0].reset_index()
+
+    merged = (
+        pd.concat([totals.set_index(STORE_KEYS)[CUBE_MEASURES], delta])
+        .groupby(level=STORE_KEYS, dropna=False, sort=False)
+        .sum()
+    )
+
+    return merged[merged["rows"] != 0].reset_index()
+
+
+def load_store(layout: str) -> tuple[pd.DataFrame, dict, int, int | None]:
+    fresh = (empty_store(), {}, 0, None)
+
+    if not STORE_MANIFEST_FILE.exists() or not STORE_TOTALS_FILE.exists() or not STORE_DAILY_FILE.exists():
+        log_summary("STORE | no existing store, rebuilding")
+        return fresh
+
+    try:
+        manifest = json.loads(STORE_MANIFEST_FILE.read_text(encoding="utf-8"))
+    except Exception as e:
+        log_error(f"STORE MANIFEST UNREADABLE | {STORE_MANIFEST_FILE} | {e}")
+        return fresh
+
+    if manifest.get("layout") != layout:
+        log_summary("STORE | bucket layout changed, rebuilding")
+        return fresh
+
+    if manifest.get("totals_sha256") != file_sha256(STORE_TOTALS_FILE):
+        log_error(f"STORE TOTALS OUT OF SYNC WITH MANIFEST | {STORE_TOTALS_FILE} | rebuilding")
+        return fresh
+
+    if manifest.get("daily_size") != STORE_DAILY_FILE.stat().st_size:
+        log_error(f"STORE PARTITIONS OUT OF SYNC WITH MANIFEST | {STORE_DAILY_FILE} | rebuilding")
+        return fresh
+
+    return (
+        read_store_csv(STORE_TOTALS_FILE),
+        manifest.get("dates", {}),
+        manifest.get("folds", 0),
+        manifest.get("cumulative_size"),
+    )
+
+
+def read_cumulative(dates: dict[str, dict], wanted: list[str]) -> pd.DataFrame:
+    """Cumulative blocks of the wanted dates, read from their offsets."""
+    spans = [(dates[d]["cumulative_offset"], dates[d]["cumulative_length"]) for d in wanted]
+    return read_store_csv(io.BytesIO(b"".join(read_blocks(STORE_CUMULATIVE_FILE, spans))))
+
+
+def accumulate(running: pd.DataFrame, partition: pd.DataFrame) -> pd.DataFrame:
+    """Running sums plus one date's partition; a key once seen keeps its row."""
+    total = running.set_index(STORE_KEYS)[CUBE_MEASURES].add(
+        partition.set_index(STORE_KEYS)[CUBE_MEASURES],
+        fill_value=0,
+    )
+    total = total.astype({m: "int64" if m in COUNT_MEASURES else "float64" for m in CUBE_MEASURES})
+    return total.reset_index().sort_values(STORE_KEYS, kind="stable").reset_index(drop=True)
+
+
+def update_cumulative(
+    dates: dict[str, dict],
+    new_rows: pd.DataFrame,
+    changed: list[str],
+    since: str | None,
+    size: int | None,
+) -> int:
+    """Rewrite the cumulative blocks from since on; return the file's size.
+
+    since is the earliest changed or removed date, None when neither. dates is
+    the new manifest and gets each rewritten block's offset and length. A file
+    that does not match the manifest is rewritten from the first date.
+    """
+    ordered = sorted(dates)
+
+    intact = (
+        size is not None
+        and STORE_CUMULATIVE_FILE.exists()
+        and STORE_CUMULATIVE_FILE.stat().st_size == size
+        and all("cumulative_offset" in dates[d] for d in ordered if since is None or d < since)
+    )
+
+    if not intact:
+        if size is not None:
+            log_error(f"STORE CUMULATIVE OUT OF SYNC WITH MANIFEST | {STORE_CUMULATIVE_FILE} | rebuilding")
+        since = ordered[0]
+    elif since is None:
+        return size
+
+    kept = [d for d in ordered if d < since]
+    tail = [d for d in ordered if d >= since]
+
+    if kept:
+        last = dates[kept[-1]]
+        offset = last["cumulative_offset"] + last["cumulative_length"]
+        running = read_cumulative(dates, kept[-1:]).drop(columns="game_date")
+    else:
+        offset = len(store_header())
+        running = empty_store()
+
+    start = offset
+    partitions = read_partitions(dates, [d for d in tail if d not in changed])
+
+    if changed:
+        partitions = pd.concat([new_rows[new_rows["game_date"].isin(tail)], partitions], ignore_index=True)
+
+    by_date = {game_date: part for game_date, part in partitions.groupby("game_date", sort=False)}
+    blocks = []
+
+    for game_date in tail:
+        if game_date in by_date:
+            running = accumulate(running, by_date[game_date])
+
+        data = store_block(running.assign(game_date=game_date))
+        dates[game_date] = {**dates[game_date], "cumulative_offset": offset, "cumulative_length": len(data)}
+        offset += len(data)
+        blocks.append(data)
+
+    if kept:
+        with STORE_CUMULATIVE_FILE.open("r+b") as f:
+            f.seek(start)
+            f.truncate()
+            f.write(b"".join(blocks))
+    else:
+        write_bytes(STORE_CUMULATIVE_FILE, store_header() + b"".join(blocks))
+
+    log_summary(f"STORE CUMULATIVE | kept={len(kept)} | rewritten={len(tail)} | since={since}")
+
+    return offset
+
+
+def update_store(index: dict | None) -> tuple[pd.DataFrame, dict[str, dict]] | None:
+    """Fold changed dates of the work file into the store; return totals and the stored dates' manifest.
+
+    index is the work manifest; without one the whole work file is read and the
+    store rebuilt. None when there are no work rows.
+    """
+    layout = store_layout()
+    totals, stored, folds, cumulative_size = load_store(layout)
+    df = None
+
+    if index is None:
+        df = safe_read(INPUT_FILE)
+        if df.empty:
+            return None
+
+        df["game_date"] = df["game_date"].astype(str)
+        current = {d: {"rows": int(len(idx)), "digest": None} for d, idx in df.groupby("game_date", sort=True).indices.items()}
+
+        if stored:
+            log_summary("STORE | no work manifest, rebuilding from the whole work file")
+        totals, stored = empty_store(), {}
+    else:
+        current = {d: {"rows": meta["rows"], "digest": meta["digest"]} for d, meta in index["dates"].items()}
+
+    if not current:
+        return None
+
+    changed = sorted(d for d, meta in current.items() if stored.get(d, {}).get("digest") != meta["digest"] or meta["digest"] is None)
+    removed = sorted(set(stored) - set(current))
+
+    retracted = sorted(set(stored) & set(changed)) + removed
+    parts = read_blocks(STORE_DAILY_FILE, partition_spans(stored, retracted)) if retracted else []
+
+    for game_date, data in zip(retracted, parts[1:]):
+        if hashlib.sha256(data).hexdigest() != stored[game_date].get("partition_sha256"):
+            log_error(f"STORE PARTITION OUT OF SYNC | {STORE_DAILY_FILE} | {game_date} | rebuilding")
+            totals, stored = empty_store(), {}
+            changed = sorted(current)
+            removed = []
+            break
+
+        totals = fold(totals, read_store_csv(io.BytesIO(parts[0] + data)), -1)
+
+    rebuilt = not stored
+
+    if rebuilt:
+        # Stores before the daily file kept one CSV per date here.
+        remove_stale(STORE_DIR / "daily", "*_report_store_NHL.csv", keep=[])
+
+    if changed:
+        rows = df[df["game_date"].isin(changed)] if df is not None else read_work_dates(index, changed)
+        new_rows = store_rows(prepare_df(rows))
+    else:
+        new_rows = empty_store()
+
+    totals = fold(totals, new_rows, 1)
+
+    dates = {d: meta for d, meta in stored.items() if d in current and d not in changed}
+
+    for game_date in changed:
+        dates[game_date] = current[game_date]
+
+    if changed or removed:
+        blocks = {d: store_block(part) for d, part in new_rows.groupby("game_date", sort=False)} if changed else {}
+        blocks = {d: blocks.get(d, b"") for d in changed}
+        daily_size = write_partitions(dates, blocks, removed)
+    else:
+        daily_size = STORE_DAILY_FILE.stat().st_size
+
+    if rebuilt:
+        folds = 0
+    elif changed or removed:
+        folds += 1
+
+    if folds >= REFRESH_EVERY:
+        totals = fold(empty_store(), read_partitions(dates, sorted(dates)), 1)
+        folds = 0
+        log_summary(f"STORE | totals re-summed from {len(dates)} partitions")
+
+    since = min(changed + removed) if changed or removed else None
+    cumulative_size = update_cumulative(dates, new_rows, changed, since, cumulative_size)
+
+    totals = totals.sort_values(STORE_KEYS, kind="stable").reset_index(drop=True)
+    write_store_csv(totals, STORE_TOTALS_FILE)
+
+    manifest = {
+        "layout": layout,
+        "totals_sha256": file_sha256(STORE_TOTALS_FILE),
+        "daily_size": daily_size,
+        "cumulative_size": cumulative_size,
+        "folds": folds,
+        "dates": dict(sorted(dates.items())),
+    }
+    write_text(STORE_MANIFEST_FILE, json.dumps(manifest, indent=2) + "\n")
+
+    folded = sum(current[d]["rows"] for d in changed)
+    log_summary(
+        f"STORE UPDATED | dates={len(current)} | changed={len(changed)} | removed={len(removed)} | "
+        f"folded_rows={folded} | cells={len(totals)} | folds_since_refresh={folds}"
+    )
+
+    return totals, dict(sorted(dates.items()))
+
+
+###############################################################
+###################### ROLLING WINDOWS ########################
+###############################################################
+
+# Any window is cum[end] - cum[start - 1], two blocks of the store's cumulative
+# file, so a window reads two dates' sums whatever the length of history.
+
+ROLLING_WINDOWS = {
+    "last_7": 7,
+    "last_30": 30,
+}
+
+WINDOW_DIMENSIONS = {
+    "moneyline": ["all", "ev", "kelly", "odds", "win_prob"],
+    "puck_line": ["all", "ev", "kelly", "odds", "side", "win_prob"],
+    "total": ["all", "ev", "kelly", "odds", "side", "total_range", "win_prob"],
+}
+
+WINDOW_COLUMNS = ["window", "start_date", "end_date", "dimension"] + REPORT_COLUMNS
+
+
+def parse_game_date(value: str) -> date:
+    return datetime.strptime(value, "%Y_%m_%d").date()
+
+
+def format_game_date(value: date) -> str:
+    return value.strftime("%Y_%m_%d")
+
+
+def season_start(value: date) -> date:
+    # NHL seasons are identified by their starting calendar year.
+    return date(value.year if value.month >= 7 else value.year - 1, 7, 1)
+
+
+class CumulativeStore:
+    def __init__(self, dates: dict[str, dict]):
+        self.index = dates
+        self.dates = np.array(sorted(dates), dtype=object)
+
+    def window(self, start: str, end: str) -> pd.DataFrame:
+        lo = np.searchsorted(self.dates, start, side="left")
+        hi = np.searchsorted(self.dates, end, side="right")
+
+        if hi <= lo:
+            return read_cumulative(self.index, []).drop(columns="game_date")
+
+        upper_date = self.dates[hi - 1]
+        lower_date = self.dates[lo - 1] if lo > 0 else None
+
+        blocks = read_cumulative(self.index, [upper_date] + ([lower_date] if lower_date else []))
+        cells = blocks[blocks["game_date"] == upper_date].set_index(STORE_KEYS)[CUBE_MEASURES]
+
+        if lower_date:
+            lower = blocks[blocks["game_date"] == lower_date].set_index(STORE_KEYS)[CUBE_MEASURES]
+            cells = cells - lower.reindex(cells.index, fill_value=0)
+
+        cells = cells.reset_index()
+        return cells[cells["rows"] != 0].reset_index(drop=True)
+
+
+def summarize_window(cells: pd.DataFrame, name: str, start: str, end: str) -> pd.DataFrame:
+    wanted = pd.MultiIndex.from_tuples(
+        [(market, dim) for market, dims in WINDOW_DIMENSIONS.items() for dim in dims]
+    )
+    cells = cells[pd.MultiIndex.from_frame(cells[["market_type", "dimension"]]).isin(wanted)]
+
+    base_cols = ["league", "market_type", "dimension", "bucket"]
+    base = cells.groupby(base_cols, dropna=False)[CUBE_MEASURES].sum().reset_index()
+    base["side_group"] = "ALL"
+
+    side = cells.groupby(base_cols[:3] + ["side_group", "bucket"], dropna=False)[CUBE_MEASURES].sum().reset_index()
+
+    out = add_report_metrics(pd.concat([base, side], ignore_index=True))
+    out = out.rename(columns={"bucket": "variable"})
+
+    out["window"] = name
+    out["start_date"] = start
+    out["end_date"] = end
+
+    return out.sort_values(
+        ["market_type", "dimension", "side_group", "variable"],
+        kind="stable",
+    ).reset_index(drop=True)[WINDOW_COLUMNS]
+
+
+def window_bounds(latest: str, args: argparse.Namespace) -> list[tuple[str, str, str]]:
+    latest_day = parse_game_date(latest)
+
+    bounds = [
+        (name, format_game_date(latest_day - timedelta(days=days - 1)), latest)
+        for name, days in ROLLING_WINDOWS.items()
+    ]
+    bounds.append(("season_to_date", format_game_date(season_start(latest_day)), latest))
+
+    if args.start or args.end:
+        start = args.start or "0000_00_00"
+        end = args.end or latest
+        bounds.append((f"range_{args.start or 'start'}_to_{args.end or 'latest'}", start, end))
+
+    return bounds
+
+
+def write_windows(dates: dict[str, dict], args: argparse.Namespace) -> None:
+    if not dates:
+        log_error("NO STORED DATES FOR WINDOW REPORTS")
+        return
+
+    cumulative = CumulativeStore(dates)
+    written = []
+
+    for name, start, end in window_bounds(max(dates), args):
+        report = summarize_window(cumulative.window(start, end), name, start, end)
+        path = WINDOW_DIR / f"nhl_{name}.csv"
+        write_report(report, path)
+        written.append(path)
+
+    # --start/--end reports belong to the run that asked for them.
+    removed = remove_stale(WINDOW_DIR, "nhl_range_*.csv", keep=written)
+    log_summary(f"REMOVED STALE RANGE REPORTS | files={len(removed)}")
+
+
 def write_report(df: pd.DataFrame, path: Path) -> None:
-    path.parent.mkdir(parents=True, exist_ok=True)
-    df.to_csv(path, index=False)
-    log_summary(f"WROTE REPORT | {path} | rows={len(df)}")
+    verb = "WROTE" if write_csv(df, path) else "UNCHANGED"
+    log_summary(f"{verb} REPORT | {path} | rows={len(df)}")
 
 
 def write_pair(
-    market_df: pd.DataFrame,
+    market_store: pd.DataFrame,
     market_type: str,
     out_dir: Path,
     prefix: str,
     report_name: str,
-    variable_col: str,
 ) -> None:
-    base = summarize(market_df, market_type, variable_col, include_side=False)
-    side = summarize(market_df, market_type, variable_col, include_side=True)
+    cells = market_store[market_store["dimension"] == report_name]
+
+    base = summarize(cells, market_type, "bucket", include_side=False)
+    side = summarize(cells, market_type, "bucket", include_side=True)
 
     write_report(base, out_dir / f"{prefix}_by_{report_name}.csv")
     write_report(side, out_dir / f"{prefix}_by_{report_name}_home_away_summary.csv")
 
 
-def write_market_tally(df: pd.DataFrame) -> None:
+def write_market_tally(store: pd.DataFrame) -> None:
     rows = []
 
     for market_type in ["moneyline", "puck_line", "total"]:
-        market_df = df[df["market_type"] == market_type].copy()
+        market_cells = store[(store["market_type"] == market_type) & (store["dimension"] == "all")]
 
-        if market_df.empty:
+        if market_cells.empty:
             row = {
                 "league": "nhl",
                 "market_type": market_type,
@@ -448,99 +1046,104 @@ def write_market_tally(df: pd.DataFrame) -> None:
             rows.append(row)
             continue
 
-        summary = summarize(market_df, market_type, "all_bucket", include_side=False)
+        summary = summarize(market_cells, market_type, "bucket", include_side=False)
         rows.extend(summary.to_dict("records"))
 
     tally = pd.DataFrame(rows, columns=REPORT_COLUMNS)
-    tally.to_csv(TALLY_FILE, index=False)
-    log_summary(f"WROTE MARKET TALLY | {TALLY_FILE} | rows={len(tally)}")
+    verb = "WROTE" if write_csv(tally, TALLY_FILE) else "UNCHANGED"
+    log_summary(f"{verb} MARKET TALLY | {TALLY_FILE} | rows={len(tally)}")
 
 
 ###############################################################
 ######################## MAIN #################################
 ###############################################################
 
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--start", help="Also write a window report from this game_date, YYYY_MM_DD; replaced by the next run.")
+    parser.add_argument("--end", help="Also write a window report through this game_date, YYYY_MM_DD; replaced by the next run.")
+    args = parser.parse_args()
+
+    for value in (args.start, args.end):
+        if value is not None:
+            try:
+                parse_game_date(value)
+            except ValueError:
+                raise SystemExit(f"Invalid date {value!r}, expected YYYY_MM_DD")
+
+    return args
+
+
 def main() -> None:
+    args = parse_args()
     reset_logs()
 
     log_summary("START 03_nhl_results_reports.py")
     log_summary(f"INPUT_FILE={INPUT_FILE}")
     log_summary(f"REPORT_ROOT={REPORT_ROOT}")
 
-    df = safe_read(INPUT_FILE)
-
-    if df.empty:
-        log_error("STOPPING: work file missing or empty")
+    try:
+        columns = pd.read_csv(INPUT_FILE, nrows=0).columns
+    except Exception as e:
+        log_error(f"STOPPING: work file missing or unreadable | {INPUT_FILE} | {e}")
         print("NHL reports failed: work file missing or empty.")
         return
 
-    required = [
-        "league",
-        "game_date",
-        "game_id",
-        "away_team",
-        "home_team",
-        "market_type",
-        "bet_side",
-        "line",
-        "dk_odds_american",
-        "model_prob",
-        "ev",
-        "kelly",
-        "bet_result",
-    ]
+    required = [col for col in GRADED if not col.startswith("source_")]
 
-    missing = [c for c in required if c not in df.columns]
+    missing = [c for c in required if c not in columns]
     if missing:
         log_error(f"STOPPING: missing required columns {missing}")
         print(f"NHL reports failed: missing columns {missing}")
         return
 
-    df = prepare_df(df)
-    df["all_bucket"] = "ALL"
+    updated = update_store(work_index())
+
+    if updated is None:
+        log_error("STOPPING: work file missing or empty")
+        print("NHL reports failed: work file missing or empty.")
+        return
+
+    store, dates = updated
 
-    moneyline_df = df[df["market_type"] == "moneyline"].copy()
-    puckline_df = df[df["market_type"] == "puck_line"].copy()
-    total_df = df[df["market_type"] == "total"].copy()
+    moneyline_store = store[store["market_type"] == "moneyline"]
+    puckline_store = store[store["market_type"] == "puck_line"]
+    total_store = store[store["market_type"] == "total"]
 
     ###########################################################
     # MONEYLINE
     ###########################################################
 
     write_pair(
-        moneyline_df,
+        moneyline_store,
         "moneyline",
         MONEYLINE_DIR,
         "nhl_moneyline",
         "ev",
-        "ev_bucket",
     )
 
     write_pair(
-        moneyline_df,
+        moneyline_store,
         "moneyline",
         MONEYLINE_DIR,
         "nhl_moneyline",
         "kelly",
-        "kelly_bucket",
     )
 
     write_pair(
-        moneyline_df,
+        moneyline_store,
         "moneyline",
         MONEYLINE_DIR,
         "nhl_moneyline",
         "odds",
-        "odds_bucket",
     )
 
     write_pair(
-        moneyline_df,
+        moneyline_store,
         "moneyline",
         MONEYLINE_DIR,
         "nhl_moneyline",
         "win_prob",
-        "win_prob_bucket",
     )
 
     ###########################################################
@@ -548,48 +1151,43 @@ def main() -> None:
     ###########################################################
 
     write_pair(
-        puckline_df,
+        puckline_store,
         "puck_line",
         PUCKLINE_DIR,
         "nhl_puck_line",
         "ev",
-        "ev_bucket",
     )
 
     write_pair(
-        puckline_df,
+        puckline_store,
         "puck_line",
         PUCKLINE_DIR,
         "nhl_puck_line",
         "kelly",
-        "kelly_bucket",
     )
 
     write_pair(
-        puckline_df,
+        puckline_store,
         "puck_line",
         PUCKLINE_DIR,
         "nhl_puck_line",
         "odds",
-        "odds_bucket",
     )
 
     write_pair(
-        puckline_df,
+        puckline_store,
         "puck_line",
         PUCKLINE_DIR,
         "nhl_puck_line",
         "side",
-        "side_bucket",
     )
 
     write_pair(
-        puckline_df,
+        puckline_store,
         "puck_line",
         PUCKLINE_DIR,
         "nhl_puck_line",
         "win_prob",
-        "win_prob_bucket",
     )
 
     ###########################################################
@@ -597,64 +1195,59 @@ def main() -> None:
     ###########################################################
 
     write_pair(
-        total_df,
+        total_store,
         "total",
         TOTAL_DIR,
         "nhl_total",
         "ev",
-        "ev_bucket",
     )
 
     write_pair(
-        total_df,
+        total_store,
         "total",
         TOTAL_DIR,
         "nhl_total",
         "kelly",
-        "kelly_bucket",
     )
 
     write_pair(
-        total_df,
+        total_store,
         "total",
         TOTAL_DIR,
         "nhl_total",
         "odds",
-        "odds_bucket",
     )
 
     write_pair(
-        total_df,
+        total_store,
         "total",
         TOTAL_DIR,
         "nhl_total",
         "side",
-        "side_bucket",
     )
 
     write_pair(
-        total_df,
+        total_store,
         "total",
         TOTAL_DIR,
         "nhl_total",
         "total_range",
-        "total_range_bucket",
     )
 
     write_pair(
-        total_df,
+        total_store,
         "total",
         TOTAL_DIR,
         "nhl_total",
         "win_prob",
-        "win_prob_bucket",
     )
 
-    write_market_tally(df)
+    write_market_tally(store)
+    write_windows(dates, args)
 
     log_summary("END 03_nhl_results_reports.py")
     print("NHL reports complete.")
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    run_main(main, ERROR_LOG)
\ No newline at end of file
@@ -0,0 +1,365 @@
+#!/usr/bin/env python3
+# docs/win/hockey/nhl/scripts/05_final_scores/04_nhl_results_calibration.py
+
+import argparse
+import sys
+from datetime import datetime, UTC
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from nhl_archive import find_file
+from nhl_output import write_csv
+from nhl_profile import run_main
+from nhl_schema import EV_KELLY, GRADED, MARKET_SIDES, read_typed_csv
+
+
+###############################################################
+######################## PATH CONFIG ##########################
+###############################################################
+
+NHL_ROOT = Path("docs/win/hockey/nhl")
+FINAL_ROOT = NHL_ROOT / "05_final_scores"
+
+INPUT_FILE = FINAL_ROOT / "graded" / "NHL_final.csv"
+EV_KELLY_DIR = NHL_ROOT / "03_edges" / "ev_kelly"
+
+CALIBRATION_DIR = FINAL_ROOT / "reports" / "calibration"
+SUMMARY_FILE = CALIBRATION_DIR / "nhl_calibration_summary.csv"
+RELIABILITY_FILE = CALIBRATION_DIR / "nhl_calibration_reliability.csv"
+
+ERROR_DIR = FINAL_ROOT / "errors"
+
+ERROR_LOG = ERROR_DIR / "04_nhl_results_calibration_errors.txt"
+SUMMARY_LOG = ERROR_DIR / "04_nhl_results_calibration_summary.txt"
+
+
+###############################################################
+######################## CALIBRATION CONFIG ###################
+###############################################################
+
+# prob_source -> per-side ev_kelly column holding that probability. "model" is
+# the dratings probability already on the graded row and "book" is the implied
+# probability of the sportsbook price, 1 / dk_odds_decimal.
+JOINED_SOURCES = {
+    "juiced": "{side}_juiced_prob_{market}",
+    "normalized": "{side}_normalized_prob_{market}",
+}
+
+PROB_SOURCES = ["model", "juiced", "normalized", "book"]
+
+GROUP_KEYS = ["market_type", "side_group", "prob_source"]
+
+ALL = "ALL"
+
+# Log loss is taken on probabilities clipped to [EPS, 1 - EPS].
+EPS = 1e-6
+
+SUMMARY_COLUMNS = [
+    "league",
+    "market_type",
+    "side_group",
+    "prob_source",
+    "bets",
+    "wins",
+    "avg_prob",
+    "win_rate",
+    "brier",
+    "log_loss",
+    "ece",
+]
+
+RELIABILITY_COLUMNS = [
+    "league",
+    "market_type",
+    "side_group",
+    "prob_source",
+    "bin",
+    "bin_low",
+    "bin_high",
+    "bets",
+    "wins",
+    "avg_prob",
+    "win_rate",
+    "gap",
+]
+
+
+###############################################################
+######################## LOGGING ##############################
+###############################################################
+
+def reset_logs() -> None:
+    CALIBRATION_DIR.mkdir(parents=True, exist_ok=True)
+    ERROR_DIR.mkdir(parents=True, exist_ok=True)
+
+    ERROR_LOG.write_text("", encoding="utf-8")
+    SUMMARY_LOG.write_text("", encoding="utf-8")
+
+
+def log_error(msg: str) -> None:
+    with ERROR_LOG.open("a", encoding="utf-8") as f:
+        f.write(f"[{datetime.now(UTC).isoformat()}] {msg}\n")
+
+
+def log_summary(msg: str) -> None:
+    with SUMMARY_LOG.open("a", encoding="utf-8") as f:
+        f.write(f"[{datetime.now(UTC).isoformat()}] {msg}\n")
+
+
+###############################################################
+######################## INPUTS ###############################
+###############################################################
+
+def read_graded() -> pd.DataFrame:
+    if not INPUT_FILE.exists():
+        log_error(f"MISSING FILE | {INPUT_FILE}")
+        return pd.DataFrame()
+
+    df = read_typed_csv(INPUT_FILE, GRADED, usecols=True)
+
+    required = ["game_date", "game_id", "market_type", "bet_side", "dk_odds_decimal", "model_prob", "bet_result"]
+    missing = [c for c in required if c not in df.columns]
+
+    if missing:
+        log_error(f"MISSING COLUMNS | {INPUT_FILE} | {missing}")
+        return pd.DataFrame()
+
+    df = df.copy()
+    df["game_date"] = df["game_date"].astype(str).str.strip().str.replace("-", "_", regex=False)
+    df["game_id"] = df["game_id"].astype(str).str.strip()
+    df["market_type"] = df["market_type"].astype(str).str.strip().str.lower()
+    df["bet_side"] = df["bet_side"].astype(str).str.strip().str.lower()
+    df["bet_result"] = df["bet_result"].astype(str).str.strip().str.title()
+
+    return df
+
+
+def priced_sides(game_date: str, market_type: str) -> pd.DataFrame:
+    """The juiced and normalized probability of every side of one ev_kelly file."""
+    entry = find_file(EV_KELLY_DIR / f"{game_date}_NHL_{market_type}.csv")
+
+    if entry is None:
+        log_error(f"MISSING FILE | {EV_KELLY_DIR / f'{game_date}_NHL_{market_type}.csv'}")
+        return pd.DataFrame()
+
+    df = read_typed_csv(entry.source(), EV_KELLY[market_type], usecols=True)
+    parts = []
+
+    for side in MARKET_SIDES[market_type]:
+        part = {"game_id": df["game_id"].astype(str).str.strip(), "bet_side": side}
+
+        for source, template in JOINED_SOURCES.items():
+            col = template.format(side=side, market=market_type)
+            part[source] = df[col] if col in df.columns else np.nan
+
+        parts.append(pd.DataFrame(part, index=df.index))
+
+    out = pd.concat(parts, ignore_index=True)
+    out["game_date"] = game_date
+    out["market_type"] = market_type
+
+    return out
+
+
+def join_prices(graded: pd.DataFrame) -> pd.DataFrame:
+    pairs = graded[["game_date", "market_type"]].drop_duplicates()
+    pairs = pairs[pairs["market_type"].isin(MARKET_SIDES)]
+
+    frames = [priced_sides(game_date, market_type) for game_date, market_type in pairs.itertuples(index=False)]
+    frames = [f for f in frames if not f.empty]
+
+    keys = ["game_date", "game_id", "market_type", "bet_side"]
+
+    if not frames:
+        return graded.assign(**dict.fromkeys(JOINED_SOURCES, np.nan))
+
+    prices = pd.concat(frames, ignore_index=True).drop_duplicates(keys, keep="last")
+
+    return graded.merge(prices, on=keys, how="left")
+
+
+###############################################################
+######################## METRICS ##############################
+###############################################################
+
+def long_probs(df: pd.DataFrame) -> pd.DataFrame:
+    """One row per (bet, prob_source) with a probability and a 0/1 outcome.
+
+    Pushes and ungraded bets are dropped, as are probabilities outside (0, 1).
+    """
+    df = df[df["bet_result"].isin(["Win", "Loss"])]
+
+    decimal = pd.to_numeric(df["dk_odds_decimal"], errors="coerce").to_numpy(dtype="float64")
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        book = np.where(decimal > 1, 1 / decimal, np.nan)
+
+    probs = {
+        "model": pd.to_numeric(df["model_prob"], errors="coerce").to_numpy(dtype="float64"),
+        "juiced": pd.to_numeric(df["juiced"], errors="coerce").to_numpy(dtype="float64"),
+        "normalized": pd.to_numeric(df["normalized"], errors="coerce").to_numpy(dtype="float64"),
+        "book": book,
+    }
+
+    n = len(df)
+    p = np.concatenate([probs[source] for source in PROB_SOURCES])
+
+    out = pd.DataFrame(
+        {
+            "market_type": np.tile(df["market_type"].to_numpy(), len(PROB_SOURCES)),
+            "side_group": np.tile(df["bet_side"].str.upper().to_numpy(), len(PROB_SOURCES)),
+            "prob_source": np.repeat(PROB_SOURCES, n),
+            "p": p,
+            "y": np.tile((df["bet_result"] == "Win").to_numpy(dtype="float64"), len(PROB_SOURCES)),
+        }
+    )
+
+    return out[np.isfinite(out["p"]) & (out["p"] > 0) & (out["p"] < 1)].reset_index(drop=True)
+
+
+def with_rollups(long: pd.DataFrame) -> pd.DataFrame:
+    """long plus copies rolled up to every side of a market and to all markets."""
+    return pd.concat(
+        [
+            long,
+            long.assign(side_group=ALL),
+            long.assign(market_type=ALL, side_group=ALL),
+        ],
+        ignore_index=True,
+    )
+
+
+def calibration_tables(long: pd.DataFrame, bins: int) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """Reliability bins and per-group metrics, in one grouped pass.
+
+    Every metric is a sum over rows, so the bin table carries the sums and the
+    group table is the bin table summed again:
+
+        brier    = mean((p - y)^2)
+        log_loss = -mean(y log p + (1 - y) log(1 - p))
+        ece      = sum_b (n_b / N) |avg_p_b - win_rate_b| = sum_b |sum_p_b - sum_y_b| / N
+    """
+    if long.empty:
+        return pd.DataFrame(columns=SUMMARY_COLUMNS), pd.DataFrame(columns=RELIABILITY_COLUMNS)
+
+    p = long["p"].to_numpy()
+    y = long["y"].to_numpy()
+    clipped = np.clip(p, EPS, 1 - EPS)
+
+    work = long[GROUP_KEYS].copy()
+    work["bin"] = np.minimum((p * bins).astype(int), bins - 1)
+    work["bets"] = 1
+    work["wins"] = y
+    work["sum_p"] = p
+    work["sq"] = (p - y) ** 2
+    work["ll"] = -(y * np.log(clipped) + (1 - y) * np.log(1 - clipped))
+
+    cells = work.groupby(GROUP_KEYS + ["bin"], sort=True, as_index=False)[["bets", "wins", "sum_p", "sq", "ll"]].sum()
+    cells["abs_gap"] = (cells["sum_p"] - cells["wins"]).abs()
+
+    groups = cells.groupby(GROUP_KEYS, sort=True, as_index=False)[["bets", "wins", "sum_p", "sq", "ll", "abs_gap"]].sum()
+
+    summary = groups[GROUP_KEYS + ["bets"]].copy()
+    summary["wins"] = groups["wins"].astype(int)
+    summary["avg_prob"] = groups["sum_p"] / groups["bets"]
+    summary["win_rate"] = groups["wins"] / groups["bets"]
+    summary["brier"] = groups["sq"] / groups["bets"]
+    summary["log_loss"] = groups["ll"] / groups["bets"]
+    summary["ece"] = groups["abs_gap"] / groups["bets"]
+    summary.insert(0, "league", "nhl")
+
+    reliability = cells[GROUP_KEYS + ["bin"]].copy()
+    reliability["bin_low"] = cells["bin"] / bins
+    reliability["bin_high"] = (cells["bin"] + 1) / bins
+    reliability["bets"] = cells["bets"]
+    reliability["wins"] = cells["wins"].astype(int)
+    reliability["avg_prob"] = cells["sum_p"] / cells["bets"]
+    reliability["win_rate"] = cells["wins"] / cells["bets"]
+    reliability["gap"] = reliability["win_rate"] - reliability["avg_prob"]
+    reliability.insert(0, "league", "nhl")
+
+    return summary[SUMMARY_COLUMNS], reliability[RELIABILITY_COLUMNS]
+
+
+def log_drift(summary: pd.DataFrame, max_ece: float, min_bets: int) -> int:
+    flagged = summary[(summary["bets"] >= min_bets) & (summary["ece"] > max_ece)]
+
+    for row in flagged.itertuples(index=False):
+        log_error(
+            f"CALIBRATION DRIFT | market={row.market_type} | side={row.side_group} | "
+            f"source={row.prob_source} | bets={row.bets} | ece={row.ece:.4f} > {max_ece} | "
+            f"avg_prob={row.avg_prob:.4f} | win_rate={row.win_rate:.4f}"
+        )
+
+    return len(flagged)
+
+
+###############################################################
+######################## MAIN #################################
+###############################################################
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--bins", type=int, default=10, help="Equal-width probability bins (default 10).")
+    parser.add_argument("--max-ece", type=float, default=0.05, help="Log groups whose ECE exceeds this.")
+    parser.add_argument("--min-bets", type=int, default=30, help="Only check groups with at least this many bets.")
+    args = parser.parse_args()
+
+    if args.bins < 1:
+        raise SystemExit("--bins must be at least 1")
+
+    return args
+
+
+def main() -> None:
+    args = parse_args()
+    reset_logs()
+
+    log_summary("START 04_nhl_results_calibration.py")
+    log_summary(f"INPUT_FILE={INPUT_FILE}")
+    log_summary(f"CALIBRATION_DIR={CALIBRATION_DIR}")
+
+    graded = read_graded()
+
+    if graded.empty:
+        log_error("STOPPING: graded master missing or empty")
+        print("NHL calibration failed: graded master missing or empty.")
+        return
+
+    joined = join_prices(graded)
+    unpriced = int(joined["juiced"].isna().sum())
+
+    if unpriced:
+        log_error(f"NO JUICED PRICE | bets={unpriced} (no matching ev_kelly row)")
+
+    long = with_rollups(long_probs(joined))
+    summary, reliability = calibration_tables(long, args.bins)
+
+    summary_changed = write_csv(summary, SUMMARY_FILE)
+    reliability_changed = write_csv(reliability, RELIABILITY_FILE)
+
+    drift = log_drift(summary, args.max_ece, args.min_bets)
+
+    log_summary(
+        f"CALIBRATION {'WRITTEN' if summary_changed or reliability_changed else 'UNCHANGED'} | "
+        f"graded={len(graded)} | groups={len(summary)} | bins={args.bins} | drift_flags={drift}"
+    )
+
+    overall = summary[(summary["market_type"] == ALL) & (summary["side_group"] == ALL)]
+
+    for row in overall.itertuples(index=False):
+        log_summary(
+            f"ALL | source={row.prob_source} | bets={row.bets} | brier={row.brier:.4f} | "
+            f"log_loss={row.log_loss:.4f} | ece={row.ece:.4f}"
+        )
+
+    log_summary("END 04_nhl_results_calibration.py")
+    print(f"NHL calibration complete: {len(summary)} groups, {drift} drift flag(s).")
+
+
+if __name__ == "__main__":
+    run_main(main, ERROR_LOG)
@@ -3,6 +3,8 @@
 
 from __future__ import annotations
 
+import argparse
+import hashlib
 import json
 import re
 import sys
@@ -10,8 +12,17 @@ from datetime import datetime, UTC
 from pathlib import Path
 from typing import Any
 
+import numpy as np
 import pandas as pd
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from nhl_archive import find_file
+from nhl_json import json_files, plain_path, read_json
+from nhl_output import write_csv, write_text
+from nhl_profile import run_main
+from nhl_schema import FINAL_SCORES
+
 
 SPORT = "hockey"
 LEAGUE = "nhl"
@@ -21,28 +32,22 @@ RAW_DIR = Path("docs/win/hockey/nhl/00_intake/drat_raw")
 GAMES_DIR = Path("docs/win/hockey/nhl/00_intake/games")
 
 OUT_DIR = Path("docs/win/hockey/nhl/05_final_scores/final_scores")
+STORE_DIR = Path("docs/win/hockey/nhl/05_final_scores/intermediate/final_scores_store")
+STORE_FILE = STORE_DIR / "nhl_final_scores_store.csv"
+MANIFEST_FILE = STORE_DIR / "manifest.json"
 ERROR_DIR = Path("docs/win/hockey/nhl/errors/05_final_scores")
 LOG_FILE = ERROR_DIR / "transform_final_scores.txt"
 
 RAW_PATTERN = "*_nhl_raw.json"
 
-OUTPUT_COLUMNS = [
-    "sport",
-    "league",
-    "game_date",
-    "game_id",
-    "away_team",
-    "home_team",
-    "away_score",
-    "home_score",
-    "total_score",
-    "away_puck_line_result",
-    "home_puck_line_result",
-]
+OUTPUT_COLUMNS = list(FINAL_SCORES)
+
+STORE_COLUMNS = ["raw_file"] + OUTPUT_COLUMNS
 
 
 def ensure_dirs() -> None:
     OUT_DIR.mkdir(parents=True, exist_ok=True)
+    STORE_DIR.mkdir(parents=True, exist_ok=True)
     ERROR_DIR.mkdir(parents=True, exist_ok=True)
 
 
@@ -63,7 +68,7 @@ def fail(msg: str) -> None:
 
 def load_json(path: Path) -> Any:
     try:
-        return json.loads(path.read_text(encoding="utf-8"))
+        return read_json(path)
     except Exception as e:
         fail(f"Failed reading JSON {path}: {e}")
 
@@ -264,12 +269,13 @@ def get_score(row: dict[str, Any], side: str) -> int | None:
 
 def load_games_for_date(game_date: str) -> pd.DataFrame:
     path = GAMES_DIR / f"{game_date}_nhl_games.csv"
+    entry = find_file(path)
 
-    if not path.exists():
+    if entry is None:
         log(f"Stage 00 games file not found for {game_date}: {path}")
         return pd.DataFrame()
 
-    df = pd.read_csv(path, dtype=str)
+    df = pd.read_csv(entry.source(), dtype=str)
 
     required = {"game_id", "game_date", "away_team", "home_team"}
     missing = sorted(required - set(df.columns))
@@ -284,53 +290,85 @@ def load_games_for_date(game_date: str) -> pd.DataFrame:
     return df
 
 
-def attach_game_id(row: dict[str, Any], games_cache: dict[str, pd.DataFrame]) -> str:
-    raw_game_id = first_present(row, ["game_id", "id", "event_id", "gameId", "eventId"])
-
-    if raw_game_id not in [None, ""]:
-        return str(raw_game_id).strip()
+def raw_game_id(row: dict[str, Any]) -> str:
+    value = first_present(row, ["game_id", "id", "event_id", "gameId", "eventId"])
 
-    game_date = str(row.get("game_date", "")).strip()
-    if not game_date:
+    if value in [None, ""]:
         return ""
 
-    if game_date not in games_cache:
-        games_cache[game_date] = load_games_for_date(game_date)
+    return str(value).strip()
 
-    games_df = games_cache[game_date]
 
-    if games_df.empty:
-        return ""
+def build_games_index(game_dates: list[str]) -> tuple[pd.DataFrame, set[str]]:
+    """Stage 00 games for every date in one frame, keyed by date and normalized teams."""
+    frames = []
+    dates_with_games = set()
 
-    away_key = norm_key(row.get("away_team"))
-    home_key = norm_key(row.get("home_team"))
+    for game_date in sorted(set(game_dates)):
+        games_df = load_games_for_date(game_date)
 
-    matches = games_df[
-        (games_df["game_date"] == game_date)
-        & (games_df["away_team_key"] == away_key)
-        & (games_df["home_team_key"] == home_key)
-    ]
+        if games_df.empty:
+            continue
 
-    if len(matches) == 1:
-        return str(matches.iloc[0]["game_id"]).strip()
+        dates_with_games.add(game_date)
+        frames.append(games_df[games_df["game_date"] == game_date])
 
-    if len(matches) > 1:
-        log(
-            f"Multiple Stage 00 game_id matches for {game_date}: "
-            f"{row.get('away_team')} at {row.get('home_team')}"
-        )
-        return ""
+    if not frames:
+        return pd.DataFrame(columns=["game_id", "game_date", "away_team_key", "home_team_key"]), dates_with_games
 
-    log(
-        f"No Stage 00 game_id match for {game_date}: "
-        f"{row.get('away_team')} at {row.get('home_team')}"
-    )
-    return ""
+    games = pd.concat(frames, ignore_index=True)
+    return games[["game_id", "game_date", "away_team_key", "home_team_key"]], dates_with_games
+
+
+def attach_game_ids(lookups: pd.DataFrame) -> pd.Series:
+    """Resolve game_id for rows without one via a single merge against Stage 00 games.
+
+    lookups holds one row per pending final-score row (index = row position) with
+    game_date, away_team and home_team as seen by the raw row.
+    """
+    game_ids = pd.Series("", index=lookups.index, dtype=object)
+
+    lookups = lookups[lookups["game_date"] != ""]
+    if lookups.empty:
+        return game_ids
+
+    games, dates_with_games = build_games_index(lookups["game_date"].tolist())
+    lookups = lookups[lookups["game_date"].isin(dates_with_games)]
+
+    keys = pd.DataFrame({
+        "row": lookups.index,
+        "game_date": lookups["game_date"].to_numpy(),
+        "away_team_key": lookups["away_team"].map(norm_key).to_numpy(),
+        "home_team_key": lookups["home_team"].map(norm_key).to_numpy(),
+    })
+
+    matches = keys.merge(games, on=["game_date", "away_team_key", "home_team_key"], how="left")
+    counts = matches.groupby("row", sort=False)["game_id"].count()
+    first = matches.drop_duplicates("row").set_index("row")["game_id"]
 
+    single = counts.index[counts == 1]
+    game_ids.loc[single] = first.loc[single].astype(str).str.strip()
 
-def build_final_score_rows(raw_rows: list[dict[str, Any]]) -> pd.DataFrame:
+    for row_pos, n in counts[counts != 1].items():
+        r = lookups.loc[row_pos]
+        if n > 1:
+            log(
+                f"Multiple Stage 00 game_id matches for {r['game_date']}: "
+                f"{r['away_team']} at {r['home_team']}"
+            )
+        else:
+            log(
+                f"No Stage 00 game_id match for {r['game_date']}: "
+                f"{r['away_team']} at {r['home_team']}"
+            )
+
+    return game_ids
+
+
+def build_final_score_rows(raw_rows: list[dict[str, Any]]) -> tuple[pd.DataFrame, list[str]]:
+    """Shape completed raw rows; also returns the Stage 00 game dates looked up for game_id."""
     rows: list[dict[str, Any]] = []
-    games_cache: dict[str, pd.DataFrame] = {}
+    lookups: list[dict[str, Any]] = []
 
     raw_count = 0
     completed_count = 0
@@ -384,7 +422,16 @@ def build_final_score_rows(raw_rows: list[dict[str, Any]]) -> pd.DataFrame:
             "home_puck_line_result": home_score_int - away_score_int,
         }
 
-        shaped["game_id"] = attach_game_id(shaped | raw, games_cache)
+        lookup = shaped | raw
+        shaped["game_id"] = raw_game_id(lookup)
+
+        if not shaped["game_id"]:
+            lookups.append({
+                "row": len(rows),
+                "game_date": str(lookup.get("game_date", "")).strip(),
+                "away_team": lookup.get("away_team"),
+                "home_team": lookup.get("home_team"),
+            })
 
         rows.append(shaped)
 
@@ -395,9 +442,14 @@ def build_final_score_rows(raw_rows: list[dict[str, Any]]) -> pd.DataFrame:
     )
 
     df = pd.DataFrame(rows, columns=OUTPUT_COLUMNS)
+    games_dates = sorted({l["game_date"] for l in lookups if l["game_date"]})
 
     if df.empty:
-        return df
+        return df, games_dates
+
+    if lookups:
+        pending = pd.DataFrame(lookups).set_index("row")
+        df.loc[pending.index, "game_id"] = attach_game_ids(pending)
 
     missing_game_id = df["game_id"].astype(str).str.strip().eq("")
     if missing_game_id.any():
@@ -413,7 +465,7 @@ def build_final_score_rows(raw_rows: list[dict[str, Any]]) -> pd.DataFrame:
         duped_ids = sorted(keyed.loc[dupes, "game_id"].astype(str).unique().tolist())
         fail(f"Duplicate game_id values in transformed final scores: {duped_ids}")
 
-    return df
+    return df, games_dates
 
 
 def normalize_output_df(df: pd.DataFrame) -> pd.DataFrame:
@@ -430,53 +482,83 @@ def normalize_output_df(df: pd.DataFrame) -> pd.DataFrame:
 
 
 def read_existing_output(path: Path) -> pd.DataFrame:
-    if not path.exists():
+    entry = find_file(path)
+
+    if entry is None:
         return pd.DataFrame(columns=OUTPUT_COLUMNS)
 
     try:
-        df = pd.read_csv(path, dtype=str)
+        df = pd.read_csv(entry.source(), dtype=str)
     except pd.errors.EmptyDataError:
         return pd.DataFrame(columns=OUTPUT_COLUMNS)
 
     return normalize_output_df(df)
 
 
-def existing_key_sets(existing_df: pd.DataFrame) -> tuple[set[str], set[str]]:
-    game_ids: set[str] = set()
-    team_keys: set[str] = set()
+def team_keys(df: pd.DataFrame) -> pd.Series:
+    return (
+        df["game_date"].astype(str).str.strip()
+        + "|"
+        + df["away_team"].astype(str).str.strip().map(norm_key)
+        + "|"
+        + df["home_team"].astype(str).str.strip().map(norm_key)
+    )
 
+
+def existing_key_sets(existing_df: pd.DataFrame) -> tuple[pd.Index, pd.Index]:
     if existing_df.empty:
-        return game_ids, team_keys
+        return pd.Index([]), pd.Index([])
 
-    for _, row in existing_df.iterrows():
-        game_id = str(row.get("game_id", "")).strip()
-        game_date = str(row.get("game_date", "")).strip()
-        away_team = str(row.get("away_team", "")).strip()
-        home_team = str(row.get("home_team", "")).strip()
+    game_ids = existing_df["game_id"].astype(str).str.strip()
 
-        if game_id:
-            game_ids.add(game_id)
+    complete = (
+        existing_df["game_date"].astype(str).str.strip().ne("")
+        & existing_df["away_team"].astype(str).str.strip().ne("")
+        & existing_df["home_team"].astype(str).str.strip().ne("")
+    )
+
+    return pd.Index(game_ids[game_ids.ne("")].unique()), pd.Index(team_keys(existing_df[complete]).unique())
+
+
+def rows_to_add(date_df: pd.DataFrame, existing_game_ids: pd.Index, existing_team_keys: pd.Index) -> np.ndarray:
+    """Anti-join new rows against the existing file, then against earlier added rows.
+
+    A row is skipped when its game_id (if any) or its date/team key is already in
+    the output, or was taken by an earlier row of this batch.
+    """
+    game_ids = date_df["game_id"].astype(str).str.strip()
+    keys = team_keys(date_df)
 
-        if game_date and away_team and home_team:
-            team_keys.add(f"{game_date}|{norm_key(away_team)}|{norm_key(home_team)}")
+    has_id = game_ids.ne("").to_numpy()
+    add = ~((has_id & game_ids.isin(existing_game_ids).to_numpy()) | keys.isin(existing_team_keys).to_numpy())
 
-    return game_ids, team_keys
+    # Rows sharing a key with another candidate are settled in order; the rest
+    # cannot collide with anything and are added as-is.
+    candidates = np.flatnonzero(add)
+    cand_ids = game_ids.iloc[candidates]
+    cand_keys = keys.iloc[candidates]
 
+    clash = (
+        (has_id[candidates] & cand_ids.duplicated(keep=False).to_numpy())
+        | cand_keys.duplicated(keep=False).to_numpy()
+    )
+
+    seen_ids: set[str] = set()
+    seen_keys: set[str] = set()
 
-def row_exists_in_output(row: pd.Series, existing_game_ids: set[str], existing_team_keys: set[str]) -> bool:
-    game_id = str(row.get("game_id", "")).strip()
-    game_date = str(row.get("game_date", "")).strip()
-    away_team = str(row.get("away_team", "")).strip()
-    home_team = str(row.get("home_team", "")).strip()
+    for pos in candidates[clash]:
+        game_id = game_ids.iat[pos]
+        key = keys.iat[pos]
 
-    if game_id and game_id in existing_game_ids:
-        return True
+        if (game_id and game_id in seen_ids) or key in seen_keys:
+            add[pos] = False
+            continue
 
-    team_key = f"{game_date}|{norm_key(away_team)}|{norm_key(home_team)}"
-    if team_key in existing_team_keys:
-        return True
+        if game_id:
+            seen_ids.add(game_id)
+        seen_keys.add(key)
 
-    return False
+    return add
 
 
 def write_final_scores_by_date(df: pd.DataFrame) -> dict[str, int]:
@@ -492,41 +574,26 @@ def write_final_scores_by_date(df: pd.DataFrame) -> dict[str, int]:
     for game_date, date_df in df.groupby("game_date", dropna=False):
         out_path = OUT_DIR / f"{game_date}_{LEAGUE_OUT}_final_scores.csv"
 
-        date_df = normalize_output_df(date_df)
+        date_df = normalize_output_df(date_df).reset_index(drop=True)
         existing_df = read_existing_output(out_path)
 
         existing_game_ids, existing_team_keys = existing_key_sets(existing_df)
+        add = rows_to_add(date_df, existing_game_ids, existing_team_keys)
 
-        add_rows = []
-
-        for _, row in date_df.iterrows():
-            if row_exists_in_output(row, existing_game_ids, existing_team_keys):
-                stats["rows_skipped_existing"] += 1
-                log(
-                    f"Skipped existing final score: "
-                    f"{row.get('game_date', '')} | {row.get('away_team', '')} at {row.get('home_team', '')} "
-                    f"| game_id={row.get('game_id', '')}"
-                )
-                continue
-
-            add_rows.append(row.to_dict())
-
-            game_id = str(row.get("game_id", "")).strip()
-            if game_id:
-                existing_game_ids.add(game_id)
-
-            team_key = (
-                f"{row.get('game_date', '')}|"
-                f"{norm_key(row.get('away_team', ''))}|"
-                f"{norm_key(row.get('home_team', ''))}"
+        for _, row in date_df.loc[~add].iterrows():
+            log(
+                f"Skipped existing final score: "
+                f"{row.get('game_date', '')} | {row.get('away_team', '')} at {row.get('home_team', '')} "
+                f"| game_id={row.get('game_id', '')}"
             )
-            existing_team_keys.add(team_key)
 
-        if not add_rows:
+        stats["rows_skipped_existing"] += int((~add).sum())
+
+        if not add.any():
             log(f"No new final-score rows to add for {game_date}: {out_path}")
             continue
 
-        additions_df = pd.DataFrame(add_rows, columns=OUTPUT_COLUMNS)
+        additions_df = date_df.loc[add, OUTPUT_COLUMNS]
         combined_df = pd.concat([existing_df, additions_df], ignore_index=True)
         combined_df = normalize_output_df(combined_df)
 
@@ -535,7 +602,7 @@ def write_final_scores_by_date(df: pd.DataFrame) -> dict[str, int]:
             kind="stable",
         )
 
-        combined_df.to_csv(out_path, index=False)
+        write_csv(combined_df, out_path)
 
         stats["rows_added"] += len(additions_df)
         stats["files_written"] += 1
@@ -548,7 +615,76 @@ def write_final_scores_by_date(df: pd.DataFrame) -> dict[str, int]:
     return stats
 
 
+######################## RAW FILE STORE ########################
+#
+# Raw payloads do not change once a game is final, so each raw file is parsed
+# once. The manifest records every processed file with its sha256 and the
+# sha256 of each Stage 00 games file used to fill in game_id; the shaped rows
+# are kept in one store CSV tagged with their raw file. A file is re-parsed
+# only when it or one of those games files changes.
+
+def file_sha256(path: Path) -> str | None:
+    if not path.exists():
+        return None
+    return hashlib.sha256(path.read_bytes()).hexdigest()
+
+
+def games_file_hashes(games_dates: list[str]) -> dict[str, str | None]:
+    hashes = {}
+
+    for game_date in games_dates:
+        entry = find_file(GAMES_DIR / f"{game_date}_nhl_games.csv")
+        hashes[game_date] = hashlib.sha256(entry.read_bytes()).hexdigest() if entry else None
+
+    return hashes
+
+
+def load_store() -> tuple[dict[str, dict], pd.DataFrame]:
+    empty = pd.DataFrame(columns=STORE_COLUMNS)
+
+    if not MANIFEST_FILE.exists() or not STORE_FILE.exists():
+        log("No raw file store found, parsing all raw files")
+        return {}, empty
+
+    try:
+        manifest = json.loads(MANIFEST_FILE.read_text(encoding="utf-8"))
+        store = pd.read_csv(STORE_FILE, dtype=str, keep_default_na=False)
+    except Exception as e:
+        log(f"Raw file store unreadable, parsing all raw files: {e}")
+        return {}, empty
+
+    if list(store.columns) != STORE_COLUMNS:
+        log("Raw file store columns changed, parsing all raw files")
+        return {}, empty
+
+    return manifest.get("files", {}), store
+
+
+def save_store(manifest: dict[str, dict], store: pd.DataFrame) -> None:
+    write_csv(store, STORE_FILE)
+    write_text(MANIFEST_FILE, json.dumps({"files": manifest}, indent=2, sort_keys=True) + "\n")
+
+
+def is_current(entry: dict | None, raw_sha: str) -> bool:
+    if not entry or entry.get("sha256") != raw_sha:
+        return False
+
+    return games_file_hashes(sorted(entry.get("games", {}))) == entry.get("games", {})
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Transform raw NHL results into per-date final-score files.")
+    parser.add_argument(
+        "--full",
+        action="store_true",
+        help="Ignore the raw file store and re-parse every raw file.",
+    )
+    return parser.parse_args()
+
+
 def main() -> int:
+    args = parse_args()
+
     ensure_dirs()
     reset_log()
 
@@ -560,25 +696,53 @@ def main() -> int:
     if not RAW_DIR.exists():
         fail(f"Raw final-score source folder does not exist: {RAW_DIR}")
 
-    raw_files = sorted(RAW_DIR.glob(RAW_PATTERN))
+    raw_files = json_files(RAW_DIR, RAW_PATTERN)
     if not raw_files:
         log(f"No raw files found matching {RAW_PATTERN} in {RAW_DIR}")
         log("=== transform_final_scores END ===")
         return 0
 
+    if args.full:
+        log("--full: parsing all raw files")
+        manifest, store = {}, pd.DataFrame(columns=STORE_COLUMNS)
+    else:
+        manifest, store = load_store()
+
+    cached_rows = {name: frame for name, frame in store.groupby("raw_file", sort=False)}
+
     all_frames: list[pd.DataFrame] = []
+    new_manifest: dict[str, dict] = {}
+    store_frames: list[pd.DataFrame] = []
+    parsed_dates: set[str] = set()
     total_files = 0
+    parsed_files = 0
 
     for raw_path in raw_files:
         total_files += 1
-        log(f"Processing raw file: {raw_path}")
+        # Keyed on the logical name so compressing a raw file keeps its rows.
+        raw_name = plain_path(raw_path).name
+        raw_sha = file_sha256(raw_path)
+        entry = manifest.get(raw_name)
+
+        if is_current(entry, raw_sha):
+            df = cached_rows.get(raw_name, store.iloc[0:0])[OUTPUT_COLUMNS]
+            log(f"Unchanged raw file, using stored rows: {raw_path} | rows={len(df)}")
+        else:
+            parsed_files += 1
+            log(f"Processing raw file: {raw_path}")
+
+            payload = load_json(raw_path)
+            raw_rows = flatten_raw_payload(payload)
+            df, games_dates = build_final_score_rows(raw_rows)
 
-        payload = load_json(raw_path)
-        raw_rows = flatten_raw_payload(payload)
-        df = build_final_score_rows(raw_rows)
+            entry = {"sha256": raw_sha, "games": games_file_hashes(games_dates)}
+            parsed_dates.update(df["game_date"].astype(str))
+
+        new_manifest[raw_name] = entry
 
         if not df.empty:
             all_frames.append(df)
+            store_frames.append(df.assign(raw_file=raw_name)[STORE_COLUMNS])
 
     if all_frames:
         final_df = pd.concat(all_frames, ignore_index=True)
@@ -586,12 +750,25 @@ def main() -> int:
             subset=["game_date", "away_team", "home_team"],
             keep="last",
         )
+        store = pd.concat(store_frames, ignore_index=True)
     else:
         final_df = pd.DataFrame(columns=OUTPUT_COLUMNS)
+        store = pd.DataFrame(columns=STORE_COLUMNS)
+
+    # Dates from stored rows were appended on an earlier run; only dates touched
+    # by a parsed file, or whose output file has gone missing, need writing.
+    write_dates = parsed_dates | {
+        game_date
+        for game_date in final_df["game_date"].unique()
+        if not (OUT_DIR / f"{game_date}_{LEAGUE_OUT}_final_scores.csv").exists()
+    }
+    final_df = final_df[final_df["game_date"].isin(write_dates)]
 
     write_stats = write_final_scores_by_date(final_df)
+    save_store(new_manifest, store)
 
     log(f"Files processed: {total_files}")
+    log(f"Raw files parsed: {parsed_files}")
     log(f"New final-score rows added: {write_stats['rows_added']}")
     log(f"Existing final-score rows skipped: {write_stats['rows_skipped_existing']}")
     log(f"Output files written: {write_stats['files_written']}")
@@ -602,7 +779,7 @@ def main() -> int:
 
 if __name__ == "__main__":
     try:
-        raise SystemExit(main())
+        raise SystemExit(run_main(main, LOG_FILE))
     except Exception as e:
         ensure_dirs()
         log(f"FATAL: {e}")
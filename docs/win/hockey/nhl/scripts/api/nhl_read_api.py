@@ -0,0 +1,344 @@
+#!/usr/bin/env python3
+# docs/win/hockey/nhl/scripts/api/nhl_read_api.py
+
+"""
+Local read-only JSON API over the latest NHL stage outputs.
+
+    python docs/win/hockey/nhl/scripts/api/nhl_read_api.py --port 8765
+
+Endpoints (date is YYYY_MM_DD and defaults to the latest slate on disk):
+    GET /health                    loaded resources and their file versions
+    GET /picks?date=               04_select picks for one slate
+    GET /edges?date=&game_id=      every priced side for one slate, optionally one game
+    GET /graded?date=              05_final_scores graded bets for one date
+    GET /tally                     05_final_scores/nhl_market_tally.csv
+
+Each response is built from an in-memory frame that is reloaded only when the
+(mtime, size) of its source files changes; slates compacted into a monthly
+archive are served from it, versioned by the archive file. Files are stat'ed at
+most once per --check-interval seconds. Serialized bodies are cached by
+endpoint, resolved date and game_id (other query parameters do not make a new
+entry) until the underlying frame changes; past MAX_CACHED_RESPONSES the least
+recently used body is dropped. Responses carry an ETag, so pollers that send
+If-None-Match get 304 with no body.
+"""
+
+import argparse
+import hashlib
+import json
+import sys
+import threading
+import time
+from collections import OrderedDict
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "warehouse"))
+
+from nhl_archive import DatasetFile, dataset_files
+from nhl_schema import GRADED, SELECTED, read_typed_csv
+from nhl_warehouse import edge_rows
+
+
+BASE_DIR = Path("docs/win/hockey/nhl")
+
+SELECT_DIR = BASE_DIR / "04_select"
+EV_KELLY_DIR = BASE_DIR / "03_edges" / "ev_kelly"
+GRADED_DIR = BASE_DIR / "05_final_scores" / "graded"
+TALLY_FILE = BASE_DIR / "05_final_scores" / "nhl_market_tally.csv"
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+DEFAULT_CHECK_INTERVAL = 2.0
+
+# Serialized bodies kept in memory; older ones are rebuilt on demand.
+MAX_CACHED_RESPONSES = 256
+
+# kind -> (directory, glob); every file name starts with its YYYY_MM_DD date.
+DATED_SOURCES = {
+    "picks": (SELECT_DIR, "*_NHL.csv"),
+    "edges": (EV_KELLY_DIR, "*_NHL_*.csv"),
+    "graded": (GRADED_DIR, "*_results_NHL.csv"),
+}
+
+DATE_LENGTH = len("YYYY_MM_DD")
+
+
+# =========================
+# CACHE
+# =========================
+
+class Throttle:
+    """due() is True at most once per interval seconds."""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.checked_at = float("-inf")
+
+    def due(self) -> bool:
+        now = time.monotonic()
+        if now - self.checked_at < self.interval:
+            return False
+        self.checked_at = now
+        return True
+
+
+class Resource:
+    """A frame built from a set of files, reloaded when their (mtime, size) changes."""
+
+    def __init__(self, paths_fn, loader, interval: float):
+        self.paths_fn = paths_fn
+        self.loader = loader
+        self.throttle = Throttle(interval)
+        self.lock = threading.Lock()
+        self.version = None
+        self.frame = None
+        self.loaded_at = None
+
+    def signature(self) -> tuple:
+        sig = []
+        for entry in self.paths_fn():
+            try:
+                st = (entry.archive or entry.path).stat()
+            except FileNotFoundError:
+                continue
+            sig.append((entry.name, st.st_mtime_ns, st.st_size))
+        return tuple(sig)
+
+    def get(self) -> tuple[str, pd.DataFrame]:
+        with self.lock:
+            if self.frame is None or self.throttle.due():
+                sig = self.signature()
+                version = hashlib.sha1(repr(sig).encode("utf-8")).hexdigest()[:16]
+
+                if version != self.version:
+                    self.frame = self.loader(self.paths_fn())
+                    self.version = version
+                    self.loaded_at = time.time()
+
+            return self.version, self.frame
+
+
+class Store:
+    """Resources by key plus an LRU cache of serialized responses."""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.lock = threading.Lock()
+        self.resources: dict[tuple, Resource] = {}
+        self.responses: OrderedDict[tuple, tuple[str, bytes]] = OrderedDict()
+        self.dates: dict[str, tuple[Throttle, list[str]]] = {}
+
+    def resource(self, key: tuple, paths_fn, loader) -> Resource:
+        with self.lock:
+            if key not in self.resources:
+                self.resources[key] = Resource(paths_fn, loader, self.interval)
+            return self.resources[key]
+
+    def available_dates(self, kind: str) -> list[str]:
+        with self.lock:
+            throttle, dates = self.dates.get(kind, (Throttle(self.interval), None))
+
+            if dates is None or throttle.due():
+                source_dir, pattern = DATED_SOURCES[kind]
+                dates = sorted({e.name[:DATE_LENGTH] for e in dataset_files(source_dir, pattern)})
+                self.dates[kind] = (throttle, dates)
+
+            return dates
+
+    def cached_body(self, key: tuple, version: str, build) -> tuple[str, bytes]:
+        """(version, body) for key, rebuilt when version changed since it was cached."""
+        with self.lock:
+            hit = self.responses.get(key)
+            if hit and hit[0] == version:
+                self.responses.move_to_end(key)
+                return hit
+
+        entry = (version, build())
+        with self.lock:
+            self.responses[key] = entry
+            self.responses.move_to_end(key)
+            while len(self.responses) > MAX_CACHED_RESPONSES:
+                self.responses.popitem(last=False)
+        return entry
+
+
+# =========================
+# LOADERS
+# =========================
+
+def concat_or_empty(frames: list[pd.DataFrame], columns: list[str]) -> pd.DataFrame:
+    frames = [f for f in frames if not f.empty]
+    if not frames:
+        return pd.DataFrame(columns=columns)
+    return pd.concat(frames, ignore_index=True)
+
+
+def load_picks(entries: list[DatasetFile]) -> pd.DataFrame:
+    return concat_or_empty([read_typed_csv(e.source(), SELECTED, usecols=True) for e in entries], list(SELECTED))
+
+
+def load_edges(entries: list[DatasetFile]) -> pd.DataFrame:
+    return concat_or_empty([edge_rows(e) for e in entries], [])
+
+
+def load_graded(entries: list[DatasetFile]) -> pd.DataFrame:
+    return concat_or_empty([read_typed_csv(e.source(), GRADED, usecols=True) for e in entries], list(GRADED))
+
+
+def load_tally(entries: list[DatasetFile]) -> pd.DataFrame:
+    return concat_or_empty([pd.read_csv(e.source()) for e in entries], [])
+
+
+def dated_paths(kind: str, date: str):
+    source_dir, pattern = DATED_SOURCES[kind]
+    return lambda: dataset_files(source_dir, f"{date}{pattern[1:]}")
+
+
+LOADERS = {
+    "picks": load_picks,
+    "edges": load_edges,
+    "graded": load_graded,
+}
+
+
+# =========================
+# HTTP
+# =========================
+
+def records_body(meta: dict, df: pd.DataFrame) -> bytes:
+    head = json.dumps(meta)[:-1]
+    rows = df.to_json(orient="records", double_precision=15) if not df.empty else "[]"
+    return f'{head}, "count": {len(df)}, "rows": {rows}}}'.encode("utf-8")
+
+
+class ApiError(Exception):
+    def __init__(self, status: HTTPStatus, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+def make_handler(store: Store, verbose: bool):
+    class Handler(BaseHTTPRequestHandler):
+        server_version = "nhl-read-api/1"
+
+        def log_message(self, fmt, *args):
+            if verbose:
+                super().log_message(fmt, *args)
+
+        def send_body(self, status: HTTPStatus, body: bytes, etag: str | None = None):
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.send_header("Cache-Control", "no-cache")
+            if etag:
+                self.send_header("ETag", etag)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            try:
+                url = urlparse(self.path)
+                params = {k: v[-1] for k, v in parse_qs(url.query).items()}
+                version, body = self.route(url.path.rstrip("/") or "/", params)
+            except ApiError as e:
+                self.send_body(e.status, json.dumps({"error": str(e)}).encode("utf-8"))
+                return
+            except Exception as e:
+                self.send_body(HTTPStatus.INTERNAL_SERVER_ERROR, json.dumps({"error": str(e)}).encode("utf-8"))
+                return
+
+            etag = f'"{version}"'
+            if self.headers.get("If-None-Match") == etag:
+                self.send_response(HTTPStatus.NOT_MODIFIED)
+                self.send_header("ETag", etag)
+                self.end_headers()
+                return
+
+            self.send_body(HTTPStatus.OK, body, etag)
+
+        def route(self, path: str, params: dict) -> tuple[str, bytes]:
+            if path == "/health":
+                resources = {
+                    "/".join(key): {"version": r.version, "loaded_at": r.loaded_at}
+                    for key, r in list(store.resources.items())
+                }
+                body = json.dumps({"status": "ok", "resources": resources}).encode("utf-8")
+                return hashlib.sha1(body).hexdigest()[:16], body
+
+            if path == "/tally":
+                res = store.resource(("tally",), lambda: dataset_files(TALLY_FILE.parent, TALLY_FILE.name), load_tally)
+                version, df = res.get()
+                return store.cached_body(("tally",), version, lambda: records_body({"source": TALLY_FILE.name}, df))
+
+            kind = path.lstrip("/")
+            if kind not in LOADERS:
+                raise ApiError(HTTPStatus.NOT_FOUND, f"unknown endpoint: {path}")
+
+            dates = store.available_dates(kind)
+            date = params.get("date") or (dates[-1] if dates else None)
+            if date is None:
+                raise ApiError(HTTPStatus.NOT_FOUND, f"no {kind} files on disk")
+            if date not in dates:
+                raise ApiError(HTTPStatus.NOT_FOUND, f"no {kind} for date {date}")
+
+            res = store.resource((kind, date), dated_paths(kind, date), LOADERS[kind])
+            version, df = res.get()
+            game_id = params.get("game_id")
+
+            def build():
+                out = df
+                if game_id:
+                    if "game_id" not in out.columns:
+                        raise ApiError(HTTPStatus.NOT_FOUND, f"no game {game_id} on {date}")
+                    out = out[out["game_id"] == game_id]
+                return records_body({"kind": kind, "date": date, "game_id": game_id}, out)
+
+            return store.cached_body((kind, date, game_id or ""), version, build)
+
+    return Handler
+
+
+# =========================
+# MAIN
+# =========================
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Local read-only JSON API over NHL stage outputs.")
+    parser.add_argument("--host", default=DEFAULT_HOST, help="Bind address.")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="Bind port.")
+    parser.add_argument(
+        "--check-interval",
+        type=float,
+        default=DEFAULT_CHECK_INTERVAL,
+        help="Seconds between file mtime checks per resource.",
+    )
+    parser.add_argument("--verbose", action="store_true", help="Log every request to stderr.")
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+
+    store = Store(args.check_interval)
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(store, args.verbose))
+
+    print(f"nhl_read_api listening on http://{args.host}:{server.server_port}", file=sys.stderr)
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
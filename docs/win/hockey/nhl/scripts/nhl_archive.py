@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+# docs/win/hockey/nhl/scripts/nhl_archive.py
+
+"""
+Monthly archives of per-slate stage files, read together with the live ones.
+
+    for entry in dataset_files(SELECT_DIR, "*_NHL.csv"):
+        df = read_typed_csv(entry.source(), SELECTED)
+
+    compact(SELECT_DIR, "*_NHL.csv", through="2026_05")
+
+    python docs/win/hockey/nhl/scripts/nhl_archive.py compact
+    python docs/win/hockey/nhl/scripts/nhl_archive.py compact --through 2026_03 --dry-run
+    python docs/win/hockey/nhl/scripts/nhl_archive.py list
+
+Every per-slate file name carries its YYYY_MM_DD date. compact() moves the live
+files of each closed month into <directory>/archive/<YYYY_MM>.zip, deflated,
+with the original file names as members. dataset_files() lists the live files
+plus the archive members matching a pattern as one sorted list of DatasetFile,
+so a reader of history does not care where a slate lives. When a name exists
+both live and archived (a late rewrite of a compacted slate), the live file
+wins, and the next compaction folds it into the archive.
+
+Archives are written deterministically (sorted members, fixed timestamps)
+through nhl_output.write_bytes, so re-compacting an unchanged month leaves the
+zip untouched. Per-slate stages keep globbing their live directory only: a
+closed month is not recomputed once it has been compacted.
+
+The compact command rolls every directory in DATASETS together, through the
+month before the current one by default, so the hot directories only hold the
+current month. All stages of a month move at once: a stage whose inputs were
+archived while its outputs stayed live would remove those outputs as stale.
+"""
+
+from __future__ import annotations
+
+import argparse
+import fnmatch
+import io
+import re
+import sys
+import zipfile
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+
+from nhl_output import write_bytes
+
+
+BASE_DIR = Path("docs/win/hockey/nhl")
+
+ARCHIVE_DIR = "archive"
+
+# Per-slate directories compacted by the command, with the files they own.
+DATASETS = [
+    ("00_intake/games", "*_nhl_games.csv"),
+    ("00_intake/sportsbook", "[Nn][Hh][Ll]_*.csv"),
+    ("00_intake/predictions", "hockey_*.csv"),
+    ("00_intake/predictions/scraper", "*_nhl_predictions.csv"),
+    ("01_merge", "*_NHL_merged.csv"),
+    ("01_merge/audit", "*.csv"),
+    ("01_merge/01_merguiced", "*_NHL_*.csv"),
+    ("02_juice", "*_NHL_*.csv"),
+    ("03_edges", "*_NHL_*.csv"),
+    ("03_edges/ev_kelly", "*_NHL_*.csv"),
+    ("04_select", "*_NHL.csv"),
+    ("04_select/portfolio", "*_NHL_portfolio.csv"),
+    ("05_final_scores/final_scores", "*_NHL_final_scores.csv"),
+    ("05_final_scores/graded", "*_results_NHL.csv"),
+]
+
+DATE_RE = re.compile(r"(\d{4})_(\d{2})_\d{2}")
+
+# Fixed member timestamp, so the same files always give the same zip bytes.
+MEMBER_TIME = (1980, 1, 1, 0, 0, 0)
+
+
+@dataclass(frozen=True)
+class DatasetFile:
+    """One file of a dataset: live at path, or a member of a monthly archive."""
+
+    path: Path
+    archive: Path | None = None
+
+    @property
+    def name(self) -> str:
+        return self.path.name
+
+    def read_bytes(self) -> bytes:
+        if self.archive is None:
+            return self.path.read_bytes()
+
+        with zipfile.ZipFile(self.archive) as zf:
+            return zf.read(self.name)
+
+    def source(self):
+        """Something pd.read_csv accepts: the live path, or the member's bytes."""
+        if self.archive is None:
+            return self.path
+        return io.BytesIO(self.read_bytes())
+
+    def __str__(self) -> str:
+        if self.archive is None:
+            return str(self.path)
+        return f"{self.archive}:{self.name}"
+
+
+def month_of(name: str) -> str | None:
+    """YYYY_MM of the first YYYY_MM_DD date in a file name."""
+    match = DATE_RE.search(name)
+    return f"{match.group(1)}_{match.group(2)}" if match else None
+
+
+def archive_path(directory: Path, month: str) -> Path:
+    return Path(directory) / ARCHIVE_DIR / f"{month}.zip"
+
+
+def archives(directory: Path) -> list[Path]:
+    return sorted((Path(directory) / ARCHIVE_DIR).glob("*.zip"))
+
+
+def dataset_files(directory: Path, pattern: str) -> list[DatasetFile]:
+    """Live and archived files in directory matching pattern, sorted by name."""
+    directory = Path(directory)
+    files = {}
+
+    for archive in archives(directory):
+        with zipfile.ZipFile(archive) as zf:
+            for name in zf.namelist():
+                if fnmatch.fnmatchcase(name, pattern):
+                    files[name] = DatasetFile(directory / name, archive)
+
+    for path in directory.glob(pattern):
+        if path.is_file():
+            files[path.name] = DatasetFile(path)
+
+    return [files[name] for name in sorted(files)]
+
+
+def find_file(path: Path) -> DatasetFile | None:
+    """path itself when it exists, else its member in the month's archive."""
+    path = Path(path)
+
+    if path.is_file():
+        return DatasetFile(path)
+
+    month = month_of(path.name)
+    archive = archive_path(path.parent, month) if month else None
+
+    if archive is None or not archive.exists():
+        return None
+
+    with zipfile.ZipFile(archive) as zf:
+        if path.name in zf.namelist():
+            return DatasetFile(path, archive)
+
+    return None
+
+
+def is_archived(path: Path, data: bytes) -> bool:
+    """True when path is not live and its month archive holds exactly data."""
+    path = Path(path)
+    month = month_of(path.name)
+
+    if path.exists():
+        return False
+    archive = archive_path(path.parent, month) if month else None
+
+    if archive is None or not archive.exists():
+        return False
+
+    with zipfile.ZipFile(archive) as zf:
+        try:
+            return zf.read(path.name) == data
+        except KeyError:
+            return False
+
+
+def write_live(path: Path, data: bytes) -> bool:
+    """nhl_output.write_bytes, skipped when the archive already holds data.
+
+    For stages that rebuild a slate of a compacted month from inputs still on
+    disk: identical output stays archived instead of reappearing live.
+    """
+    if is_archived(path, data):
+        return False
+    return write_bytes(path, data)
+
+
+def build_archive(members: dict[str, bytes]) -> bytes:
+    buffer = io.BytesIO()
+
+    with zipfile.ZipFile(buffer, "w", compression=zipfile.ZIP_DEFLATED, compresslevel=9) as zf:
+        for name in sorted(members):
+            info = zipfile.ZipInfo(name, date_time=MEMBER_TIME)
+            info.compress_type = zipfile.ZIP_DEFLATED
+            info.external_attr = 0o644 << 16
+            zf.writestr(info, members[name])
+
+    data = buffer.getvalue()
+
+    with zipfile.ZipFile(io.BytesIO(data)) as zf:
+        if zf.testzip() is not None or any(zf.read(n) != b for n, b in members.items()):
+            raise RuntimeError("archive failed read-back verification")
+
+    return data
+
+
+def compact(directory: Path, pattern: str, through: str, dry_run: bool = False) -> dict[str, int]:
+    """Move live files dated in months <= through into their monthly archives.
+
+    Returns {month: files moved}. Live files are deleted only after the archive
+    holding them has been written and read back.
+    """
+    directory = Path(directory)
+    by_month = defaultdict(list)
+
+    for path in sorted(directory.glob(pattern)):
+        month = month_of(path.name)
+        if path.is_file() and month is not None and month <= through:
+            by_month[month].append(path)
+
+    if dry_run:
+        return {month: len(paths) for month, paths in sorted(by_month.items())}
+
+    for month, paths in sorted(by_month.items()):
+        archive = archive_path(directory, month)
+        members = {}
+
+        if archive.exists():
+            with zipfile.ZipFile(archive) as zf:
+                members = {name: zf.read(name) for name in zf.namelist()}
+
+        for path in paths:
+            members[path.name] = path.read_bytes()
+
+        write_bytes(archive, build_archive(members))
+
+        for path in paths:
+            path.unlink()
+
+    return {month: len(paths) for month, paths in sorted(by_month.items())}
+
+
+def previous_month(today: datetime | None = None) -> str:
+    today = today or datetime.now()
+    year, month = (today.year, today.month - 1) if today.month > 1 else (today.year - 1, 12)
+    return f"{year:04d}_{month:02d}"
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Monthly archives of NHL per-slate stage files.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    compact_p = sub.add_parser("compact", help="move closed months into their archives")
+    compact_p.add_argument("--through", default=None, help="last month to compact, YYYY_MM (default: previous month)")
+    compact_p.add_argument("--dry-run", action="store_true", help="only report what would move")
+
+    sub.add_parser("list", help="live and archived file counts per dataset")
+
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+
+    if args.command == "list":
+        for rel, pattern in DATASETS:
+            directory = BASE_DIR / rel
+            live = sum(1 for p in directory.glob(pattern) if p.is_file())
+            total = len(dataset_files(directory, pattern))
+            months = [a.stem for a in archives(directory)]
+            span = f"{months[0]}..{months[-1]}" if months else "-"
+            print(f"{rel:<32} live={live:<5} archived={total - live:<5} archives={len(months):<3} {span}")
+        return 0
+
+    through = args.through or previous_month()
+    if not re.fullmatch(r"\d{4}_\d{2}", through):
+        print(f"--through must be YYYY_MM, got {through}", file=sys.stderr)
+        return 2
+
+    verb = "WOULD MOVE" if args.dry_run else "MOVED"
+    total = 0
+
+    for rel, pattern in DATASETS:
+        moved = compact(BASE_DIR / rel, pattern, through, dry_run=args.dry_run)
+        for month, count in moved.items():
+            print(f"{verb} | {rel} | {month} | files={count}")
+            total += count
+
+    print(f"{verb} {total} files through {through}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+# docs/win/hockey/nhl/scripts/nhl_json.py
+
+"""
+Raw JSON dumps stored plain or compressed, read the same way either way.
+
+    path = write_json(ODDS_DIR / f"{run_date}.json", payload)
+    payload = read_json(path)
+    for path in json_files(ODDS_DIR, "*.json"): ...
+
+    python docs/win/hockey/nhl/scripts/nhl_json.py compress --codec gzip
+    python docs/win/hockey/nhl/scripts/nhl_json.py compress --dry-run
+    python docs/win/hockey/nhl/scripts/nhl_json.py decompress
+
+The odds pulls, dratings scrapes and sportsdataverse raw dumps are written with
+write_json. With $NHL_JSON_COMPRESS unset or "off" it writes the indent=2 JSON
+it always did. With "gzip" or "zstd" it writes compact JSON (no indentation or
+spaces after separators) compressed to name.json.gz / name.json.zst and removes
+a plain name.json left beside it. gzip output has a zero mtime and no file
+name, so the same payload always gives the same bytes and write-if-changed
+holds. zstd needs Python 3.14's compression.zstd or the zstandard package.
+
+read_json takes any of the three forms and tells them apart by their leading
+magic bytes. Given name.json that does not exist it reads the compressed file
+beside it. json_files globs a pattern ending in .json and also returns the
+compressed files, one path per logical name (the plain file when both exist),
+so readers keep their patterns.
+
+compress / decompress rewrite the existing files of RAW_DATASETS in place.
+"""
+
+from __future__ import annotations
+
+import argparse
+import gzip
+import json
+import os
+from pathlib import Path
+
+from nhl_output import write_bytes
+
+
+BASE_DIR = Path("docs/win/hockey/nhl")
+
+COMPRESS_ENV = "NHL_JSON_COMPRESS"
+
+CODECS = ("gzip", "zstd")
+SUFFIXES = {"gzip": ".gz", "zstd": ".zst"}
+
+GZIP_MAGIC = b"\x1f\x8b"
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+
+GZIP_LEVEL = 9
+ZSTD_LEVEL = 19
+
+# (folder, pattern) of the raw dumps, relative to BASE_DIR.
+RAW_DATASETS = [
+    ("odds", "*.json"),
+    ("odds/historic", "**/*.json"),
+    ("00_intake/drat_raw", "*_nhl_raw.json"),
+    ("00_intake/drat_raw/rows", "*_nhl_raw_rows.json"),
+    ("sdv", "**/*_raw.json"),
+]
+
+
+# =========================
+# CODECS
+# =========================
+
+def _zstd():
+    """(compress, decompress) for zstd, from the stdlib or zstandard."""
+    try:
+        from compression import zstd
+
+        return (lambda data: zstd.compress(data, level=ZSTD_LEVEL)), zstd.decompress
+    except ImportError:
+        pass
+
+    try:
+        import zstandard
+    except ImportError:
+        raise RuntimeError("zstd needs Python 3.14+ or the zstandard package; use gzip instead")
+
+    return (
+        lambda data: zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(data),
+        lambda data: zstandard.ZstdDecompressor().decompress(data),
+    )
+
+
+def compress(data: bytes, codec: str) -> bytes:
+    if codec == "gzip":
+        return gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0)
+    if codec == "zstd":
+        return _zstd()[0](data)
+    raise ValueError(f"Unknown codec {codec!r}, expected one of {CODECS}")
+
+
+def decompress(data: bytes) -> bytes:
+    if data.startswith(GZIP_MAGIC):
+        return gzip.decompress(data)
+    if data.startswith(ZSTD_MAGIC):
+        return _zstd()[1](data)
+    return data
+
+
+def configured_codec() -> str | None:
+    """The codec $NHL_JSON_COMPRESS asks for, or None for plain JSON."""
+    value = os.environ.get(COMPRESS_ENV, "").strip().lower()
+
+    if value in ("", "0", "off", "none", "false"):
+        return None
+    if value in ("1", "on", "true"):
+        return "gzip"
+    if value not in CODECS:
+        raise ValueError(f"${COMPRESS_ENV}={value!r}: expected off, gzip or zstd")
+
+    return value
+
+
+# =========================
+# PATHS
+# =========================
+
+def plain_path(path: Path) -> Path:
+    """name.json for name.json, name.json.gz or name.json.zst."""
+    path = Path(path)
+
+    for suffix in SUFFIXES.values():
+        if path.name.endswith(".json" + suffix):
+            return path.with_name(path.name[: -len(suffix)])
+
+    return path
+
+
+def variants(path: Path) -> list[Path]:
+    """Every stored form of a logical JSON path, plain first."""
+    plain = plain_path(path)
+    return [plain] + [plain.with_name(plain.name + suffix) for suffix in SUFFIXES.values()]
+
+
+def json_files(directory: Path, pattern: str) -> list[Path]:
+    """Files matching pattern in any stored form, one per logical name."""
+    directory = Path(directory)
+    found = {}
+
+    for suffix in ("", *SUFFIXES.values()):
+        for path in directory.glob(pattern + suffix):
+            if path.is_file():
+                found.setdefault(plain_path(path), path)
+
+    return [found[name] for name in sorted(found)]
+
+
+# =========================
+# READ / WRITE
+# =========================
+
+def read_json_bytes(path: Path) -> bytes:
+    """The uncompressed JSON bytes of path, or of its stored form."""
+    path = Path(path)
+
+    if not path.exists():
+        path = next((p for p in variants(path) if p.exists()), path)
+
+    return decompress(path.read_bytes())
+
+
+def read_json(path: Path):
+    return json.loads(read_json_bytes(path).decode("utf-8-sig"))
+
+
+def encode_json(path: Path, obj, codec: str | None, **dumps_kwargs) -> tuple[Path, bytes]:
+    """(stored path, bytes) for obj at the logical path in codec (None for plain)."""
+    plain = plain_path(path)
+
+    if codec is None:
+        return plain, json.dumps(obj, indent=2, **dumps_kwargs).encode("utf-8")
+
+    data = json.dumps(obj, separators=(",", ":"), **dumps_kwargs).encode("utf-8")
+    return plain.with_name(plain.name + SUFFIXES[codec]), compress(data, codec)
+
+
+def write_json(path: Path, obj, codec: str | None = "env", **dumps_kwargs) -> Path:
+    """Write obj to the logical path, plain or compressed; returns the file written.
+
+    codec "env" (the default) follows $NHL_JSON_COMPRESS; None forces plain JSON.
+    Other stored forms of the same logical path are removed.
+    """
+    if codec == "env":
+        codec = configured_codec()
+
+    plain = plain_path(path)
+    target, data = encode_json(plain, obj, codec, **dumps_kwargs)
+
+    write_bytes(target, data)
+
+    for other in variants(plain):
+        if other != target:
+            other.unlink(missing_ok=True)
+
+    return target
+
+
+# =========================
+# CLI
+# =========================
+
+def convert(codec: str | None, dry_run: bool) -> tuple[int, int, int]:
+    """Rewrite every RAW_DATASETS file into codec; returns (files, bytes before, bytes after)."""
+    files = before = after = 0
+
+    for folder, pattern in RAW_DATASETS:
+        for path in json_files(BASE_DIR / folder, pattern):
+            # Files already stored in the requested form are left as they are.
+            if path.name.endswith(".json" + SUFFIXES.get(codec, "")):
+                continue
+
+            size = path.stat().st_size
+            payload = read_json(path)
+            target, data = encode_json(path, payload, codec, ensure_ascii=False)
+
+            files += 1
+            before += size
+            after += len(data)
+
+            print(f"{'WOULD WRITE' if dry_run else 'WROTE'} {target} | {size} -> {len(data)} bytes")
+
+            if not dry_run:
+                write_json(path, payload, codec=codec, ensure_ascii=False)
+
+    return files, before, after
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Compress or decompress the NHL raw JSON dumps in place.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    comp = sub.add_parser("compress", help="Rewrite the raw dumps as compact compressed JSON.")
+    comp.add_argument("--codec", choices=CODECS, default="gzip", help="Compression (default gzip).")
+    comp.add_argument("--dry-run", action="store_true", help="Only print what would change.")
+
+    decomp = sub.add_parser("decompress", help="Rewrite the raw dumps as indent=2 JSON.")
+    decomp.add_argument("--dry-run", action="store_true", help="Only print what would change.")
+
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    codec = args.codec if args.command == "compress" else None
+
+    files, before, after = convert(codec, args.dry_run)
+    print(f"{args.command}: {files} file(s) | {before} -> {after} bytes")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+# docs/win/hockey/nhl/scripts/nhl_output.py
+
+"""
+Write-if-changed, atomic output files for the stage scripts.
+
+    changed = write_csv(df, out_path)
+    changed = write_rows_csv(out_path, fieldnames, rows)
+    removed = remove_stale(OUTPUT_DIR, "*.csv", keep=written)
+    removed = remove_stale(OUTPUT_DIR, "*.csv", keep=written, dates=args.dates)
+
+Each output is serialized in memory and compared with the bytes already on
+disk. When they match, the file is left alone, mtime included, so the
+workflows' `git add` has nothing to re-hash or commit for slates that did not
+change. When they differ, the new bytes go to a temporary file in the same
+directory which is then os.replace()d over the target, so a reader never sees a
+half-written CSV.
+
+Stages no longer wipe their output directory up front. They collect the paths
+they wrote (changed or not) and call remove_stale() once the run has gone
+through, which deletes whatever else matches the output pattern: slates whose
+input disappeared, or markets that produced no rows this time.
+"""
+
+from __future__ import annotations
+
+import csv
+import io
+import os
+import re
+from pathlib import Path
+
+
+DATE_RE = re.compile(r"\d{4}_\d{2}_\d{2}")
+
+
+def write_bytes(path: Path, data: bytes) -> bool:
+    """Atomically replace path with data unless it already holds exactly data."""
+    path = Path(path)
+
+    try:
+        if path.stat().st_size == len(data) and path.read_bytes() == data:
+            return False
+    except FileNotFoundError:
+        pass
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+
+    try:
+        tmp.write_bytes(data)
+        os.replace(tmp, path)
+    finally:
+        tmp.unlink(missing_ok=True)
+
+    return True
+
+
+def write_text(path: Path, text: str, encoding: str = "utf-8") -> bool:
+    return write_bytes(path, text.encode(encoding))
+
+
+def write_csv(df, path: Path, **to_csv_kwargs) -> bool:
+    """df.to_csv(path, index=False), skipped when the file would not change."""
+    to_csv_kwargs.setdefault("index", False)
+    return write_text(path, df.to_csv(**to_csv_kwargs))
+
+
+def write_rows_csv(
+    path: Path,
+    fieldnames: list[str],
+    rows: list[dict],
+    encoding: str = "utf-8",
+    **writer_kwargs,
+) -> bool:
+    """csv.DictWriter header plus rows, skipped when the file would not change."""
+    buffer = io.StringIO(newline="")
+    writer = csv.DictWriter(buffer, fieldnames=fieldnames, **writer_kwargs)
+    writer.writeheader()
+    writer.writerows(rows)
+    return write_text(path, buffer.getvalue(), encoding)
+
+
+def path_date(path: Path) -> str | None:
+    """The YYYY_MM_DD date in a slate file's name, if any."""
+    match = DATE_RE.search(Path(path).name)
+    return match.group(0) if match else None
+
+
+def remove_stale(directory: Path, pattern: str, keep, dates=None) -> list[Path]:
+    """Delete files in directory matching pattern that are not in keep.
+
+    With dates, only files whose name carries one of those YYYY_MM_DD dates are
+    candidates, so a run limited to some slates leaves the others alone.
+    """
+    keep = {Path(p).resolve() for p in keep}
+    dates = None if dates is None else set(dates)
+    removed = []
+
+    for path in sorted(Path(directory).glob(pattern)):
+        if dates is not None and path_date(path) not in dates:
+            continue
+        if path.is_file() and path.resolve() not in keep:
+            path.unlink()
+            removed.append(path)
+
+    return removed
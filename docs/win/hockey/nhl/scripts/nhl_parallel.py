@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+# docs/win/hockey/nhl/scripts/nhl_parallel.py
+
+"""
+Process-pool fan-out over independent slates for the per-slate stages.
+
+    results = map_slates(process_file, input_files, args.workers, LOG_FILE)
+
+With workers <= 1 this is the plain serial loop. Otherwise each call runs in a
+worker process and whatever it logs through log_line() is buffered. The buffer
+is appended to log_file in input order, and results come back in input order,
+so the log and every counter the caller merges from the results match a serial
+run line for line (timestamps aside). If a call raises, the log gets the lines
+of every slate up to and including the failing one, pending slates are
+cancelled and the exception is re-raised, as the serial loop would have done.
+Slates that were already running may still have written their outputs; the
+stage has failed either way.
+
+Stages take --workers N; the default comes from $NHL_WORKERS so a workflow can
+set it once for every stage. They also take --date YYYY_MM_DD, repeatable, to
+process only those slates; for_dates() filters the dated inputs and the stage
+passes the same dates to remove_stale() so other dates' outputs are untouched. Workers are forked where the platform allows it,
+so they inherit the loaded script, its config and imports instead of
+re-importing the stage module.
+"""
+
+from __future__ import annotations
+
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from nhl_output import path_date
+
+
+WORKERS_ENV = "NHL_WORKERS"
+
+_buffer: list[str] | None = None
+
+
+def log_line(log_file: Path, line: str) -> None:
+    """Append line to log_file, or to the current slate's buffer inside a worker."""
+    if _buffer is not None:
+        _buffer.append(line)
+        return
+
+    with open(log_file, "a", encoding="utf-8") as f:
+        f.write(line)
+
+
+def _flush(log_file: Path, lines: list[str]) -> None:
+    if lines:
+        with open(log_file, "a", encoding="utf-8") as f:
+            f.write("".join(lines))
+
+
+def _call_buffered(fn, item):
+    global _buffer
+    _buffer = []
+
+    try:
+        return fn(item), _buffer
+    except BaseException as e:
+        e.slate_log = _buffer
+        raise
+    finally:
+        _buffer = None
+
+
+def _context():
+    if "fork" in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("fork")
+    return None
+
+
+def map_slates(fn, items, workers: int, log_file: Path) -> list:
+    """[fn(item) for item in items], sharded across worker processes."""
+    items = list(items)
+
+    if workers <= 1 or len(items) <= 1:
+        return [fn(item) for item in items]
+
+    results = []
+
+    with ProcessPoolExecutor(max_workers=min(workers, len(items)), mp_context=_context()) as pool:
+        futures = [pool.submit(_call_buffered, fn, item) for item in items]
+
+        for future in futures:
+            try:
+                result, lines = future.result()
+            except BaseException as e:
+                _flush(log_file, getattr(e, "slate_log", []))
+                pool.shutdown(wait=True, cancel_futures=True)
+                raise
+
+            _flush(log_file, lines)
+            results.append(result)
+
+    return results
+
+
+def add_workers_argument(parser) -> None:
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=int(os.environ.get(WORKERS_ENV, "1")),
+        help=f"Worker processes for per-slate work (default ${WORKERS_ENV} or 1: serial).",
+    )
+
+
+def add_dates_argument(parser) -> None:
+    parser.add_argument(
+        "--date",
+        dest="dates",
+        action="append",
+        default=None,
+        metavar="YYYY_MM_DD",
+        help="Only process this slate date; repeatable. Default: every date.",
+    )
+
+
+def for_dates(paths, dates) -> list:
+    """The paths whose file name carries one of dates; every path when dates is None."""
+    if dates is None:
+        return list(paths)
+
+    dates = set(dates)
+    return [p for p in paths if path_date(p) in dates]
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+# docs/win/hockey/nhl/scripts/nhl_profile.py
+
+"""
+Opt-in profiling for stage entry points.
+
+    if __name__ == "__main__":
+        run_main(main, LOG_FILE)
+
+    python docs/win/hockey/nhl/scripts/02_juice/apply_total_juice.py --profile
+    python docs/win/hockey/nhl/scripts/02_juice/apply_total_juice.py --profile-memory
+    NHL_PROFILE=1 python docs/win/hockey/nhl/scripts/pipeline/nhl_pipeline.py run pipeline
+
+Without --profile / --profile-memory on the command line and with $NHL_PROFILE
+unset, run_main() just calls main(). Otherwise main() runs under cProfile and,
+next to the stage's log file, run_main() writes
+
+    <log stem>.prof           raw stats for snakeviz / pstats
+    <log stem>_profile.txt    wall time, top functions by cumulative and own time
+
+$NHL_PROFILE=memory (or --profile-memory) also traces allocations with
+tracemalloc and adds peak memory and the top allocation sites to the text
+summary; tracing slows the stage down noticeably. $NHL_PROFILE_TOP sets how many
+rows each table keeps. Both flags are removed from sys.argv before main()
+parses it, so stages need no argparse changes.
+
+The profile covers the calling process only. Stages that fan out with
+--workers N do their per-slate work in child processes, so profile them with
+--workers 1 to see those hot spots.
+"""
+
+from __future__ import annotations
+
+import cProfile
+import io
+import os
+import pstats
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+
+
+PROFILE_ENV = "NHL_PROFILE"
+PROFILE_TOP_ENV = "NHL_PROFILE_TOP"
+
+PROFILE_FLAG = "--profile"
+MEMORY_FLAG = "--profile-memory"
+
+DEFAULT_TOP = 40
+
+
+def _requested_mode() -> str | None:
+    """None, "cpu" or "memory", from argv flags (removed) or $NHL_PROFILE."""
+    mode = None
+
+    if MEMORY_FLAG in sys.argv:
+        mode = "memory"
+    elif PROFILE_FLAG in sys.argv:
+        mode = "cpu"
+
+    sys.argv[:] = [a for a in sys.argv if a not in (PROFILE_FLAG, MEMORY_FLAG)]
+
+    if mode is None:
+        env = os.environ.get(PROFILE_ENV, "").strip().lower()
+        if env == "memory":
+            mode = "memory"
+        elif env not in ("", "0", "off", "false", "no"):
+            mode = "cpu"
+
+    return mode
+
+
+def _stats_table(profiler: cProfile.Profile, sort: str, top: int) -> str:
+    out = io.StringIO()
+    stats = pstats.Stats(profiler, stream=out)
+    stats.strip_dirs().sort_stats(sort).print_stats(top)
+    return out.getvalue().strip()
+
+
+def _memory_table(snapshot: tracemalloc.Snapshot, top: int) -> list[str]:
+    lines = []
+    for stat in snapshot.statistics("lineno")[:top]:
+        frame = stat.traceback[0]
+        lines.append(f"  {stat.size / 1024 / 1024:9.2f} MiB  {stat.count:>9}  {frame.filename}:{frame.lineno}")
+    return lines
+
+
+def write_profile(
+    profiler: cProfile.Profile,
+    log_file: Path,
+    wall_seconds: float,
+    outcome: str,
+    memory: tuple[int, tracemalloc.Snapshot] | None = None,
+) -> tuple[Path, Path]:
+    """Write <log stem>.prof and <log stem>_profile.txt beside log_file."""
+    log_file = Path(log_file)
+    log_file.parent.mkdir(parents=True, exist_ok=True)
+
+    prof_path = log_file.with_suffix(".prof")
+    text_path = log_file.with_name(f"{log_file.stem}_profile.txt")
+    top = int(os.environ.get(PROFILE_TOP_ENV, DEFAULT_TOP))
+
+    profiler.dump_stats(prof_path)
+
+    lines = [
+        f"Profile: {Path(sys.argv[0]).name} {' '.join(sys.argv[1:])}".rstrip(),
+        f"Written: {datetime.now(timezone.utc).isoformat()}",
+        f"Outcome: {outcome}",
+        f"Wall time: {wall_seconds:.3f}s",
+        f"Raw stats: {prof_path}",
+    ]
+
+    if memory is not None:
+        peak, snapshot = memory
+        lines.append(f"Peak traced memory: {peak / 1024 / 1024:.2f} MiB")
+
+    lines += ["", f"=== Top {top} by cumulative time ===", _stats_table(profiler, "cumulative", top)]
+    lines += ["", f"=== Top {top} by own time ===", _stats_table(profiler, "tottime", top)]
+
+    if memory is not None:
+        lines += ["", f"=== Top {top} allocation sites still held at exit ===", "        size      count  line"]
+        lines += _memory_table(snapshot, top)
+
+    text_path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    return prof_path, text_path
+
+
+def run_main(main, log_file: Path):
+    """main(), profiled when asked; returns what main() returns."""
+    mode = _requested_mode()
+    if mode is None:
+        return main()
+
+    if mode == "memory":
+        tracemalloc.start()
+
+    profiler = cProfile.Profile()
+    outcome = "ok"
+    start = time.perf_counter()
+
+    try:
+        profiler.enable()
+        try:
+            return main()
+        finally:
+            profiler.disable()
+    except SystemExit as e:
+        outcome = f"exit {e.code}"
+        raise
+    except BaseException as e:
+        outcome = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        wall = time.perf_counter() - start
+
+        memory = None
+        if mode == "memory":
+            memory = (tracemalloc.get_traced_memory()[1], tracemalloc.take_snapshot())
+            tracemalloc.stop()
+
+        _, text_path = write_profile(profiler, log_file, wall, outcome, memory)
+        print(f"Profile written: {text_path}", file=sys.stderr)
@@ -0,0 +1,342 @@
+#!/usr/bin/env python3
+# docs/win/hockey/nhl/scripts/nhl_schema.py
+
+"""
+Column names and dtypes for every CSV the NHL pipeline reads or writes.
+
+A schema is an ordered {column: kind} mapping; list(schema) is the column
+order a stage writes. Kinds:
+
+    TEXT    identifiers and labels, always read as str
+    FLOAT   probabilities, prices and model outputs, read as float64
+    NUMBER  lines and American odds; left to the C parser so whole-number
+            columns stay int64 and are written back unchanged
+
+read_typed_csv passes the kinds to pandas as dtype (and usecols when asked), so
+numeric parsing happens once inside the C engine; coerce_numeric applies them to
+a frame read some other way. Stage scripts import from here instead of keeping
+their own copies of the column lists. pandas is imported by those two functions,
+not with the module, so csv-only stages can use the column names for free.
+"""
+
+from __future__ import annotations
+
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+TEXT = "text"
+FLOAT = "float"
+NUMBER = "number"
+
+
+GAME_KEY = {
+    "sport": TEXT,
+    "league": TEXT,
+    "game_date": TEXT,
+    "game_time": TEXT,
+    "game_id": TEXT,
+    "away_team": TEXT,
+    "home_team": TEXT,
+}
+
+
+###################### 00_intake ######################
+
+GAMES = {
+    "game_id": TEXT,
+    "sport": TEXT,
+    "league": TEXT,
+    "game_date": TEXT,
+    "game_time": TEXT,
+    "home_team": TEXT,
+    "away_team": TEXT,
+}
+
+SPORTSBOOK_REQUIRED = GAMES | {
+    "home_dk_moneyline_american": NUMBER,
+    "away_dk_moneyline_american": NUMBER,
+    "home_puck_line": NUMBER,
+    "away_puck_line": NUMBER,
+    "total": NUMBER,
+    "home_dk_puck_line_american": NUMBER,
+    "away_dk_puck_line_american": NUMBER,
+    "dk_total_over_american": NUMBER,
+    "dk_total_under_american": NUMBER,
+    "home_dk_moneyline_decimal": FLOAT,
+    "away_dk_moneyline_decimal": FLOAT,
+    "home_dk_puck_line_decimal": FLOAT,
+    "away_dk_puck_line_decimal": FLOAT,
+    "dk_total_over_decimal": FLOAT,
+    "dk_total_under_decimal": FLOAT,
+}
+
+PREDICTIONS = {
+    "sport": TEXT,
+    "league": TEXT,
+    "game_id": TEXT,
+    "game_date": TEXT,
+    "game_time": TEXT,
+    "home_team": TEXT,
+    "away_team": TEXT,
+    "home_prob_moneyline": FLOAT,
+    "away_prob_moneyline": FLOAT,
+    "away_projected_goals": FLOAT,
+    "home_projected_goals": FLOAT,
+    "total_projected_goals": FLOAT,
+}
+
+
+###################### 01_merge ######################
+
+MERGED = GAME_KEY | {
+    "away_prob_moneyline": FLOAT,
+    "home_prob_moneyline": FLOAT,
+    "away_projected_goals": FLOAT,
+    "home_projected_goals": FLOAT,
+    "total_projected_goals": FLOAT,
+    "away_puck_line": NUMBER,
+    "home_puck_line": NUMBER,
+    "total": NUMBER,
+    "away_dk_moneyline_american": NUMBER,
+    "home_dk_moneyline_american": NUMBER,
+    "away_dk_moneyline_decimal": FLOAT,
+    "home_dk_moneyline_decimal": FLOAT,
+    "away_dk_puck_line_american": NUMBER,
+    "home_dk_puck_line_american": NUMBER,
+    "away_dk_puck_line_decimal": FLOAT,
+    "home_dk_puck_line_decimal": FLOAT,
+    "dk_total_over_american": NUMBER,
+    "dk_total_under_american": NUMBER,
+    "dk_total_over_decimal": FLOAT,
+    "dk_total_under_decimal": FLOAT,
+}
+
+# 01_merge/01_merguiced/, written by build_juice_files for the juice stage: one
+# file per market, model probabilities and fair prices added.
+MONEYLINE = GAME_KEY | {
+    "away_prob_moneyline": FLOAT,
+    "home_prob_moneyline": FLOAT,
+    "away_fair_decimal_moneyline": FLOAT,
+    "home_fair_decimal_moneyline": FLOAT,
+    "away_dk_moneyline_american": NUMBER,
+    "home_dk_moneyline_american": NUMBER,
+    "away_dk_moneyline_decimal": FLOAT,
+    "home_dk_moneyline_decimal": FLOAT,
+}
+
+PUCK_LINE = GAME_KEY | {
+    "away_puck_line": NUMBER,
+    "home_puck_line": NUMBER,
+    "away_prob_puck_line": FLOAT,
+    "home_prob_puck_line": FLOAT,
+    "away_fair_decimal_puck_line": FLOAT,
+    "home_fair_decimal_puck_line": FLOAT,
+    "away_dk_puck_line_american": NUMBER,
+    "home_dk_puck_line_american": NUMBER,
+    "away_dk_puck_line_decimal": FLOAT,
+    "home_dk_puck_line_decimal": FLOAT,
+}
+
+TOTAL = GAME_KEY | {
+    "total": NUMBER,
+    "total_projected_goals": FLOAT,
+    "over_prob_total": FLOAT,
+    "under_prob_total": FLOAT,
+    "over_fair_decimal_total": FLOAT,
+    "under_fair_decimal_total": FLOAT,
+    "dk_total_over_american": NUMBER,
+    "dk_total_under_american": NUMBER,
+    "dk_total_over_decimal": FLOAT,
+    "dk_total_under_decimal": FLOAT,
+}
+
+
+###################### 02_juice / 03_edges ######################
+
+MARKET_SIDES = {
+    "moneyline": ("away", "home"),
+    "puck_line": ("away", "home"),
+    "total": ("over", "under"),
+}
+
+
+def _side_columns(market: str, fields: list[str]) -> dict[str, str]:
+    return {
+        f"{side}_{field}_{market}": FLOAT
+        for field in fields
+        for side in MARKET_SIDES[market]
+    }
+
+
+JUICE_FIELDS = ["juiced_decimal", "juiced_prob", "normalized_prob"]
+EDGE_FIELDS = ["model_prob", "edge_decimal", "edge_pct"]
+EV_KELLY_FIELDS = ["ev", "kelly"]
+
+JUICED = {
+    "moneyline": MONEYLINE | _side_columns("moneyline", JUICE_FIELDS),
+    "puck_line": PUCK_LINE | _side_columns("puck_line", JUICE_FIELDS),
+    "total": TOTAL | _side_columns("total", JUICE_FIELDS),
+}
+
+EDGES = {
+    market: schema | _side_columns(market, EDGE_FIELDS)
+    for market, schema in JUICED.items()
+}
+
+EV_KELLY = {
+    market: schema | _side_columns(market, EV_KELLY_FIELDS)
+    for market, schema in EDGES.items()
+}
+
+# Per-side field -> column template for one market row; "line" is None for
+# moneyline. Used to turn a wide ev_kelly row into one row per bet side.
+MARKET_FIELDS = {
+    "moneyline": {
+        "odds": "{side}_dk_moneyline_american",
+        "dec": "{side}_dk_moneyline_decimal",
+        "line": None,
+        "prob": "{side}_model_prob_moneyline",
+        "edge": "{side}_edge_decimal_moneyline",
+        "ev": "{side}_ev_moneyline",
+        "kelly": "{side}_kelly_moneyline",
+    },
+    "puck_line": {
+        "odds": "{side}_dk_puck_line_american",
+        "dec": "{side}_dk_puck_line_decimal",
+        "line": "{side}_puck_line",
+        "prob": "{side}_model_prob_puck_line",
+        "edge": "{side}_edge_decimal_puck_line",
+        "ev": "{side}_ev_puck_line",
+        "kelly": "{side}_kelly_puck_line",
+    },
+    "total": {
+        "odds": "dk_total_{side}_american",
+        "dec": "dk_total_{side}_decimal",
+        "line": "total",
+        "prob": "{side}_model_prob_total",
+        "edge": "{side}_edge_decimal_total",
+        "ev": "{side}_ev_total",
+        "kelly": "{side}_kelly_total",
+    },
+}
+
+JUICE_CONFIG = {
+    "band": TEXT,
+    "band_min": FLOAT,
+    "band_max": FLOAT,
+    "fav_ud": TEXT,
+    "venue": TEXT,
+    "side": TEXT,
+    "extra_juice": FLOAT,
+}
+
+
+###################### 04_select ######################
+
+SELECTED = GAME_KEY | {
+    "market_type": TEXT,
+    "bet_side": TEXT,
+    "line": NUMBER,
+    "take_bet": TEXT,
+    "dk_odds_american": NUMBER,
+    "dk_odds_decimal": FLOAT,
+    "model_prob": FLOAT,
+    "edge": FLOAT,
+    "ev": FLOAT,
+    "kelly": FLOAT,
+}
+
+
+###################### 05_final_scores ######################
+
+FINAL_SCORES = {
+    "sport": TEXT,
+    "league": TEXT,
+    "game_date": TEXT,
+    "game_id": TEXT,
+    "away_team": TEXT,
+    "home_team": TEXT,
+    "away_score": NUMBER,
+    "home_score": NUMBER,
+    "total_score": NUMBER,
+    "away_puck_line_result": NUMBER,
+    "home_puck_line_result": NUMBER,
+}
+
+# 05_final_scores/graded: a selected bet joined to its final score.
+GRADED = SELECTED | {
+    "source_select_file": TEXT,
+    "away_score": NUMBER,
+    "home_score": NUMBER,
+    "total_score": NUMBER,
+    "away_puck_line_result": NUMBER,
+    "home_puck_line_result": NUMBER,
+    "source_score_file": TEXT,
+    "bet_result": TEXT,
+}
+
+# 05_final_scores/intermediate/work_nhl.csv: graded bets plus the aliases the
+# reports read.
+WORK = GRADED | {
+    "side_group": TEXT,
+    "selected_edge": FLOAT,
+    "take_odds": NUMBER,
+    "win_prob": FLOAT,
+}
+
+
+###################### READING ######################
+
+def read_typed_csv(path: Path, schema: dict[str, str], usecols: bool = False) -> pd.DataFrame:
+    """Read path with schema dtypes applied by the parser.
+
+    Columns outside the schema are inferred as usual, or dropped when usecols is
+    set. Schema columns missing from the file are simply absent, so callers keep
+    their own required-column checks. A non-numeric value in a FLOAT column
+    becomes NaN, as pd.to_numeric(errors="coerce") would give.
+    """
+    import pandas as pd
+
+    text = {col: str for col, kind in schema.items() if kind == TEXT}
+    floats = [col for col, kind in schema.items() if kind == FLOAT]
+    select = (lambda col: col in schema) if usecols else None
+
+    try:
+        df = pd.read_csv(path, dtype=text | dict.fromkeys(floats, "float64"), usecols=select)
+    except ValueError:
+        if hasattr(path, "seek"):
+            path.seek(0)
+        df = pd.read_csv(path, dtype=text | dict.fromkeys(floats, str), usecols=select)
+
+        for col in floats:
+            if col in df.columns:
+                df[col] = pd.to_numeric(df[col], errors="coerce").astype("float64")
+
+    for col, kind in schema.items():
+        if kind == NUMBER and col in df.columns and df[col].dtype == object:
+            df[col] = pd.to_numeric(df[col], errors="coerce")
+
+    return df
+
+
+def numeric_columns(schema: dict[str, str]) -> list[str]:
+    return [col for col, kind in schema.items() if kind != TEXT]
+
+
+def coerce_numeric(df: pd.DataFrame, schema: dict[str, str]) -> pd.DataFrame:
+    """df with the FLOAT and NUMBER columns of schema it has run through pd.to_numeric.
+
+    For frames read as str or by inference; a value that does not parse becomes
+    NaN. Columns outside the schema are left alone.
+    """
+    import pandas as pd
+
+    for col in numeric_columns(schema):
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col], errors="coerce")
+
+    return df
@@ -0,0 +1,379 @@
+#!/usr/bin/env python3
+# docs/win/hockey/nhl/scripts/nhl_validate.py
+
+"""
+Declarative, vectorized checks for the CSVs the stages read.
+
+    RULES = Rules(
+        required=("game_id", "game_date"),
+        not_null=("game_id",),
+        unique=(("game_id",),),
+        single_value=("game_date",),
+        ranges={"home_dk_moneyline_decimal": ODDS_DECIMAL},
+    )
+    violations = validate(df, RULES, path)
+    if violations:
+        fail(report(violations))
+
+validate() pulls the checked columns out of the frame once, as one object
+array, and runs every rule on that array (a blank mask, duplicated keys, a
+numeric mask), so the cost is a few numpy passes per call and not per-column
+pandas overhead. It does not stop at the first problem: it returns a Violation
+for each rule that fails, carrying the file row numbers (header is row 1, so
+frame index i is row i + 2 unless the caller set its own index) and the
+offending values. report() renders any number of them as one block, which the
+stage hands to its own fail(), so one run shows every problem of every file
+instead of the first.
+
+Many small files are checked as one frame: concatenate them with a column
+naming each row's file and one holding its file row number, and pass those as
+by= and row=. Unique keys and single_value then hold within each file, and each
+violation is reported against the file its rows came from. validate_rows() runs
+the same rules over csv.DictReader rows, for the csv-only stages.
+
+Blank values are "", whitespace, None or NaN. Range checks skip blanks
+(not_null is the rule for those) and treat a value that does not parse as a
+number as out of range.
+
+numpy and pandas are imported when a check runs, not with the module, so csv-only
+stages can declare their Rules at module level and stay cheap to import.
+"""
+
+from __future__ import annotations
+
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import numpy as np
+    import pandas as pd
+
+
+# Rows / values listed per violation in a report; the rest are counted.
+LISTED = 20
+
+
+@dataclass(frozen=True)
+class Range:
+    low: float | None = None
+    high: float | None = None
+    low_open: bool = False
+    high_open: bool = False
+
+    def describe(self) -> str:
+        low = "" if self.low is None else f"{'(' if self.low_open else '['}{self.low:g}"
+        high = "" if self.high is None else f"{self.high:g}{')' if self.high_open else ']'}"
+
+        if self.low is None:
+            return f"{'<' if self.high_open else '<='} {self.high:g}"
+        if self.high is None:
+            return f"{'>' if self.low_open else '>='} {self.low:g}"
+        return f"{low}, {high}"
+
+    def outside(self, values: np.ndarray) -> np.ndarray:
+        import numpy as np
+
+        bad = np.isnan(values)
+
+        with np.errstate(invalid="ignore"):
+            if self.low is not None:
+                bad |= values <= self.low if self.low_open else values < self.low
+            if self.high is not None:
+                bad |= values >= self.high if self.high_open else values > self.high
+
+        return bad
+
+
+# Decimal odds and fair / juiced prices.
+ODDS_DECIMAL = Range(low=1, low_open=True)
+# Win probabilities: strictly between 0 and 1.
+PROBABILITY = Range(low=0, high=1, low_open=True, high_open=True)
+
+
+@dataclass(frozen=True)
+class Rules:
+    required: tuple[str, ...] = ()
+    not_null: tuple[str, ...] = ()
+    unique: tuple[tuple[str, ...], ...] = ()
+    single_value: tuple[str, ...] = ()
+    ranges: dict[str, Range] = field(default_factory=dict)
+
+
+@dataclass(frozen=True)
+class Violation:
+    source: str
+    rule: str
+    columns: tuple[str, ...]
+    detail: str
+    rows: tuple[int, ...] = ()
+    values: tuple[str, ...] = ()
+
+    def __str__(self) -> str:
+        parts = [self.source, self.rule, f"columns={','.join(self.columns)}", self.detail]
+
+        if self.rows:
+            parts.append(f"rows={_listed(self.rows)}")
+        if self.values:
+            parts.append(f"values={_listed(self.values)}")
+
+        return " | ".join(parts)
+
+
+def _listed(items) -> str:
+    shown = ", ".join(str(item) for item in items[:LISTED])
+    more = len(items) - LISTED
+    return f"[{shown}{f', ... +{more} more' if more > 0 else ''}]"
+
+
+def _is_blank(value) -> bool:
+    if value is None:
+        return True
+    if isinstance(value, str):
+        return not value.strip()
+    return isinstance(value, float) and value != value
+
+
+def _to_float(value) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return float("nan")
+
+
+def blank_values(values: np.ndarray) -> np.ndarray:
+    """True where values are None / NaN / NA or an empty / whitespace-only string."""
+    import numpy as np
+    import pandas as pd
+
+    mask = pd.isna(values)
+
+    if values.dtype == object and values.size:
+        mask = mask | np.frompyfunc(_is_blank, 1, 1)(values).astype(bool)
+
+    return mask
+
+
+def blank(series: pd.Series) -> np.ndarray:
+    """True where series is NaN or an empty / whitespace-only string."""
+    import pandas as pd
+
+    if pd.api.types.is_numeric_dtype(series):
+        return pd.isna(series.to_numpy())
+    return blank_values(series.to_numpy(dtype=object))
+
+
+def numbers(values: np.ndarray) -> np.ndarray:
+    """values as float64; anything that does not parse as a number is NaN."""
+    import numpy as np
+
+    try:
+        return values.astype("float64")
+    except (TypeError, ValueError):
+        return np.frompyfunc(_to_float, 1, 1)(values).astype("float64")
+
+
+def _checked(rules: Rules, columns) -> list[str]:
+    """Columns any row-level rule reads that are present in columns, in rule order."""
+    wanted = [
+        *rules.not_null,
+        *(col for key in rules.unique for col in key),
+        *rules.single_value,
+        *rules.ranges,
+    ]
+    present = set(columns)
+    return [col for col in dict.fromkeys(wanted) if col in present]
+
+
+def _required(rules: Rules, columns, source: str) -> list[Violation]:
+    missing = [col for col in rules.required if col not in set(columns)]
+    return [Violation(source, "required", tuple(missing), "missing columns")] if missing else []
+
+
+def validate(
+    df: pd.DataFrame,
+    rules: Rules,
+    source,
+    first_row: int = 2,
+    by: str | None = None,
+    row: str | None = None,
+) -> list[Violation]:
+    """Every violation of rules in df.
+
+    Rows are numbered index + first_row, or taken from column row. With by, the
+    column naming each row's source, unique and single_value hold per source and
+    violations are reported per source; source names the frame as a whole.
+    """
+    source = str(source)
+    violations = _required(rules, df.columns, source)
+    checked = _checked(rules, df.columns)
+
+    if not checked or df.empty:
+        return violations
+
+    values = df.to_numpy(dtype=object)[:, df.columns.get_indexer(checked)]
+    labels = df[by].to_numpy(dtype=object) if by else None
+    row_ids = df[row].to_numpy() if row else df.index.to_numpy() + first_row
+
+    return violations + _check(values, blank_values(values), checked, rules, source, labels, row_ids)
+
+
+def validate_rows(
+    rows: list[dict],
+    rules: Rules,
+    source,
+    first_row: int = 2,
+    by: str | None = None,
+    row: str | None = None,
+) -> list[Violation]:
+    """validate() for csv.DictReader rows, without building a DataFrame.
+
+    required is checked against the keys of the first row; by and row name keys
+    of each row. Stages that read their inputs with csv use this and never load
+    pandas.
+    """
+    import numpy as np
+
+    source = str(source)
+
+    if not rows:
+        return []
+
+    violations = _required(rules, rows[0], source)
+    checked = _checked(rules, rows[0])
+
+    if not checked:
+        return violations
+
+    values = np.empty((len(rows), len(checked)), dtype=object)
+    values[:] = [[r.get(col) for col in checked] for r in rows]
+    labels = np.array([r[by] for r in rows], dtype=object) if by else None
+    row_ids = np.array([r[row] for r in rows]) if row else np.arange(len(rows)) + first_row
+    empty = np.frompyfunc(_is_blank, 1, 1)(values).astype(bool)
+
+    return violations + _check(values, empty, checked, rules, source, labels, row_ids)
+
+
+def _by_source(labels: np.ndarray | None, mask: np.ndarray):
+    """(label, mask) for each source label with rows in mask; label None without by=."""
+    import numpy as np
+
+    if labels is None:
+        yield None, mask
+        return
+
+    hits = np.flatnonzero(mask)
+
+    for label in dict.fromkeys(labels[hits]):
+        sub = np.zeros(len(mask), dtype=bool)
+        sub[hits[labels[hits] == label]] = True
+        yield label, sub
+
+
+def _check(
+    values: np.ndarray,
+    empty: np.ndarray,
+    checked: list[str],
+    rules: Rules,
+    source: str,
+    labels: np.ndarray | None,
+    row_ids: np.ndarray,
+) -> list[Violation]:
+    """The row-level rules over values, one object column per checked column."""
+    import numpy as np
+
+    violations = []
+    position = {col: j for j, col in enumerate(checked)}
+
+    def add(rule, columns, mask, detail, shown=None):
+        for label, sub in _by_source(labels, mask):
+            violations.append(
+                Violation(
+                    source if label is None else str(label),
+                    rule,
+                    tuple(columns),
+                    detail(sub),
+                    tuple(int(r) for r in row_ids[sub]),
+                    shown(sub) if shown else (),
+                )
+            )
+
+    for col in rules.not_null:
+        if col not in position:
+            continue
+
+        mask = empty[:, position[col]]
+        if mask.any():
+            add("not_null", (col,), mask, lambda sub: f"{int(sub.sum())} blank")
+
+    for key in rules.unique:
+        if any(col not in position for col in key):
+            continue
+
+        cols = [position[col] for col in key]
+        keyed = ~empty[:, cols].any(axis=1)
+
+        keys = [tuple(k) for k in values[keyed][:, cols]]
+        if labels is not None:
+            keys = [(label, *k) for label, k in zip(labels[keyed], keys)]
+
+        counts = Counter(keys)
+        mask = np.zeros(len(values), dtype=bool)
+        mask[keyed] = [counts[k] > 1 for k in keys]
+
+        if mask.any():
+            def shown(sub, cols=cols):
+                return tuple(dict.fromkeys("/".join(str(v) for v in r) for r in values[sub][:, cols]))
+
+            add("unique", key, mask, lambda sub: f"{len(shown(sub))} duplicated key(s)", shown)
+
+    for col in rules.single_value:
+        if col not in position:
+            continue
+
+        present = ~empty[:, position[col]]
+        sources = labels[present] if labels is not None else [source] * int(present.sum())
+
+        seen = {}
+        for label, value in zip(sources, values[present, position[col]]):
+            seen.setdefault(label, set()).add(str(value).strip())
+
+        for label, distinct in seen.items():
+            if len(distinct) > 1:
+                violations.append(
+                    Violation(
+                        str(label),
+                        "single_value",
+                        (col,),
+                        f"{len(distinct)} distinct values",
+                        values=tuple(sorted(distinct)),
+                    )
+                )
+
+    ranged = [col for col in rules.ranges if col in position]
+    if ranged:
+        cols = [position[col] for col in ranged]
+        parsed = numbers(values[:, cols])
+
+        for j, col in enumerate(ranged):
+            allowed = rules.ranges[col]
+            mask = ~empty[:, cols[j]] & allowed.outside(parsed[:, j])
+
+            if mask.any():
+                add(
+                    "range",
+                    (col,),
+                    mask,
+                    lambda sub, allowed=allowed: f"{int(sub.sum())} outside {allowed.describe()}",
+                    lambda sub, j=j: tuple(str(v) for v in values[sub, cols[j]]),
+                )
+
+    return violations
+
+
+def report(violations: list[Violation]) -> str:
+    """All violations as one block: a count line, then one line each."""
+    sources = len({v.source for v in violations})
+    lines = [f"{len(violations)} validation error(s) in {sources} source(s):"]
+    lines.extend(f"  - {v}" for v in violations)
+    return "\n".join(lines)
@@ -0,0 +1,464 @@
+#!/usr/bin/env python3
+# docs/win/hockey/nhl/scripts/pipeline/nhl_golden.py
+
+"""
+Golden-output equivalence check of a stage against the committed history.
+
+    python docs/win/hockey/nhl/scripts/pipeline/nhl_golden.py compute_edges
+    python docs/win/hockey/nhl/scripts/pipeline/nhl_golden.py apply_total_juice --baseline HEAD
+    python docs/win/hockey/nhl/scripts/pipeline/nhl_golden.py hockey_select_bets --rtol 1e-12 --ulps 0
+
+The stage script of the working tree runs in a sandbox: a temporary folder laid
+out like the repository, holding symlinks to the committed files of every
+resource the stage reads (nhl_pipeline.STAGES) and nothing the stage writes. Its
+paths are relative, so run from the sandbox it processes the whole history into
+the sandbox and leaves production folders alone. Months compacted into monthly
+archives (nhl_archive) are part of that history: their input members are
+extracted into the sandbox as live files, so the stage recomputes them too.
+
+The new outputs (GOLDEN patterns of the stage) are compared with the committed
+outputs, live and archived alike (nhl_archive.dataset_files), or with
+--baseline REV: the same stage script exported from that git
+revision and run in its own sandbox at the same time. Every CSV pair is matched
+by row key (game_date, game_id, market_type, bet_side, whichever the file has;
+repeated keys by occurrence) and compared column by column:
+
+    - equal strings match,
+    - empty / nan on both sides match,
+    - numbers match within --ulps units in the last place or within
+      --atol + --rtol * max(|old|, |new|),
+    - anything else, a missing or extra row, column or file is a mismatch.
+
+The report names the first mismatching slate file, row key and column with both
+values, and the mismatch counts per file; the exit status is 1 on any mismatch,
+so it can gate a rewrite. Comparison runs across --workers processes.
+"""
+
+import argparse
+import io
+import os
+import shutil
+import subprocess
+import sys
+import tarfile
+import tempfile
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, UTC
+from fnmatch import fnmatch
+from functools import partial
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from nhl_archive import ARCHIVE_DIR, DatasetFile, dataset_files
+from nhl_parallel import add_workers_argument, log_line, map_slates, WORKERS_ENV
+from nhl_pipeline import STAGE_BY_NAME
+from nhl_profile import run_main
+
+
+BASE_DIR = Path("docs/win/hockey/nhl")
+SCRIPT_DIR = Path(__file__).resolve().parents[1]
+
+ERROR_DIR = BASE_DIR / "errors" / "pipeline"
+LOG_FILE = ERROR_DIR / "nhl_golden.txt"
+
+# stage -> (folder, pattern) of the outputs compared, relative to BASE_DIR.
+GOLDEN = {
+    "merge_intake": [("01_merge", "*_NHL_merged.csv"), ("01_merge/audit", "*.csv")],
+    "build_juice_files": [("01_merge/01_merguiced", "*_NHL_*.csv")],
+    "apply_moneyline_juice": [("02_juice", "*_NHL_moneyline.csv")],
+    "apply_puck_line_juice": [("02_juice", "*_NHL_puck_line.csv")],
+    "apply_total_juice": [("02_juice", "*_NHL_total.csv")],
+    "compute_edges": [("03_edges", "*_NHL_*.csv")],
+    "compute_ev_kelly": [("03_edges/ev_kelly", "*_NHL_*.csv")],
+    "hockey_select_bets": [("04_select", "*_NHL.csv")],
+    "hockey_portfolio_kelly": [("04_select/portfolio", "*_NHL_portfolio.csv")],
+    "nhl_results_grade": [("05_final_scores/graded", "*.csv")],
+}
+
+KEY_COLUMNS = ["game_date", "game_id", "market_type", "bet_side"]
+
+NA_STRINGS = {"", "nan", "NaN", "<NA>", "None"}
+
+DEFAULT_RTOL = 1e-9
+DEFAULT_ATOL = 0.0
+DEFAULT_ULPS = 4
+
+STDERR_TAIL_LINES = 20
+
+
+# =========================
+# LOGGING
+# =========================
+
+def _now():
+    return datetime.now(UTC).isoformat()
+
+
+def _log(msg: str, level: str = "INFO"):
+    log_line(LOG_FILE, f"{_now()} | {level:<5} | {msg.rstrip()}\n")
+
+
+# =========================
+# SANDBOX
+# =========================
+
+def is_output(path: Path, stage) -> bool:
+    """path is one the stage writes: a GOLDEN file or under a written folder."""
+    for folder, pattern in GOLDEN[stage.name]:
+        if path.parent == BASE_DIR / folder and fnmatch(path.name, pattern):
+            return True
+
+    for resource in stage.writes:
+        written = BASE_DIR / resource
+        if written.is_dir() and (path == written or written in path.parents):
+            return True
+
+    return False
+
+
+def is_archive(path: Path) -> bool:
+    return path.parent.name == ARCHIVE_DIR and path.suffix == ".zip"
+
+
+def link_inputs(stage, root: Path) -> tuple[int, int]:
+    """Put the committed files the stage reads into root.
+
+    Live files are symlinked. Members of monthly archives are written out as
+    live files next to them, unless the live file exists (it wins, as in
+    dataset_files), since the per-slate stages only glob live files. Returns
+    (linked, extracted).
+    """
+    linked = 0
+    extracted = 0
+    zips = []
+
+    for resource in stage.reads:
+        source = BASE_DIR / resource
+        if not source.exists():
+            source = source.parent
+
+        files = [source] if source.is_file() else [p for p in sorted(source.rglob("*")) if p.is_file()]
+
+        for path in files:
+            if is_archive(path):
+                zips.append(path)
+                continue
+
+            target = root / path
+            if is_output(path, stage) or target.exists():
+                continue
+
+            target.parent.mkdir(parents=True, exist_ok=True)
+            target.symlink_to(path.resolve())
+            linked += 1
+
+    for archive in sorted(set(zips)):
+        directory = archive.parent.parent
+
+        with zipfile.ZipFile(archive) as zf:
+            for name in zf.namelist():
+                path = directory / name
+                target = root / path
+                if is_output(path, stage) or target.exists():
+                    continue
+
+                target.parent.mkdir(parents=True, exist_ok=True)
+                target.write_bytes(zf.read(name))
+                extracted += 1
+
+    return linked, extracted
+
+
+def export_scripts(rev: str, root: Path) -> Path:
+    """The scripts folder of git revision rev, extracted under root."""
+    archive = subprocess.run(
+        ["git", "archive", "--format=tar", rev, "--", (BASE_DIR / "scripts").as_posix()],
+        capture_output=True,
+        check=True,
+    ).stdout
+
+    with tarfile.open(fileobj=io.BytesIO(archive)) as tar:
+        if hasattr(tarfile, "data_filter"):
+            tar.extractall(root, filter="data")
+        else:
+            tar.extractall(root)
+
+    return root / BASE_DIR / "scripts"
+
+
+def run_stage(stage, scripts: Path, root: Path, workers: int) -> tuple[int, float, str]:
+    """Run the stage script from scripts with root as working directory."""
+    env = dict(os.environ)
+    env[WORKERS_ENV] = str(workers)
+    env.pop("NHL_PROFILE", None)
+
+    start = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, str(scripts / stage.script)],
+        cwd=root,
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    seconds = time.perf_counter() - start
+
+    tail = "\n".join((proc.stderr or "").splitlines()[-STDERR_TAIL_LINES:])
+    return proc.returncode, seconds, tail
+
+
+def output_files(stage, root: Path) -> dict[str, DatasetFile]:
+    """Relative path -> file of the stage's outputs under root, live or archived
+    (symlinks excluded)."""
+    found = {}
+
+    for folder, pattern in GOLDEN[stage.name]:
+        directory = root / BASE_DIR / folder
+        if not directory.is_dir():
+            continue
+
+        for entry in dataset_files(directory, pattern):
+            if entry.archive is None and entry.path.is_symlink():
+                continue
+            found[entry.path.relative_to(root).as_posix()] = entry
+
+    return found
+
+
+# =========================
+# COMPARISON
+# =========================
+
+def read_frame(entry: DatasetFile):
+    import pandas as pd
+
+    return pd.read_csv(entry.source(), dtype=str, keep_default_na=False)
+
+
+def keyed(df):
+    """df indexed by its key columns plus the occurrence of each key."""
+    keys = [col for col in KEY_COLUMNS if col in df.columns]
+    out = df.copy()
+
+    if keys:
+        out["_occurrence"] = out.groupby(keys, sort=False).cumcount()
+        return out.set_index(keys + ["_occurrence"])
+
+    out.index.name = "_row"
+    return out
+
+
+def ordered_floats(values):
+    """float64 bits mapped to integers that are ordered like the floats."""
+    import numpy as np
+
+    bits = values.astype("float64").view("int64")
+    return np.where(bits < 0, np.iinfo(np.int64).min - bits, bits)
+
+
+def column_mismatches(old, new, rtol: float, atol: float, ulps: int):
+    """Boolean mask of the rows where old and new (aligned string Series) differ."""
+    import numpy as np
+    import pandas as pd
+
+    a = old.fillna("").astype(str).str.strip()
+    b = new.fillna("").astype(str).str.strip()
+    same = (a == b).to_numpy()
+
+    if same.all():
+        return ~same
+
+    a_na = a.isin(NA_STRINGS).to_numpy()
+    b_na = b.isin(NA_STRINGS).to_numpy()
+    x = pd.to_numeric(a.where(~a_na), errors="coerce").to_numpy(dtype="float64")
+    y = pd.to_numeric(b.where(~b_na), errors="coerce").to_numpy(dtype="float64")
+
+    numeric = (a_na | ~np.isnan(x)) & (b_na | ~np.isnan(y))
+    both_na = a_na & b_na
+
+    with np.errstate(invalid="ignore", over="ignore"):
+        exact = x == y
+        within = np.abs(x - y) <= atol + rtol * np.maximum(np.abs(x), np.abs(y))
+        finite = np.isfinite(x) & np.isfinite(y)
+        distance = np.abs(ordered_floats(np.where(finite, x, 0.0)) - ordered_floats(np.where(finite, y, 0.0)))
+        close = exact | (finite & (within | ((np.signbit(x) == np.signbit(y)) & (distance <= ulps))))
+
+    return ~(same | both_na | (numeric & close))
+
+
+def compare_file(item: tuple[str, DatasetFile | None, DatasetFile | None], rtol: float, atol: float, ulps: int) -> dict:
+    """Mismatch count and first mismatch of one output file."""
+    name, old_path, new_path = item
+    result = {"file": name, "mismatches": 0, "first": None}
+
+    if old_path is None or new_path is None:
+        side = "golden" if old_path is None else "new"
+        result.update(mismatches=1, first=("<file>", "<file>", f"missing from {side} outputs", ""))
+        return result
+
+    old, new = keyed(read_frame(old_path)), keyed(read_frame(new_path))
+    first = None
+    count = 0
+
+    if list(old.columns) != list(new.columns):
+        count += 1
+        first = ("<header>", "<columns>", ",".join(old.columns), ",".join(new.columns))
+
+    missing = old.index.difference(new.index, sort=False)
+    extra = new.index.difference(old.index, sort=False)
+    count += len(missing) + len(extra)
+
+    if first is None and len(missing):
+        first = (missing[0], "<row>", "present", "missing")
+    if first is None and len(extra):
+        first = (extra[0], "<row>", "missing", "present")
+
+    shared = old.index.intersection(new.index, sort=False)
+    columns = [col for col in old.columns if col in new.columns]
+    old_rows, new_rows = old.loc[shared, columns], new.loc[shared, columns]
+
+    first_at = None
+
+    for col in columns:
+        mask = column_mismatches(old_rows[col], new_rows[col], rtol, atol, ulps)
+        if not mask.any():
+            continue
+
+        count += int(mask.sum())
+        at = int(mask.argmax())
+
+        # Earliest row wins; on a tie the earlier column, as columns go in order.
+        if first_at is None or at < first_at[0]:
+            first_at = (at, (shared[at], col, old_rows[col].iloc[at], new_rows[col].iloc[at]))
+
+    if first is None and first_at is not None:
+        first = first_at[1]
+
+    result.update(mismatches=count, first=first, rows=len(old))
+    return result
+
+
+def format_key(key) -> str:
+    if not isinstance(key, tuple):
+        return str(key)
+    parts = [str(part) for part in key]
+    return "/".join(parts[:-1]) + (f" #{parts[-1]}" if parts[-1] != "0" else "")
+
+
+# =========================
+# MAIN
+# =========================
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Compare a stage's outputs over the committed history.")
+    parser.add_argument("stages", nargs="+", choices=sorted(GOLDEN), help="Stages to check.")
+    parser.add_argument(
+        "--baseline",
+        default=None,
+        help="Git revision whose stage script gives the golden outputs (default: the committed outputs).",
+    )
+    parser.add_argument("--rtol", type=float, default=DEFAULT_RTOL, help=f"Relative tolerance (default {DEFAULT_RTOL}).")
+    parser.add_argument("--atol", type=float, default=DEFAULT_ATOL, help=f"Absolute tolerance (default {DEFAULT_ATOL}).")
+    parser.add_argument("--ulps", type=int, default=DEFAULT_ULPS, help=f"Units in the last place (default {DEFAULT_ULPS}).")
+    parser.add_argument("--keep", action="store_true", help="Keep the sandbox folders and print where they are.")
+    add_workers_argument(parser)
+    return parser.parse_args()
+
+
+def check_stage(stage, args, tmp: Path) -> int:
+    new_root = tmp / f"{stage.name}_new"
+    linked, extracted = link_inputs(stage, new_root)
+
+    runs = {"new": (SCRIPT_DIR, new_root)}
+
+    if args.baseline:
+        old_root = tmp / f"{stage.name}_old"
+        shutil.copytree(new_root, old_root, symlinks=True)
+        runs["old"] = (export_scripts(args.baseline, tmp / "baseline"), old_root)
+
+    _log(
+        f"STAGE: {stage.name} | inputs linked={linked} extracted from archives={extracted} | "
+        f"baseline={args.baseline or 'committed outputs'}"
+    )
+
+    with ThreadPoolExecutor(max_workers=len(runs)) as pool:
+        futures = {
+            label: pool.submit(run_stage, stage, scripts, root, args.workers)
+            for label, (scripts, root) in runs.items()
+        }
+        results = {label: future.result() for label, future in futures.items()}
+
+    for label, (code, seconds, tail) in results.items():
+        _log(f"RUN {label}: {stage.name} | exit={code} | {seconds:.2f}s")
+        if code != 0:
+            _log(f"{stage.name} ({label}) failed:\n{tail}", "ERROR")
+            print(f"{stage.name}: {label} run failed (exit {code})\n{tail}")
+            return 1
+
+    new = output_files(stage, new_root)
+    old = output_files(stage, old_root if args.baseline else Path("."))
+
+    items = [(name, old.get(name), new.get(name)) for name in sorted(set(old) | set(new))]
+    archived = sum(1 for entry in old.values() if entry.archive is not None)
+
+    start = time.perf_counter()
+    compared = map_slates(
+        partial(compare_file, rtol=args.rtol, atol=args.atol, ulps=args.ulps),
+        items,
+        args.workers,
+        LOG_FILE,
+    )
+    seconds = time.perf_counter() - start
+
+    failed = [r for r in compared if r["mismatches"]]
+
+    for r in failed:
+        _log(f"MISMATCH: {r['file']} | cells/rows={r['mismatches']}", "ERROR")
+
+    summary = (
+        f"{stage.name}: {len(items)} file(s) compared ({archived} golden from archives) in {seconds:.2f}s "
+        f"(new run {results['new'][1]:.2f}s), {len(failed)} with mismatches"
+    )
+    _log(summary)
+    print(summary)
+
+    if failed:
+        r = failed[0]
+        key, column, old_value, new_value = r["first"]
+        detail = f"first mismatch: {r['file']} | key={format_key(key)} | column={column} | old={old_value!r} | new={new_value!r}"
+        _log(detail, "ERROR")
+        print(f"  {detail}")
+        return 1
+
+    return 0
+
+
+def main():
+    args = parse_args()
+
+    ERROR_DIR.mkdir(parents=True, exist_ok=True)
+    with open(LOG_FILE, "w", encoding="utf-8") as f:
+        f.write(f"=== nhl_golden RUN {_now()} ===\n")
+
+    tmp = Path(tempfile.mkdtemp(prefix="nhl_golden_"))
+    status = 0
+
+    try:
+        for name in args.stages:
+            status |= check_stage(STAGE_BY_NAME[name], args, tmp)
+    finally:
+        if args.keep:
+            print(f"sandboxes kept in {tmp}")
+        else:
+            shutil.rmtree(tmp, ignore_errors=True)
+
+    _log(f"STATUS: {'MISMATCH' if status else 'EQUIVALENT'}")
+
+    if status:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    run_main(main, LOG_FILE)
@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+# docs/win/hockey/nhl/scripts/pipeline/nhl_import_budget.py
+
+"""
+Import-time budget and side-effect check for every NHL script.
+
+    python docs/win/hockey/nhl/scripts/pipeline/nhl_import_budget.py
+    python docs/win/hockey/nhl/scripts/pipeline/nhl_import_budget.py --own 0.5 --repeat 7
+
+Each script under docs/win/hockey/nhl/scripts is imported (not run) in a fresh
+`python -X importtime` process whose working directory is an empty temporary
+folder. A script fails the check when:
+
+    - its own import time is over --own seconds (best of --repeat runs). Own
+      time is the wall time of the import minus the cumulative time -X
+      importtime reports for the outermost third-party and stdlib modules it
+      pulls in, so it is the cost of the repo's modules themselves and does not
+      move with how long pandas takes to load on the runner. The limit is far
+      above what any script needs, so only module-level work (reading files,
+      building tables, network calls) trips it. The heaviest top-level imports
+      are listed so the offender is obvious, or
+    - one of its modules imports one of DEFERRED at module level, or
+    - importing it creates anything in the working directory. Stage paths are
+      relative, so a module-level mkdir or log reset shows up there.
+
+Heavy dependencies that only some code paths need (DEFERRED) are imported where
+they are used, so a stage's import cost is pandas plus its own code. Scripts
+whose top-level imports are missing from the environment are reported as
+skipped rather than failed. The total import time is printed for reference.
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+
+SCRIPT_DIR = Path(__file__).resolve().parents[1]
+
+DEFAULT_OWN_SECONDS = 0.3
+DEFAULT_REPEAT = 5
+TOP_IMPORTS = 5
+
+# Imported inside the functions that need them, never at module level.
+DEFERRED = ("scipy", "playwright", "polars", "sportsdataverse")
+
+MARKER = "nhl_import_budget: start"
+
+# Imports path as a script would run: its own folder first on sys.path, under a
+# module name other than __main__ so the entry point does not execute. MARKER
+# on stderr separates the child's own imports from the target's in the
+# -X importtime log; the repo's modules are reported by name.
+CHILD = """
+import importlib.util, json, sys, time
+path, folder, script_dir = sys.argv[1:4]
+sys.path.insert(0, folder)
+sys.stderr.write("%s\\n")
+sys.stderr.flush()
+start = time.perf_counter()
+spec = importlib.util.spec_from_file_location("nhl_import_budget_target", path)
+module = importlib.util.module_from_spec(spec)
+sys.modules[spec.name] = module
+try:
+    spec.loader.exec_module(module)
+except ModuleNotFoundError as e:
+    print(json.dumps({"missing": e.name}))
+    raise SystemExit(0)
+seconds = time.perf_counter() - start
+local = sorted(
+    name for name, m in list(sys.modules.items())
+    if (getattr(m, "__file__", None) or "").startswith(script_dir)
+)
+print(json.dumps({"seconds": seconds, "local": local}))
+""" % MARKER
+
+
+def script_paths() -> list[Path]:
+    own = Path(__file__).resolve()
+    return sorted(p for p in SCRIPT_DIR.rglob("*.py") if p.resolve() != own and "tests" not in p.parts)
+
+
+def import_lines(importtime_log: str) -> list[tuple[int, str, float]]:
+    """(depth, module, cumulative seconds) of each import after MARKER, in log order."""
+    lines = importtime_log.splitlines()
+    if MARKER in lines:
+        lines = lines[lines.index(MARKER) + 1:]
+
+    rows = []
+
+    for line in lines:
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+
+        _, cumulative, name = line[len("import time:"):].split("|", 2)
+
+        # Nested imports are indented two spaces per level under the module
+        # that triggered them, after one leading space.
+        depth = (len(name) - len(name.lstrip(" ")) - 1) // 2
+        rows.append((depth, name.strip(), int(cumulative) / 1e6))
+
+    return rows
+
+
+def external_imports(rows: list[tuple[int, str, float]], local: set[str]) -> list[tuple[str, float]]:
+    """(module, cumulative seconds) of the outermost imports that are not the repo's modules.
+
+    These are the third-party and stdlib modules the repo's own modules import;
+    whatever they import in turn is inside their time. -X importtime logs a
+    module after its children, so walking the log backwards meets each parent
+    before its children.
+    """
+    found = []
+    stack = []
+
+    for depth, name, seconds in reversed(rows):
+        while stack and stack[-1][0] >= depth:
+            stack.pop()
+
+        inside_external = any(external for _, external in stack)
+        external = name not in local
+
+        if external and not inside_external:
+            found.append((name, seconds))
+
+        stack.append((depth, external))
+
+    return found
+
+
+def heaviest_imports(rows: list[tuple[int, str, float]], n: int) -> list[tuple[str, float]]:
+    """Modules imported directly by the script, by cumulative import time."""
+    top = [(name, seconds) for depth, name, seconds in rows if depth == 0]
+    return sorted(top, key=lambda r: r[1], reverse=True)[:n]
+
+
+def measure(path: Path) -> dict:
+    with tempfile.TemporaryDirectory() as cwd:
+        proc = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", CHILD, str(path), str(path.parent), str(SCRIPT_DIR)],
+            cwd=cwd,
+            capture_output=True,
+            text=True,
+        )
+        created = sorted(p.relative_to(cwd).as_posix() for p in Path(cwd).rglob("*"))
+
+    if proc.returncode != 0:
+        error = proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else f"exit {proc.returncode}"
+        return {"error": error, "created": created}
+
+    result = json.loads(proc.stdout.strip().splitlines()[-1])
+    result["created"] = created
+
+    if "missing" in result:
+        return result
+
+    rows = import_lines(proc.stderr)
+    local = set(result.pop("local"))
+
+    external = external_imports(rows, local)
+
+    result["own"] = max(0.0, result["seconds"] - sum(seconds for _, seconds in external))
+    result["deferred"] = sorted({name for name, _ in external if name.split(".")[0] in DEFERRED})
+    result["heaviest"] = heaviest_imports(rows, TOP_IMPORTS)
+    return result
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Check NHL script import time and import side effects.")
+    parser.add_argument(
+        "--own",
+        type=float,
+        default=DEFAULT_OWN_SECONDS,
+        help="Seconds a script's own modules may take to import, third-party imports excluded.",
+    )
+    parser.add_argument(
+        "--repeat",
+        type=int,
+        default=DEFAULT_REPEAT,
+        help="Imports per script; the fastest one is compared to the limit.",
+    )
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+    repeat = max(1, args.repeat)
+    failures = 0
+
+    print(f"limit per script: {args.own:.3f}s own import time (best of {repeat})\n")
+
+    for path in script_paths():
+        name = path.relative_to(SCRIPT_DIR).as_posix()
+        runs = [measure(path) for _ in range(repeat)]
+        best = min(runs, key=lambda r: r.get("own", float("inf")))
+
+        if "missing" in best:
+            print(f"SKIP  {name:<48} missing dependency: {best['missing']}")
+            continue
+
+        problems = []
+
+        if "error" in best:
+            problems.append(f"import failed: {best['error']}")
+        else:
+            if best["own"] > args.own:
+                problems.append(f"own {best['own']:.3f}s over limit {args.own:.3f}s")
+            if best["deferred"]:
+                problems.append(f"imports at module level: {', '.join(best['deferred'])}")
+
+        created = sorted({p for r in runs for p in r["created"]})
+        if created:
+            problems.append(f"import created files: {', '.join(created[:5])}")
+
+        if not problems:
+            print(f"OK    {name:<48} own {best['own']:.3f}s | total {best['seconds']:.3f}s")
+            continue
+
+        failures += 1
+        print(f"FAIL  {name:<48} {'; '.join(problems)}")
+        for module, seconds in best.get("heaviest", []):
+            print(f"        {seconds:.3f}s  {module}")
+
+    print(f"\n{failures} script(s) failed the import check.")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
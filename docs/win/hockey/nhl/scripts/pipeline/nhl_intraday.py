@@ -0,0 +1,390 @@
+#!/usr/bin/env python3
+# docs/win/hockey/nhl/scripts/pipeline/nhl_intraday.py
+
+"""
+Intraday re-pricing of one slate for the games whose lines moved.
+
+    python docs/win/hockey/nhl/scripts/pipeline/nhl_intraday.py
+    python docs/win/hockey/nhl/scripts/pipeline/nhl_intraday.py --date 2026_06_11
+    python docs/win/hockey/nhl/scripts/pipeline/nhl_intraday.py --games 70558078,70558079
+
+transform_hockey_odds.py records the game_ids whose sportsbook row it added or
+changed in 00_intake/changed_games.json. For the slate date (today in ET by
+default) this script takes those game_ids, or --games, and runs only their rows
+through the stage code: merge_intake.merged_row, the build_juice_files frames,
+apply_juice of each juice script, compute_edges, compute_ev_kelly and
+hockey_select_bets.slate_picks. Each step reads the slate's input file as the
+full stage does, computes the changed games and patches their rows into the
+slate's output file in place. Rows of other games keep their bytes and their
+position; picks are re-sorted the way hockey_select_bets orders them. The
+slate's portfolio is then re-sized with hockey_portfolio_kelly, which is joint
+over every pick of the slate.
+
+Only games already in the slate's merged file are re-priced. A changed game
+that is new to the slate, or no longer has a games/sportsbook/prediction row,
+changes the merge audit too; it is reported as needing a full pipeline run and
+left alone. Stage functions log to this script's log file while it runs.
+"""
+
+import argparse
+import csv
+import io
+import json
+import sys
+import traceback
+from datetime import datetime, UTC
+from pathlib import Path
+from zoneinfo import ZoneInfo
+
+SCRIPT_DIR = Path(__file__).resolve().parents[1]
+
+sys.path.insert(0, str(SCRIPT_DIR))
+
+from nhl_output import write_text
+from nhl_profile import run_main
+from nhl_validate import report
+
+
+BASE_DIR = Path("docs/win/hockey/nhl")
+
+CHANGES_FILE = BASE_DIR / "00_intake" / "changed_games.json"
+
+ERROR_DIR = BASE_DIR / "errors" / "pipeline"
+LOG_FILE = ERROR_DIR / "nhl_intraday.txt"
+
+ET = ZoneInfo("America/New_York")
+
+MARKETS = ["moneyline", "puck_line", "total"]
+
+STAGE_MODULES = [
+    ("01_merge", "merge_intake"),
+    ("01_merge", "build_juice_files"),
+    ("02_juice", "apply_moneyline_juice"),
+    ("02_juice", "apply_puck_line_juice"),
+    ("02_juice", "apply_total_juice"),
+    ("03_edges", "compute_edges"),
+    ("03_edges", "compute_ev_kelly"),
+    ("04_select", "hockey_select_bets"),
+    ("04_select", "hockey_portfolio_kelly"),
+]
+
+
+# =========================
+# LOGGING
+# =========================
+
+def _now():
+    return datetime.now(UTC).isoformat()
+
+
+def _log(msg: str, level: str = "INFO"):
+    with open(LOG_FILE, "a", encoding="utf-8") as f:
+        f.write(f"{_now()} | {level:<5} | {msg.rstrip()}\n")
+
+
+def load_stages(log_file: Path = LOG_FILE) -> dict:
+    """Import the stage modules, with their logging sent to log_file."""
+    stages = {}
+
+    for folder, name in STAGE_MODULES:
+        sys.path.insert(0, str(SCRIPT_DIR / folder))
+        module = __import__(name)
+        module.LOG_FILE = log_file
+        stages[name] = module
+
+    return stages
+
+
+# =========================
+# CSV PATCHING
+# =========================
+
+def read_rows(path: Path) -> tuple[list[str], list[list[str]], str]:
+    """Header, rows and line terminator of a CSV, every value as written."""
+    text = path.read_bytes().decode("utf-8")
+    rows = list(csv.reader(io.StringIO(text, newline="")))
+    terminator = "\r\n" if "\r\n" in text else "\n"
+
+    if not rows:
+        return [], [], terminator
+
+    return rows[0], rows[1:], terminator
+
+
+def frame_rows(df, header: list[str]) -> list[list[str]]:
+    """df rendered exactly as a stage's write_csv would, as rows under header."""
+    rows = list(csv.reader(io.StringIO(df.to_csv(index=False), newline="")))
+
+    if rows and rows[0] != header:
+        raise ValueError(f"column mismatch: {rows[0]} != {header}")
+
+    return rows[1:]
+
+
+def patch_rows(path: Path, header: list[str], new_rows: list[list[str]], game_ids: set[str], sort_key=None) -> bool:
+    """Replace the rows of game_ids in path with new_rows, in place.
+
+    Without sort_key the new rows of a game take the position of its old ones
+    and games new to the file go last; with it the patched rows are re-sorted.
+    """
+    if path.exists():
+        old_header, old_rows, terminator = read_rows(path)
+        if old_header and old_header != header:
+            raise ValueError(f"{path} header differs from the stage's columns")
+    else:
+        old_rows, terminator = [], "\n"
+
+    gid = header.index("game_id")
+    by_game = {}
+    for row in new_rows:
+        by_game.setdefault(row[gid], []).append(row)
+
+    rows = []
+    for row in old_rows:
+        if row[gid] not in game_ids:
+            rows.append(row)
+        elif row[gid] in by_game:
+            rows.extend(by_game.pop(row[gid]))
+
+    for game_rows in by_game.values():
+        rows.extend(game_rows)
+
+    if sort_key is not None:
+        rows.sort(key=sort_key)
+
+    buffer = io.StringIO(newline="")
+    writer = csv.writer(buffer, lineterminator=terminator)
+    writer.writerow(header)
+    writer.writerows(rows)
+
+    return write_text(path, buffer.getvalue())
+
+
+def patch_frame(path: Path, df, game_ids: set[str], sort_key=None) -> None:
+    header = list(df.columns)
+    changed = patch_rows(path, header, frame_rows(df, header), game_ids, sort_key)
+    _log(f"{'PATCHED' if changed else 'UNCHANGED'}: {path} | games={len(game_ids)} | rows={len(df)}")
+
+
+def only_games(df, game_ids: set[str]):
+    return df[df["game_id"].astype(str).isin(game_ids)].copy()
+
+
+# =========================
+# STAGES
+# =========================
+
+def changed_games(date: str) -> set[str]:
+    if not CHANGES_FILE.exists():
+        return set()
+
+    dates = json.loads(CHANGES_FILE.read_text(encoding="utf-8")).get("dates", {})
+    return {gid for ids in dates.get(date, {}).values() for gid in ids}
+
+
+def source_rows(stages: dict, date: str) -> dict[str, dict]:
+    mi = stages["merge_intake"]
+
+    sources = {
+        "games": [mi.GAMES_DIR / f"{date}_nhl_games.csv"],
+        "sportsbook": [p for p in mi.SPORTSBOOK_DIR.glob("*.csv") if p.name.lower() == f"nhl_{date}.csv"],
+        "predictions": [mi.PREDICTIONS_DIR / f"hockey_{date}.csv"],
+    }
+
+    maps = {}
+
+    for name, paths in sources.items():
+        rows, violations = mi.check_sources(name, [(path, *mi.load_csv(path)) for path in paths if path.exists()])
+
+        if violations:
+            raise ValueError(report(violations))
+
+        maps[name] = mi.rows_by_date_game_id(rows).get(date, {})
+
+    return maps
+
+
+def remerge(stages: dict, date: str, requested: set[str]) -> tuple[Path, set[str], set[str]]:
+    mi = stages["merge_intake"]
+    merged_path = mi.MERGE_DIR / f"{date}_NHL_merged.csv"
+
+    if not merged_path.exists():
+        raise FileNotFoundError(f"No merged slate for {date}: {merged_path}. Run the full pipeline.")
+
+    header, rows, _ = read_rows(merged_path)
+    on_slate = {row[header.index("game_id")] for row in rows}
+    maps = source_rows(stages, date)
+
+    games = {
+        gid for gid in requested
+        if gid in on_slate and all(gid in maps[name] for name in ("games", "sportsbook", "predictions"))
+    }
+    full_run = requested - games
+
+    new_rows = [
+        mi.merged_row(date, gid, maps["games"][gid], maps["sportsbook"][gid], maps["predictions"][gid])
+        for gid in sorted(games)
+    ]
+    changed = patch_rows(merged_path, header, [[r.get(col, "") for col in header] for r in new_rows], games)
+    _log(f"{'PATCHED' if changed else 'UNCHANGED'}: {merged_path} | games={len(games)}")
+
+    return merged_path, games, full_run
+
+
+def rejuice(stages: dict, date: str, merged_path: Path, games: set[str]) -> None:
+    from nhl_schema import EDGES, JUICED, MERGED, MONEYLINE, PUCK_LINE, TOTAL, read_typed_csv
+
+    bjf = stages["build_juice_files"]
+    ce = stages["compute_edges"]
+    ev = stages["compute_ev_kelly"]
+
+    merged = only_games(read_typed_csv(merged_path, MERGED, usecols=True), games)
+
+    pre_juice = {"moneyline": MONEYLINE, "puck_line": PUCK_LINE, "total": TOTAL}
+    frames = {
+        "moneyline": bjf.moneyline_frame,
+        "puck_line": bjf.puck_line_frame,
+        "total": bjf.total_frame,
+    }
+    edge_fns = {
+        "moneyline": ce.compute_moneyline_edges,
+        "puck_line": ce.compute_puck_line_edges,
+        "total": ce.compute_total_edges,
+    }
+    ev_fns = {
+        "moneyline": ev.process_moneyline,
+        "puck_line": ev.process_puck_line,
+        "total": ev.process_total,
+    }
+
+    for market in MARKETS:
+        name = f"{date}_NHL_{market}.csv"
+
+        pre_juice_path = bjf.OUTPUT_DIR / name
+        patch_frame(pre_juice_path, frames[market](merged), games)
+
+        juice = stages[f"apply_{market}_juice"]
+        df = read_typed_csv(pre_juice_path, pre_juice[market], usecols=True)
+        juice.validate_columns(pre_juice_path, df, juice.REQUIRED_INPUT_COLUMNS)
+        juiced, applied, skipped_bad, skipped_noband = juice.apply_juice(only_games(df, games), juice.load_config(), name)
+        _log(f"{name} juice | applied={applied} skipped_bad={skipped_bad} skipped_noband={skipped_noband}")
+        patch_frame(juice.OUTPUT_DIR / name, juiced, games)
+
+        juiced_path = juice.OUTPUT_DIR / name
+        edges, null_edges = edge_fns[market](only_games(read_typed_csv(juiced_path, JUICED[market]), games), juiced_path)
+        patch_frame(ce.OUTPUT_DIR / name, edges, games)
+
+        edges_path = ce.OUTPUT_DIR / name
+        priced, neg_kelly = ev_fns[market](only_games(read_typed_csv(edges_path, EDGES[market]), games), edges_path)
+        patch_frame(ev.OUTPUT_DIR / name, priced, games)
+
+        _log(f"{name} | null_edges={null_edges} | neg_kelly_clipped={neg_kelly}")
+
+
+def reselect(stages: dict, date: str, games: set[str]) -> Path:
+    from market_rules import MARKET_SIDES
+
+    hsb = stages["hockey_select_bets"]
+    config = hsb.load_config()
+
+    frames = []
+    for market in MARKETS:
+        path = hsb.INPUT_DIR / f"{date}_NHL_{market}.csv"
+        df = hsb.read_market_file(path, market)
+
+        if df is not None:
+            hsb.validate_market_columns(df, market, path)
+            df = only_games(df, games)
+
+        frames.append(df)
+
+    picks = hsb.slate_picks(*frames, config, date)
+
+    header = hsb.OUTPUT_COLUMNS
+    gid, market_col, side_col = (header.index(c) for c in ("game_id", "market_type", "bet_side"))
+
+    def pick_order(row):
+        market = row[market_col]
+        return row[gid], MARKETS.index(market), MARKET_SIDES[market].index(row[side_col])
+
+    out_path = hsb.OUTPUT_DIR / f"{date}_NHL.csv"
+    hsb.assert_write_path(out_path)
+
+    changed = patch_rows(out_path, header, frame_rows(picks, header), games, sort_key=pick_order)
+    _log(f"{'PATCHED' if changed else 'UNCHANGED'}: {out_path} | games={len(games)} | picks for games={len(picks)}")
+
+    return out_path
+
+
+def resize(stages: dict, select_path: Path) -> None:
+    hpk = stages["hockey_portfolio_kelly"]
+
+    summary = {
+        "slates_processed": 0,
+        "bets_sized": 0,
+        "converged": 0,
+        "budget_hit": 0,
+        "no_projection": 0,
+        "errors": 0,
+    }
+
+    hpk.OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+    hpk.process_slate(select_path, summary)
+
+
+# =========================
+# MAIN
+# =========================
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Re-price today's NHL slate for the games whose lines moved.")
+    parser.add_argument("--date", default=None, help="slate date YYYY_MM_DD (default: today in ET)")
+    parser.add_argument("--games", default=None, help=f"comma-separated game_ids (default: from {CHANGES_FILE.name})")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+
+    ERROR_DIR.mkdir(parents=True, exist_ok=True)
+    with open(LOG_FILE, "w", encoding="utf-8") as f:
+        f.write(f"=== nhl_intraday RUN {_now()} ===\n")
+
+    date = args.date or datetime.now(ET).strftime("%Y_%m_%d")
+
+    if args.games:
+        requested = {gid.strip() for gid in args.games.split(",") if gid.strip()}
+    else:
+        requested = changed_games(date)
+
+    _log(f"SLATE: {date} | changed games: {sorted(requested)}")
+
+    if not requested:
+        _log("No changed games for the slate; nothing to re-price.")
+        print(f"nhl_intraday: no changed games for {date}.")
+        return
+
+    try:
+        stages = load_stages()
+
+        merged_path, games, full_run = remerge(stages, date, requested)
+
+        for gid in sorted(full_run):
+            _log(f"game_id={gid} is new to the slate or lost a source row; run the full pipeline", "WARN")
+
+        if games:
+            rejuice(stages, date, merged_path, games)
+            select_path = reselect(stages, date, games)
+            resize(stages, select_path)
+
+    except Exception as e:
+        _log(f"FATAL: {e}\n{traceback.format_exc()}", "ERROR")
+        _log("STATUS: FAILED")
+        raise
+
+    _log(f"STATUS: SUCCESS | re-priced={len(games)} | full run needed={len(full_run)}")
+    print(f"nhl_intraday: re-priced {len(games)} game(s) for {date}; {len(full_run)} need a full run.")
+
+
+if __name__ == "__main__":
+    run_main(main, LOG_FILE)
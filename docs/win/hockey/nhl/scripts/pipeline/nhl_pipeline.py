@@ -0,0 +1,806 @@
+#!/usr/bin/env python3
+# docs/win/hockey/nhl/scripts/pipeline/nhl_pipeline.py
+
+"""
+Declarative stage graph for the NHL scripts and a parallel scheduler over it.
+
+    python docs/win/hockey/nhl/scripts/pipeline/nhl_pipeline.py run pipeline
+    python docs/win/hockey/nhl/scripts/pipeline/nhl_pipeline.py run intake odds --jobs 4
+    python docs/win/hockey/nhl/scripts/pipeline/nhl_pipeline.py run apply_total_juice --upstream
+    python docs/win/hockey/nhl/scripts/pipeline/nhl_pipeline.py graph pipeline
+    python docs/win/hockey/nhl/scripts/pipeline/nhl_pipeline.py watch --debounce 2
+
+Every stage script is a node with the resources it reads and writes. Resources
+are paths under docs/win/hockey/nhl, where a last segment that is not a real
+directory names the subset of files a stage owns there ("01_merge/merged" is
+01_merge/*.csv, "02_juice/moneyline" is the moneyline files). Two resources
+overlap when they are equal or one is a parent of the other, so "02_juice"
+covers "02_juice/moneyline".
+
+A node depends on every earlier node in STAGES that writes something it reads
+or writes, or reads something it writes. STAGES order is therefore the
+tie-breaker for in-place rewriters such as the name normalization scripts.
+
+run starts each ready node as its own python process, up to --jobs at a time.
+A node's stdout and stderr are captured and printed as one block when it
+finishes, so parallel stages do not interleave in the CI log. On the first
+failure no new node is started and running nodes are terminated; a node that
+fails on its own meanwhile is reported too. Each failure report names the
+failed node, the chain of stages that led to it and its stderr tail. The run
+ends with every failed node, the stages that were skipped and the critical
+path: the longest chain of measured step times, which bounds the wall time of
+the run.
+
+watch polls the intake folders (games, sportsbook, predictions), config/juice
+and config/markets.yaml, and once a change has been quiet for --debounce
+seconds it recomputes what depends on it. A dated intake file whose rows only
+changed in place re-prices those games of that date with nhl_intraday. An added,
+removed or deleted game, or a games file change, re-runs build_games and the
+"pipeline" stages that read the changed resource and every one of those
+downstream of them, passing the changed dates as --date so only those slates
+are rebuilt. A config change, or any other undated change, re-runs them over
+every date. Stage failures are logged and the watch keeps going.
+"""
+
+import argparse
+import csv
+import os
+import re
+import subprocess
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, wait
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field, replace
+from datetime import datetime, UTC
+from pathlib import Path
+
+
+BASE_DIR = Path("docs/win/hockey/nhl")
+SCRIPT_DIR = BASE_DIR / "scripts"
+
+ERROR_DIR = BASE_DIR / "errors" / "pipeline"
+LOG_FILE = ERROR_DIR / "nhl_pipeline.txt"
+
+STDERR_TAIL_LINES = 20
+
+# (folder, pattern, resource) polled by watch, relative to BASE_DIR.
+WATCHED = [
+    ("00_intake/games", "*_nhl_games.csv", "00_intake/games"),
+    ("00_intake/sportsbook", "*.csv", "00_intake/sportsbook"),
+    ("00_intake/predictions", "hockey_*.csv", "00_intake/predictions/hockey"),
+    ("config/juice", "*.csv", "config/juice/{name}"),
+    ("config", "markets.yaml", "config/markets.yaml"),
+]
+
+# Dated intake resources whose in-place row changes nhl_intraday can re-price.
+INTRADAY_RESOURCES = {"00_intake/sportsbook", "00_intake/predictions/hockey"}
+
+DATE_RE = re.compile(r"\d{4}_\d{2}_\d{2}")
+
+
+@dataclass(frozen=True)
+class Stage:
+    name: str
+    script: str
+    group: str
+    reads: tuple[str, ...] = ()
+    writes: tuple[str, ...] = ()
+    args: tuple[str, ...] = ()
+    log: str | None = None
+    # Takes --date YYYY_MM_DD (repeatable) to limit the run to those slates.
+    dated: bool = False
+
+
+# Listed in the order the workflows run them.
+STAGES = [
+    # odds_nhl.yml
+    Stage(
+        "nhl_odds_pull",
+        "00_intake/nhl_odds_pull.py",
+        "odds",
+        writes=("odds",),
+    ),
+    Stage(
+        "transform_hockey_odds",
+        "00_intake/transform_hockey_odds.py",
+        "odds",
+        reads=("odds",),
+        writes=("00_intake/sportsbook", "00_intake/changed_games.json"),
+        log="errors/00_intake/transform_hockey_odds.txt",
+    ),
+    Stage(
+        "odds_name_normalization",
+        "00_intake/odds_name_normalization.py",
+        "odds",
+        reads=("config/mapping/team_map_nhl.csv",),
+        writes=("00_intake/sportsbook", "config/mapping/no_map_nhl_odds.csv"),
+        log="errors/00_intake/odds_name_normalization.txt",
+    ),
+    # sdv_nhl.yml
+    Stage(
+        "pull_sdv",
+        "00_intake/pull_sdv.py",
+        "sdv",
+        writes=("sdv",),
+    ),
+    # intake_nhl.yml
+    Stage(
+        "build_games",
+        "00_intake/build_games.py",
+        "intake",
+        reads=("00_intake/sportsbook",),
+        writes=("00_intake/games",),
+        log="errors/00_intake/build_games.txt",
+        dated=True,
+    ),
+    Stage(
+        "hockey_drat_scraper",
+        "00_intake/hockey_drat_scraper.py",
+        "intake",
+        writes=("00_intake/drat_raw", "00_intake/predictions/scraper"),
+        log="errors/00_intake/hockey_drat_scraper.txt",
+    ),
+    Stage(
+        "transform_hockey",
+        "00_intake/transform_hockey.py",
+        "intake",
+        reads=(
+            "00_intake/predictions/scraper",
+            "00_intake/sportsbook",
+            "config/mapping/team_map_nhl.csv",
+        ),
+        writes=("00_intake/predictions/hockey", "config/mapping/no_map_nhl_pred.csv"),
+        log="errors/00_intake/transform_hockey.txt",
+    ),
+    Stage(
+        "pred_name_normalization",
+        "00_intake/pred_name_normalization.py",
+        "intake",
+        reads=("config/mapping/team_map_nhl.csv",),
+        writes=("00_intake/predictions/hockey", "config/mapping/no_map_nhl_pred.csv"),
+        log="errors/00_intake/pred_name_normalization.txt",
+    ),
+    # pipeline_nhl.yml
+    Stage(
+        "merge_intake",
+        "01_merge/merge_intake.py",
+        "pipeline",
+        reads=("00_intake/games", "00_intake/sportsbook", "00_intake/predictions/hockey"),
+        writes=("01_merge/merged", "01_merge/audit"),
+        log="errors/01_merge/merge_intake.txt",
+        dated=True,
+    ),
+    Stage(
+        "build_juice_files",
+        "01_merge/build_juice_files.py",
+        "pipeline",
+        reads=("01_merge/merged",),
+        writes=("01_merge/01_merguiced",),
+        log="errors/01_merge/build_juice_files.txt",
+        dated=True,
+    ),
+    Stage(
+        "apply_moneyline_juice",
+        "02_juice/apply_moneyline_juice.py",
+        "pipeline",
+        reads=("01_merge/01_merguiced", "config/juice/nhl_moneyline_juice.csv"),
+        writes=("02_juice/moneyline",),
+        log="errors/02_juice/apply_moneyline_juice.txt",
+        dated=True,
+    ),
+    Stage(
+        "apply_puck_line_juice",
+        "02_juice/apply_puck_line_juice.py",
+        "pipeline",
+        reads=("01_merge/01_merguiced", "config/juice/nhl_puck_line_juice.csv"),
+        writes=("02_juice/puck_line",),
+        log="errors/02_juice/apply_puck_line_juice.txt",
+        dated=True,
+    ),
+    Stage(
+        "apply_total_juice",
+        "02_juice/apply_total_juice.py",
+        "pipeline",
+        reads=("01_merge/01_merguiced", "config/juice/nhl_total_juice.csv"),
+        writes=("02_juice/total",),
+        log="errors/02_juice/apply_total_juice.txt",
+        dated=True,
+    ),
+    Stage(
+        "compute_edges",
+        "03_edges/compute_edges.py",
+        "pipeline",
+        reads=("02_juice",),
+        writes=("03_edges/edges",),
+        log="errors/03_edges/compute_edges.txt",
+        dated=True,
+    ),
+    Stage(
+        "compute_ev_kelly",
+        "03_edges/compute_ev_kelly.py",
+        "pipeline",
+        reads=("03_edges/edges",),
+        writes=("03_edges/ev_kelly",),
+        log="errors/03_edges/compute_ev_kelly.txt",
+        dated=True,
+    ),
+    Stage(
+        "hockey_select_bets",
+        "04_select/hockey_select_bets.py",
+        "pipeline",
+        reads=("03_edges/ev_kelly", "config/markets.yaml"),
+        writes=("04_select/picks", "04_select/.rules_cache"),
+        log="errors/04_select/hockey_select_bets.txt",
+        dated=True,
+    ),
+    Stage(
+        "hockey_portfolio_kelly",
+        "04_select/hockey_portfolio_kelly.py",
+        "pipeline",
+        reads=("04_select/picks", "01_merge/merged"),
+        writes=("04_select/portfolio",),
+        log="errors/04_select/hockey_portfolio_kelly.txt",
+        dated=True,
+    ),
+    # intraday_nhl.yml: patches today's slate for the games whose lines moved
+    Stage(
+        "nhl_intraday",
+        "pipeline/nhl_intraday.py",
+        "intraday",
+        reads=(
+            "00_intake/changed_games.json",
+            "00_intake/games",
+            "00_intake/sportsbook",
+            "00_intake/predictions/hockey",
+            "config/juice",
+            "config/markets.yaml",
+        ),
+        writes=(
+            "01_merge/merged",
+            "01_merge/01_merguiced",
+            "02_juice",
+            "03_edges/edges",
+            "03_edges/ev_kelly",
+            "04_select/picks",
+            "04_select/.rules_cache",
+            "04_select/portfolio",
+        ),
+        log="errors/pipeline/nhl_intraday.txt",
+    ),
+    # final_scores_nhl.yml
+    Stage(
+        "transform_final_scores",
+        "05_final_scores/transform_final_scores.py",
+        "final_scores",
+        reads=("00_intake/drat_raw", "00_intake/games"),
+        writes=("05_final_scores/final_scores", "05_final_scores/intermediate/final_scores_store"),
+        log="errors/05_final_scores/transform_final_scores.txt",
+    ),
+    Stage(
+        "nhl_results_grade",
+        "05_final_scores/01_nhl_results_grade.py",
+        "final_scores",
+        reads=("04_select/picks", "05_final_scores/final_scores"),
+        writes=("05_final_scores/graded", "05_final_scores/intermediate/grade"),
+        log="05_final_scores/errors/01_nhl_results_grade_errors.txt",
+    ),
+    Stage(
+        "nhl_results_analyze",
+        "05_final_scores/02_nhl_results_analyze.py",
+        "final_scores",
+        reads=("05_final_scores/graded", "05_final_scores/intermediate/grade"),
+        writes=("05_final_scores/intermediate/work_nhl.csv", "05_final_scores/intermediate/work_nhl_manifest.json"),
+        log="05_final_scores/errors/02_nhl_results_analyze_errors.txt",
+    ),
+    Stage(
+        "nhl_results_reports",
+        "05_final_scores/03_nhl_results_reports.py",
+        "final_scores",
+        reads=("05_final_scores/intermediate/work_nhl.csv", "05_final_scores/intermediate/work_nhl_manifest.json"),
+        writes=(
+            "05_final_scores/reports",
+            "05_final_scores/intermediate/report_store",
+            "05_final_scores/nhl_market_tally.csv",
+        ),
+        log="05_final_scores/errors/03_nhl_results_reports_errors.txt",
+    ),
+    Stage(
+        "nhl_results_calibration",
+        "05_final_scores/04_nhl_results_calibration.py",
+        "final_scores",
+        reads=("05_final_scores/graded", "03_edges/ev_kelly"),
+        writes=("05_final_scores/reports/calibration",),
+        log="05_final_scores/errors/04_nhl_results_calibration_errors.txt",
+    ),
+]
+
+STAGE_BY_NAME = {stage.name: stage for stage in STAGES}
+GROUPS = sorted({stage.group for stage in STAGES})
+
+# What watch re-runs: build_games, which turns sportsbook files into the games
+# files merge_intake reads, and the pipeline group.
+WATCH_STAGES = [s for s in STAGES if s.name == "build_games" or s.group == "pipeline"]
+
+
+# =========================
+# LOGGING
+# =========================
+
+def _now():
+    return datetime.now(UTC).isoformat()
+
+
+def _log(msg: str, level: str = "INFO"):
+    line = f"{_now()} | {level:<5} | {msg.rstrip()}"
+    print(line, flush=True)
+    with open(LOG_FILE, "a", encoding="utf-8") as f:
+        f.write(line + "\n")
+
+
+# =========================
+# GRAPH
+# =========================
+
+def overlaps(a: str, b: str) -> bool:
+    return a == b or a.startswith(b + "/") or b.startswith(a + "/")
+
+
+def any_overlap(left: tuple[str, ...], right: tuple[str, ...]) -> bool:
+    return any(overlaps(a, b) for a in left for b in right)
+
+
+def build_graph(stages: list[Stage]) -> dict[str, list[str]]:
+    """name -> direct dependencies among stages, from read/write hazards in list order."""
+    deps = {}
+
+    for i, stage in enumerate(stages):
+        deps[stage.name] = [
+            earlier.name
+            for earlier in stages[:i]
+            if any_overlap(earlier.writes, stage.reads + stage.writes)
+            or any_overlap(earlier.reads, stage.writes)
+        ]
+
+    return deps
+
+
+def ancestors(name: str, deps: dict[str, list[str]]) -> set[str]:
+    seen = set()
+    stack = list(deps[name])
+
+    while stack:
+        node = stack.pop()
+        if node not in seen:
+            seen.add(node)
+            stack.extend(deps[node])
+
+    return seen
+
+
+def select_stages(targets: list[str], upstream: bool) -> list[Stage]:
+    names = set()
+
+    for target in targets:
+        if target in GROUPS:
+            names.update(s.name for s in STAGES if s.group == target)
+        elif target in STAGE_BY_NAME:
+            names.add(target)
+        else:
+            raise SystemExit(f"Unknown stage or group: {target} (groups: {', '.join(GROUPS)})")
+
+    if upstream:
+        full = build_graph(STAGES)
+        for name in list(names):
+            names.update(ancestors(name, full))
+
+    return [s for s in STAGES if s.name in names]
+
+
+def longest_chain(deps: dict[str, list[str]], weight: dict[str, float]) -> tuple[float, list[str]]:
+    """Heaviest dependency chain; deps must list nodes in topological order."""
+    best: dict[str, tuple[float, list[str]]] = {}
+
+    for name in deps:
+        prior = max(
+            (best[d] for d in deps[name] if d in best),
+            key=lambda item: item[0],
+            default=(0.0, []),
+        )
+        best[name] = (prior[0] + weight.get(name, 0.0), prior[1] + [name])
+
+    return max(best.values(), key=lambda item: item[0], default=(0.0, []))
+
+
+def levels(deps: dict[str, list[str]]) -> list[list[str]]:
+    depth = {}
+    for name in deps:
+        depth[name] = 1 + max((depth[d] for d in deps[name]), default=-1)
+
+    out = [[] for _ in range(max(depth.values(), default=-1) + 1)]
+    for name, d in depth.items():
+        out[d].append(name)
+    return out
+
+
+# =========================
+# RUN
+# =========================
+
+@dataclass
+class Result:
+    name: str
+    status: str = "pending"
+    returncode: int | None = None
+    seconds: float = 0.0
+    stdout: str = ""
+    stderr: str = ""
+    process: subprocess.Popen | None = field(default=None, repr=False)
+
+
+def run_stage(stage: Stage, result: Result, extra_env: dict) -> Result:
+    cmd = [sys.executable, str(SCRIPT_DIR / stage.script), *stage.args]
+    start = time.perf_counter()
+
+    result.process = subprocess.Popen(
+        cmd,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True,
+        env=os.environ | extra_env,
+    )
+    stdout, stderr = result.process.communicate()
+
+    result.seconds = time.perf_counter() - start
+    result.returncode = result.process.returncode
+    result.stdout = stdout or ""
+    result.stderr = stderr or ""
+    # Cancelled only if terminate() is what ended it; a stage that exited on
+    # its own first keeps its own status.
+    if result.status != "cancelled" or result.returncode >= 0:
+        result.status = "ok" if result.returncode == 0 else "failed"
+    return result
+
+
+def print_output(result: Result) -> None:
+    """The stage's captured stdout and stderr, as one block on our stdout."""
+    for stream, text in (("stdout", result.stdout), ("stderr", result.stderr)):
+        if text.strip():
+            print(f"----- {result.name} {stream} -----", flush=True)
+            print(text.rstrip(), flush=True)
+
+
+def ancestry_chain(name: str, deps: dict[str, list[str]], results: dict[str, Result]) -> list[str]:
+    """The slowest chain of finished stages that led to name, root first."""
+    keep = ancestors(name, deps) | {name}
+    sub = {n: [d for d in deps[n] if d in keep] for n in deps if n in keep}
+    return longest_chain(sub, {n: results[n].seconds for n in sub})[1]
+
+
+def report_failure(failed: Result, deps: dict[str, list[str]], results: dict[str, Result]) -> None:
+    stage = STAGE_BY_NAME[failed.name]
+    chain = ancestry_chain(failed.name, deps, results)
+
+    _log(f"FAILED: {failed.name} (exit {failed.returncode}, {failed.seconds:.2f}s)", "ERROR")
+    _log(f"  ancestry : {' -> '.join(chain)}", "ERROR")
+    _log(f"  script   : {SCRIPT_DIR / stage.script}", "ERROR")
+    if stage.log:
+        _log(f"  stage log: {BASE_DIR / stage.log}", "ERROR")
+
+    tail = failed.stderr.strip().splitlines()[-STDERR_TAIL_LINES:]
+    for line in tail:
+        _log(f"  | {line}", "ERROR")
+
+
+def run(stages: list[Stage], jobs: int, extra_env: dict) -> int:
+    deps = build_graph(stages)
+    results = {s.name: Result(s.name) for s in stages}
+    remaining = {s.name: set(deps[s.name]) for s in stages}
+    failed = []
+
+    wall_start = time.perf_counter()
+
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        running = {}
+
+        while True:
+            if not failed:
+                for stage in stages:
+                    r = results[stage.name]
+                    if r.status == "pending" and not remaining[stage.name] and len(running) < jobs:
+                        r.status = "running"
+                        _log(f"START {stage.name}")
+                        running[pool.submit(run_stage, stage, r, extra_env)] = stage.name
+
+            if not running:
+                break
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+
+            for future in done:
+                name = running.pop(future)
+                r = future.result()
+                print_output(r)
+
+                if r.status == "ok":
+                    _log(f"DONE  {name} ({r.seconds:.2f}s)")
+                    for deps_left in remaining.values():
+                        deps_left.discard(name)
+
+                elif r.status == "failed":
+                    failed.append(r)
+                    report_failure(r, deps, results)
+
+                    # Stages that already exited keep their own status.
+                    for other in running.values():
+                        proc = results[other].process
+                        if proc is not None and proc.poll() is None:
+                            results[other].status = "cancelled"
+                            proc.terminate()
+
+                elif r.status == "cancelled":
+                    _log(f"CANCELLED {name} after {r.seconds:.2f}s", "WARN")
+
+    wall = time.perf_counter() - wall_start
+
+    if failed:
+        _log(f"FAILED: {', '.join(r.name for r in failed)}", "ERROR")
+
+    skipped = [name for name, r in results.items() if r.status == "pending"]
+    if skipped:
+        _log(f"SKIPPED: {', '.join(skipped)}", "WARN")
+
+    finished = {n: r.seconds for n, r in results.items() if r.status in ("ok", "failed")}
+    length, path = longest_chain({n: d for n, d in deps.items() if n in finished}, finished)
+
+    _log("CRITICAL PATH: " + " -> ".join(f"{n} ({finished[n]:.2f}s)" for n in path))
+    _log(
+        f"wall {wall:.2f}s | critical path {length:.2f}s | "
+        f"sum of steps {sum(finished.values()):.2f}s | jobs {jobs}"
+    )
+    _log(f"STATUS: {'FAILED' if failed else 'SUCCESS'}")
+
+    return 1 if failed else 0
+
+
+
+# =========================
+# WATCH
+# =========================
+
+def watched_files() -> dict[Path, tuple[str, tuple[int, int]]]:
+    """path -> (resource, (mtime_ns, size)) for every watched input file."""
+    files = {}
+
+    for folder, pattern, resource in WATCHED:
+        for path in (BASE_DIR / folder).glob(pattern):
+            if resource == "00_intake/sportsbook" and not path.name.lower().startswith("nhl_"):
+                continue
+            try:
+                st = path.stat()
+            except FileNotFoundError:
+                continue
+            if path.is_file():
+                files[path] = (resource.format(name=path.name), (st.st_mtime_ns, st.st_size))
+
+    return files
+
+
+def game_rows(path: Path) -> dict[str, tuple]:
+    if not path.exists():
+        return {}
+
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        return {
+            str(row.get("game_id", "")).strip(): tuple(sorted(row.items()))
+            for row in csv.DictReader(f)
+        }
+
+
+def downstream(resources: set[str]) -> list[Stage]:
+    """WATCH_STAGES reading any of resources, plus the WATCH_STAGES after them."""
+    deps = build_graph(WATCH_STAGES)
+
+    names = {s.name for s in WATCH_STAGES if any_overlap(s.reads, tuple(resources))}
+    names |= {n for n in deps if ancestors(n, deps) & names}
+
+    return [s for s in WATCH_STAGES if s.name in names]
+
+
+def for_dates(stage: Stage, dates: set[str] | None) -> Stage:
+    """stage limited to dates with --date, if it takes it; None means every date."""
+    if dates is None or not stage.dated:
+        return stage
+
+    return replace(stage, args=stage.args + tuple(arg for date in sorted(dates) for arg in ("--date", date)))
+
+
+def plan(
+    changed: dict[Path, str],
+    rows: dict[Path, dict],
+) -> tuple[dict[str, set[str]], set[str], set[str] | None]:
+    """({date: game_ids} for nhl_intraday, resources needing a downstream run,
+    the dates that run must cover or None for every date)."""
+    intraday = {}
+    rerun = set()
+    dates = set()
+    undated = False
+
+    for path, resource in changed.items():
+        match = DATE_RE.search(path.name)
+        date = match.group(0) if match else None
+
+        if resource not in INTRADAY_RESOURCES or date is None:
+            rerun.add(resource)
+            if date is None:
+                undated = True
+            else:
+                dates.add(date)
+            continue
+
+        old = rows.get(path, {})
+        new = rows[path] = game_rows(path)
+
+        if old.keys() != new.keys():
+            rerun.add(resource)
+            dates.add(date)
+            continue
+
+        moved = {gid for gid in new if new[gid] != old[gid]}
+        if moved:
+            intraday.setdefault(date, set()).update(moved)
+
+    return intraday, rerun, None if undated else dates
+
+
+def dispatch(changed: dict[Path, str], rows: dict[Path, dict], jobs: int, extra_env: dict) -> None:
+    for path, resource in sorted(changed.items()):
+        _log(f"CHANGED {resource}: {path.name}")
+
+    intraday, rerun, dates = plan(changed, rows)
+    stages = [for_dates(s, dates) for s in downstream(rerun)]
+
+    # A run from merge_intake down re-prices its dates anyway.
+    covered = "merge_intake" in {s.name for s in stages}
+
+    for date, games in sorted(intraday.items()):
+        if covered and (dates is None or date in dates):
+            continue
+
+        _log(f"INTRADAY {date}: {len(games)} game(s)")
+        stage = replace(STAGE_BY_NAME["nhl_intraday"], args=("--date", date, "--games", ",".join(sorted(games))))
+        run([stage], 1, extra_env)
+
+    if stages:
+        scope = "every date" if dates is None else ", ".join(sorted(dates))
+        _log(f"RERUN for {', '.join(sorted(rerun))} ({scope}): {', '.join(s.name for s in stages)}")
+        run(stages, jobs, extra_env)
+
+
+def watch(interval: float, debounce: float, jobs: int, extra_env: dict) -> int:
+    seen = watched_files()
+    rows = {
+        path: game_rows(path)
+        for path, (resource, _) in seen.items()
+        if resource in INTRADAY_RESOURCES
+    }
+
+    _log(f"WATCH {len(seen)} files | interval {interval}s | debounce {debounce}s")
+
+    pending: dict[Path, str] = {}
+    last_change = 0.0
+
+    try:
+        while True:
+            time.sleep(interval)
+            current = watched_files()
+
+            for path in seen.keys() | current.keys():
+                if seen.get(path) != current.get(path):
+                    pending[path] = (current.get(path) or seen[path])[0]
+                    last_change = time.monotonic()
+
+            seen = current
+
+            if pending and time.monotonic() - last_change >= debounce:
+                batch, pending = pending, {}
+                dispatch(batch, rows, jobs, extra_env)
+
+    except KeyboardInterrupt:
+        _log("WATCH stopped")
+        return 0
+
+# =========================
+# MAIN
+# =========================
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Run NHL stages as a dependency graph.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    for command in ("run", "graph"):
+        p = sub.add_parser(command)
+        p.add_argument(
+            "targets",
+            nargs="*",
+            default=["pipeline"],
+            help=f"Stage names or groups ({', '.join(GROUPS)}). Default: pipeline.",
+        )
+        p.add_argument(
+            "--upstream",
+            action="store_true",
+            help="Also run every stage the targets depend on.",
+        )
+
+    watch_parser = sub.add_parser("watch")
+    watch_parser.add_argument(
+        "--interval",
+        type=float,
+        default=1.0,
+        help="Seconds between polls of the watched inputs.",
+    )
+    watch_parser.add_argument(
+        "--debounce",
+        type=float,
+        default=2.0,
+        help="Seconds the inputs must stay unchanged before recomputing.",
+    )
+
+    run_parser = sub.choices["run"]
+    for p in (run_parser, watch_parser):
+        p.add_argument(
+            "--jobs",
+            type=int,
+            default=os.cpu_count() or 1,
+            help="Maximum stages running at once.",
+        )
+        p.add_argument(
+            "--env",
+            action="append",
+            default=[],
+            metavar="KEY=VALUE",
+            help="Extra environment variable passed to every stage. Repeatable.",
+        )
+
+    return parser.parse_args()
+
+
+def print_graph(stages: list[Stage]) -> None:
+    deps = build_graph(stages)
+
+    for i, names in enumerate(levels(deps)):
+        print(f"level {i}:")
+        for name in names:
+            after = f"  <- {', '.join(deps[name])}" if deps[name] else ""
+            print(f"  {name}{after}")
+
+
+def main() -> int:
+    args = parse_args()
+
+    if args.command == "watch":
+        ERROR_DIR.mkdir(parents=True, exist_ok=True)
+        with open(LOG_FILE, "w", encoding="utf-8") as f:
+            f.write(f"=== nhl_pipeline WATCH {_now()} ===\n")
+
+        extra_env = dict(item.split("=", 1) for item in args.env)
+        return watch(args.interval, args.debounce, max(1, args.jobs), extra_env)
+
+    stages = select_stages(args.targets, args.upstream)
+
+    if args.command == "graph":
+        print_graph(stages)
+        return 0
+
+    ERROR_DIR.mkdir(parents=True, exist_ok=True)
+    with open(LOG_FILE, "w", encoding="utf-8") as f:
+        f.write(f"=== nhl_pipeline RUN {_now()} ===\n")
+
+    extra_env = dict(item.split("=", 1) for item in args.env)
+
+    _log(f"targets: {' '.join(args.targets)} | stages: {len(stages)} | jobs: {args.jobs}")
+    return run(stages, max(1, args.jobs), extra_env)
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,342 @@
+#!/usr/bin/env python3
+# docs/win/hockey/nhl/scripts/pipeline/nhl_replay.py
+
+"""
+Point-in-time replay of the pricing and selection stages over a date range.
+
+    python docs/win/hockey/nhl/scripts/pipeline/nhl_replay.py --start 2026_01_01 --end 2026_01_31
+    python docs/win/hockey/nhl/scripts/pipeline/nhl_replay.py --start 2026_01_15 --end 2026_01_15 --cutoff 18:00
+    python docs/win/hockey/nhl/scripts/pipeline/nhl_replay.py --start 2025_10_07 --end 2026_06_14 \
+        --markets /tmp/markets_wide.yaml --out /tmp/replay_wide --workers 8
+
+For every date with a predictions file in [start, end], the games, sportsbook
+and predictions files of that date are merged with merge_intake.merged_row and
+run through build_juice_files, the three juice scripts, compute_edges,
+compute_ev_kelly and hockey_select_bets.slate_picks. Each step writes the file
+the production stage would write, under the same relative path below --out,
+and the next step reads it back the way the stage does, so a replay of current
+inputs with current config gives the production files.
+
+Without --cutoff the intake files are read as they are now (live or from the
+monthly archives). With --cutoff HH:MM each file is read from the last git
+commit at or before that time (ET) on its slate date: the sportsbook snapshot,
+predictions and games that existed before puck drop. Juice config and
+markets.yaml are the current ones unless --juice-dir / --markets point
+elsewhere, which is how a config change is backtested.
+
+Dates run in parallel with --workers. Nothing under the production stage
+folders is written; --out/replay_summary.csv lists each date's status and pick
+counts, and the stage logs go to errors/pipeline/nhl_replay.txt. The exit status
+is 1 when any date ended in error, after every date has been replayed.
+"""
+
+import argparse
+import csv
+import io
+import subprocess
+import sys
+import traceback
+from dataclasses import dataclass
+from datetime import datetime, UTC
+from functools import partial
+from pathlib import Path
+from zoneinfo import ZoneInfo
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from nhl_archive import dataset_files, find_file
+from nhl_intraday import MARKETS, load_stages
+from nhl_output import write_csv, write_rows_csv
+from nhl_parallel import add_workers_argument, log_line, map_slates
+from nhl_profile import run_main
+from nhl_validate import report
+
+
+BASE_DIR = Path("docs/win/hockey/nhl")
+
+GAMES_DIR = BASE_DIR / "00_intake" / "games"
+SPORTSBOOK_DIR = BASE_DIR / "00_intake" / "sportsbook"
+PREDICTIONS_DIR = BASE_DIR / "00_intake" / "predictions"
+
+JUICE_DIR = BASE_DIR / "config" / "juice"
+MARKETS_PATH = BASE_DIR / "config" / "markets.yaml"
+
+DEFAULT_OUT = BASE_DIR / "replay"
+
+ERROR_DIR = BASE_DIR / "errors" / "pipeline"
+LOG_FILE = ERROR_DIR / "nhl_replay.txt"
+
+# Production folders a replay must never write into.
+PRODUCTION_DIRS = ["00_intake", "01_merge", "02_juice", "03_edges", "04_select", "05_final_scores", "config"]
+
+ET = ZoneInfo("America/New_York")
+
+SUMMARY_COLUMNS = ["game_date", "status", "games", "merged", "moneyline", "puck_line", "total", "picks", "note"]
+
+_stages: dict = {}
+
+
+@dataclass(frozen=True)
+class Replay:
+    out: Path
+    cutoff: str | None
+    juice: dict
+    rules: object
+
+
+# =========================
+# LOGGING
+# =========================
+
+def _now():
+    return datetime.now(UTC).isoformat()
+
+
+def _log(msg: str, level: str = "INFO"):
+    log_line(LOG_FILE, f"{_now()} | {level:<5} | {msg.rstrip()}\n")
+
+
+def stages() -> dict:
+    """Stage modules of this process, imported once and logging to LOG_FILE."""
+    if not _stages:
+        _stages.update(load_stages(LOG_FILE))
+    return _stages
+
+
+# =========================
+# POINT-IN-TIME SOURCES
+# =========================
+
+def git_text(path: Path, before: str) -> str | None:
+    """path as committed at or before the ISO time before, or None."""
+    rev = subprocess.run(
+        ["git", "log", "-1", "--format=%H", f"--before={before}", "--", path.as_posix()],
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout.strip()
+
+    if not rev:
+        return None
+
+    shown = subprocess.run(
+        ["git", "show", f"{rev}:{path.as_posix()}"],
+        capture_output=True,
+        check=True,
+    )
+    return shown.stdout.decode("utf-8-sig")
+
+
+def source_text(path: Path, date: str, cutoff: str | None) -> str | None:
+    """path as it is now, or as committed by cutoff (HH:MM ET) on date."""
+    if cutoff is None:
+        entry = find_file(path)
+        return None if entry is None else entry.read_bytes().decode("utf-8-sig")
+
+    moment = datetime.strptime(f"{date} {cutoff}", "%Y_%m_%d %H:%M").replace(tzinfo=ET)
+    return git_text(path, moment.isoformat())
+
+
+def load_sources(mi, date: str, cutoff: str | None) -> dict[str, dict[str, dict]]:
+    sources = {
+        "games": [GAMES_DIR / f"{date}_nhl_games.csv"],
+        "sportsbook": [SPORTSBOOK_DIR / f"NHL_{date}.csv", SPORTSBOOK_DIR / f"nhl_{date}.csv"],
+        "predictions": [PREDICTIONS_DIR / f"hockey_{date}.csv"],
+    }
+
+    maps = {}
+
+    for name, paths in sources.items():
+        files = []
+
+        for path in paths:
+            text = source_text(path, date, cutoff)
+            if text is None:
+                continue
+
+            reader = csv.DictReader(io.StringIO(text, newline=""))
+            files.append((path, reader.fieldnames or [], list(reader)))
+
+        if not files:
+            raise FileNotFoundError(f"no {name} file for {date}" + (f" by {cutoff} ET" if cutoff else ""))
+
+        rows, violations = mi.check_sources(name, files)
+
+        if violations:
+            raise ValueError(report(violations))
+
+        maps[name] = mi.rows_by_date_game_id(rows).get(date, {})
+
+    return maps
+
+
+# =========================
+# REPLAY
+# =========================
+
+def replay_date(date: str, ctx: Replay) -> dict:
+    from nhl_schema import EDGES, EV_KELLY, JUICED, MERGED, MONEYLINE, PUCK_LINE, TOTAL, read_typed_csv
+
+    st = stages()
+    mi = st["merge_intake"]
+    bjf = st["build_juice_files"]
+    ce = st["compute_edges"]
+    ev = st["compute_ev_kelly"]
+    hsb = st["hockey_select_bets"]
+
+    result = dict.fromkeys(SUMMARY_COLUMNS, "")
+    result.update(game_date=date, status="ok")
+
+    _log(f"--- DATE: {date}")
+
+    try:
+        maps = load_sources(mi, date, ctx.cutoff)
+        games, sportsbook, predictions = maps["games"], maps["sportsbook"], maps["predictions"]
+
+        merged_rows = [
+            mi.merged_row(date, gid, game, sportsbook[gid], predictions[gid])
+            for gid, game in games.items()
+            if gid in sportsbook and gid in predictions
+        ]
+        result.update(games=len(games), merged=len(merged_rows))
+
+        if not merged_rows:
+            result.update(status="empty", note="no game with sportsbook and prediction rows")
+            return result
+
+        merged_path = ctx.out / "01_merge" / f"{date}_NHL_merged.csv"
+        write_rows_csv(merged_path, mi.MERGED_COLUMNS, merged_rows, extrasaction="ignore")
+        merged = read_typed_csv(merged_path, MERGED, usecols=True)
+
+        pre_juice = {"moneyline": MONEYLINE, "puck_line": PUCK_LINE, "total": TOTAL}
+        frames = {"moneyline": bjf.moneyline_frame, "puck_line": bjf.puck_line_frame, "total": bjf.total_frame}
+        edge_fns = {
+            "moneyline": ce.compute_moneyline_edges,
+            "puck_line": ce.compute_puck_line_edges,
+            "total": ce.compute_total_edges,
+        }
+        ev_fns = {"moneyline": ev.process_moneyline, "puck_line": ev.process_puck_line, "total": ev.process_total}
+
+        priced = {}
+
+        for market in MARKETS:
+            name = f"{date}_NHL_{market}.csv"
+
+            pre_path = ctx.out / "01_merge" / "01_merguiced" / name
+            write_csv(frames[market](merged), pre_path)
+
+            juice = st[f"apply_{market}_juice"]
+            df = read_typed_csv(pre_path, pre_juice[market], usecols=True)
+            juice.validate_columns(pre_path, df, juice.REQUIRED_INPUT_COLUMNS)
+            juiced, _, _, _ = juice.apply_juice(df, ctx.juice[market], name)
+            juiced_path = ctx.out / "02_juice" / name
+            write_csv(juiced, juiced_path)
+
+            edges, _ = edge_fns[market](read_typed_csv(juiced_path, JUICED[market]), juiced_path)
+            edges_path = ctx.out / "03_edges" / name
+            write_csv(edges, edges_path)
+
+            out, _ = ev_fns[market](read_typed_csv(edges_path, EDGES[market]), edges_path)
+            ev_path = ctx.out / "03_edges" / "ev_kelly" / name
+            write_csv(out, ev_path)
+
+            priced[market] = read_typed_csv(ev_path, EV_KELLY[market])
+            hsb.validate_market_columns(priced[market], market, ev_path)
+
+        picks = hsb.slate_picks(priced["moneyline"], priced["puck_line"], priced["total"], ctx.rules, date)
+        write_csv(picks, ctx.out / "04_select" / f"{date}_NHL.csv")
+
+        counts = picks["market_type"].value_counts().to_dict()
+        result.update({market: counts.get(market, 0) for market in MARKETS})
+        result["picks"] = len(picks)
+
+    except (Exception, SystemExit) as e:
+        _log(f"{date} FAILED: {e}\n{traceback.format_exc()}", "ERROR")
+        result.update(status="error", note=str(e))
+
+    return result
+
+
+# =========================
+# MAIN
+# =========================
+
+def check_out_root(out: Path) -> None:
+    out = out.resolve()
+
+    for folder in PRODUCTION_DIRS:
+        production = (BASE_DIR / folder).resolve()
+        if out == production or production in out.parents or out in production.parents:
+            raise SystemExit(f"--out {out} overlaps the production folder {production}")
+
+
+def replay_dates(start: str, end: str) -> list[str]:
+    dates = set()
+
+    for entry in dataset_files(PREDICTIONS_DIR, "hockey_*.csv"):
+        date = entry.name[len("hockey_"):-len(".csv")]
+        if start <= date <= end:
+            dates.add(date)
+
+    return sorted(dates)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Replay NHL pricing and selection over past dates.")
+    parser.add_argument("--start", required=True, help="first slate date, YYYY_MM_DD")
+    parser.add_argument("--end", required=True, help="last slate date, YYYY_MM_DD")
+    parser.add_argument("--cutoff", default=None, help="read intake files as committed by HH:MM ET on each date")
+    parser.add_argument("--juice-dir", type=Path, default=JUICE_DIR, help="folder with the nhl_*_juice.csv configs")
+    parser.add_argument("--markets", type=Path, default=MARKETS_PATH, help="selection rules (markets.yaml)")
+    parser.add_argument("--out", type=Path, default=DEFAULT_OUT, help="output root, mirrors docs/win/hockey/nhl")
+    add_workers_argument(parser)
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    check_out_root(args.out)
+
+    if args.cutoff:
+        datetime.strptime(args.cutoff, "%H:%M")
+
+    ERROR_DIR.mkdir(parents=True, exist_ok=True)
+    with open(LOG_FILE, "w", encoding="utf-8") as f:
+        f.write(f"=== nhl_replay RUN {_now()} ===\n")
+
+    st = stages()
+
+    from market_rules import load_rules
+
+    rules, _ = load_rules(args.markets, args.out / ".rules_cache")
+    juice = {}
+    for market in MARKETS:
+        module = st[f"apply_{market}_juice"]
+        juice[market] = module.load_config(args.juice_dir / module.JUICE_FILE.name)
+
+    ctx = Replay(out=args.out, cutoff=args.cutoff, juice=juice, rules=rules)
+
+    dates = replay_dates(args.start, args.end)
+    _log(f"DATES: {len(dates)} | {args.start}..{args.end} | cutoff={args.cutoff or 'current files'}")
+    _log(f"JUICE_DIR: {args.juice_dir} | MARKETS: {args.markets} | OUT: {args.out}")
+
+    results = map_slates(partial(replay_date, ctx=ctx), dates, args.workers, LOG_FILE)
+
+    summary_path = args.out / "replay_summary.csv"
+    write_rows_csv(summary_path, SUMMARY_COLUMNS, results)
+
+    failed = [r["game_date"] for r in results if r["status"] == "error"]
+    picks = sum(r["picks"] or 0 for r in results)
+
+    _log(f"SUMMARY: dates={len(results)} | picks={picks} | errors={len(failed)} | {summary_path}")
+    _log(f"STATUS: {'COMPLETED WITH ERRORS' if failed else 'SUCCESS'}")
+
+    print(f"nhl_replay: {len(results)} date(s), {picks} pick(s), {len(failed)} error(s) -> {summary_path}")
+
+    if failed:
+        print(f"nhl_replay: failed dates: {', '.join(failed)}", file=sys.stderr)
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    run_main(main, LOG_FILE)
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+# docs/win/hockey/nhl/scripts/tests/test_nhl_validate.py
+
+"""
+nhl_validate on the frames the stages build.
+
+    python -m pytest -q docs/win/hockey/nhl/scripts/tests
+
+pandas 3 reads text columns as the str dtype and hands out read-only arrays,
+which is what the stages see in CI; these read their frames with pd.read_csv so
+the same arrays reach validate(). validate_rows() must report exactly what
+validate() reports for the same rows.
+"""
+
+import csv
+import io
+import sys
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from nhl_validate import ODDS_DECIMAL, PROBABILITY, Rules, blank, report, validate, validate_rows
+
+
+RULES = Rules(
+    required=("game_date", "game_id", "home_prob"),
+    not_null=("game_id",),
+    unique=(("game_date", "game_id"),),
+    single_value=("game_date",),
+    ranges={"home_prob": PROBABILITY, "home_decimal": ODDS_DECIMAL},
+)
+
+GOOD = """game_date,game_id,home_prob,home_decimal
+2026_01_15,a,0.55,1.80
+2026_01_15,b,0.40,2.50
+"""
+
+BAD = """game_date,game_id,home_prob,home_decimal
+2026_01_15,a,0.55,1.80
+2026_01_15,a,1.20,x
+2026_01_16, ,0.40,0.90
+"""
+
+
+def frame(text: str) -> pd.DataFrame:
+    return pd.read_csv(io.StringIO(text), dtype=str, keep_default_na=False)
+
+
+def rows(text: str) -> list[dict]:
+    return list(csv.DictReader(io.StringIO(text)))
+
+
+def test_blank_on_read_only_str_column():
+    series = frame(BAD)["game_id"]
+
+    assert blank(series).tolist() == [False, False, True]
+    assert blank(pd.Series([1.0, None, 2.0])).tolist() == [False, True, False]
+
+
+def test_clean_frame_has_no_violations():
+    assert validate(frame(GOOD), RULES, "good.csv") == []
+
+
+def test_every_violation_is_reported():
+    found = {(v.rule, v.columns): v for v in validate(frame(BAD), RULES, "bad.csv")}
+
+    assert found[("not_null", ("game_id",))].rows == (4,)
+    assert found[("unique", ("game_date", "game_id"))].rows == (2, 3)
+    assert found[("single_value", ("game_date",))].values == ("2026_01_15", "2026_01_16")
+    assert found[("range", ("home_prob",))].rows == (3,)
+    assert found[("range", ("home_decimal",))].values == ("x", "0.90")
+
+
+def test_missing_required_column():
+    violations = validate(frame(GOOD).drop(columns="home_prob"), RULES, "good.csv")
+
+    assert [(v.rule, v.columns) for v in violations] == [("required", ("home_prob",))]
+
+
+def test_by_source_keeps_files_apart():
+    # The same key in two files is not a duplicate; each file reports its own rows.
+    tagged = pd.concat(
+        [
+            frame(text).assign(_source_file=name, _row=lambda df: df.index + 2)
+            for name, text in (("good.csv", GOOD), ("bad.csv", BAD))
+        ],
+        ignore_index=True,
+    )
+
+    violations = validate(tagged, RULES, "all", by="_source_file", row="_row")
+
+    assert {v.source for v in violations} == {"bad.csv"}
+    assert report(violations).startswith(f"{len(violations)} validation error(s) in 1 source(s):")
+
+
+@pytest.mark.parametrize("text", [GOOD, BAD])
+def test_validate_rows_matches_validate(text):
+    assert validate_rows(rows(text), RULES, "f.csv") == validate(frame(text), RULES, "f.csv")
@@ -0,0 +1,455 @@
+#!/usr/bin/env python3
+# docs/win/hockey/nhl/scripts/warehouse/nhl_warehouse.py
+
+"""
+Local SQLite warehouse over the NHL stage outputs.
+
+    python docs/win/hockey/nhl/scripts/warehouse/nhl_warehouse.py load
+    python docs/win/hockey/nhl/scripts/warehouse/nhl_warehouse.py query bets --market puck_line --side away --min-ev 0.03 --start 2026_03_01 --end 2026_03_31
+    python docs/win/hockey/nhl/scripts/warehouse/nhl_warehouse.py query tally --start 2026_03_01
+    python docs/win/hockey/nhl/scripts/warehouse/nhl_warehouse.py sql "SELECT COUNT(*) FROM edges"
+
+Tables:
+    edges         every priced side from 03_edges/ev_kelly, one row per bet side,
+                  with the 02_juice and 03_edges fields for that side
+    picks         04_select rows
+    graded        05_final_scores/graded rows
+    final_scores  05_final_scores/final_scores rows
+
+load is incremental: the _files table keeps the sha256 of every loaded CSV, and
+only new or changed files are re-read. Rows of a changed or deleted file are
+replaced or dropped by source_file. Files compacted into a monthly archive keep
+their original path as source_file, so compaction does not trigger a reload.
+The database file is local and not committed.
+"""
+
+import argparse
+import hashlib
+import sqlite3
+import sys
+import time
+import traceback
+from datetime import datetime, UTC
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from nhl_archive import DatasetFile, dataset_files
+from nhl_schema import (
+    EV_KELLY,
+    FINAL_SCORES,
+    FLOAT,
+    GAME_KEY,
+    GRADED,
+    MARKET_FIELDS,
+    MARKET_SIDES,
+    NUMBER,
+    SELECTED,
+    TEXT,
+    read_typed_csv,
+)
+
+
+BASE_DIR = Path("docs/win/hockey/nhl")
+
+EV_KELLY_DIR = BASE_DIR / "03_edges" / "ev_kelly"
+SELECT_DIR = BASE_DIR / "04_select"
+GRADED_DIR = BASE_DIR / "05_final_scores" / "graded"
+FINAL_SCORES_DIR = BASE_DIR / "05_final_scores" / "final_scores"
+
+DB_PATH = BASE_DIR / "warehouse" / "nhl_warehouse.sqlite"
+
+ERROR_DIR = BASE_DIR / "errors" / "warehouse"
+LOG_FILE = ERROR_DIR / "nhl_warehouse.txt"
+
+# Bump when a table layout changes; a mismatch drops and reloads everything.
+WAREHOUSE_VERSION = 1
+
+# Per-side fields pulled from 02_juice / 03_edges in addition to MARKET_FIELDS.
+EXTRA_SIDE_FIELDS = {
+    "raw_prob": "{side}_prob_{market}",
+    "fair_decimal": "{side}_fair_decimal_{market}",
+    "juiced_prob": "{side}_juiced_prob_{market}",
+}
+
+EDGE_FIELD_NAMES = {
+    "odds": "dk_odds_american",
+    "dec": "dk_odds_decimal",
+    "line": "line",
+    "prob": "model_prob",
+    "edge": "edge",
+    "ev": "ev",
+    "kelly": "kelly",
+}
+
+EDGES = GAME_KEY | {
+    "market_type": TEXT,
+    "bet_side": TEXT,
+    "line": NUMBER,
+    "dk_odds_american": NUMBER,
+    "dk_odds_decimal": FLOAT,
+    "raw_prob": FLOAT,
+    "fair_decimal": FLOAT,
+    "juiced_prob": FLOAT,
+    "model_prob": FLOAT,
+    "edge": FLOAT,
+    "ev": FLOAT,
+    "kelly": FLOAT,
+}
+
+SQL_TYPES = {TEXT: "TEXT", FLOAT: "REAL", NUMBER: "REAL"}
+
+INDEXED_COLUMNS = ["game_date", "game_id", "market_type"]
+
+
+# =========================
+# LOGGING
+# =========================
+
+def _now():
+    return datetime.now(UTC).isoformat()
+
+
+def _log(msg: str, level: str = "INFO"):
+    with open(LOG_FILE, "a", encoding="utf-8") as f:
+        f.write(f"{_now()} | {level:<5} | {msg.rstrip()}\n")
+
+
+# =========================
+# SOURCES
+# =========================
+
+def market_from_path(path: Path) -> str:
+    for market_type in MARKET_FIELDS:
+        if path.stem.endswith(f"_NHL_{market_type}"):
+            return market_type
+    raise ValueError(f"Cannot tell market from file name: {path.name}")
+
+
+def edge_rows(entry: DatasetFile) -> pd.DataFrame:
+    market_type = market_from_path(entry.path)
+    df = read_typed_csv(entry.source(), EV_KELLY[market_type], usecols=True)
+
+    parts = []
+
+    for side in MARKET_SIDES[market_type]:
+        part = {col: df[col] for col in GAME_KEY if col in df.columns}
+        part["market_type"] = market_type
+        part["bet_side"] = side
+
+        for field, template in MARKET_FIELDS[market_type].items():
+            if template:
+                part[EDGE_FIELD_NAMES[field]] = df[template.format(side=side)]
+
+        for name, template in EXTRA_SIDE_FIELDS.items():
+            col = template.format(side=side, market=market_type)
+            if col in df.columns:
+                part[name] = df[col]
+
+        parts.append(pd.DataFrame(part, index=df.index))
+
+    return pd.concat(parts, ignore_index=True)
+
+
+def plain_rows(schema: dict):
+    def read(entry: DatasetFile) -> pd.DataFrame:
+        return read_typed_csv(entry.source(), schema, usecols=True)
+    return read
+
+
+# table -> (source dir, glob, reader, column kinds)
+SOURCES = {
+    "edges": (EV_KELLY_DIR, "*_NHL_*.csv", edge_rows, EDGES),
+    "picks": (SELECT_DIR, "*_NHL.csv", plain_rows(SELECTED), SELECTED),
+    "graded": (GRADED_DIR, "*_results_NHL.csv", plain_rows(GRADED), GRADED),
+    "final_scores": (FINAL_SCORES_DIR, "*_NHL_final_scores.csv", plain_rows(FINAL_SCORES), FINAL_SCORES),
+}
+
+
+# =========================
+# DATABASE
+# =========================
+
+def connect() -> sqlite3.Connection:
+    DB_PATH.parent.mkdir(parents=True, exist_ok=True)
+    con = sqlite3.connect(DB_PATH)
+    con.execute("PRAGMA journal_mode=WAL")
+    con.execute("PRAGMA synchronous=NORMAL")
+    return con
+
+
+def create_schema(con: sqlite3.Connection, rebuild: bool) -> None:
+    version = con.execute("PRAGMA user_version").fetchone()[0]
+
+    if rebuild or version != WAREHOUSE_VERSION:
+        _log(f"Rebuilding warehouse (version {version} -> {WAREHOUSE_VERSION}, rebuild={rebuild})")
+        for table in list(SOURCES) + ["_files"]:
+            con.execute(f"DROP TABLE IF EXISTS {table}")
+
+    con.execute(
+        "CREATE TABLE IF NOT EXISTS _files ("
+        "source_file TEXT PRIMARY KEY, tbl TEXT NOT NULL, sha256 TEXT NOT NULL, "
+        "rows INTEGER NOT NULL, loaded_at TEXT NOT NULL)"
+    )
+
+    for table, (_, _, _, schema) in SOURCES.items():
+        cols = ", ".join(f"{col} {SQL_TYPES[kind]}" for col, kind in schema.items())
+        con.execute(f"CREATE TABLE IF NOT EXISTS {table} ({cols}, source_file TEXT NOT NULL)")
+        con.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_source_file ON {table}(source_file)")
+
+        for col in INDEXED_COLUMNS:
+            if col in schema:
+                con.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_{col} ON {table}({col})")
+
+    con.execute(f"PRAGMA user_version = {WAREHOUSE_VERSION}")
+
+
+def file_sha256(entry: DatasetFile) -> str:
+    return hashlib.sha256(entry.read_bytes()).hexdigest()
+
+
+def insert_rows(con: sqlite3.Connection, table: str, schema: dict, frames: list[pd.DataFrame]) -> None:
+    cols = list(schema) + ["source_file"]
+    values = pd.concat(frames, ignore_index=True).reindex(columns=cols).to_numpy(dtype=object)
+    values[pd.isna(values)] = None
+
+    placeholders = ", ".join("?" for _ in cols)
+    con.executemany(f"INSERT INTO {table} ({', '.join(cols)}) VALUES ({placeholders})", values.tolist())
+
+
+def load(con: sqlite3.Connection) -> dict:
+    stats = {"files_seen": 0, "files_loaded": 0, "files_removed": 0, "rows_loaded": 0}
+
+    known = {
+        source_file: (table, sha)
+        for source_file, table, sha in con.execute("SELECT source_file, tbl, sha256 FROM _files")
+    }
+
+    for table, (source_dir, pattern, reader, schema) in SOURCES.items():
+        seen = set()
+        stale = []
+        frames = []
+        manifest = []
+
+        for entry in dataset_files(source_dir, pattern):
+            source_file = entry.path.as_posix()
+            seen.add(source_file)
+            stats["files_seen"] += 1
+
+            sha = file_sha256(entry)
+            if known.get(source_file) == (table, sha):
+                continue
+
+            df = reader(entry)
+            frames.append(df.assign(source_file=source_file))
+            stale.append((source_file,))
+            manifest.append((source_file, table, sha, len(df), _now()))
+
+            stats["files_loaded"] += 1
+            stats["rows_loaded"] += len(df)
+            _log(f"LOADED {table} <- {source_file} ({len(df)} rows)")
+
+        removed = [
+            (source_file,)
+            for source_file, (known_table, _) in known.items()
+            if known_table == table and source_file not in seen
+        ]
+        for (source_file,) in removed:
+            _log(f"REMOVED {table} <- {source_file}")
+
+        con.executemany(f"DELETE FROM {table} WHERE source_file = ?", stale + removed)
+        con.executemany("DELETE FROM _files WHERE source_file = ?", removed)
+
+        if frames:
+            insert_rows(con, table, schema, frames)
+
+        con.executemany(
+            "INSERT OR REPLACE INTO _files (source_file, tbl, sha256, rows, loaded_at) VALUES (?, ?, ?, ?, ?)",
+            manifest,
+        )
+        stats["files_removed"] += len(removed)
+
+    return stats
+
+
+# =========================
+# QUERIES
+# =========================
+
+UNITS_SQL = (
+    "CASE bet_result "
+    "WHEN 'Win' THEN CASE WHEN dk_odds_american > 0 THEN dk_odds_american / 100.0 "
+    "WHEN dk_odds_american < 0 THEN 100.0 / -dk_odds_american END "
+    "WHEN 'Loss' THEN -1.0 WHEN 'Push' THEN 0.0 END"
+)
+
+# name -> (description, SQL with a {where} placeholder)
+QUERIES = {
+    "bets": (
+        "Graded bets with scores and results.",
+        "SELECT game_date, game_id, away_team, home_team, market_type, bet_side, line, "
+        "dk_odds_american, model_prob, edge, ev, kelly, away_score, home_score, bet_result, "
+        f"{UNITS_SQL} AS units "
+        "FROM graded {where} ORDER BY game_date, game_id, market_type, bet_side",
+    ),
+    "tally": (
+        "Record, units and ROI per market side over graded bets.",
+        "SELECT market_type, bet_side, COUNT(*) AS bets, "
+        "SUM(bet_result = 'Win') AS wins, SUM(bet_result = 'Loss') AS losses, "
+        "SUM(bet_result = 'Push') AS pushes, ROUND(SUM(units), 4) AS units, "
+        "ROUND(SUM(units) / COUNT(*), 4) AS roi "
+        f"FROM (SELECT *, {UNITS_SQL} AS units FROM graded {{where}}) "
+        "GROUP BY market_type, bet_side ORDER BY market_type, bet_side",
+    ),
+    "daily": (
+        "Bets, record and units per game_date over graded bets.",
+        "SELECT game_date, COUNT(*) AS bets, SUM(bet_result = 'Win') AS wins, "
+        "SUM(bet_result = 'Loss') AS losses, ROUND(SUM(units), 4) AS units "
+        f"FROM (SELECT *, {UNITS_SQL} AS units FROM graded {{where}}) "
+        "GROUP BY game_date ORDER BY game_date",
+    ),
+    "edges": (
+        "Every priced side with model probability, edge, EV and Kelly.",
+        "SELECT game_date, game_id, away_team, home_team, market_type, bet_side, line, "
+        "dk_odds_american, raw_prob, juiced_prob, model_prob, edge, ev, kelly "
+        "FROM edges {where} ORDER BY game_date, game_id, market_type, bet_side",
+    ),
+    "unpicked": (
+        "Priced sides that were not selected, with the final score when known.",
+        "SELECT e.game_date, e.game_id, e.away_team, e.home_team, e.market_type, e.bet_side, "
+        "e.line, e.dk_odds_american, e.model_prob, e.ev, s.away_score, s.home_score "
+        "FROM edges e "
+        "LEFT JOIN picks p ON p.game_id = e.game_id AND p.market_type = e.market_type AND p.bet_side = e.bet_side "
+        "LEFT JOIN final_scores s ON s.game_id = e.game_id "
+        "{where} AND p.game_id IS NULL "
+        "ORDER BY e.game_date, e.game_id, e.market_type, e.bet_side",
+    ),
+}
+
+
+def build_where(args: argparse.Namespace, prefix: str = "") -> tuple[str, list]:
+    filters = [
+        (args.start, f"{prefix}game_date >= ?"),
+        (args.end, f"{prefix}game_date <= ?"),
+        (args.market, f"{prefix}market_type = ?"),
+        (args.side, f"{prefix}bet_side = ?"),
+        (args.game_id, f"{prefix}game_id = ?"),
+        (args.min_ev, f"{prefix}ev >= ?"),
+    ]
+
+    clauses = [clause for value, clause in filters if value is not None]
+    params = [value for value, _ in filters if value is not None]
+
+    return "WHERE " + (" AND ".join(clauses) if clauses else "1 = 1"), params
+
+
+def run_sql(con: sqlite3.Connection, sql: str, params: list, args: argparse.Namespace) -> None:
+    start = time.perf_counter()
+    df = pd.read_sql_query(sql, con, params=params)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+
+    if args.limit is not None:
+        df = df.head(args.limit)
+
+    if args.csv:
+        df.to_csv(sys.stdout, index=False)
+    else:
+        print(df.to_string(index=False) if not df.empty else "(no rows)")
+
+    print(f"{len(df)} rows in {elapsed_ms:.1f} ms", file=sys.stderr)
+
+
+# =========================
+# MAIN
+# =========================
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Local SQLite warehouse over NHL stage outputs.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_load = sub.add_parser("load", help="Load new or changed stage outputs.")
+    p_load.add_argument("--rebuild", action="store_true", help="Drop all tables and reload every file.")
+
+    p_query = sub.add_parser("query", help="Run a canned query.")
+    p_query.add_argument("name", choices=sorted(QUERIES), help="Canned query name.")
+    p_query.add_argument("--start", help="First game_date, YYYY_MM_DD.")
+    p_query.add_argument("--end", help="Last game_date, YYYY_MM_DD.")
+    p_query.add_argument("--market", choices=sorted(MARKET_FIELDS), help="market_type.")
+    p_query.add_argument("--side", help="bet_side, e.g. away, home, over, under.")
+    p_query.add_argument("--game-id", help="Single game_id.")
+    p_query.add_argument("--min-ev", type=float, help="Minimum EV, e.g. 0.03.")
+
+    p_sql = sub.add_parser("sql", help="Run raw SQL.")
+    p_sql.add_argument("statement", help="SQL statement.")
+
+    sub.add_parser("list", help="List canned queries and table row counts.")
+
+    for p in (p_query, p_sql):
+        p.add_argument("--limit", type=int, help="Print at most this many rows.")
+        p.add_argument("--csv", action="store_true", help="Write CSV to stdout.")
+
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+    ERROR_DIR.mkdir(parents=True, exist_ok=True)
+
+    con = connect()
+
+    try:
+        if args.command == "load":
+            with open(LOG_FILE, "w", encoding="utf-8") as f:
+                f.write(f"=== nhl_warehouse load RUN {_now()} ===\n")
+
+            start = time.perf_counter()
+            with con:
+                create_schema(con, args.rebuild)
+                stats = load(con)
+
+            elapsed = time.perf_counter() - start
+            _log(
+                f"files_seen={stats['files_seen']} files_loaded={stats['files_loaded']} "
+                f"files_removed={stats['files_removed']} rows_loaded={stats['rows_loaded']} "
+                f"elapsed_sec={elapsed:.2f}"
+            )
+            print(
+                f"{DB_PATH}: loaded {stats['files_loaded']} of {stats['files_seen']} files "
+                f"({stats['rows_loaded']} rows), removed {stats['files_removed']} in {elapsed:.2f}s"
+            )
+            return 0
+
+        if con.execute("PRAGMA user_version").fetchone()[0] != WAREHOUSE_VERSION:
+            print(f"{DB_PATH} is missing or out of date; run the load command first.", file=sys.stderr)
+            return 1
+
+        if args.command == "list":
+            for name, (description, _) in QUERIES.items():
+                print(f"{name:<10} {description}")
+            print()
+            for table in SOURCES:
+                n = con.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+                print(f"{table:<14} {n:>8} rows")
+            return 0
+
+        if args.command == "query":
+            _, sql = QUERIES[args.name]
+            where, params = build_where(args, prefix="e." if args.name == "unpicked" else "")
+            run_sql(con, sql.format(where=where), params, args)
+            return 0
+
+        run_sql(con, args.statement, [], args)
+        return 0
+
+    except Exception as e:
+        _log(f"FATAL: {e}\n{traceback.format_exc()}", "ERROR")
+        raise
+
+    finally:
+        con.close()
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())